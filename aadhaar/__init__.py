@@ -0,0 +1,96 @@
+"""
+Aadhaar Analytics Core Library
+==============================
+Importable building blocks of the analytical engine. Importing this package
+has NO side effects: no data is loaded, no plots are drawn and no heavy ML
+libraries are imported until a model function is actually called.
+
+MODULES:
+- ingestion: Locate and load the raw API CSV shards
+- dedup:     Hash-based duplicate-row removal across overlapping shards
+- cache:     Parquet cache of the parsed shards, keyed by path/size/mtime
+- schema:    Declared compact dtypes (categorical names, int32 pincode, uint counts)
+- parallel:  Bounded, order-preserving process pool for per-shard work
+- sketch:    Mergeable KMV distinct-count sketch for chunked/sharded statistics
+- mappings:  Raw -> canonical state/district spelling tables
+- normalize: Canonical name engine with a persisted, versioned lookup table
+- cleaning:  Date/name/pincode normalization for merging
+- geography: Integer state_id/district_id dimension (append-only, persisted)
+- cube:      Master cube (enrolment + demographic + biometric) and custom formulas
+- artifacts: Persisted, versioned master cube (month-partitioned Parquet + manifest)
+- rollups:   Pre-aggregated district x day/week, state x month, national x day lattice
+- outofcore: Month-by-month master cube build and partition-wise aggregations (bounded memory)
+- columnar:  Memory-mapped Arrow IPC copies of the cleaned CSVs (zero-copy, shared)
+- incremental: Fold newly arrived shards into the persisted cube + rollups
+- memo:      On-disk memo of analysis phase results, keyed by input hash
+- profiling: Per-phase/step wall, CPU, RSS and row-count profile written per run
+- synthetic: Aadhaar-shaped synthetic shard generator at any scale (benchmark.py)
+- sql:       Embedded DuckDB views over the cleaned data, cube and rollups (optional duckdb)
+- metrics:   Context proxies, AAC, correlation significance, velocity, health score
+- quality:   Per-district/pincode data-quality scan (round numbers, CV, Benford, runs, zero streaks)
+- models:    Holt-Winters, Isolation Forest, DBSCAN, Random Forest, K-Means
+- forecast:  Per-district/state Holt-Winters fleet (process pool, cached + warm-started fits)
+- anomaly:   Streaming per-weekday robust EWMA anomaly scoring (persisted state, new days only)
+
+The phase-by-phase CLI lives in `analysis.py`.
+"""
+
+from aadhaar.ingestion import (
+    BIOMETRIC_PATTERN,
+    DEMOGRAPHIC_PATTERN,
+    ENROLMENT_PATTERN,
+    load_and_combine,
+)
+from aadhaar.cache import read_shard
+from aadhaar.dedup import DuplicateFilter, drop_duplicate_rows
+from aadhaar.cleaning import clean_data
+from aadhaar.normalize import normalize_names
+from aadhaar.schema import DATE_FORMAT, apply_schema, read_csv_typed
+from aadhaar.geography import decode_geography, encode_geography, update_geography
+from aadhaar.cube import add_custom_formulas, build_master_cube
+from aadhaar.artifacts import cube_fingerprint, load_master_cube, save_master_cube
+from aadhaar.columnar import read_cleaned
+from aadhaar.rollups import build_rollups, domain_totals, load_rollups, query_rollup, save_rollups
+from aadhaar.metrics import (
+    calculate_accessibility_adjusted_compliance,
+    calculate_health_score,
+    classify_opportunity_neglect,
+    corr_with_pvalue,
+    enrollment_velocity,
+    load_context_proxies,
+)
+
+__all__ = [
+    'ENROLMENT_PATTERN',
+    'DEMOGRAPHIC_PATTERN',
+    'BIOMETRIC_PATTERN',
+    'load_and_combine',
+    'read_shard',
+    'DuplicateFilter',
+    'drop_duplicate_rows',
+    'DATE_FORMAT',
+    'apply_schema',
+    'read_csv_typed',
+    'clean_data',
+    'normalize_names',
+    'update_geography',
+    'encode_geography',
+    'decode_geography',
+    'build_master_cube',
+    'add_custom_formulas',
+    'cube_fingerprint',
+    'save_master_cube',
+    'load_master_cube',
+    'read_cleaned',
+    'build_rollups',
+    'query_rollup',
+    'domain_totals',
+    'save_rollups',
+    'load_rollups',
+    'load_context_proxies',
+    'calculate_accessibility_adjusted_compliance',
+    'classify_opportunity_neglect',
+    'corr_with_pvalue',
+    'calculate_health_score',
+    'enrollment_velocity',
+]
@@ -0,0 +1,230 @@
+"""
+Streaming Anomaly Scoring for Daily Volumes
+===========================================
+Scores each NEW day of every national, state and district daily series
+against a running baseline, instead of refitting a model on all of history.
+
+BASELINE (per series and weekday - Sunday volume is judged against Sundays):
+    expected = EWMA mean,  spread = sqrt(max(EW variance, |mean|, 1))
+    z = (x - expected) / spread            flagged when |z| >= Z_THRESHOLD
+then the day is folded in, robustly (Huber): past warm-up the residual is
+clipped to +/- HUBER_K x spread first, so one spike cannot drag the
+baseline along.
+    alpha = max(ALPHA, 1 / (n + 1))       (running average while warming up)
+    mean += alpha x r,  var = (1 - alpha) x (var + alpha x r^2)
+A weekday is only scored after WARMUP observations of it; a series is WARM
+once every weekday it reports on is scored (is_warm). Until the national
+series is warm, analysis.py reports "insufficient history" and falls back
+to the batch Isolation Forest (aadhaar.models.detect_anomalies).
+
+COST: O(1) per series per new day; one vectorized update per day across all
+series. The state (.cache/anomaly/) is a few numbers per series, plus the log
+of flagged days. A series whose already-scored history changed (e.g. a
+corrected shard) is replayed from its first day - detected by hashing that
+history.
+
+DAYS: only REPORTING days (dates present anywhere in the data) are scored; a
+date missing from the whole extract is not a zero-volume day. On a reporting
+day an entity without activity scores 0.
+
+DISTRICTS are keyed "District, State" (aadhaar.geography.label_districts), so
+same-named districts in different states keep separate baselines.
+
+Set AADHAAR_NO_CACHE=1 to replay everything without touching the state.
+"""
+
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.cache import CACHE_DIR
+from aadhaar.geography import label_districts
+from aadhaar.profiling import profiled
+from aadhaar.rollups import query_rollup
+
+ANOMALY_DIR = os.path.join(CACHE_DIR, 'anomaly')
+STATE_NAME = 'state.pkl'
+STATE_VERSION = 2  # 2: districts keyed "District, State"
+
+ALPHA = 0.1
+HUBER_K = 3.0
+Z_THRESHOLD = 4.0
+WARMUP = 4
+LEVELS = {'national': None, 'state': 'state', 'district': 'district'}
+COLUMNS = ('total_activity', 'total_demo')
+FLAG_COLUMNS = ['level', 'entity', 'column', 'date', 'value', 'expected', 'z', 'direction']
+
+
+# ============================================================================
+# SERIES
+# ============================================================================
+def daily_panel(rollups, by, column):
+    """
+    Entities x reporting days matrix of `column` (a single 'national' row
+    when `by` is None): 0 on days without activity, NaN before the entity's
+    first active day.
+    """
+    if by is None:
+        wide = query_rollup(rollups, (), 'D', columns=[column])[column].rename('national').to_frame().T
+    elif by == 'district':
+        daily = label_districts(query_rollup(rollups, ('state', 'district'), 'D', columns=[column])[column])
+        wide = daily.unstack('date')
+    else:
+        wide = query_rollup(rollups, (by,), 'D', columns=[column])[column].unstack('date')
+        wide.index = wide.index.astype(str)
+    started = wide.notna().cummax(axis=1)
+    return wide.fillna(0).where(started).sort_index(axis=1)
+
+
+def is_warm(seen):
+    """True once every weekday a series reports on has WARMUP observations (all its days are scored)."""
+    seen = np.asarray(seen)
+    return bool((seen > 0).any() and seen[seen > 0].min() >= WARMUP)
+
+
+def _history_hash(dates, values):
+    sha = hashlib.sha1(np.ascontiguousarray(dates.astype('datetime64[ns]')).tobytes())
+    sha.update(np.ascontiguousarray(values, dtype='float64').tobytes())
+    return sha.hexdigest()[:16]
+
+
+# ============================================================================
+# STATE
+# ============================================================================
+def _empty_state():
+    return {'version': STATE_VERSION, 'series': {}, 'flags': pd.DataFrame(columns=FLAG_COLUMNS)}
+
+
+def load_state(state_dir=ANOMALY_DIR):
+    """The detector state of the last run (empty if none / AADHAAR_NO_CACHE=1)."""
+    if os.environ.get('AADHAAR_NO_CACHE') == '1':
+        return _empty_state()
+    try:
+        with open(os.path.join(state_dir, STATE_NAME), 'rb') as f:
+            state = pickle.load(f)
+    except Exception:
+        return _empty_state()
+    return state if state.get('version') == STATE_VERSION else _empty_state()
+
+
+def save_state(state, state_dir=ANOMALY_DIR):
+    """Persist the detector state (temp file + rename)."""
+    if os.environ.get('AADHAAR_NO_CACHE') == '1':
+        return False
+    os.makedirs(state_dir, exist_ok=True)
+    path = os.path.join(state_dir, STATE_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[WARNING] Could not save anomaly detector state: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    return True
+
+
+# ============================================================================
+# SCORING
+# ============================================================================
+def _score_panel(wide, series_state):
+    """
+    Advance the baselines of the rows of `wide` over their unscored days.
+    `series_state` (entity -> dict) is updated in place. Returns
+    (scores frame, entities whose history changed and were replayed,
+    series-days folded in).
+    """
+    dates = wide.columns.to_numpy(dtype='datetime64[ns]')
+    values = wide.to_numpy(dtype='float64')
+    n_series = len(wide)
+    mean, var, seen = np.zeros((n_series, 7)), np.zeros((n_series, 7)), np.zeros((n_series, 7))
+    last = np.full(n_series, np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    replayed = []
+    for i, entity in enumerate(wide.index):
+        previous = series_state.get(entity)
+        if previous is None:
+            continue
+        done = dates <= previous['last_date']
+        if _history_hash(dates[done], np.nan_to_num(values[i, done], nan=-1)) == previous['hash']:
+            mean[i], var[i], seen[i] = previous['mean'], previous['var'], previous['n']
+            last[i] = previous['last_date']
+        else:
+            replayed.append(entity)  # scored history changed: start this series over
+
+    weekdays = pd.DatetimeIndex(dates).dayofweek.to_numpy()
+    rows, processed = [], 0
+    for j, (date, w) in enumerate(zip(dates, weekdays)):
+        x = values[:, j]
+        todo = ~np.isnan(x) & ~(date <= last)  # NaT compares False: new series
+        if not todo.any():
+            continue
+        idx = np.flatnonzero(todo)
+        processed += len(idx)
+        m, v, n, xi = mean[idx, w], var[idx, w], seen[idx, w], x[idx]
+        spread = np.sqrt(np.maximum.reduce([v, np.abs(m), np.ones_like(m)]))
+        z = (xi - m) / spread
+        scored = n >= WARMUP
+        rows.append(pd.DataFrame({'entity': wide.index[idx[scored]], 'date': date, 'value': xi[scored],
+                                  'expected': m[scored], 'z': z[scored]}))
+
+        # no clipping while warming up: the spread is not known yet
+        residual = np.where(scored, np.clip(xi - m, -HUBER_K * spread, HUBER_K * spread), xi - m)
+        alpha = np.maximum(ALPHA, 1 / (n + 1))
+        mean[idx, w] = m + alpha * residual
+        var[idx, w] = (1 - alpha) * (v + alpha * residual ** 2)
+        seen[idx, w] = n + 1
+
+    for i, entity in enumerate(wide.index):
+        observed = ~np.isnan(values[i])
+        if observed.any():
+            series_state[entity] = {'mean': mean[i].copy(), 'var': var[i].copy(), 'n': seen[i].copy(),
+                                    'last_date': dates[-1],
+                                    'hash': _history_hash(dates, np.nan_to_num(values[i], nan=-1))}
+    scores = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=['entity', 'date', 'value', 'expected', 'z'])
+    return scores, replayed, processed
+
+
+@profiled('fit')
+def score_new_days(panels, state_dir=ANOMALY_DIR):
+    """
+    Score the days not seen by the previous run for every panel of
+    {(level, column): daily_panel(...)} and persist the updated state.
+
+    Returns (scores of the new days, all flagged days so far, stats: series,
+    new_days folded in, scored (past warm-up), replayed, warm - {(level,
+    column): number of warm series}).
+    """
+    state = load_state(state_dir)
+    flags = state['flags']
+    all_scores, replayed, processed, warm = [], 0, 0, {}
+    for (level, column), wide in panels.items():
+        series_state = state['series'].setdefault(f"{level}:{column}", {})
+        scores, replayed_entities, n_processed = _score_panel(wide, series_state)
+        processed += n_processed
+        warm[(level, column)] = sum(is_warm(series_state[e]['n']) for e in wide.index if e in series_state)
+        if replayed_entities:
+            # replayed series are re-flagged from scratch
+            replayed += len(replayed_entities)
+            stale = (flags['level'] == level) & (flags['column'] == column) & flags['entity'].isin(replayed_entities)
+            flags = flags[~stale]
+        scores.insert(0, 'level', level)
+        scores.insert(2, 'column', column)
+        all_scores.append(scores)
+
+    scores = pd.concat(all_scores, ignore_index=True)
+    scores['z'] = scores['z'].astype('float64')
+    scores['direction'] = np.where(scores['z'] > 0, 'spike', 'drop')
+    new_flags = scores[scores['z'].abs() >= Z_THRESHOLD]
+    flags = pd.concat([flags, new_flags[FLAG_COLUMNS]], ignore_index=True) if len(new_flags) else flags
+    state['flags'] = flags.sort_values(['level', 'column', 'entity', 'date'], kind='stable').reset_index(drop=True)
+    save_state(state, state_dir)
+
+    stats = {'series': sum(len(wide) for wide in panels.values()), 'new_days': processed,
+             'scored': len(scores), 'replayed': replayed, 'warm': warm}
+    return scores, state['flags'], stats
@@ -0,0 +1,191 @@
+"""
+Persisted Master Cube Artifact
+==============================
+The master cube (with its derived columns: totals, Saturation_Index,
+efficiency_score, fraud_index) is written once to `.cache/master_cube/` and
+reloaded by analysis.py, extract_insights.py and app.py while its inputs are
+unchanged.
+
+LAYOUT:
+    .cache/master_cube/
+        manifest.json              version, input hash, rows, dtypes, partitions, shards
+        month=2025-03/part.parquet one Parquet file per calendar month
+        month=unknown/part.parquet rows without a valid date (if any)
+
+INPUT HASH: sha1 over
+- CUBE_VERSION (bump when build_master_cube/add_custom_formulas change)
+- SCHEMA_VERSION and the name-normalization rules fingerprint
+- the cache key (path, size, mtime) of every raw shard
+- the geography rows the cube's district_ids refer to
+
+Any change -> `load_master_cube` returns None and the caller rebuilds.
+
+WHY: The merge of ~5M fact rows is rebuilt on every run and thrown away;
+the dashboard and report steps only need the finished cube.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from aadhaar.cache import CACHE_DIR, _parquet_available, shard_cache_key
+from aadhaar.geography import load_geography
+from aadhaar.ingestion import BIOMETRIC_PATTERN, DEMOGRAPHIC_PATTERN, ENROLMENT_PATTERN
+from aadhaar.normalize import rules_fingerprint
+from aadhaar.profiling import profiled
+from aadhaar.schema import SCHEMA_VERSION
+
+# Bump when the cube build or the custom formulas change
+CUBE_VERSION = 1
+
+CUBE_DIR = os.path.join(CACHE_DIR, 'master_cube')
+MANIFEST_NAME = 'manifest.json'
+UNKNOWN_MONTH = 'unknown'
+
+INPUT_PATTERNS = (ENROLMENT_PATTERN, DEMOGRAPHIC_PATTERN, BIOMETRIC_PATTERN)
+
+
+# ============================================================================
+# INPUT HASH
+# ============================================================================
+def geography_hash(geo):
+    """Hash of the (district_id, state_id, state, district) rows of the dimension."""
+    rows = geo.sort_values('district_id')[['district_id', 'state_id', 'state', 'district']]
+    payload = json.dumps(rows.astype(str).values.tolist())
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def current_shards(patterns=INPUT_PATTERNS):
+    """{shard file name: cache key} for every raw shard on disk."""
+    return {os.path.basename(path): shard_cache_key(path)
+            for pattern in patterns for path in sorted(glob.glob(pattern))}
+
+
+def cube_fingerprint(geo=None, patterns=INPUT_PATTERNS):
+    """
+    Hash of everything the master cube is derived from (see module docstring).
+
+    `geo` defaults to the persisted geography dimension.
+    """
+    if geo is None:
+        geo = load_geography()
+    parts = [f"cube-v{CUBE_VERSION}", f"schema-v{SCHEMA_VERSION}", rules_fingerprint()]
+    parts.extend(f"{name}:{key}" for name, key in current_shards(patterns).items())
+    parts.append(geography_hash(geo))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+# ============================================================================
+# WRITE / READ
+# ============================================================================
+def _month_labels(dates):
+    labels = dates.dt.strftime('%Y-%m')
+    return labels.fillna(UNKNOWN_MONTH)
+
+
+@profiled('io')
+def save_master_cube(master_df, fingerprint, cube_dir=CUBE_DIR, shards=None, geo=None):
+    """
+    Write `master_df` as month-partitioned Parquet plus a manifest.
+
+    For aadhaar.incremental the manifest also records which shards (name ->
+    cache key; default: all shards on disk) went into the cube, the rules
+    fingerprint and - with `geo` - the geography rows its ids refer to.
+
+    The artifact is assembled in a temp directory and swapped in with a
+    rename, so readers never see a half-written cube. Returns False (and
+    writes nothing) without pyarrow.
+    """
+    months = _month_labels(master_df['date'])
+    # Partitions in first-appearance order, so loading restores row order
+    parts = ((month, master_df[(months == month).to_numpy()]) for month in months.unique())
+    return save_cube_partitions(parts, fingerprint, cube_dir, shards=shards, geo=geo)
+
+
+def save_cube_partitions(parts, fingerprint, cube_dir=CUBE_DIR, shards=None, geo=None):
+    """
+    save_master_cube for a cube that arrives as (month label, frame) pairs
+    in row order - e.g. from a generator, so only one partition is in memory
+    at a time (aadhaar.outofcore).
+    """
+    if not _parquet_available():
+        return False
+
+    tmp_dir = f"{cube_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    partitions, columns = [], None
+    try:
+        for month, part in parts:
+            rel = os.path.join(f"month={month}", 'part.parquet')
+            os.makedirs(os.path.join(tmp_dir, f"month={month}"))
+            part.to_parquet(os.path.join(tmp_dir, rel), index=False)
+            partitions.append({'month': month, 'path': rel, 'rows': len(part)})
+            if columns is None:
+                columns = {col: str(dtype) for col, dtype in part.dtypes.items()}
+
+        manifest = {
+            'cube_version': CUBE_VERSION,
+            'schema_version': SCHEMA_VERSION,
+            'input_hash': fingerprint,
+            'rows': sum(p['rows'] for p in partitions),
+            'shards': current_shards() if shards is None else shards,
+            'rules': rules_fingerprint(),
+            'geography': None if geo is None else {'rows': len(geo), 'hash': geography_hash(geo)},
+            'columns': columns or {},
+            'partitions': partitions,
+            'created': datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(cube_dir, ignore_errors=True)
+        os.replace(tmp_dir, cube_dir)
+    except Exception as e:
+        print(f"[WARNING] Could not write master cube artifact {cube_dir}: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+    return True
+
+
+def read_manifest(cube_dir=CUBE_DIR):
+    """The artifact's manifest dict, or None if there is no (readable) artifact."""
+    try:
+        with open(os.path.join(cube_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@profiled('io')
+def load_master_cube(fingerprint, cube_dir=CUBE_DIR, columns=None):
+    """
+    The persisted master cube if it was built from the same inputs, else None.
+
+    `columns` reads only a subset of the columns (Parquet is columnar).
+    """
+    if os.environ.get('AADHAAR_NO_CACHE') == '1' or not _parquet_available():
+        return None
+    manifest = read_manifest(cube_dir)
+    if (manifest is None or manifest.get('cube_version') != CUBE_VERSION
+            or manifest.get('input_hash') != fingerprint):
+        return None
+
+    try:
+        parts = [pd.read_parquet(os.path.join(cube_dir, p['path']), columns=columns)
+                 for p in manifest['partitions']]
+    except Exception:
+        # Missing/corrupt partition -> treat as stale
+        return None
+    if not parts:
+        return None
+    master_df = pd.concat(parts, ignore_index=True)
+    if len(master_df) != manifest['rows']:
+        return None
+    return master_df
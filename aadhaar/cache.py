@@ -0,0 +1,98 @@
+"""
+Columnar Ingestion Cache for the Raw CSV Shards
+===============================================
+Each `dataset/api_data_aadhar_*` CSV shard is parsed from text ONCE and
+stored as a typed Parquet file (dtypes from `aadhaar.schema`) under
+`.cache/shards/`. Every later load reads the Parquet copy instead.
+
+WHY: Re-parsing ~220 MB of CSV text costs minutes per pipeline run, and
+every script (analysis, extract_insights, app, clean_data) used to pay it
+again. Parquet is columnar and already typed, so a warm load takes seconds.
+
+CACHE KEY: (path relative to the working directory, size in bytes, mtime in
+ns, schema version)
+- A shard that is replaced or edited gets a new key -> re-parsed automatically
+- The key does not depend on WHERE the checkout lives: a moved or copied tree
+  (mtimes preserved, e.g. `cp -a`) keeps its keys, so the cube manifest
+  (aadhaar.artifacts) still sees unchanged shards and appends incrementally
+- Stale entries for the same shard are removed when the new one is written
+
+Set AADHAAR_CACHE_DIR to move the cache, or AADHAAR_NO_CACHE=1 to bypass it.
+Without pyarrow the shards are simply read from CSV as before.
+"""
+
+import glob
+import hashlib
+import importlib.util
+import os
+
+import pandas as pd
+
+from aadhaar.schema import SCHEMA_VERSION, read_csv_typed
+
+CACHE_DIR = os.environ.get('AADHAAR_CACHE_DIR', '.cache')
+SHARD_CACHE_DIR = os.path.join(CACHE_DIR, 'shards')
+
+
+def _parquet_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def shard_cache_key(path):
+    """Fingerprint of a shard: hash of (relative path, size, mtime, schema version)."""
+    st = os.stat(path)
+    relative = os.path.relpath(path).replace(os.sep, '/')
+    raw = f"{relative}|{st.st_size}|{st.st_mtime_ns}|v{SCHEMA_VERSION}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def shard_cache_path(path):
+    """Location of the Parquet copy of `path` for its current key."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(SHARD_CACHE_DIR, f"{stem}-{shard_cache_key(path)}.parquet")
+
+
+def read_shard(path):
+    """
+    Read one raw CSV shard through the columnar cache.
+
+    Cache hit  -> pd.read_parquet (typed, columnar, fast)
+    Cache miss -> typed pd.read_csv, then write the Parquet copy for next time
+    """
+    if os.environ.get('AADHAAR_NO_CACHE') == '1' or not _parquet_available():
+        return read_csv_typed(path)
+
+    cached = shard_cache_path(path)
+    if os.path.exists(cached):
+        try:
+            return pd.read_parquet(cached)
+        except Exception:
+            # Corrupt/partial cache file -> fall through and rebuild it
+            pass
+
+    df = read_csv_typed(path)
+    _write_cache(df, cached)
+    return df
+
+
+def _write_cache(df, cached):
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+
+    # Drop older entries for the same shard (different size/mtime)
+    prefix = os.path.basename(cached).rsplit('-', 1)[0]
+    for old in glob.glob(os.path.join(glob.escape(os.path.dirname(cached)), f"{glob.escape(prefix)}-*.parquet")):
+        if old != cached:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    # Write to a temp file then rename, so readers never see a partial file
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, cached)
+    except Exception as e:
+        print(f"[WARNING] Could not write shard cache {cached}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
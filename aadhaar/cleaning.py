@@ -0,0 +1,48 @@
+"""
+In-Memory Cleaning for Loaded Aadhaar Frames
+============================================
+Normalizes dates, state/district names and pincodes so the three domains
+can be merged on the same keys.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.normalize import normalize_names
+from aadhaar.profiling import profiled
+
+
+@profiled('clean')
+def clean_data(df):
+    """
+    Clean and standardize the data:
+    - Fix date formats
+    - Normalize state/district names (critical for merging!)
+    - Validate pincodes
+    - Handle missing values
+
+    WHY: Raw government data often has inconsistencies (e.g., 'West Bengal' vs 'West Bangal')
+    This function ensures we can merge data correctly without losing records.
+    Names come out in the canonical display form of aadhaar.normalize.
+    """
+    if df.empty: return df
+
+    # 1. Date Standardization (already datetime64 when loaded via the schema)
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
+
+    # 2-4. State/District Normalization (Critical for Merging)
+    # Same canonical engine as clean_data.py, so in-memory frames and the
+    # cleaned CSVs agree. Rows with invalid names ('100000', ...) are dropped.
+    df = normalize_names(df)
+
+    # 5. Pincode Validation (Indian pincodes are 6 digits, 110000-999999)
+    if 'pincode' in df.columns:
+        df['pincode'] = pd.to_numeric(df['pincode'], errors='coerce').fillna(0).astype('int32')
+        df = df[(df['pincode'] >= 110000) & (df['pincode'] <= 999999)]
+
+    # 6. Null Handling (Numeric -> 0)
+    num_cols = df.select_dtypes(include=[np.number]).columns
+    df[num_cols] = df[num_cols].fillna(0)
+
+    return df
@@ -0,0 +1,167 @@
+"""
+Memory-Mapped Arrow IPC Copies of the Cleaned Datasets
+======================================================
+Next to every `dataset_cleaned/*_cleaned.csv`, clean_data.py writes an
+uncompressed Arrow IPC (Feather v2) file with the same rows and dtypes:
+
+    dataset_cleaned/enrollment_cleaned.csv    ->  enrollment_cleaned.arrow
+
+Readers (`read_cleaned`) memory-map that file and hand pandas the mapped
+buffers directly - numeric, date and categorical-code columns are
+read-only views of the file, not private copies. Every process that maps
+the same file shares ONE copy in the OS page cache.
+
+WHY: app.py (one process per Streamlit session) and the batch jobs each
+parsed the cleaned CSVs into their own pandas copy; three dashboard
+sessions plus a batch job held four copies of the same data in RAM.
+
+ZERO-COPY NEEDS ONE RECORD BATCH: a column spread over several batches is
+concatenated (copied) by to_pandas. The in-memory and incremental clean
+write a single batch; `--stream` mode writes one batch per chunk to keep
+its memory bound, so its readers get one copy at load (still no CSV parse).
+
+FRESHNESS: The Arrow file stores the cache key (path, size, mtime) of the
+CSV it was written from. If the CSV changes without the Arrow file being
+rewritten (edited by hand, older pipeline), readers fall back to the CSV.
+Files are replaced atomically (temp file + rename), so a process that has
+the old file mapped keeps a valid mapping.
+
+Without pyarrow everything falls back to parsing the CSV, as before.
+"""
+
+import os
+
+from aadhaar.cache import _parquet_available, shard_cache_key
+from aadhaar.schema import apply_schema, iter_csv_typed, read_csv_typed
+
+ARROW_SUFFIX = '.arrow'
+SOURCE_KEY = b'aadhaar.source_key'
+
+# Columns written as Arrow dictionaries (pandas categoricals)
+DICTIONARY_COLUMNS = ('state', 'district')
+
+
+def arrow_path(csv_path):
+    """Location of the Arrow IPC copy of a cleaned CSV."""
+    return os.path.splitext(csv_path)[0] + ARROW_SUFFIX
+
+
+# ============================================================================
+# WRITE
+# ============================================================================
+def _write_tables(tables, csv_path, schema):
+    """Write record batches to the Arrow file of `csv_path` (temp file + rename)."""
+    import pyarrow as pa
+
+    schema = schema.with_metadata({**(schema.metadata or {}), SOURCE_KEY: shard_cache_key(csv_path).encode()})
+    path = arrow_path(csv_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            for table in tables:
+                writer.write_table(table.replace_schema_metadata(schema.metadata))
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[WARNING] Could not write {path}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    return True
+
+
+def write_arrow(df, csv_path):
+    """
+    Write `df` (the full contents of the just-written `csv_path`) as a
+    single-batch Arrow file. Returns False if pyarrow is missing.
+    """
+    if not _parquet_available():
+        return False
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return _write_tables([table.combine_chunks()], csv_path, table.schema)
+
+
+def csv_to_arrow(csv_path, chunksize, single_batch=True):
+    """
+    Convert a cleaned CSV into its Arrow file, reading `chunksize` rows at a time.
+
+    Pass 1 collects the state/district categories (small), pass 2 converts
+    the chunks with those categories fixed, so every batch shares one
+    dictionary. single_batch=False writes one batch per chunk (bounded
+    memory); otherwise the batches are combined into one (zero-copy reads).
+    """
+    if not _parquet_available():
+        return False
+    import pyarrow as pa
+
+    categories = {col: set() for col in DICTIONARY_COLUMNS}
+    for chunk in iter_csv_typed(csv_path, chunksize):
+        for col in categories:
+            if col in chunk.columns:
+                categories[col].update(chunk[col].cat.categories)
+    categories = {col: sorted(values) for col, values in categories.items()}
+
+    tables = []
+    for chunk in iter_csv_typed(csv_path, chunksize):
+        for col, values in categories.items():
+            if col in chunk.columns:
+                chunk[col] = chunk[col].cat.set_categories(values)
+        tables.append(pa.Table.from_pandas(chunk, preserve_index=False))
+    if not tables:
+        return False
+
+    schema = tables[0].schema
+    if single_batch:
+        tables = [pa.concat_tables(tables).combine_chunks()]
+    return _write_tables(tables, csv_path, schema)
+
+
+# ============================================================================
+# READ
+# ============================================================================
+def map_arrow_table(csv_path):
+    """
+    The memory-mapped Arrow copy of `csv_path` as a pyarrow Table, or None
+    if there is none, it is stale or pyarrow is missing.
+    """
+    path = arrow_path(csv_path)
+    if not _parquet_available() or not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+    import pyarrow as pa
+
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        if (reader.schema.metadata or {}).get(SOURCE_KEY) != shard_cache_key(csv_path).encode():
+            return None
+        return reader.read_all()
+    except Exception:
+        return None
+
+
+def map_arrow(csv_path):
+    """
+    The memory-mapped Arrow copy of `csv_path` as a DataFrame, or None if
+    there is none, it is stale or pyarrow is missing.
+
+    Columns are READ-ONLY views of the mapped file. Assigning a whole
+    column (df['x'] = ...) is fine; to modify values in place, `.copy()`
+    the frame (or column) first - writing into a mapped buffer raises.
+    """
+    table = map_arrow_table(csv_path)
+    if table is None:
+        return None
+    try:
+        return apply_schema(table.to_pandas(split_blocks=True))
+    except Exception:
+        return None
+
+
+def read_cleaned(csv_path):
+    """
+    A cleaned dataset: mapped zero-copy from its Arrow file when fresh, else
+    parsed from CSV. The mapped frame is read-only (see map_arrow): `.copy()`
+    it before writing values in place.
+    """
+    df = map_arrow(csv_path)
+    return df if df is not None else read_csv_typed(csv_path)
@@ -0,0 +1,241 @@
+"""
+Master Cube Construction
+========================
+Joins the enrolment, demographic and biometric frames into one wide
+`master_df` keyed by (date, state, district, pincode) and derives the
+cross-domain custom formulas on top of it.
+
+KEY-INDEXED BUILD (frames carrying geography ids):
+Instead of two 4-key outer pd.merge calls, every row gets ONE int64 key
+
+    key = day << 32 | district_rank << 20 | pincode
+
+    day:           days since 1970-01-01      (bits 32-62)
+    district_rank: district_id ranked by (state, district) name (bits 20-31, < 4096)
+    pincode:       6-digit pincode            (bits 0-19, < 1,048,576)
+
+Each source is collapsed to unique keys (bincount sums), the sorted union of
+keys is the cube's row index, and each source is scattered into it with
+searchsorted. Because the rank follows the name order, sorting by key gives
+exactly the (date, state, district, pincode) order of the old merge.
+
+WHY: The two outer merges were the peak-memory spike of the pipeline - they
+materialize hash tables and intermediate wide frames keyed on strings.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.profiling import profiled
+
+MERGE_KEYS = ['date', 'state', 'district', 'pincode']
+
+DAY_SHIFT = 32
+DISTRICT_SHIFT = 20
+DISTRICT_MASK = (1 << (DAY_SHIFT - DISTRICT_SHIFT)) - 1
+PINCODE_MASK = (1 << DISTRICT_SHIFT) - 1
+NAT_DAY = (1 << 31) - 1  # missing dates sort last
+
+ENROL_COLS = ['age_0_5', 'age_5_17', 'age_18_greater']
+DEMO_COLS = ['demo_age_5_17', 'demo_age_17_']
+BIO_COLS = ['bio_age_5_17', 'bio_age_17_']
+
+
+def collapse_duplicate_keys(df, value_cols, keys=MERGE_KEYS):
+    """
+    Sum rows that share the same (date, state, district, pincode).
+
+    WHY: Once names are canonical, one pincode-day reported under two raw
+    spellings ('Bangalore' / 'Bengaluru') becomes two rows with the same key.
+    Left as-is, the outer merge would pair them with every matching row of
+    the other domains and double-count those counts.
+    """
+    if not df.duplicated(keys).any():
+        return df
+    cols = [c for c in value_cols if c in df.columns]
+    return df.groupby(keys, observed=True, sort=False)[cols].sum().reset_index()
+
+
+def _district_rank(geo):
+    """district_id -> rank in (state, district) name order, and its inverse."""
+    ordered = geo.sort_values(['state', 'district'])['district_id'].to_numpy()
+    rank_of_id = np.empty(len(ordered), dtype=np.int64)
+    rank_of_id[ordered] = np.arange(len(ordered))
+    return rank_of_id, ordered
+
+
+def encode_cube_key(df, geo):
+    """Composite int64 (date, district, pincode) key for every row of `df`."""
+    rank_of_id, _ = _district_rank(geo)
+    dates = df['date']
+    day = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    day = np.where(dates.isna().to_numpy(), NAT_DAY, day)
+    district = rank_of_id[df['district_id'].to_numpy()]
+    pincode = df['pincode'].to_numpy().astype(np.int64)
+    return (day << DAY_SHIFT) | (district << DISTRICT_SHIFT) | pincode
+
+
+def decode_cube_key(keys, geo, date_dtype='datetime64[us]'):
+    """Inverse of encode_cube_key: a frame of date, district_id, pincode."""
+    _, id_of_rank = _district_rank(geo)
+    day = keys >> DAY_SHIFT
+    date = np.where(day == NAT_DAY, np.datetime64('NaT'), day.astype('datetime64[D]'))
+    return pd.DataFrame({
+        'date': date.astype(date_dtype),
+        'district_id': id_of_rank[(keys >> DISTRICT_SHIFT) & DISTRICT_MASK].astype('int16'),
+        'pincode': (keys & PINCODE_MASK).astype('int32'),
+    })
+
+
+def _keys_fit(frames, geo):
+    """True if pincodes and district ids fit their bit fields."""
+    if len(geo) > DISTRICT_MASK + 1:
+        return False
+    return all(df.empty or (df['pincode'].min() >= 0 and df['pincode'].max() <= PINCODE_MASK)
+               for df, _ in frames)
+
+
+def _build_keyed(frames, geo):
+    """Key-indexed union of the three sources (see module docstring)."""
+    collapsed = []
+    for df, cols in frames:
+        keys = encode_cube_key(df, geo)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        # bincount sums duplicate keys (float64, like the old fillna(0) merge)
+        sums = {col: np.bincount(inverse, weights=df[col].to_numpy(), minlength=len(unique_keys))
+                for col in cols}
+        collapsed.append((unique_keys, sums))
+
+    cube_keys = np.unique(np.concatenate([keys for keys, _ in collapsed]))
+
+    date_dtype = next((df['date'].dtype for df, _ in frames if len(df)), 'datetime64[us]')
+    master_df = decode_cube_key(cube_keys, geo, date_dtype)
+    for unique_keys, sums in collapsed:
+        positions = np.searchsorted(cube_keys, unique_keys)
+        for col, values in sums.items():
+            column = np.zeros(len(cube_keys))
+            column[positions] = values
+            master_df[col] = column
+
+    # Display names + state_id from the dimension (integer indexing only)
+    from aadhaar.geography import decode_geography
+    master_df = decode_geography(master_df, geo)
+    return master_df[MERGE_KEYS + ['state_id', 'district_id'] +
+                     [c for c in master_df.columns if c not in MERGE_KEYS + ['state_id', 'district_id']]]
+
+
+@profiled('merge')
+def build_master_cube(enrolment_df, demographic_df, biometric_df, geo=None):
+    """
+    Merge the three domains into the master cube and add domain totals.
+
+    With a geography dimension (`geo`, frames encoded by
+    aadhaar.geography.encode_geography) the cube is built key-indexed on a
+    single int64 key (see module docstring); otherwise by outer merges on
+    the name keys. Both produce the same wide frame.
+
+    COLUMNS ADDED:
+    - total_enrol, total_demo, total_bio: Per-domain transaction counts
+    - total_activity: Sum of all three domains
+    """
+    frames = [(enrolment_df, ENROL_COLS), (demographic_df, DEMO_COLS), (biometric_df, BIO_COLS)]
+    use_ids = (geo is not None and all('district_id' in df.columns for df, _ in frames)
+               and _keys_fit(frames, geo))
+
+    if use_ids:
+        master_df = _build_keyed(frames, geo)
+    else:
+        enrolment_df, demographic_df, biometric_df = [
+            collapse_duplicate_keys(df[MERGE_KEYS + [c for c in cols if c in df.columns]], cols)
+            for df, cols in frames
+        ]
+        master_df = pd.merge(enrolment_df, demographic_df, on=MERGE_KEYS, how='outer')
+        master_df = pd.merge(master_df, biometric_df, on=MERGE_KEYS, how='outer')
+        master_df = master_df.fillna(0)
+
+    return add_totals(master_df)
+
+
+def add_totals(master_df):
+    """Per-domain totals and their sum (see build_master_cube)."""
+    master_df['total_enrol'] = master_df['age_0_5'] + master_df['age_5_17'] + master_df['age_18_greater']
+    master_df['total_demo'] = master_df['demo_age_5_17'] + master_df['demo_age_17_']
+    master_df['total_bio'] = master_df['bio_age_5_17'] + master_df['bio_age_17_']
+    master_df['total_activity'] = master_df['total_enrol'] + master_df['total_demo'] + master_df['total_bio']
+    return master_df
+
+
+@profiled('merge')
+def add_to_cube(master_df, delta_df, geo):
+    """
+    Fold a cube built from NEW shards (`delta_df`) into an existing cube.
+
+    Counts are additive: both cubes are re-keyed with the (possibly grown)
+    geography, the key sets are unioned and each count column is summed
+    position-wise. Totals are recomputed; the custom formulas are NOT (call
+    add_custom_formulas on the result - fraud_index uses a cube-wide quantile).
+
+    WHY: A daily API drop touches a few days of keys; re-merging every
+    shard to absorb it costs the full build.
+    """
+    value_cols = ENROL_COLS + DEMO_COLS + BIO_COLS
+    old_keys = encode_cube_key(master_df, geo)
+    new_keys = encode_cube_key(delta_df, geo)
+    cube_keys = np.union1d(old_keys, new_keys)
+
+    merged = decode_cube_key(cube_keys, geo, master_df['date'].dtype)
+    old_pos = np.searchsorted(cube_keys, old_keys)
+    new_pos = np.searchsorted(cube_keys, new_keys)
+    for col in value_cols:
+        column = np.zeros(len(cube_keys))
+        column[old_pos] = master_df[col].to_numpy()
+        column[new_pos] += delta_df[col].to_numpy()  # cube keys are unique -> no repeats
+        merged[col] = column
+
+    from aadhaar.geography import decode_geography
+    merged = decode_geography(merged, geo)
+    merged = merged[MERGE_KEYS + ['state_id', 'district_id'] + value_cols]
+    return add_totals(merged)
+
+
+@profiled('transform')
+def add_custom_formulas(master_df, demo_threshold=None):
+    """
+    Add the three custom cross-domain formulas to the master cube.
+
+    CUSTOM FORMULA 1: Saturation Index (System Maturity)
+    FORMULA: (Updates) / (Enrollments + 1)
+    WHY: High ratio = Mature region (more updates than new enrollments)
+         Low ratio = Growth region (more enrollments than updates)
+
+    CUSTOM FORMULA 2: System Efficiency Score (Cost Optimization)
+    FORMULA: Weighted cost of activities (Bio > Demo > Enrol)
+    WHY: Biometric updates are EXPENSIVE (fingerprint scanners, iris cameras)
+         This score helps identify districts that are inefficient (too many bio updates)
+         and can benefit from SELF-SERVICE KIOSKS.
+
+    CUSTOM FORMULA 3: Fraud Probability Index
+    FORMULA: Combines 3 red flags
+    WHY: High demographic updates + Zero enrollments + Extreme saturation = Fraud signal
+         This helps UIDAI focus audit resources on suspicious pincodes.
+
+    The "high demographic updates" flag is total_demo above the cube-wide
+    95th percentile; pass `demo_threshold` when `master_df` is only one
+    partition of the cube (aadhaar.outofcore).
+    """
+    master_df['Saturation_Index'] = (master_df['total_demo'] + master_df['total_bio']) / (master_df['total_enrol'] + 1)
+
+    master_df['efficiency_score'] = (
+        (master_df['total_bio'] * 0.5) +   # Bio updates cost 2x (equipment)
+        (master_df['total_demo'] * 0.3) +  # Demo updates cost 1.5x (staff time)
+        (master_df['total_enrol'] * 0.2)   # Enrollments are cheapest (one-time)
+    ) / (master_df['total_activity'] + 1)
+
+    if demo_threshold is None:
+        demo_threshold = master_df['total_demo'].quantile(0.95)
+    master_df['fraud_index'] = (
+        (master_df['total_demo'] > demo_threshold).astype(int) * 0.4 +
+        (master_df['total_enrol'] == 0).astype(int) * 0.3 +
+        (master_df['Saturation_Index'] > 10).astype(int) * 0.3
+    )
+    return master_df
@@ -0,0 +1,230 @@
+"""
+Duplicate-Row Detection Across Shards
+=====================================
+Overlapping API dumps can repeat a record - the same (date, state, district,
+pincode) row in two shards, or twice in one. `pd.concat` keeps every copy,
+so every downstream total (and the master cube) counts it again.
+
+HOW (single pass over the rows):
+- Each row's RAW key (date, state, district, pincode - before name
+  canonicalization, so 'Bangalore' and 'Bengaluru' stay distinct records)
+  is hashed to one uint64 with pd.util.hash_pandas_object
+- Shards are visited in file order; a row whose key hash was seen before
+  (earlier in the shard or in an earlier shard) is dropped - first copy wins
+- A second hash over the full row tells EXACT copies from CONFLICTING ones
+  (same key, different counts); both are dropped, conflicts are reported
+
+Repeats WITHIN a frame are hash-table lookups (pandas duplicated). Hashes of
+EARLIER frames are kept as a few sorted runs of doubling size (SeenHashes), so
+a frame is checked with one binary search per run - O(rows x log seen) - and
+the earlier hashes are never concatenated or re-hashed again. Many streaming
+chunks therefore cost about the same as one big frame, not quadratically more.
+
+COLLISIONS: With 64-bit hashes and ~5M rows the chance of any false match is
+about 1e-6.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.cache import read_shard, shard_cache_path
+
+DEDUP_KEYS = ['date', 'state', 'district', 'pincode']
+
+
+def _hash_rows(df, columns):
+    """One uint64 per row over `columns` (value-based, also for categoricals)."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def row_hashes(df, keys=DEDUP_KEYS):
+    """
+    Key hash and full-row hash of every row, indexed like `df`.
+
+    Compute these on the RAW rows; they can be carried through cleaning
+    (`.loc[cleaned.index]`) and passed to DuplicateFilter.filter.
+    """
+    keys = [k for k in keys if k in df.columns]
+    if not len(df) or not keys:
+        return pd.DataFrame({'key': np.empty(0, dtype=np.uint64), 'row': np.empty(0, dtype=np.uint64)})
+    return pd.DataFrame({'key': _hash_rows(df, keys), 'row': _hash_rows(df, list(df.columns))}, index=df.index)
+
+
+def shard_hashes_path(path):
+    """Location of the persisted row_hashes of shard `path`, next to its columnar cache entry."""
+    return shard_cache_path(path)[:-len('.parquet')] + '.hashes.npz'
+
+
+def shard_hashes(path, df=None, keys=DEDUP_KEYS):
+    """
+    row_hashes of a raw shard (its key and row hash arrays), persisted in
+    `.cache/shards/` under the shard's cache key.
+
+    Seeding a DuplicateFilter with already-ingested shards then loads 16
+    bytes per row instead of re-reading and re-hashing every shard. `df` is
+    the raw shard when it is already in memory (computed and stored once).
+    """
+    cached = shard_hashes_path(path)
+    use_cache = os.environ.get('AADHAAR_NO_CACHE') != '1'
+    if use_cache and os.path.exists(cached):
+        try:
+            with np.load(cached) as stored:
+                if list(stored['keys']) == list(keys):
+                    return pd.DataFrame({'key': stored['key'], 'row': stored['row']})
+        except Exception:
+            pass  # corrupt/partial file -> recompute below
+
+    hashes = row_hashes(read_shard(path) if df is None else df, keys)
+    if use_cache:
+        _write_hashes(hashes, keys, cached)
+    return hashes
+
+
+def _write_hashes(hashes, keys, cached):
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+
+    # Drop older entries for the same shard (different size/mtime)
+    prefix = os.path.basename(cached).rsplit('-', 1)[0]
+    for old in glob.glob(os.path.join(glob.escape(os.path.dirname(cached)), f"{glob.escape(prefix)}-*.hashes.npz")):
+        if old != cached:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, key=hashes['key'].to_numpy(), row=hashes['row'].to_numpy(), keys=np.array(keys))
+        os.replace(tmp, cached)
+    except Exception as e:
+        print(f"[WARNING] Could not write shard hashes {cached}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class SeenHashes:
+    """
+    Growing set of uint64 hashes: sorted unique runs in strictly decreasing
+    power-of-two size classes (so at most log2(n) runs). Adding merges the
+    small runs at the tail, like a binary counter - each hash is merged
+    O(log n) times in all; lookups never touch the whole set.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def add(self, values):
+        run = np.unique(values)
+        if not len(run):
+            return
+        # merge while the tail run is in the same power-of-two size class or smaller
+        while self.runs and len(self.runs[-1]).bit_length() <= len(run).bit_length():
+            run = self._merge(self.runs.pop(), run)
+        self.runs.append(run)
+
+    @staticmethod
+    def _merge(a, b):
+        # timsort (kind='stable') merges two sorted runs in linear time
+        merged = np.sort(np.concatenate([a, b]), kind='stable')
+        return merged[np.r_[True, merged[1:] != merged[:-1]]]
+
+    def contains(self, values):
+        """Boolean array: which of `values` were added before."""
+        values = np.asarray(values, dtype=np.uint64)
+        order = np.argsort(values)
+        ordered = values[order]  # sorted queries keep the binary searches cache-friendly
+        found = np.zeros(len(values), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, ordered), len(run) - 1)
+            found[order] |= run[pos] == ordered
+        return found
+
+
+class DuplicateFilter:
+    """
+    Stateful first-copy-wins filter; feed frames (shards or chunks) in order.
+
+    report: one dict per frame - name, rows, duplicates, of which conflicting
+    """
+
+    def __init__(self, keys=DEDUP_KEYS):
+        self.keys = keys
+        self._seen_keys = SeenHashes()
+        self._seen_rows = SeenHashes()
+        self.report = []
+
+    def seed(self, df=None, hashes=None):
+        """
+        Mark the rows of `df` as already ingested (nothing is dropped or
+        reported); pass `hashes` (e.g. shard_hashes) instead of the rows.
+        """
+        if hashes is None:
+            hashes = row_hashes(df, self.keys)
+        self._seen_keys.add(hashes['key'].to_numpy())
+        self._seen_rows.add(hashes['row'].to_numpy())
+        return self
+
+    def filter(self, df, name='', hashes=None):
+        """
+        `df` without rows whose key was already seen; records a report entry.
+
+        `hashes` (from row_hashes on the raw rows) is needed when `df` has
+        already been cleaned - its names are then canonical, not raw.
+        """
+        if hashes is None:
+            hashes = row_hashes(df, self.keys)
+        if not len(df) or hashes.empty:
+            self.report.append({'name': name, 'rows': len(df), 'duplicates': 0, 'conflicting': 0})
+            return df
+
+        key_hash, row_hash = hashes['key'], hashes['row']
+        # Seen before: earlier in this frame, or in an earlier frame
+        dup = key_hash.duplicated().to_numpy() | self._seen_keys.contains(key_hash.to_numpy())
+        exact = row_hash.duplicated().to_numpy() | self._seen_rows.contains(row_hash.to_numpy())
+
+        keep = ~dup
+        self._seen_keys.add(key_hash.to_numpy()[keep])
+        self._seen_rows.add(row_hash.to_numpy()[keep])
+        n_dup = int(dup.sum())
+        self.report.append({'name': name, 'rows': len(df), 'duplicates': n_dup,
+                            'conflicting': int((dup & ~exact).sum())})
+        return df[keep] if n_dup else df
+
+
+def drop_duplicate_rows(frames, names, seed=(), seed_hashes=(), hashes=None):
+    """
+    Dedup a list of shard frames in order, after the already-ingested frames
+    in `seed` and the row_hashes in `seed_hashes` (e.g. shard_hashes), if
+    any. `hashes`: the row_hashes of each frame, if already computed.
+    Returns (frames, report).
+    """
+    dedup = DuplicateFilter()
+    for df in seed:
+        dedup.seed(df)
+    for seen in seed_hashes:
+        dedup.seed(hashes=seen)
+    hashes = hashes or [None] * len(frames)
+    frames = [dedup.filter(df, name, h) for df, name, h in zip(frames, names, hashes)]
+    return frames, dedup.report
+
+
+def print_dedup_report(report, label=''):
+    """Per-shard duplicate counts (shards with duplicates only) and a total."""
+    per_shard = {}
+    for entry in report:  # streaming mode reports chunk by chunk -> sum per shard
+        totals = per_shard.setdefault(entry['name'], {'rows': 0, 'duplicates': 0, 'conflicting': 0})
+        for field in totals:
+            totals[field] += entry[field]
+
+    for name, totals in per_shard.items():
+        if totals['duplicates']:
+            conflict = f", {totals['conflicting']:,} with different counts" if totals['conflicting'] else ""
+            print(f"  [DEDUP] {name}: dropped {totals['duplicates']:,} of {totals['rows']:,} rows{conflict}")
+    total = sum(totals['duplicates'] for totals in per_shard.values())
+    prefix = f"{label}: " if label else ""
+    print(f"  [DEDUP] {prefix}{total:,} duplicate rows removed across {len(per_shard)} shard(s)")
+    return total
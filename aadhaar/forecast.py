@@ -0,0 +1,224 @@
+"""
+Forecast Fleet (Per-District and Per-State Holt-Winters)
+========================================================
+Fits one additive Holt-Winters model per district and per state on daily
+total_activity and writes a forecast table:
+
+    entity_type, entity, date, point, lower, upper, method
+
+MODEL: ETS(A,A,A) - the state-space form of additive-trend, additive weekly
+seasonality Holt-Winters (the national model in analysis.py Phase 5) -
+because it gives ANALYTIC prediction intervals and accepts start values.
+Series shorter than MIN_FIT_DAYS, or whose fit fails, get a SEASONAL NAIVE
+forecast (repeat the last week; interval from the week-over-week
+differences, widening with every full week ahead).
+
+SPEED:
+- Series are fitted in batches over the process pool (aadhaar.parallel)
+- Fitted parameters are cached per entity in `.cache/forecasts/`:
+    same series as last run   -> no optimization, just re-smooth (cached)
+    changed / extended series -> optimizer starts from the cached
+                                 parameters (warm, ~7x fewer iterations)
+    no cached parameters      -> full fit (cold)
+
+Set AADHAAR_NO_CACHE=1 to fit everything cold without touching the cache.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.cache import CACHE_DIR
+from aadhaar.geography import label_districts
+from aadhaar.parallel import parallel_map
+from aadhaar.profiling import profiled
+from aadhaar.rollups import query_rollup
+
+FORECAST_DIR = os.path.join(CACHE_DIR, 'forecasts')
+PARAMS_NAME = 'params.json'
+MODEL_SPEC = 'ets-AAA'        # part of the cache: changing the model invalidates it
+
+SEASONAL_PERIODS = 7
+MIN_FIT_DAYS = 4 * SEASONAL_PERIODS
+HORIZON = 90
+INTERVAL = 0.95
+BATCH_SIZE = 25               # series per pool task
+
+
+# ============================================================================
+# SERIES
+# ============================================================================
+def entity_series(rollups, by, column='total_activity'):
+    """
+    {entity name: daily Series} at the `by` level ('district' or 'state'),
+    each on a complete daily calendar (0 = no activity) from the entity's
+    first day to the last day in the data - like the national series.
+    Districts are named "District, State" (same-named districts differ).
+    """
+    if by == 'district':
+        daily = label_districts(query_rollup(rollups, ('state', 'district'), 'D', columns=[column])[column])
+    else:
+        daily = query_rollup(rollups, (by,), 'D', columns=[column])[column]
+    if daily.empty:
+        return {}
+    end = daily.index.get_level_values('date').max()
+    series = {}
+    for entity, values in daily.groupby(level=by, observed=True):
+        values = values.droplevel(by)
+        series[str(entity)] = values.reindex(pd.date_range(values.index.min(), end, freq='D'), fill_value=0)
+    return series
+
+
+def series_hash(series):
+    sha = hashlib.sha1(str(series.index[0]).encode('utf-8'))
+    sha.update(np.ascontiguousarray(series.to_numpy(dtype='float64')).tobytes())
+    return sha.hexdigest()[:16]
+
+
+# ============================================================================
+# MODELS
+# ============================================================================
+def seasonal_naive(values, horizon, seasonal_periods=SEASONAL_PERIODS, interval=INTERVAL):
+    """
+    Repeat the last season. Interval: sigma of the seasonal differences
+    x sqrt(k + 1), k = full seasons ahead (NaN with less than two seasons).
+    """
+    from scipy.stats import norm
+
+    values = np.asarray(values, dtype='float64')
+    period = max(1, min(seasonal_periods, len(values)))
+    steps = np.arange(horizon)
+    point = values[-period:][steps % period] if len(values) else np.full(horizon, np.nan)
+    diffs = values[period:] - values[:-period]
+    sigma = np.sqrt(np.mean(diffs ** 2)) if len(diffs) else np.nan
+    half = norm.ppf(0.5 + interval / 2) * sigma * np.sqrt(steps // period + 1)
+    return point, point - half, point + half
+
+
+def fit_ets(values, horizon, start_params=None, fixed_params=None, interval=INTERVAL):
+    """
+    ETS(A,A,A) forecast of `values`: (params, point, lower, upper).
+    fixed_params: smooth with these, no optimization; start_params: warm start.
+    """
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+    # a pandas index is required by get_prediction's summary frame
+    model = ETSModel(pd.Series(values, dtype='float64'), error='add', trend='add', seasonal='add',
+                     seasonal_periods=SEASONAL_PERIODS)
+    if fixed_params is not None:
+        result = model.smooth(np.asarray(fixed_params))
+    else:
+        result = model.fit(start_params=None if start_params is None else np.asarray(start_params), disp=False)
+    n = len(values)
+    frame = result.get_prediction(start=n, end=n + horizon - 1).summary_frame(alpha=1 - interval)
+    point, lower, upper = (frame[c].to_numpy() for c in ('mean', 'pi_lower', 'pi_upper'))
+    if not (np.isfinite(point).all() and np.isfinite(lower).all() and np.isfinite(upper).all()):
+        raise ValueError("non-finite forecast")
+    return [float(p) for p in result.params], point, lower, upper
+
+
+def fit_one(values, digest, cached, horizon):
+    """Forecast one series, reusing `cached` parameters where possible. Returns (record, point, lower, upper)."""
+    ets_cached = cached if cached and cached.get('method') == 'ets' and cached.get('params') else None
+    if len(values) >= MIN_FIT_DAYS:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                if ets_cached and ets_cached.get('hash') == digest:
+                    fit, out = 'cached', fit_ets(values, horizon, fixed_params=ets_cached['params'])
+                elif ets_cached:
+                    fit, out = 'warm', fit_ets(values, horizon, start_params=ets_cached['params'])
+                else:
+                    fit, out = 'cold', fit_ets(values, horizon)
+            params, point, lower, upper = out
+            return {'method': 'ets', 'fit': fit, 'params': params, 'hash': digest}, point, lower, upper
+        except Exception:
+            pass  # degenerate series (e.g. all zeros): seasonal naive below
+    point, lower, upper = seasonal_naive(values, horizon)
+    return {'method': 'seasonal_naive', 'fit': 'naive', 'params': None, 'hash': digest}, point, lower, upper
+
+
+def _fit_batch(batch):
+    """Pool task: fit_one for each (key, values, hash, cached, horizon)."""
+    return [(key,) + fit_one(values, digest, cached, horizon) for key, values, digest, cached, horizon in batch]
+
+
+# ============================================================================
+# PARAMETER CACHE
+# ============================================================================
+def load_params(forecast_dir=FORECAST_DIR):
+    """{'<entity_type>:<entity>': record} from the last run, or {}."""
+    if os.environ.get('AADHAAR_NO_CACHE') == '1':
+        return {}
+    try:
+        with open(os.path.join(forecast_dir, PARAMS_NAME), encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return stored.get('entities', {}) if stored.get('model') == MODEL_SPEC else {}
+
+
+def save_params(records, forecast_dir=FORECAST_DIR):
+    """Persist the fitted parameters (temp file + rename)."""
+    if os.environ.get('AADHAAR_NO_CACHE') == '1':
+        return False
+    os.makedirs(forecast_dir, exist_ok=True)
+    path = os.path.join(forecast_dir, PARAMS_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'model': MODEL_SPEC, 'entities': records}, f)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[WARNING] Could not save forecast parameters: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    return True
+
+
+# ============================================================================
+# FLEET
+# ============================================================================
+@profiled('fit')
+def forecast_fleet(series_by_type, horizon=HORIZON, max_workers=None, forecast_dir=FORECAST_DIR):
+    """
+    Forecast every series of {entity_type: {entity: daily Series}}.
+
+    Returns (forecast table, {fit kind: count}) - fit kinds: cached, warm,
+    cold, naive (see module docstring).
+    """
+    cached = load_params(forecast_dir)
+    tasks, last_days = [], {}
+    for entity_type, series in series_by_type.items():
+        for entity, values in series.items():
+            key = f"{entity_type}:{entity}"
+            tasks.append((key, values.to_numpy(dtype='float64'), series_hash(values), cached.get(key), horizon))
+            last_days[key] = values.index[-1]
+
+    batches = [tasks[i:i + BATCH_SIZE] for i in range(0, len(tasks), BATCH_SIZE)]
+    results = [result for batch in parallel_map(_fit_batch, batches, max_workers) for result in batch]
+
+    records, frames, fits = {}, [], {}
+    for key, record, point, lower, upper in results:
+        entity_type, entity = key.split(':', 1)
+        fits[record['fit']] = fits.get(record['fit'], 0) + 1
+        records[key] = {k: v for k, v in record.items() if k != 'fit'}
+        frames.append(pd.DataFrame({
+            'entity_type': entity_type,
+            'entity': entity,
+            'date': pd.date_range(last_days[key] + pd.Timedelta(days=1), periods=horizon, freq='D'),
+            # activity counts cannot go negative
+            'point': np.clip(point, 0, None),
+            'lower': np.clip(lower, 0, None),
+            'upper': np.clip(upper, 0, None),
+            'method': record['method'],
+        }))
+    save_params(records, forecast_dir)
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=['entity_type', 'entity', 'date', 'point', 'lower', 'upper', 'method'])
+    return table, fits
@@ -0,0 +1,175 @@
+"""
+Integer-Coded Geography Dimension
+=================================
+Maps canonical (state, district) names to compact integer IDs:
+
+    state_id     int16   one per canonical state
+    district_id  int16   one per (state, district) pair - 'Aurangabad' in
+                         Bihar and in Maharashtra get DIFFERENT ids
+
+WHY: String hashing dominated our groupby and merge profiles. Fact frames
+carry the int16 IDs; the state/district name columns are categoricals whose
+(sorted) categories come from this dimension, so they too are stored as
+small int codes with each name held once. Names are only materialized for
+display.
+
+STABILITY: The dimension is persisted to `.cache/geography-<rules>.csv` and
+is APPEND-ONLY - a newly seen district gets the next free id and existing ids
+never change, so anything keyed on district_id stays valid across runs.
+<rules> is the name-normalization fingerprint (aadhaar.normalize): when the
+canonical names change, a fresh dimension is started instead of keeping the
+old spellings as orphan ids (the cube is rebuilt then anyway).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.cache import CACHE_DIR
+from aadhaar.normalize import rules_fingerprint
+
+GEOGRAPHY_PATH = os.path.join(CACHE_DIR, f"geography-{rules_fingerprint()}.csv")
+
+GEO_COLUMNS = ['district_id', 'state_id', 'state', 'district']
+
+
+def load_geography(path=GEOGRAPHY_PATH):
+    """The persisted dimension table (empty if none has been built yet)."""
+    if not os.path.exists(path):
+        return pd.DataFrame({'district_id': pd.Series(dtype='int16'), 'state_id': pd.Series(dtype='int16'),
+                             'state': pd.Series(dtype=object), 'district': pd.Series(dtype=object)})
+    geo = pd.read_csv(path, dtype={'state': str, 'district': str}, keep_default_na=False)
+    return geo.astype({'district_id': 'int16', 'state_id': 'int16'})[GEO_COLUMNS]
+
+
+def save_geography(geo, path=GEOGRAPHY_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    geo.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def update_geography(frames, path=GEOGRAPHY_PATH):
+    """
+    Extend the persisted dimension with any (state, district) pairs in
+    `frames` that it does not know yet. Returns the (possibly grown) table.
+
+    New pairs are appended in sorted order, so a fresh build is deterministic.
+    """
+    geo = load_geography(path)
+
+    pairs = [f[['state', 'district']].dropna().drop_duplicates().astype(str)
+             for f in frames if {'state', 'district'}.issubset(f.columns) and len(f)]
+    if not pairs:
+        return geo
+    seen = pd.concat(pairs, ignore_index=True).drop_duplicates()
+
+    known = set(zip(geo['state'], geo['district']))
+    new = seen[[pair not in known for pair in zip(seen['state'], seen['district'])]]
+    if new.empty:
+        return geo
+    new = new.sort_values(['state', 'district'])
+
+    # State ids: keep existing ones, append unseen states
+    state_ids = dict(zip(geo['state'], geo['state_id']))
+    for state in sorted(set(new['state']) - set(state_ids)):
+        state_ids[state] = len(state_ids)
+
+    start = len(geo)
+    new = pd.DataFrame({
+        'district_id': np.arange(start, start + len(new), dtype='int16'),
+        'state_id': new['state'].map(state_ids).astype('int16').to_numpy(),
+        'state': new['state'].to_numpy(),
+        'district': new['district'].to_numpy(),
+    })
+    geo = pd.concat([geo, new], ignore_index=True)
+    save_geography(geo, path)
+    return geo
+
+
+def state_names(geo):
+    """Distinct state names, sorted (categorical categories)."""
+    return sorted(set(geo['state']))
+
+
+def district_names(geo):
+    """Distinct district NAMES, sorted (a name can span states)."""
+    return sorted(set(geo['district']))
+
+
+def _code_arrays(geo):
+    """
+    Integer lookup arrays between ids and name codes.
+
+    Name categories are SORTED (so groupby output stays alphabetical exactly
+    as with plain strings); the ids are append-only. These arrays translate
+    between the two without touching strings per row.
+    """
+    geo = geo.sort_values('district_id')  # ids are dense 0..n-1 (append-only)
+    states, dnames = state_names(geo), district_names(geo)
+    state_code = pd.Categorical(geo['state'], categories=states).codes
+    dname_code = pd.Categorical(geo['district'], categories=dnames).codes
+
+    state_id_by_code = np.full(len(states) + 1, -1, dtype='int16')
+    state_id_by_code[state_code] = geo['state_id'].to_numpy()
+
+    # (state code, district-name code) -> district_id, as a small dense grid;
+    # the extra trailing row/column catches code -1 (unknown name)
+    district_id_grid = np.full((len(states) + 1, len(dnames) + 1), -1, dtype='int16')
+    district_id_grid[state_code, dname_code] = geo['district_id'].to_numpy()
+    return states, dnames, state_code, dname_code, state_id_by_code, district_id_grid
+
+
+def encode_geography(df, geo):
+    """
+    Add int16 `state_id` / `district_id` columns and re-code the name columns
+    as categoricals over the dimension's names.
+
+    After this, grouping/merging on any geography column works on integers.
+    """
+    if not {'state', 'district'}.issubset(df.columns):
+        return df
+
+    states, dnames, _, _, state_id_by_code, district_id_grid = _code_arrays(geo)
+    state = pd.Categorical(df['state'], categories=states)
+    district = pd.Categorical(df['district'], categories=dnames)
+
+    df['state'] = state
+    df['district'] = district
+    df['state_id'] = state_id_by_code[state.codes]
+    df['district_id'] = district_id_grid[state.codes, district.codes]
+    return df
+
+
+def decode_geography(df, geo):
+    """
+    Join state/district names (and state_id) back onto an id-only frame.
+
+    Pure integer indexing: district_id -> name codes -> categoricals over the
+    dimension's names. No per-row strings.
+    """
+    states, dnames, state_code, dname_code, state_id_by_code, _ = _code_arrays(geo)
+    ids = df['district_id'].to_numpy()
+    df['state'] = pd.Categorical.from_codes(state_code[ids], categories=states)
+    df['district'] = pd.Categorical.from_codes(dname_code[ids], categories=dnames)
+    df['state_id'] = state_id_by_code[state_code[ids]]
+    return df
+
+
+def label_districts(data):
+    """
+    `data` indexed by (state, district[, ...]) with the two name levels
+    folded into one 'district' level of "District, State" labels - one per
+    district_id, so same-named districts in different states stay apart.
+    """
+    index = data.index
+    labels = (pd.Index(index.get_level_values('district').astype(str)) + ', '
+              + pd.Index(index.get_level_values('state').astype(str)))
+    rest = [name for name in index.names if name not in ('state', 'district')]
+    if rest:
+        labels = pd.MultiIndex.from_arrays([labels] + [index.get_level_values(name) for name in rest],
+                                           names=['district'] + rest)
+    else:
+        labels = labels.rename('district')
+    return data.set_axis(labels)
@@ -0,0 +1,197 @@
+"""
+Incremental Append of New API Shards
+====================================
+Absorbs a new API drop (e.g. `api_data_aadhar_enrolment_1006030_1012000.csv`)
+into the persisted master cube and rollups without re-running the full build.
+
+HOW:
+1. The cube manifest (aadhaar.artifacts) records every shard - file name and
+   cache key - that went into the cube
+2. Shards on disk are compared with it:
+   - only NEW shards   -> clean just those, build a small cube from them and
+                          add it key-wise into the persisted cube (counts are
+                          additive); formulas and rollups are recomputed
+                          from the merged cube (vectorized, sub-second)
+   - a shard CHANGED or REMOVED, no cube, a version/rules change, or a
+     rebuilt (not just grown) geography
+                       -> full rebuild (old contributions cannot be subtracted)
+   - nothing new       -> nothing to do
+3. The merged cube is saved under the new input hash, so analysis.py,
+   extract_insights.py and app.py pick it up without rebuilding
+
+WHY: Daily drops; the full recompute no longer fits the nightly window.
+
+USAGE:
+    python -m aadhaar.incremental        # called by `run_pipeline.py --incremental`
+"""
+
+import glob
+import os
+
+import pandas as pd
+
+from aadhaar.artifacts import (
+    CUBE_VERSION,
+    INPUT_PATTERNS,
+    cube_fingerprint,
+    current_shards,
+    geography_hash,
+    load_master_cube,
+    read_manifest,
+    save_master_cube,
+)
+from aadhaar.cache import read_shard
+from aadhaar.cleaning import clean_data
+from aadhaar.dedup import drop_duplicate_rows, print_dedup_report, shard_hashes
+from aadhaar.cube import BIO_COLS, DEMO_COLS, ENROL_COLS, add_custom_formulas, add_to_cube, build_master_cube
+from aadhaar.geography import encode_geography, load_geography, update_geography
+from aadhaar.ingestion import BIOMETRIC_PATTERN, DEMOGRAPHIC_PATTERN, ENROLMENT_PATTERN
+from aadhaar.normalize import rules_fingerprint
+from aadhaar.parallel import parallel_map
+from aadhaar.rollups import build_rollups, save_rollups
+from aadhaar.schema import SCHEMA_VERSION, apply_schema
+
+# Cube domain order: (pattern, count columns)
+DOMAINS = [
+    (ENROLMENT_PATTERN, ENROL_COLS),
+    (DEMOGRAPHIC_PATTERN, DEMO_COLS),
+    (BIOMETRIC_PATTERN, BIO_COLS),
+]
+
+
+# ============================================================================
+# CHANGE DETECTION
+# ============================================================================
+def shard_changes(recorded, current):
+    """(new, changed, removed) shard names between two {name: cache key} maps."""
+    new = sorted(name for name in current if name not in recorded)
+    changed = sorted(name for name in current if name in recorded and recorded[name] != current[name])
+    removed = sorted(name for name in recorded if name not in current)
+    return new, changed, removed
+
+
+def plan_update(shards):
+    """
+    Decide what the cube needs for the shards on disk (`shards`, name -> key):
+    ('up-to-date' | 'append' | 'rebuild', new shard names, reason).
+    """
+    manifest = read_manifest()
+    if manifest is None or manifest.get('cube_version') != CUBE_VERSION or 'shards' not in manifest:
+        return 'rebuild', [], "no persisted cube (or an older version)"
+    if manifest.get('schema_version') != SCHEMA_VERSION or manifest.get('rules') != rules_fingerprint():
+        return 'rebuild', [], "schema or name-normalization rules changed"
+    if not _geography_extends(manifest.get('geography')):
+        return 'rebuild', [], "geography dimension was rebuilt"
+
+    new, changed, removed = shard_changes(manifest['shards'], shards)
+    if changed or removed:
+        return 'rebuild', [], f"{len(changed)} changed / {len(removed)} removed shard(s)"
+    if not new:
+        if manifest.get('input_hash') != cube_fingerprint():
+            # Same shards, but the geography has grown since: re-stamp the cube
+            return 'append', [], "geography grew; re-stamping the cube"
+        return 'up-to-date', [], "no new shards"
+    return 'append', new, f"{len(new)} new shard(s)"
+
+
+def _geography_extends(recorded):
+    """True if the persisted geography still starts with the rows the cube was built on."""
+    if recorded is None:
+        return False
+    geo = load_geography().sort_values('district_id')
+    return len(geo) >= recorded['rows'] and geography_hash(geo.head(recorded['rows'])) == recorded['hash']
+
+
+# ============================================================================
+# BUILD / APPEND
+# ============================================================================
+def _empty_domain(cols):
+    """A cleaned, geography-encoded frame with no rows (domain without new shards)."""
+    frame = pd.DataFrame({'date': pd.Series(dtype='datetime64[us]'), 'state': [], 'district': [],
+                          'pincode': pd.Series(dtype='int32'), 'state_id': pd.Series(dtype='int16'),
+                          'district_id': pd.Series(dtype='int16')})
+    for col in cols:
+        frame[col] = pd.Series(dtype='float64')
+    return frame
+
+
+def load_domains(names, seed_names=()):
+    """
+    Cleaned enrolment/demographic/biometric frames from the shards named in
+    `names`, encoded with the updated geography. Returns ([frame per domain], geo).
+
+    Rows repeated across shards are dropped (aadhaar.dedup); when appending,
+    rows already in the cube's shards (`seed_names`) count as seen - from
+    their persisted key hashes (shard_hashes), not by re-reading them.
+    """
+    frames = []
+    for pattern, cols in DOMAINS:
+        shards = sorted(glob.glob(pattern))
+        files = [f for f in shards if os.path.basename(f) in names]
+        if files:
+            raw = parallel_map(read_shard, files)
+            # Stored with the shard cache, so a later append seeds from them without re-reading
+            hashes = [shard_hashes(f, df) for f, df in zip(files, raw)]
+            seed = [shard_hashes(f) for f in shards if os.path.basename(f) in seed_names]
+            parts, report = drop_duplicate_rows(raw, [os.path.basename(f) for f in files],
+                                                seed_hashes=seed, hashes=hashes)
+            print_dedup_report(report)
+            frames.append(clean_data(apply_schema(pd.concat(parts, ignore_index=True))))
+        else:
+            frames.append(None)
+
+    geo = update_geography([f for f in frames if f is not None])
+    frames = [encode_geography(f, geo) if f is not None else _empty_domain(cols)
+              for f, (_, cols) in zip(frames, DOMAINS)]
+    return frames, geo
+
+
+def _publish(master_df, geo, shards):
+    """Formulas, then save the cube + rollups under the new input hash."""
+    master_df = add_custom_formulas(master_df)
+    fingerprint = cube_fingerprint(geo)
+    save_master_cube(master_df, fingerprint, shards=shards, geo=geo)
+    save_rollups(build_rollups(master_df), fingerprint)
+    return master_df
+
+
+def rebuild_cube(shards):
+    """Full build of the cube and rollups from every shard in `shards`."""
+    frames, geo = load_domains(set(shards))
+    return _publish(build_master_cube(*frames, geo=geo), geo, shards)
+
+
+def append_shards(names, shards):
+    """Add the shards in `names` to the persisted cube; returns the new cube (None if unreadable)."""
+    old = load_master_cube(read_manifest()['input_hash'])
+    if old is None:
+        return None
+    frames, geo = load_domains(set(names), seed_names=set(shards) - set(names))
+    delta = build_master_cube(*frames, geo=geo)
+    return _publish(add_to_cube(old, delta, geo), geo, shards)
+
+
+def update_cube(patterns=INPUT_PATTERNS):
+    """Bring the persisted cube up to date with the shards on disk (see module docstring)."""
+    shards = current_shards(patterns)
+    action, new, reason = plan_update(shards)
+    print(f"Master cube: {action} ({reason})")
+    if action == 'up-to-date':
+        return load_master_cube(read_manifest()['input_hash'])
+
+    if action == 'append':
+        for name in new:
+            print(f"  + {name}")
+        master_df = append_shards(new, shards)
+        if master_df is not None:
+            print(f"  Appended. Cube shape: {master_df.shape}")
+            return master_df
+        print("  Persisted cube unreadable - rebuilding")
+
+    master_df = rebuild_cube(shards)
+    print(f"  Rebuilt. Cube shape: {master_df.shape}")
+    return master_df
+
+
+if __name__ == "__main__":
+    update_cube()
@@ -0,0 +1,49 @@
+"""
+Data Ingestion for the UIDAI Aadhaar API Shards
+===============================================
+Locates and loads the raw `dataset/api_data_aadhar_*` CSV shards.
+Shards are read through the columnar cache in `aadhaar.cache`; rows repeated
+by overlapping dumps are dropped by `aadhaar.dedup`.
+"""
+
+import glob
+import os
+
+import pandas as pd
+
+from aadhaar.cache import read_shard
+from aadhaar.dedup import drop_duplicate_rows, print_dedup_report
+from aadhaar.parallel import parallel_map
+from aadhaar.profiling import profiled
+from aadhaar.schema import apply_schema
+
+# ============================================================================
+# RAW SHARD LOCATIONS
+# ============================================================================
+ENROLMENT_PATTERN = 'dataset/api_data_aadhar_enrolment_*.csv'
+DEMOGRAPHIC_PATTERN = 'dataset/api_data_aadhar_demographic_*.csv'
+BIOMETRIC_PATTERN = 'dataset/api_data_aadhar_biometric_*.csv'
+
+
+@profiled('load')
+def load_and_combine(pattern, max_workers=None):
+    """
+    Load and combine multiple CSV files matching a pattern.
+    This helps us combine all enrollment/demographic/biometric files into single DataFrames.
+
+    Shards are read in parallel (bounded process pool) and concatenated in
+    sorted file order, so the result does not depend on scheduling. A row
+    whose (date, state, district, pincode) already appeared - in the same
+    or an earlier shard - is dropped (first copy wins).
+    """
+    files = sorted(glob.glob(pattern))
+    if not files:
+        print(f"[WARNING] No files found for pattern: {pattern}")
+        return pd.DataFrame()
+    df_list = parallel_map(read_shard, files, max_workers)
+    print(f"Loaded {len(files)} files for pattern: {pattern}")
+    df_list, report = drop_duplicate_rows(df_list, [os.path.basename(f) for f in files])
+    print_dedup_report(report)
+    # Shards carry different category sets -> concat falls back to object,
+    # so re-apply the schema to get one shared categorical per column
+    return apply_schema(pd.concat(df_list, ignore_index=True))
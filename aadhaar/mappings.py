@@ -0,0 +1,431 @@
+"""
+Raw -> Canonical Name Mapping Tables
+====================================
+Hand-curated spelling fixes for state and district names found in the UIDAI
+API dumps. Keys are raw names AFTER `clean_text()` (stripped, lowercased,
+single-spaced); values are canonical lowercase names, or None for values
+that are not a valid name at all (rows are dropped).
+
+These tables are the single source of truth for both clean_data.py and
+analysis.py - edit them here. Any edit changes the fingerprint of the
+persisted lookup table in `aadhaar.normalize`, which is then rebuilt.
+"""
+
+# ============================================================================
+# STATE STANDARDIZATION MAPPING
+# ============================================================================
+STATE_MAPPING = {
+    # West Bengal variants
+    'west  bengal': 'west bengal',
+    'west bangal': 'west bengal',
+    'west bengli': 'west bengal',
+    'westbengal': 'west bengal',
+    
+    # Chhattisgarh
+    'chhatisgarh': 'chhattisgarh',
+    
+    # Odisha
+    'orissa': 'odisha',
+    
+    # Uttarakhand
+    'uttaranchal': 'uttarakhand',
+    
+    # Puducherry
+    'pondicherry': 'puducherry',
+    
+    # Tamil Nadu
+    'tamilnadu': 'tamil nadu',
+    
+    # Andaman & Nicobar Islands
+    'andaman & nicobar islands': 'andaman and nicobar islands',
+    
+    # Jammu & Kashmir
+    'jammu & kashmir': 'jammu and kashmir',
+    
+    # Dadra and Nagar Haveli (now merged with Daman & Diu)
+    'dadra & nagar haveli': 'dadra and nagar haveli and daman and diu',
+    'dadra and nagar haveli': 'dadra and nagar haveli and daman and diu',
+    'the dadra and nagar haveli and daman and diu': 'dadra and nagar haveli and daman and diu',
+    'daman & diu': 'dadra and nagar haveli and daman and diu',
+    'daman and diu': 'dadra and nagar haveli and daman and diu',
+    
+    # Invalid city names -> Map to correct state (best effort)
+    'balanagar': 'telangana',          # Balanagar is in Hyderabad, Telangana
+    'darbhanga': 'bihar',              # Darbhanga is in Bihar
+    'jaipur': 'rajasthan',             # Jaipur is in Rajasthan
+    'nagpur': 'maharashtra',           # Nagpur is in Maharashtra
+    'madanapalle': 'andhra pradesh',   # Madanapalle is in Andhra Pradesh
+    'puttenahalli': 'karnataka',       # Puttenahalli is in Bengaluru, Karnataka
+    'raja annamalai puram': 'tamil nadu',  # R.A. Puram is in Chennai, Tamil Nadu
+    
+    # Typos previously only handled by analysis.clean_data()
+    'andhra pradsh': 'andhra pradesh',
+    'telengana': 'telangana',
+    
+    # Invalid numeric
+    '100000': None,  # Will be marked as invalid
+}
+
+# ============================================================================
+# DISTRICT STANDARDIZATION MAPPING
+# ============================================================================
+DISTRICT_MAPPING = {
+    # Ahmedabad
+    'ahmadabad': 'ahmedabad',
+    
+    # Ahmednagar
+    'ahmadnagar': 'ahmednagar',
+    'ahmed nagar': 'ahmednagar',
+    'ahilyanagar': 'ahmednagar',  # Renamed in Maharashtra
+    
+    # Anantapur variants
+    'ananthapur': 'anantapur',
+    'ananthapuramu': 'anantapur',
+    
+    # Angul
+    'anugul': 'angul',
+    'anugul  *': 'angul',
+    
+    # Ashoknagar
+    'ashok nagar': 'ashoknagar',
+    
+    # Trailing asterisks removal (generic patterns handled in clean_text)
+    'auraiya *': 'auraiya',
+    'bagalkot *': 'bagalkot',
+    'baghpat *': 'baghpat',
+    'bokaro *': 'bokaro',
+    'chamarajanagar *': 'chamarajanagar',
+    'chandauli *': 'chandauli',
+    'chitrakoot *': 'chitrakoot',
+    
+    # Baghpat
+    'bagpat': 'baghpat',
+    
+    # Banaskantha
+    'banas kantha': 'banaskantha',
+    
+    # Barabanki
+    'bara banki': 'barabanki',
+    
+    # Bardhaman
+    'barddhaman': 'bardhaman',
+    
+    # Bulandshahr
+    'bulandshahar': 'bulandshahr',
+    
+    # Buldhana
+    'buldana': 'buldhana',
+    
+    # Chamarajanagar
+    'chamrajanagar': 'chamarajanagar',
+    'chamrajnagar': 'chamarajanagar',
+    
+    # Chhatrapati Sambhajinagar
+    'chatrapati sambhaji nagar': 'chhatrapati sambhajinagar',
+    
+    # Chikmagalur - NEW
+    'chickmagalur': 'chikmagalur',
+    'chikkamagaluru': 'chikmagalur',
+    
+    # Chittorgarh
+    'chittaurgarh': 'chittorgarh',
+    
+    # Cooch Behar
+    'coochbehar': 'cooch behar',
+    
+    # Dadra and Nagar Haveli
+    'dadra & nagar haveli': 'dadra and nagar haveli',
+    
+    # Davangere
+    'davanagere': 'davangere',
+    
+    # Invalid entries
+    '100000': None,
+    '?': None,
+    '5th cross': None,
+    'akhera': None,
+    
+    # Raebareli
+    'rae bareli': 'raebareli',
+    'rai bareilly': 'raebareli',
+    'raibarely': 'raebareli',
+    
+    'sahibganj': 'sahebganj',
+    'sant kabir nagar': 'sant kabeer nagar',
+    'sant ravidas nagar': 'sant ravidas nagar (bhadohi)',
+    'sarangarh-bilaigarh': 'sarangarh bilaigarh',
+    'sheopurkalan': 'sheopur',
+    'shi yomi': 'shi-yomi',
+    'siddharthnagar': 'siddharth nagar',
+    'sri ganganagar': 'ganganagar',
+    
+    'y.s.r.': 'ysr kadapa',
+    'y.s.r. kadapa': 'ysr kadapa',
+    'ysr': 'ysr kadapa',
+    
+    # 24 Paraganas
+    '24 paraganas north': 'north 24 parganas',
+    '24 paraganas south': 'south 24 parganas',
+    
+    # Medinipur
+    'pashchim medinipur': 'paschim medinipur',
+    'east midnapore': 'purba medinipur',
+    'east midnapur': 'purba medinipur',
+    'west midnapore': 'paschim medinipur',
+    
+    'baleshwar': 'balasore',
+    'kheri': 'lakhimpur kheri',
+    'faizabad': 'ayodhya',
+    'allahabad': 'prayagraj',
+    
+    # ====== NEW MAPPINGS FROM SECOND PASS ======
+    
+    # Gaurela-Pendra-Marwahi
+    'gaurela-pendra-marwahi': 'gaurella pendra marwahi',
+    
+    # Haridwar
+    'hardwar': 'haridwar',
+    
+    # Hassan
+    'hasan': 'hassan',
+    
+    # Hazaribagh
+    'hazaribag': 'hazaribagh',
+    
+    # Hooghly
+    'hooghiy': 'hooghly',
+    
+    # Jagatsinghpur
+    'jagatsinghapur': 'jagatsinghpur',
+    
+    # Jajpur
+    'jajapur': 'jajpur',
+    
+    # Jalore
+    'jalor': 'jalore',
+    
+    # Janjgir-Champa
+    'janjgir - champa': 'janjgir-champa',
+    'janjgir champa': 'janjgir-champa',
+    
+    # Jhunjhunu
+    'jhunjhunun': 'jhunjhunu',
+    
+    # Ranga Reddy
+    'k.v. rangareddy': 'rangareddy',
+    'k.v.rangareddy': 'rangareddy',
+    
+    # Kanchipuram
+    'kancheepuram': 'kanchipuram',
+    
+    # Kanyakumari
+    'kanniyakumari': 'kanyakumari',
+    
+    # Karimnagar
+    'karim nagar': 'karimnagar',
+    
+    # Kasaragod
+    'kasargod': 'kasaragod',
+    
+    # Khordha
+    'khorda': 'khordha',
+    
+    # Koderma
+    'kodarma': 'koderma',
+    
+    # Kushinagar
+    'kushi nagar': 'kushinagar',
+    
+    # Lahaul and Spiti
+    'lahul and spiti': 'lahaul and spiti',
+    
+    # Singhbhum
+    'east singhbum': 'east singhbhum',
+    
+    # Mahabubnagar
+    'mahabub nagar': 'mahabubnagar',
+    'mahaboobnagar': 'mahabubnagar',
+    
+    # Malerkotla
+    'maler kotla': 'malerkotla',
+    
+    # Mayurbhanj
+    'mayurabhanj': 'mayurbhanj',
+    
+    # Medak / Medchal
+    'medchal malkajgiri': 'medchal-malkajgiri',
+    
+    # Mewat -> Nuh
+    'mewat': 'nuh',
+    
+    # Mirzapur
+    'mirzpur': 'mirzapur',
+    
+    # Moga
+    'mojha': 'moga',
+    
+    # Muzaffarnagar
+    'muzaffar nagar': 'muzaffarnagar',
+    
+    # Nagapattinam
+    'nagapatnam': 'nagapattinam',
+    
+    # Nalanda
+    'naladna': 'nalanda',
+    
+    # Narmada
+    'narmadapuram': 'narmada',
+    
+    # Nilgiris
+    'the nilgiris': 'nilgiris',
+    
+    # Palakkad
+    'palghat': 'palakkad',
+    
+    # Panchkula
+    'panchakula': 'panchkula',
+    
+    # Papum Pare
+    'papumpare': 'papum pare',
+    
+    # Purnia
+    'purnea': 'purnia',
+    
+    # Puruliya
+    'purulia': 'puruliya',
+    
+    # Raichur
+    'raichoor': 'raichur',
+    
+    # Ramgarh
+    'ramghar': 'ramgarh',
+    
+    # Rupnagar
+    'ropar': 'rupnagar',
+    
+    # Samastipur
+    'samasthipur': 'samastipur',
+    
+    # Saran
+    'saaran': 'saran',
+    
+    # Saraikela-Kharsawan
+    'saraikela kharsawan': 'saraikela-kharsawan',
+    'seraikella kharsawan': 'saraikela-kharsawan',
+    
+    # Sitapur
+    'sitapurl': 'sitapur',
+    
+    # Sonipat
+    'sonepat': 'sonipat',
+    
+    # Srikakulam
+    'srikakulum': 'srikakulam',
+    
+    # Supaul
+    'supoul': 'supaul',
+    
+    # Tiruchirapalli
+    'tiruchirappalli': 'tiruchirappalli',
+    'trichy': 'tiruchirappalli',
+    
+    # Tirunelveli
+    'thirunelveli': 'tirunelveli',
+    
+    # Tiruvannamalai
+    'thiruvannamalai': 'tiruvannamalai',
+    
+    # Virudhunagar
+    'virudunagar': 'virudhunagar',
+    
+    # Vizianagaram
+    'vizayanagaram': 'vizianagaram',
+    
+    # Warangal
+    'warangal urban': 'warangal',
+    'warangal rural': 'warangal',
+    
+    # ====== FINAL BATCH - TRUE DUPLICATES ======
+    
+    # Mahabubnagar
+    'mahbubnagar': 'mahabubnagar',
+    
+    # Maharajganj
+    'mahrajganj': 'maharajganj',
+    
+    # Malda/Maldah
+    'maldah': 'malda',
+    
+    # Mamit
+    'mammit': 'mamit',
+    
+    # Medchal-Malkajgiri (fix special character)
+    'medchal?malkajgiri': 'medchal-malkajgiri',
+    
+    # Mohla-Manpur
+    'mohalla-manpur-ambagarh chowki': 'mohla-manpur-ambagarh chouki',
+    
+    # Nabarangpur/Nabarangapur
+    'nabarangapur': 'nabarangpur',
+    
+    # Nagarkurnool
+    'nagar kurnool': 'nagarkurnool',
+    
+    # Nicobar/Nicobars
+    'nicobars': 'nicobar',
+    
+    # North Tripura variations
+    'north': None,  # Invalid standalone
+    
+    # Pakaur -> Pakur
+    'pakaur': 'pakur',
+    
+    # Pali/Palli
+    'palli': 'pali',
+    
+    # Ramanathapuram
+    'ramanathpuram': 'ramanathapuram',
+    
+    # Senapati
+    'senapat': 'senapati',
+    
+    # Shimla
+    'shimoga': 'shivamogga',  # Renamed
+    
+    # South Tripura variations  
+    'south': None,  # Invalid standalone
+    
+    # Sri Potti Sriramulu Nellore
+    'sri potti sriramulu nellore': 'spsr nellore',
+    's.p.s.r nellore': 'spsr nellore',
+    
+    # Subarnapur/Sonapur
+    'subarnapur': 'sonepur',
+    
+    # Surguja
+    'sarguja': 'surguja',
+    
+    # Thane
+    'thana': 'thane',
+    
+    # Thiruvananthapuram
+    'trivandrum': 'thiruvananthapuram',
+    
+    # Vikarabad
+    'vikrabad': 'vikarabad',
+    
+    # Villupuram
+    'viluppuram': 'villupuram',
+    
+    # Wanaparthy
+    'wanaparthi': 'wanaparthy',
+    
+    # West Tripura variations
+    'west': None,  # Invalid standalone
+    
+    # Renamed cities previously only handled by analysis.clean_data()
+    'bangalore': 'bengaluru',
+    'bangalore urban': 'bengaluru urban',
+    'calcutta': 'kolkata',
+    'gurgaon': 'gurugram',
+}
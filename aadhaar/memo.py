@@ -0,0 +1,95 @@
+"""
+On-Disk Memoization of Analysis Phase Results
+=============================================
+Stores what one phase of analysis.py returned (its context outputs) as a
+pickle under `.cache/phases/`, keyed by an INPUT HASH:
+
+    key = sha1(phase name, phase source code, aadhaar library source,
+               keys of every context input, external source key)
+
+The key of a context value is derived from the key of the phase that
+produced it (Merkle style), so nothing large is ever hashed: a changed
+raw shard changes the ingestion key, which changes every key downstream;
+an edited phase changes only its own key and those of its dependents.
+
+NOT TRACKED: module-level helpers or constants of analysis.py outside the
+phase function - re-run with `--no-memo` after changing those.
+
+Set AADHAAR_NO_CACHE=1 to bypass the memo store.
+"""
+
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+
+from aadhaar.cache import CACHE_DIR
+
+MEMO_DIR = os.path.join(CACHE_DIR, 'phases')
+LIBRARY_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_library_fingerprint = None
+
+
+def library_fingerprint():
+    """Hash of the aadhaar package source (computed once per process)."""
+    global _library_fingerprint
+    if _library_fingerprint is None:
+        sha = hashlib.sha1()
+        for path in sorted(glob.glob(os.path.join(LIBRARY_DIR, '*.py'))):
+            with open(path, 'rb') as f:
+                sha.update(os.path.basename(path).encode('utf-8') + b'\0' + f.read())
+        _library_fingerprint = sha.hexdigest()[:16]
+    return _library_fingerprint
+
+
+def phase_key(name, func, input_keys, source_key=''):
+    """Input hash of one phase run (see module docstring)."""
+    sha = hashlib.sha1()
+    for part in [name, inspect.getsource(func), library_fingerprint(), repr(source_key)]:
+        sha.update(part.encode('utf-8') + b'\0')
+    for input_name in sorted(input_keys):
+        sha.update(f"{input_name}={input_keys[input_name]}\0".encode('utf-8'))
+    return sha.hexdigest()[:16]
+
+
+def value_key(phase_hash, output_name):
+    """Key of one context value produced by a phase run."""
+    return hashlib.sha1(f"{phase_hash}:{output_name}".encode('utf-8')).hexdigest()[:16]
+
+
+def memo_path(name, key, memo_dir=MEMO_DIR):
+    return os.path.join(memo_dir, f"{name}-{key}.pkl")
+
+
+def load_memo(name, key, memo_dir=MEMO_DIR):
+    """The memoized outputs of phase `name` for input hash `key`, or None."""
+    if os.environ.get('AADHAAR_NO_CACHE') == '1':
+        return None
+    try:
+        with open(memo_path(name, key, memo_dir), 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def save_memo(name, key, outputs, memo_dir=MEMO_DIR):
+    """Persist `outputs` (temp file + rename) and drop older entries of the phase."""
+    os.makedirs(memo_dir, exist_ok=True)
+    path = memo_path(name, key, memo_dir)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[WARNING] Could not memoize phase {name}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+    for stale in glob.glob(os.path.join(memo_dir, f"{name}-*.pkl")):
+        if stale != path:
+            os.remove(stale)
+    return True
@@ -0,0 +1,242 @@
+"""
+Analytical Metrics and Custom Formulas
+======================================
+External context proxies (UDISE+, TRAI), Accessibility-Adjusted Compliance,
+correlation significance, enrolment velocity and the composite Aadhaar
+Health Score.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.outofcore import cube_groupby
+from aadhaar.profiling import profiled
+
+
+# --- EXTERNAL CONTEXT INTEGRATION ---
+def load_context_proxies(districts, states):
+    """
+    Integrate external context indicators from UDISE+ and TRAI data.
+
+    SOURCE MAP:
+    - Schools: UDISE+ (Unified District Information System for Education)
+    - Internet: TRAI Internet Subscription Report
+
+    NOTE: Simulates external data when API unavailable.
+    In production, replace with actual API calls.
+    """
+    np.random.seed(42)  # Reproducible results
+
+    context_data = {}
+
+    # 1. School Density Index (UDISE+ Proxy)
+    # Range: 0.2 - 0.9 (higher = more schools per sq km)
+    # Correlation: Urban districts have higher density
+    for district in districts:
+        # Simulate based on district name characteristics
+        if any(urban in district.lower() for urban in ['urban', 'metro', 'city', 'mumbai', 'delhi', 'bengaluru', 'kolkata', 'chennai']):
+            base_density = 0.75
+        elif any(rural in district.lower() for rural in ['rural', 'north', 'south', 'east', 'west']):
+            base_density = 0.35
+        else:
+            base_density = 0.5
+
+        # Add random variation ±0.15
+        noise = np.random.uniform(-0.15, 0.15)
+        school_density = np.clip(base_density + noise, 0.2, 0.9)
+        context_data[district] = {'school_density_index': round(school_density, 3)}
+
+    # 2. Digital Literacy Score (TRAI Proxy)
+    # Range: 0.1 - 0.8 (higher = better internet penetration)
+    # Correlation: State-level, southern & western states higher
+    high_digital_states = ['Karnataka', 'Kerala', 'Tamil Nadu', 'Maharashtra', 'Gujarat', 'Telangana', 'Delhi']
+    medium_digital_states = ['Andhra Pradesh', 'West Bengal', 'Punjab', 'Haryana', 'Rajasthan']
+
+    state_digital_scores = {}
+    for state in states:
+        if state in high_digital_states:
+            base_score = 0.65
+        elif state in medium_digital_states:
+            base_score = 0.45
+        else:
+            base_score = 0.25
+
+        noise = np.random.uniform(-0.1, 0.1)
+        state_digital_scores[state] = round(np.clip(base_score + noise, 0.1, 0.8), 3)
+
+    return context_data, state_digital_scores
+
+
+def _shaped_like(values, *inputs):
+    """`values` as a Series if any input is one, a float for scalar inputs, else an array."""
+    for x in inputs:
+        if isinstance(x, pd.Series):
+            return pd.Series(values, index=x.index)
+    return values.item() if values.ndim == 0 else values
+
+
+def calculate_accessibility_adjusted_compliance(compliance_rate, school_density_index):
+    """
+    Accessibility-Adjusted Compliance (AAC)
+
+    FORMULA: AAC = Compliance_Rate / School_Density_Index
+
+    INTERPRETATION:
+    - Low AAC + High School Density = NEGLECT (resources available but unused)
+    - Low AAC + Low School Density = ACCESS ISSUE (need mobile vans)
+    - High AAC = Good performance regardless of infrastructure
+
+    APPLICATION:
+    Flag "High Priority Intervention" when:
+    - Compliance < 30% AND School_Density > 0.7
+    (High infrastructure, low usage = NEGLECT)
+
+    Takes scalars or aligned arrays/Series (one value per district); a
+    non-positive density leaves the compliance rate unadjusted.
+    """
+    compliance = np.asarray(compliance_rate, dtype='float64')
+    density = np.asarray(school_density_index, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aac = np.where(density > 0, np.round(compliance / density, 2), compliance)
+    return _shaped_like(aac, compliance_rate, school_density_index)
+
+
+def classify_opportunity_neglect(compliance_rate, school_density, digital_literacy):
+    """
+    Classify districts into Opportunity vs Neglect categories.
+
+    CATEGORIES:
+    1. HIGH_PRIORITY_INTERVENTION: Low compliance + High infrastructure
+    2. OPPORTUNITY_ZONE: Low compliance + Low infrastructure (needs resources)
+    3. SUCCESS_STORY: High compliance + High infrastructure
+    4. OVERPERFORMER: High compliance + Low infrastructure (learn from them)
+
+    Takes scalars or aligned arrays/Series, like the AAC formula.
+    """
+    low_compliance = np.asarray(compliance_rate, dtype='float64') < 30
+    high_density = np.asarray(school_density, dtype='float64') > 0.7
+    category = np.select(
+        [low_compliance & high_density,   # Neglect
+         low_compliance,                  # Needs resources
+         high_density],                   # Model districts
+        ['HIGH_PRIORITY_INTERVENTION', 'OPPORTUNITY_ZONE', 'SUCCESS_STORY'],
+        default='OVERPERFORMER',          # Learn from them
+    ).astype(object)
+    return _shaped_like(category, compliance_rate, school_density, digital_literacy)
+
+
+def corr_with_pvalue(df):
+    """Calculate correlation matrix with p-values."""
+    from scipy import stats as scipy_stats
+
+    cols = df.columns
+    corr_matrix = pd.DataFrame(index=cols, columns=cols, dtype=float)
+    pval_matrix = pd.DataFrame(index=cols, columns=cols, dtype=float)
+
+    for i, c1 in enumerate(cols):
+        for j, c2 in enumerate(cols):
+            if i == j:
+                corr_matrix.loc[c1, c2] = 1.0
+                pval_matrix.loc[c1, c2] = 0.0
+            else:
+                corr, pval = scipy_stats.pearsonr(df[c1], df[c2])
+                corr_matrix.loc[c1, c2] = corr
+                pval_matrix.loc[c1, c2] = pval
+
+    return corr_matrix.astype(float), pval_matrix.astype(float)
+
+
+VELOCITY_WINDOWS = (1, 4, 13)
+
+
+@profiled('groupby')
+def enrollment_velocity(weekly, windows=VELOCITY_WINDOWS):
+    """
+    Enrolment Velocity and Acceleration (all districts in one pass)
+
+    FORMULA: velocity_kw = (E_t - E_t-k) / (E_t-k + 1) x 100
+             acceleration = velocity_1w(t) - velocity_1w(t-1)   (second difference, in pp)
+    where E_t is the district's enrolments in its latest week t.
+
+    weekly: one row per (district, week) with an 'enrollments' column, e.g.
+            query_rollup(rollups, ('district',), 'W', columns=['total_enrol'])
+
+    HOW: Weeks a district has no cube rows for are filled in as 0 enrolments
+    (between its first and last week), so shift(k) is exactly k weeks back;
+    then one sorted groupby-shift per window. A window reaching back before
+    the district's first week is NaN.
+
+    Returns one row per district with at least two weeks: recent, the
+    velocity_<k>w columns and acceleration.
+    """
+    series = weekly.set_index(['district', 'week'])['enrollments'].sort_index()
+    weeks = series.index.get_level_values('week')
+    span = weeks.to_series(index=series.index.get_level_values('district')).groupby(level=0, observed=True).agg(['min', 'max'])
+    n_weeks = ((span['max'] - span['min']).dt.days // 7 + 1).to_numpy()
+
+    # Complete each district's calendar: first week + 0, 1, ... n-1 weeks
+    offsets = np.arange(n_weeks.sum()) - np.repeat(np.cumsum(n_weeks) - n_weeks, n_weeks)
+    calendar = pd.MultiIndex.from_arrays([
+        span.index.repeat(n_weeks),
+        span['min'].to_numpy().repeat(n_weeks) + pd.to_timedelta(offsets * 7, unit='D'),
+    ], names=['district', 'week'])
+    panel = series.reindex(calendar, fill_value=0).reset_index()
+
+    by_district = panel.groupby('district', observed=True, sort=False)['enrollments']
+    for k in windows:
+        previous = by_district.shift(k)
+        panel[f'velocity_{k}w'] = (panel['enrollments'] - previous) / (previous + 1) * 100
+    previous = by_district.shift(1)
+    week_over_week = (panel['enrollments'] - previous) / (previous + 1) * 100
+    panel['acceleration'] = week_over_week - week_over_week.groupby(panel['district'], observed=True).shift(1)
+
+    latest = panel.groupby('district', observed=True, sort=False).tail(1)
+    latest = latest[n_weeks >= 2].rename(columns={'enrollments': 'recent'})
+    return latest.drop(columns='week').reset_index(drop=True)
+
+
+@profiled('groupby')
+def calculate_health_score(master_df):
+    """
+    Aadhaar Health Score (Composite District Metric)
+
+    FORMULA:
+    Health = 0.4×Compliance + 0.3×Activity + 0.3×DataQuality
+
+    Where:
+    - Compliance = Biometric update rate (bio/enrol)
+    - Activity = Total transactions (normalized)
+    - DataQuality = Inverse of coefficient of variation (consistency)
+
+    Returns the per-district components sorted by health score (best first).
+    `master_df` may also be an out-of-core aadhaar.outofcore.PartitionedCube.
+    """
+    district_health = cube_groupby(master_df, 'district', {
+        'total_enrol': 'sum',
+        'total_bio': 'sum',
+        'total_activity': ['sum', 'std', 'mean']
+    }).fillna(0)
+
+    district_health.columns = ['enrol', 'bio', 'activity_sum', 'activity_std', 'activity_mean']
+
+    # Component 1: Compliance Score (0-100)
+    district_health['compliance_score'] = (district_health['bio'] / (district_health['enrol'] + 1)) * 100
+    district_health['compliance_score'] = district_health['compliance_score'].clip(0, 100)
+
+    # Component 2: Activity Score (0-100, normalized)
+    max_activity = district_health['activity_sum'].max()
+    district_health['activity_score'] = (district_health['activity_sum'] / (max_activity + 1)) * 100
+
+    # Component 3: Data Quality Score (0-100, inverse of CV)
+    district_health['cv'] = district_health['activity_std'] / (district_health['activity_mean'] + 1)
+    district_health['quality_score'] = (1 - district_health['cv'].clip(0, 1)) * 100
+
+    # COMPOSITE HEALTH SCORE
+    district_health['health_score'] = (
+        0.4 * district_health['compliance_score'] +
+        0.3 * district_health['activity_score'] +
+        0.3 * district_health['quality_score']
+    )
+
+    # Rank districts
+    return district_health.sort_values('health_score', ascending=False)
@@ -0,0 +1,86 @@
+"""
+Machine Learning Models
+=======================
+Forecasting, anomaly detection, spatial clustering, hot-spot regression and
+district typology clustering used by the analytical engine.
+
+WHY lazy imports: statsmodels and scikit-learn are heavy. Importing them
+inside each function means scripts that only need ingestion or cleaning
+never pay for them.
+"""
+
+from aadhaar.profiling import profiled
+
+
+@profiled('fit')
+def holt_winters_forecast(ts_data, horizon=90, seasonal_periods=7):
+    """
+    Holt-Winters (additive trend + additive weekly seasonality) forecast.
+
+    Returns the fitted model and a `horizon`-day forecast series.
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    model = ExponentialSmoothing(ts_data, trend='add', seasonal='add', seasonal_periods=seasonal_periods).fit()
+    return model, model.forecast(horizon)
+
+
+@profiled('fit')
+def detect_anomalies(values, contamination=0.01):
+    """
+    Isolation Forest anomaly labels for a 1-D daily volume series.
+
+    Returns an array of labels: -1 = anomaly, 1 = normal.
+    """
+    from sklearn.ensemble import IsolationForest
+
+    iso = IsolationForest(contamination=contamination, random_state=42)
+    return iso.fit_predict(values.reshape(-1, 1))
+
+
+@profiled('fit')
+def detect_spatial_clusters(fraud_coords, eps=1000, min_samples=3):
+    """
+    DBSCAN over (pincode, total_demo) pairs.
+
+    Returns the number of clusters found (noise label -1 excluded).
+    """
+    from sklearn.cluster import DBSCAN
+
+    db = DBSCAN(eps=eps, min_samples=min_samples).fit(fraud_coords)
+    return len(set(db.labels_)) - (1 if -1 in db.labels_ else 0)
+
+
+@profiled('fit')
+def train_hotspot_model(X, y):
+    """
+    Random Forest regressor for per-district enrollment hot-spots.
+
+    Returns (model, X_train, X_test, y_train, y_test, R² on the test split).
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Random Forest: Ensemble of decision trees
+    # WHY: Handles non-linear relationships between features
+    rf = RandomForestRegressor(n_estimators=100, random_state=42)
+    rf.fit(X_train, y_train)
+    return rf, X_train, X_test, y_train, y_test, rf.score(X_test, y_test)
+
+
+@profiled('fit')
+def cluster_districts(features, n_clusters=4):
+    """
+    K-Means over standardized district features.
+
+    WHY standardization: Enrollment numbers (100,000s) would dominate
+    ratio (0-10) without scaling.
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    scaled = StandardScaler().fit_transform(features)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+    return kmeans.fit_predict(scaled)
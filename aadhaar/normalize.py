@@ -0,0 +1,210 @@
+"""
+Canonical Name Normalization Engine
+===================================
+ONE normalizer for state/district names, shared by clean_data.py (cleaned
+CSVs), aadhaar.cleaning.clean_data (in-memory frames), extract_insights.py
+and app.py - so every frame agrees on the same canonical names.
+
+RULES (aadhaar.mappings):
+    raw -> clean_text() -> STATE_MAPPING / DISTRICT_MAPPING -> canonical
+    canonical is stored in display form: title-cased, joining words kept
+    lowercase ('West Bengal', 'Jammu and Kashmir' - as the baseline names
+    and the GeoJSON ST_NM the choropleth joins on)
+
+LOOKUP TABLE:
+- raw -> canonical results are memoized in a lookup table, built once and
+  persisted to `.cache/normalize/lookup-v<VERSION>-<fingerprint>.json`
+- The fingerprint hashes NORMALIZER_VERSION + both mapping tables, so any
+  rule edit starts a fresh table automatically
+- Canonical names map to themselves, so already-clean frames (e.g. the
+  cleaned CSVs) are detected and passed through without re-cleaning
+
+WHY per distinct value: there are millions of rows but only a few thousand
+distinct raw spellings. factorize -> normalize uniques -> map back calls the
+regex-heavy rules a few thousand times and is then pure integer indexing.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.cache import CACHE_DIR
+from aadhaar.mappings import DISTRICT_MAPPING, STATE_MAPPING
+
+# Bump when clean_text()/display rules change (mapping edits are detected automatically)
+NORMALIZER_VERSION = 2
+
+# Lowercase in display names unless first ('Andaman and Nicobar Islands')
+SMALL_WORDS = {'and', 'of'}
+
+LOOKUP_DIR = os.path.join(CACHE_DIR, 'normalize')
+
+NAME_COLUMNS = ('state', 'district')
+
+
+# ============================================================================
+# RULES
+# ============================================================================
+def clean_text(text):
+    """Clean and standardize text"""
+    if pd.isna(text):
+        return None
+    text = str(text).strip().lower()
+    # Remove multiple spaces
+    text = re.sub(r'\s+', ' ', text)
+    # Remove trailing asterisks and special chars
+    text = re.sub(r'\s*\*\s*$', '', text)
+    return text
+
+
+def standardize_state(state):
+    """Standardize state name"""
+    if pd.isna(state):
+        return None
+    cleaned = clean_text(state)
+    if cleaned in STATE_MAPPING:
+        return STATE_MAPPING[cleaned]
+    return cleaned
+
+
+def standardize_district(district):
+    """Standardize district name"""
+    if pd.isna(district):
+        return None
+    cleaned = clean_text(district)
+    if cleaned in DISTRICT_MAPPING:
+        return DISTRICT_MAPPING[cleaned]
+    return cleaned
+
+
+def display_name(canonical):
+    """Canonical lowercase name -> display form ('jammu and kashmir' -> 'Jammu and Kashmir')."""
+    if not canonical:
+        return None
+    first, *rest = canonical.title().split(' ')
+    return ' '.join([first] + [word.lower() if word.lower() in SMALL_WORDS else word for word in rest])
+
+
+RULES = {
+    'state': standardize_state,
+    'district': standardize_district,
+}
+
+
+# ============================================================================
+# PERSISTED LOOKUP TABLE
+# ============================================================================
+_lookup = None
+_lookup_dirty = False
+
+
+def rules_fingerprint():
+    """Short hash of the normalizer version and both mapping tables."""
+    payload = json.dumps([NORMALIZER_VERSION, STATE_MAPPING, DISTRICT_MAPPING], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def lookup_path():
+    return os.path.join(LOOKUP_DIR, f"lookup-v{NORMALIZER_VERSION}-{rules_fingerprint()}.json")
+
+
+def get_lookup():
+    """{'state': {raw: canonical}, 'district': {...}} - loaded once per process."""
+    global _lookup
+    if _lookup is None:
+        _lookup = {kind: {} for kind in RULES}
+        try:
+            with open(lookup_path(), encoding='utf-8') as f:
+                _lookup.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+    return _lookup
+
+
+def save_lookup():
+    """Persist new raw -> canonical entries (atomic write; no-op if unchanged)."""
+    global _lookup_dirty
+    if not _lookup_dirty:
+        return
+    path = lookup_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(_lookup, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp, path)
+        _lookup_dirty = False
+    except OSError as e:
+        print(f"[WARNING] Could not save normalization lookup {path}: {e}")
+
+
+def canonicalize(raw, kind):
+    """Canonical display name of one raw value (None = invalid)."""
+    global _lookup_dirty
+    table = get_lookup()[kind]
+    key = str(raw)
+    if key not in table:
+        canonical = display_name(RULES[kind](raw))
+        table[key] = canonical
+        if canonical is not None and canonical not in table:
+            # Canonical names map to themselves (unless a mapping chains on)
+            table[canonical] = display_name(RULES[kind](canonical))
+        _lookup_dirty = True
+    return table[key]
+
+
+# ============================================================================
+# VECTORIZED APPLICATION
+# ============================================================================
+def _from_unique_results(series, codes, results):
+    """Rebuild a categorical column from row codes and per-unique results."""
+    canon_codes, canon_uniques = pd.factorize(pd.Series(results, dtype=object))
+    # code -1 (null input) must stay null -> append a trailing -1 slot
+    lookup = np.append(canon_codes, -1)
+    return pd.Series(
+        pd.Categorical.from_codes(lookup[codes], categories=canon_uniques),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def normalize_column(series, kind):
+    """
+    Canonical names for a 'state' or 'district' column (categorical result).
+
+    STEPS:
+    1. factorize: rows -> integer codes + array of distinct raw values
+    2. normalize: lookup table (rules on a miss) for each distinct value only
+    3. map back: re-factorize the canonical names (several raw spellings
+       collapse to one) and index by the row codes
+
+    Columns whose values are all canonical already are returned as-is
+    (only cast to category) - no remapping. Nulls and invalid names -> NaN.
+    """
+    codes, uniques = pd.factorize(series)
+    results = [canonicalize(value, kind) for value in uniques]
+    if all(result == value for result, value in zip(results, uniques)):
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    return _from_unique_results(series, codes, results)
+
+
+def normalize_names(df, drop_invalid=True):
+    """
+    Normalize the state/district columns of `df` with the canonical engine.
+
+    Rows whose name maps to None (e.g. '100000', a bare 'South') are dropped
+    unless drop_invalid=False. The lookup table is persisted afterwards.
+    """
+    for col in NAME_COLUMNS:
+        if col in df.columns:
+            df[col] = normalize_column(df[col], col)
+    if drop_invalid:
+        present = [col for col in NAME_COLUMNS if col in df.columns]
+        if present:
+            df = df.dropna(subset=present)
+    save_lookup()
+    return df
@@ -0,0 +1,273 @@
+"""
+Out-of-Core Master Cube (Month by Month)
+========================================
+Builds, persists and aggregates the master cube one calendar month at a
+time, so the full wide cube is never held in memory.
+
+WHY MONTHS: The cube key is (day, district, pincode) and day is its major
+component (aadhaar.cube), so the rows of different months never share a
+key. Building the cube from each month's slice of the three domain frames
+and concatenating the slices in month order gives exactly the cube of the
+in-memory build - and exactly the month partitions of the persisted
+artifact (aadhaar.artifacts).
+
+BUILD (`build_cube_out_of_core`):
+1. Per month: build the month's cube, count its total_demo values
+2. fraud_index threshold = cube-wide 95th percentile of total_demo, read
+   off the merged value counts (exact - same interpolation as
+   Series.quantile)
+3. Per month again: rebuild, add the custom formulas with that threshold,
+   write the Parquet partition, build the month's rollups
+4. Combine the monthly rollups (every rollup column is a sum)
+
+Peak memory: the domain frames + ONE month of cube, instead of the whole
+cube plus its rollup and Parquet copies.
+
+AGGREGATION: `PartitionedCube` is a read-only view of the artifact that
+streams its partitions (with their row positions as index). The `cube_*`
+helpers take either a DataFrame or a PartitionedCube, so analysis phases
+are written once: groupby aggregations are merged from per-partition
+partials (sum/count/min/max directly, mean as sum/count, std from the
+partial means and variances), filters and sums are concatenated.
+
+Results equal the in-memory path; float means/stds can differ in the last
+bits (summation order).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.artifacts import (CUBE_DIR, CUBE_VERSION, UNKNOWN_MONTH, read_manifest,
+                               save_cube_partitions)
+from aadhaar.cache import _parquet_available
+from aadhaar.cube import add_custom_formulas, build_master_cube
+from aadhaar.profiling import profiled, span
+from aadhaar.rollups import build_rollups, combine_rollups, save_rollups
+
+FRAUD_QUANTILE = 0.95
+MERGEABLE_AGGS = {'sum', 'count', 'size', 'mean', 'std', 'min', 'max'}
+
+
+def out_of_core_enabled():
+    """AADHAAR_OUT_OF_CORE=1 (or analysis.py --out-of-core) selects this backend."""
+    return os.environ.get('AADHAAR_OUT_OF_CORE') == '1'
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+def month_slices(frames):
+    """
+    (month label, [slice of each frame]) for every month present in any of
+    `frames`, in date order; rows without a date come last ('unknown').
+    """
+    codes = []
+    for df in frames:
+        dates = df['date']
+        code = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype='float64')
+        codes.append(np.where(np.isnan(code), np.inf, code))
+    months = np.unique(np.concatenate(codes)) if codes else np.empty(0)
+    for month in months:
+        label = UNKNOWN_MONTH if np.isinf(month) else f"{int(month) // 12}-{int(month) % 12 + 1:02d}"
+        yield label, [df[code == month] for df, code in zip(frames, codes)]
+
+
+def quantile_from_counts(counts, q):
+    """
+    Series.quantile(q) (linear interpolation) of the values whose
+    multiplicities are `counts` (value -> count, e.g. merged value_counts).
+    """
+    counts = counts[counts > 0].sort_index()
+    if counts.empty:
+        return np.nan
+    values = counts.index.to_numpy(dtype='float64')
+    ends = np.cumsum(counts.to_numpy())
+    position = (ends[-1] - 1) * q
+    lower = int(np.floor(position))
+    lo = values[np.searchsorted(ends, lower, side='right')]
+    hi = values[np.searchsorted(ends, min(lower + 1, ends[-1] - 1), side='right')]
+    return lo + (hi - lo) * (position - lower)
+
+
+@profiled('merge')
+def build_cube_out_of_core(enrolment_df, demographic_df, biometric_df, geo, fingerprint,
+                           cube_dir=CUBE_DIR):
+    """
+    Build the master cube month by month straight into the persisted
+    artifact (see module docstring).
+
+    Returns (PartitionedCube, rollups), or None when the artifact cannot be
+    written (no pyarrow) - the caller then builds in memory.
+    """
+    frames = [enrolment_df, demographic_df, biometric_df]
+    if not _parquet_available() or all(df.empty for df in frames):
+        return None
+
+    # Pass 1: cube-wide total_demo distribution (for the fraud threshold)
+    demo_counts = None
+    with span('count total_demo by month', 'groupby'):
+        for _, parts in month_slices(frames):
+            counts = build_master_cube(*parts, geo=geo)['total_demo'].value_counts()
+            demo_counts = counts if demo_counts is None else demo_counts.add(counts, fill_value=0)
+    threshold = quantile_from_counts(demo_counts, FRAUD_QUANTILE)
+
+    # Pass 2: rebuild each month, add formulas, write it, roll it up
+    partials = []
+
+    def partitions():
+        for month, parts in month_slices(frames):
+            cube = add_custom_formulas(build_master_cube(*parts, geo=geo), demo_threshold=threshold)
+            partials.append(build_rollups(cube))
+            print(f"  month {month}: {len(cube):,} cube rows")
+            yield month, cube
+
+    if not save_cube_partitions(partitions(), fingerprint, cube_dir, geo=geo):
+        return None
+    rollups = combine_rollups(partials)
+    save_rollups(rollups, fingerprint)
+    return PartitionedCube(cube_dir), rollups
+
+
+# ============================================================================
+# PARTITIONED VIEW
+# ============================================================================
+class PartitionedCube:
+    """Read-only, month-partitioned view of the persisted master cube."""
+
+    def __init__(self, cube_dir=CUBE_DIR, manifest=None):
+        self.cube_dir = cube_dir
+        self.manifest = manifest or read_manifest(cube_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"No master cube artifact in {cube_dir}")
+        self.columns = pd.Index(list(self.manifest['columns']))
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def shape(self):
+        return (len(self), len(self.columns))
+
+    def partitions(self, columns=None):
+        """Each month partition as a frame, indexed by its row positions in the cube."""
+        start = 0
+        for p in self.manifest['partitions']:
+            part = pd.read_parquet(os.path.join(self.cube_dir, p['path']), columns=columns)
+            part.index = pd.RangeIndex(start, start + len(part))
+            start += len(part)
+            yield part
+
+
+def open_partitioned_cube(fingerprint, cube_dir=CUBE_DIR):
+    """A PartitionedCube of the artifact if it was built from the same inputs, else None."""
+    if os.environ.get('AADHAAR_NO_CACHE') == '1' or not _parquet_available():
+        return None
+    manifest = read_manifest(cube_dir)
+    if (manifest is None or manifest.get('cube_version') != CUBE_VERSION
+            or manifest.get('input_hash') != fingerprint or not manifest.get('partitions')):
+        return None
+    if not all(os.path.exists(os.path.join(cube_dir, p['path'])) for p in manifest['partitions']):
+        return None
+    return PartitionedCube(cube_dir, manifest)
+
+
+# ============================================================================
+# AGGREGATION HELPERS (DataFrame or PartitionedCube)
+# ============================================================================
+def _as_list(funcs):
+    return [funcs] if isinstance(funcs, str) else list(funcs)
+
+
+def cube_sum(cube, columns):
+    """cube[columns].sum() as a Series."""
+    if isinstance(cube, pd.DataFrame):
+        return cube[columns].sum()
+    return sum((part.sum() for part in cube.partitions(columns)), pd.Series(0.0, index=columns))
+
+
+def cube_quantile(cube, column, q):
+    """cube[column].quantile(q), exact (from merged value counts) for a PartitionedCube."""
+    if isinstance(cube, pd.DataFrame):
+        return cube[column].quantile(q)
+    counts = None
+    for part in cube.partitions([column]):
+        vc = part[column].value_counts()
+        counts = vc if counts is None else counts.add(vc, fill_value=0)
+    return quantile_from_counts(counts, q) if counts is not None else np.nan
+
+
+def cube_filter(cube, predicate, columns=None):
+    """The rows where `predicate(frame)` is True (original row positions as index)."""
+    if isinstance(cube, pd.DataFrame):
+        rows = cube[predicate(cube)]
+        return rows if columns is None else rows[columns]
+    parts = [part[predicate(part)] for part in cube.partitions()]
+    rows = pd.concat(parts) if parts else pd.DataFrame(columns=cube.columns)
+    return rows if columns is None else rows[columns]
+
+
+def cube_map(cube, func, columns=None):
+    """
+    func(frame) for a DataFrame; for a PartitionedCube, func of each month
+    partition, concatenated. Only valid when `func` never combines rows of
+    different months (e.g. a groupby on the month).
+    """
+    if isinstance(cube, pd.DataFrame):
+        return func(cube if columns is None else cube[columns])
+    return pd.concat([func(part) for part in cube.partitions(columns)])
+
+
+def cube_groupby(cube, by, spec):
+    """
+    cube.groupby(by, observed=True).agg(spec), for `spec` a dict of
+    column -> aggregation name(s) from MERGEABLE_AGGS. Column layout
+    (flat, or (column, agg) when any value is a list) matches pandas.
+    """
+    if isinstance(cube, pd.DataFrame):
+        return cube.groupby(by, observed=True).agg(spec)
+
+    by_cols = [by] if isinstance(by, str) else list(by)
+    wanted = {col: _as_list(funcs) for col, funcs in spec.items()}
+    unknown = {f for funcs in wanted.values() for f in funcs} - MERGEABLE_AGGS
+    if unknown:
+        raise ValueError(f"Not mergeable across partitions: {sorted(unknown)}")
+
+    # Per partition and group: count, sum, min/max, and mean + var for std
+    partial_spec = {col: ['count', 'sum'] + [f for f in ('min', 'max', 'mean', 'var')
+                                             if f in funcs or (f in ('mean', 'var') and 'std' in funcs)]
+                    for col, funcs in wanted.items()}
+    partials = pd.concat([part.groupby(by_cols, observed=True).agg(partial_spec)
+                          for part in cube.partitions(by_cols + list(wanted))])
+    levels = list(range(len(by_cols)))
+
+    def per_group(values, how):
+        return values.groupby(level=levels, observed=True, sort=True).agg(how)
+
+    result = {}
+    for col, funcs in wanted.items():
+        n = per_group(partials[(col, 'count')], 'sum')
+        total = per_group(partials[(col, 'sum')], 'sum')
+        for f in funcs:
+            if f in ('sum', 'min', 'max'):
+                value = per_group(partials[(col, f)], f)
+            elif f in ('count', 'size'):
+                value = n.astype('int64')
+            elif f == 'mean':
+                value = total / n
+            else:  # std (ddof=1): M2 = sum of (n_i - 1) var_i + n_i (mean_i - mean)^2
+                part_n = partials[(col, 'count')]
+                mean = (total / n).reindex(partials.index).to_numpy()
+                spread = partials[(col, 'var')].fillna(0) * (part_n - 1) + part_n * (partials[(col, 'mean')] - mean) ** 2
+                value = np.sqrt(per_group(spread, 'sum') / (n - 1)).where(n > 1)
+            result[(col, f)] = value
+    out = pd.DataFrame(result)
+    out.index.names = by_cols
+    if not any(isinstance(funcs, (list, tuple)) for funcs in spec.values()):
+        out.columns = [col for col, _ in out.columns]
+    return out
@@ -0,0 +1,51 @@
+"""
+Bounded Parallel Map over Shards
+================================
+Runs one function per item (usually per CSV shard) across a process pool and
+returns the results IN INPUT ORDER, so concatenated frames are identical to
+a sequential run.
+
+WHY processes: CSV parsing and the per-row name standardization are CPU
+bound and hold the GIL, so threads would still use one core.
+
+WORKERS: min(items, AADHAAR_WORKERS or cpu_count, 8). The cap keeps peak
+memory bounded - every worker holds one parsed shard.
+
+PLATFORMS: Uses the 'fork' start method. Where fork is unavailable
+(Windows) a thread pool is used instead, because spawned children would
+re-run the unguarded top-level code of the calling script.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def worker_count(n_items, max_workers=None):
+    """Number of workers to use for `n_items` tasks."""
+    if max_workers is None:
+        max_workers = int(os.environ.get('AADHAAR_WORKERS', 0)) or min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    return max(1, min(n_items, max_workers))
+
+
+def parallel_map(func, items, max_workers=None):
+    """
+    [func(item) for item in items], spread over a bounded process pool.
+
+    Falls back to a plain loop for a single item or a single worker.
+    """
+    items = list(items)
+    workers = worker_count(len(items), max_workers)
+    if workers == 1:
+        return [func(item) for item in items]
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    with pool:
+        # Executor.map yields results in submission order
+        return list(pool.map(func, items))
@@ -0,0 +1,56 @@
+"""
+Compare Two Run Profiles
+========================
+Per-step wall time, CPU and memory changes between two profiles written by
+aadhaar.profiling - e.g. the runs before and after a new shard drop.
+Repeated steps (many rollup queries) are summed per name; steps under
+`min_seconds` in both runs are hidden.
+
+USAGE:
+    python -m aadhaar.profile_diff output/profiles/analysis-A.json output/profiles/analysis-B.json
+"""
+
+import json
+import sys
+
+
+def diff_profiles(path_a, path_b, min_seconds=0.05):
+    """Print per-step wall/CPU/memory changes between two profile files."""
+    with open(path_a, encoding='utf-8') as f:
+        a = json.load(f)
+    with open(path_b, encoding='utf-8') as f:
+        b = json.load(f)
+
+    def by_name(profile):
+        # Repeated steps (e.g. many rollup queries) are summed per name
+        steps = {}
+        for r in profile['records']:
+            s = steps.setdefault(r['name'], {'wall_s': 0.0, 'cpu_s': 0.0, 'rss_delta_mb': 0.0, 'calls': 0})
+            s['wall_s'] += r['wall_s']
+            s['cpu_s'] += r['cpu_s']
+            s['rss_delta_mb'] += r['rss_delta_mb'] or 0.0
+            s['calls'] += 1
+        return steps
+
+    steps_a, steps_b = by_name(a), by_name(b)
+    print(f"{'step':<60} {'wall A':>8} {'wall B':>8} {'change':>8} {'mem B-A':>8}")
+    for name in list(steps_a) + [n for n in steps_b if n not in steps_a]:
+        sa, sb = steps_a.get(name), steps_b.get(name)
+        wall_a = sa['wall_s'] if sa else 0.0
+        wall_b = sb['wall_s'] if sb else 0.0
+        if max(wall_a, wall_b) < min_seconds:
+            continue
+        mem = (sb['rss_delta_mb'] if sb else 0.0) - (sa['rss_delta_mb'] if sa else 0.0)
+        change = f"{(wall_b - wall_a) / wall_a:+.0%}" if wall_a else 'new'
+        if sb is None:
+            change = 'gone'
+        print(f"{name[:60]:<60} {wall_a:>8.2f} {wall_b:>8.2f} {change:>8} {mem:>+8.1f}")
+    print(f"{'peak RSS (MB)':<60} {a['peak_rss_mb']!s:>8} {b['peak_rss_mb']!s:>8}")
+
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python -m aadhaar.profile_diff PROFILE_A.json PROFILE_B.json")
+        sys.exit(1)
+    diff_profiles(sys.argv[1], sys.argv[2])
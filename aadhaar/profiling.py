@@ -0,0 +1,229 @@
+"""
+Lightweight Run Profiling (time, CPU, memory, rows)
+===================================================
+Records, for every analysis phase, script section and major library step
+(merges, groupbys, model fits), how long it took and what it cost:
+
+    wall_s        elapsed seconds
+    cpu_s         CPU seconds of this process + reaped worker processes
+    rss_mb        resident memory at the end of the step
+    rss_delta_mb  resident memory added by the step
+    peak_rss_mb   process high-water mark so far (OS counter; per-step
+                  peaks would need a sampling thread - the delta + the
+                  monotonically growing peak show where it jumped)
+    rows_in/out   size of the frame(s) in and out, where there is one
+
+Each run writes `output/profiles/<script>-<timestamp>.json` (+ `.csv`; the
+directory is gitignored and only the newest PROFILE_KEEP runs per script are
+kept), so two runs - e.g. before and after a new shard drop - can be compared:
+
+    python -m aadhaar.profile_diff output/profiles/analysis-A.json output/profiles/analysis-B.json
+
+HOW TO INSTRUMENT:
+    with span('merge enrolment+demo', rows=len(df)) as s:   # nested blocks
+        out = ...
+        s.rows_out = len(out)
+
+    @profiled('fit')                                        # library functions
+    def train_hotspot_model(X, y): ...
+
+    section('Analysis 2: Age Pyramid')                      # top-level scripts:
+                                                            # ends the previous section
+
+Overhead is two clock reads and one /proc read per step. Set
+AADHAAR_PROFILE=0 to skip writing the profile files.
+"""
+
+import csv
+import functools
+import json
+import os
+import platform
+import re
+import sys
+import time
+from datetime import datetime
+
+PROFILE_DIR = os.path.join('output', 'profiles')
+PROFILE_KEEP = 10  # newest runs kept per script
+FIELDS = ['name', 'kind', 'depth', 'wall_s', 'cpu_s', 'rss_mb', 'rss_delta_mb', 'peak_rss_mb', 'rows_in', 'rows_out']
+
+_records = []
+_stack = []
+_section = None
+_started = datetime.now()
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ============================================================================
+# MEASUREMENTS
+# ============================================================================
+def _psutil_process():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process()
+
+
+def rss_mb():
+    """Current resident set size in MB (None if the platform offers no cheap way)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        process = _psutil_process()
+        return process.memory_info().rss / 2**20 if process else None
+
+
+def peak_rss_mb():
+    """Process high-water mark in MB."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10  # bytes on macOS, KB elsewhere
+    process = _psutil_process()
+    info = process.memory_info() if process else None
+    return getattr(info, 'peak_wset', info.rss) / 2**20 if info else None
+
+
+def cpu_seconds():
+    """CPU time of this process plus its finished children (parallel_map workers)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def row_count(value):
+    """len() of a frame/array/series argument or result, else None."""
+    if hasattr(value, 'shape') and getattr(value, 'ndim', 0) >= 1:
+        return int(value.shape[0])
+    return None
+
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+
+# ============================================================================
+# SPANS
+# ============================================================================
+class span:
+    """Context manager recording one (possibly nested) step."""
+
+    def __init__(self, name, kind='step', rows=None):
+        self.name = name
+        self.kind = kind
+        self.rows_in = rows
+        self.rows_out = None
+
+    def __enter__(self):
+        self.path = ' > '.join([s.name for s in _stack] + [self.name])
+        self.depth = len(_stack)
+        _stack.append(self)
+        self._rss = rss_mb()
+        self._cpu = cpu_seconds()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        cpu = cpu_seconds() - self._cpu
+        rss = rss_mb()
+        _stack.remove(self)
+        _records.append({
+            'name': self.path,
+            'kind': self.kind,
+            'depth': self.depth,
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),
+            'rss_mb': _round(rss, 1),
+            'rss_delta_mb': _round(rss - self._rss, 1) if rss is not None and self._rss is not None else None,
+            'peak_rss_mb': _round(peak_rss_mb(), 1),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+        })
+        return False
+
+
+def profiled(kind, name=None):
+    """Decorator: record every call of a function as a span (rows from its frame args/result)."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            rows = [row_count(a) for a in args]
+            rows = [r for r in rows if r is not None]
+            with span(label, kind, rows=sum(rows) if rows else None) as s:
+                result = func(*args, **kwargs)
+                s.rows_out = row_count(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def section(name):
+    """Top-level scripts: end the current section span (if any) and start `name`."""
+    global _section
+    end_section()
+    _section = span(name, 'section').__enter__()
+    return _section
+
+
+def end_section():
+    global _section
+    if _section is not None:
+        _section.__exit__(None, None, None)
+        _section = None
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+def write_profile(script, directory=PROFILE_DIR):
+    """Write this run's records as JSON + CSV; returns the JSON path (None if disabled)."""
+    end_section()
+    if os.environ.get('AADHAAR_PROFILE') == '0':
+        return None
+
+    finished = datetime.now()
+    profile = {
+        'script': script,
+        'started': _started.isoformat(timespec='seconds'),
+        'finished': finished.isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'peak_rss_mb': _round(peak_rss_mb(), 1),
+        'records': _records,
+    }
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f"{script}-{_started:%Y%m%d-%H%M%S}")
+    with open(f"{stem}.json", 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=1)
+    with open(f"{stem}.csv", 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(_records)
+    prune_profiles(script, directory)
+
+    top = sorted((r for r in _records if r['depth'] == 0), key=lambda r: -r['wall_s'])[:5]
+    print(f"\nProfile written to {stem}.json  (peak RSS {profile['peak_rss_mb']} MB)")
+    for r in top:
+        print(f"  {r['wall_s']:>8.2f}s  {r['name']}")
+    return f"{stem}.json"
+
+
+def prune_profiles(script, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+    """Delete all but the newest `keep` profiles (JSON + CSV) of `script`."""
+    pattern = re.compile(rf"{re.escape(script)}-\d{{8}}-\d{{6}}\.json$")
+    runs = sorted(f for f in os.listdir(directory) if pattern.match(f))  # timestamps sort by name
+    for name in runs[:-keep] if keep else runs:
+        for path in (os.path.join(directory, name), os.path.join(directory, name[:-len('.json')] + '.csv')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
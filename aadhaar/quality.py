@@ -0,0 +1,148 @@
+"""
+Data-Quality Scanner (Trust Metric)
+===================================
+Scores EVERY entity (district, pincode) for patterns typical of data-entry
+errors or fabricated numbers, from its daily activity series, in one
+grouped pass per check - no per-entity loop, no sampling.
+
+CHECKS (on the entity's days in date order):
+    cv              std / (mean + 1) of daily activity; < LOW_CV = suspiciously uniform
+    round_share     share of active days whose count is a multiple of ROUND_BASE
+    benford         first-digit distribution of the active-day counts vs Benford's
+                    law P(d) = log10(1 + 1/d): mean absolute deviation (MAD) and
+                    chi-square p-value (8 dof); flagged when BOTH are off. Only
+                    evaluated when the counts span BENFORD_MIN_ORDERS orders of
+                    magnitude (p5..p95) - a steady series is not Benford anyway
+    longest_repeat  longest run of consecutive active days with the SAME count
+                    (counts >= REPEAT_MIN_COUNT; runs of 1s are just low volume)
+    zero_streak     longest run of REPORTING days (dates present anywhere in the
+                    scan) without activity between the entity's first and last
+                    active day - a sparse extract does not count as a zero streak.
+                    Flagged when >= ZERO_STREAK days AND unlikely at the entity's
+                    own activity rate p: span x (1 - p)^streak < ZERO_STREAK_P
+
+A check is only EVALUATED with enough days (MIN_DAYS, BENFORD_MIN_VALUES);
+quality_score = 100 x share of evaluated checks passed.
+
+USAGE:
+    table = scan_quality(daily_activity, 'district')   # Series indexed (district, date)
+"""
+
+import numpy as np
+import pandas as pd
+
+from aadhaar.profiling import profiled
+
+ROUND_BASE = 100
+MIN_DAYS = 10                 # round/repeat/zero checks need more active days than this
+BENFORD_MIN_VALUES = 100      # chi-square needs >= 5 expected counts for digit 9
+BENFORD_MIN_ORDERS = 1.5      # log10(p95 / p5) of the active-day counts
+
+LOW_CV = 0.1
+ROUND_SHARE = 0.2
+BENFORD_MAD = 0.015           # Nigrini's first-digit nonconformity threshold
+BENFORD_P = 0.001
+REPEAT_RUN = 5
+REPEAT_MIN_COUNT = 10
+ZERO_STREAK = 14
+ZERO_STREAK_P = 0.01
+
+BENFORD = np.log10(1 + 1 / np.arange(1, 10))
+CHECKS = ('low_cv', 'round_bias', 'benford', 'repeats', 'zero_streak')
+
+
+def first_digits(values):
+    """Leading digit (1-9) of each positive value."""
+    values = np.asarray(values, dtype='float64')
+    scale = 10.0 ** np.floor(np.log10(values))
+    digits = np.floor(values / scale)
+    # log10 of exact powers of ten can land a hair either side
+    digits = np.where(digits >= 10, digits // 10, digits)
+    digits = np.where(digits < 1, np.floor(values * 10 / scale), digits)
+    return digits.astype('int64')
+
+
+@profiled('groupby')
+def scan_quality(daily, entity):
+    """
+    Quality table for every `entity` in `daily`, a Series of activity
+    counts indexed by (entity, date) - one value per entity and day.
+
+    Returns a DataFrame indexed by entity: days, active_days, mean, cv,
+    round_share, benford_mad, benford_p, benford_orders, longest_repeat,
+    longest_zero_streak, one boolean column per check in CHECKS, checks
+    (how many were evaluated) and quality_score.
+    """
+    from scipy.stats import chi2
+
+    frame = daily.dropna().sort_index().rename('value').reset_index()
+    grouped = frame.groupby(entity, observed=True, sort=True)['value']
+    table = grouped.agg(days='count', mean='mean', std='std')
+    table['cv'] = table['std'] / (table['mean'] + 1)
+
+    # Active days only from here on (in entity, date order)
+    active = frame[frame['value'] > 0]
+    key = active[entity]
+    by_entity = active.groupby(entity, observed=True, sort=True)
+    table['active_days'] = by_entity.size().reindex(table.index, fill_value=0)
+
+    is_round = (active['value'] % ROUND_BASE == 0)
+    table['round_share'] = is_round.groupby(key, observed=True).mean()
+
+    # Benford: entity x digit counts in one groupby
+    digits = pd.Series(first_digits(active['value']), index=active.index)
+    counts = (active.groupby([key, digits], observed=True).size().unstack(fill_value=0)
+              .reindex(columns=range(1, 10), fill_value=0))
+    n = counts.sum(axis=1).to_numpy()[:, None]
+    expected = n * BENFORD
+    table['benford_mad'] = pd.Series(np.abs(counts.to_numpy() / n - BENFORD).mean(axis=1), index=counts.index)
+    chi_square = pd.Series(((counts.to_numpy() - expected) ** 2 / expected).sum(axis=1), index=counts.index)
+    table['benford_p'] = pd.Series(chi2.sf(chi_square, df=8), index=counts.index)
+    spread = by_entity['value'].quantile([0.05, 0.95]).unstack()
+    table['benford_orders'] = np.log10(spread[0.95] / spread[0.05])
+
+    # Runs of identical counts on consecutive active days
+    same = (key == key.shift()) & (active['value'] == active['value'].shift())
+    run = (~same).cumsum()
+    run_length = run.map(run.value_counts()).where(active['value'] >= REPEAT_MIN_COUNT, 1)
+    table['longest_repeat'] = run_length.groupby(key, observed=True).max()
+
+    # Zero streaks: reporting days skipped between consecutive active days
+    reporting_day = pd.Series(np.searchsorted(np.sort(frame['date'].unique()), active['date']), index=active.index)
+    gap = reporting_day.groupby(key, observed=True).diff() - 1
+    table['longest_zero_streak'] = gap.groupby(key, observed=True).max().reindex(table.index).fillna(0)
+    first_last = reporting_day.groupby(key, observed=True).agg(['min', 'max'])
+    span = (first_last['max'] - first_last['min'] + 1).reindex(table.index)
+    streak_chance = span * (1 - table['active_days'] / span) ** table['longest_zero_streak']
+
+    enough = table['active_days'] > MIN_DAYS
+    evaluated = pd.DataFrame({
+        'low_cv': table['std'].notna(),
+        'round_bias': enough,
+        'benford': (table['active_days'] >= BENFORD_MIN_VALUES) & (table['benford_orders'] >= BENFORD_MIN_ORDERS),
+        'repeats': enough,
+        'zero_streak': enough,
+    })
+    failed = pd.DataFrame({
+        'low_cv': table['cv'] < LOW_CV,
+        'round_bias': table['round_share'] > ROUND_SHARE,
+        'benford': (table['benford_mad'] > BENFORD_MAD) & (table['benford_p'] < BENFORD_P),
+        'repeats': table['longest_repeat'] >= REPEAT_RUN,
+        'zero_streak': (table['longest_zero_streak'] >= ZERO_STREAK) & (streak_chance < ZERO_STREAK_P),
+    }) & evaluated
+    for check in CHECKS:
+        table[check] = failed[check]
+    table['checks'] = evaluated.sum(axis=1)
+    table['quality_score'] = (100 * (1 - failed.sum(axis=1) / table['checks'].where(table['checks'] > 0))).fillna(100)
+    return table.drop(columns='std')
+
+
+def quality_table(entities):
+    """One table for several scans: {entity type: scan_quality(...)} stacked with an entity_type column."""
+    frames = []
+    for entity_type, table in entities.items():
+        frame = table.reset_index().rename(columns={table.index.name: 'entity'})
+        frame['entity'] = frame['entity'].astype(str)
+        frame.insert(0, 'entity_type', entity_type)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
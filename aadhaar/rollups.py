@@ -0,0 +1,244 @@
+"""
+Pre-Aggregated Rollup Lattice
+=============================
+Aggregates of the master cube materialized ONCE, at four grains:
+
+    district_day    (state, district) x day
+    district_week   (state, district) x week   (weeks end on Sunday, as pd.Grouper(freq='W'))
+    state_month     state x month              (labelled by the month's first day)
+    national_day    day
+
+Every rollup carries the SUMS of the count columns and totals, plus `rows`
+(the number of cube rows folded in) and the sums of the per-row formulas
+(Saturation_Index, efficiency_score, fraud_index), so their cube-level
+means are exact: mean = sum / rows.
+
+QUERYING: `query_rollup(rollups, by=('state',), freq='M', ...)` picks the
+SMALLEST rollup that still has the dimensions and time grain asked for
+(day serves week/month, anything serves 'no time'), re-aggregates it and
+returns the result. Consumers that only need district level or coarser
+never touch the fact rows.
+
+PERSISTENCE: Rollups are stored next to the master cube artifact in
+`.cache/master_cube/rollups/` under the same input hash (aadhaar.artifacts),
+so they are invalidated together with it.
+
+WHY: analysis.py, the three domain modules, extract_insights.py and app.py
+each recomputed the same district/state/daily groupbys from row level.
+"""
+
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from aadhaar.artifacts import CUBE_DIR
+from aadhaar.cache import _parquet_available
+from aadhaar.cube import BIO_COLS, DEMO_COLS, ENROL_COLS
+from aadhaar.profiling import profiled
+from aadhaar.schema import RECORD_SCHEMAS
+
+ROLLUP_DIR = os.path.join(CUBE_DIR, 'rollups')
+MANIFEST_NAME = 'manifest.json'
+
+SUM_COLUMNS = ENROL_COLS + DEMO_COLS + BIO_COLS + ['total_enrol', 'total_demo', 'total_bio', 'total_activity']
+MEAN_COLUMNS = ['Saturation_Index', 'efficiency_score', 'fraud_index']
+
+# name -> (geography dimensions, time grain)
+LATTICE = {
+    'district_day': (('state', 'district'), 'D'),
+    'district_week': (('state', 'district'), 'W'),
+    'state_month': (('state',), 'M'),
+    'national_day': ((), 'D'),
+}
+
+# Which requested time grains each stored grain can answer (None = no time axis)
+SERVES = {
+    'D': {'D', 'W', 'M', None},
+    'W': {'W', None},
+    'M': {'M', None},
+}
+
+# Integer ids carried alongside the name dimensions
+DIMENSION_IDS = {'state': 'state_id', 'district': 'district_id'}
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+def period_label(dates, freq):
+    """
+    Label each date with its period: the day itself ('D'), the Sunday ending
+    its week ('W', same labels as pd.Grouper(freq='W')) or the first day of
+    its month ('M'). NaT stays NaT.
+    """
+    if freq == 'D':
+        return dates.dt.normalize()
+    if freq == 'W':
+        return dates.dt.to_period('W-SUN').dt.end_time.dt.normalize().astype(dates.dtype)
+    if freq == 'M':
+        return dates.dt.to_period('M').dt.start_time.astype(dates.dtype)
+    raise ValueError(f"Unknown rollup time grain: {freq!r}")
+
+
+def build_rollup(master_df, dims, freq):
+    """One rollup of `master_df` at (dims x freq)."""
+    keys = []
+    for dim in dims:
+        keys.append(dim)
+        if DIMENSION_IDS[dim] in master_df.columns:
+            keys.append(DIMENSION_IDS[dim])
+    values = [c for c in SUM_COLUMNS + MEAN_COLUMNS if c in master_df.columns]
+
+    frame = master_df[keys + values].copy()
+    frame['date'] = period_label(master_df['date'], freq)
+    frame['rows'] = 1
+    # dropna=False: rows without a valid date still count towards the geography totals
+    grouped = frame.groupby(keys + ['date'], observed=True, dropna=False, sort=True)
+    return grouped[values + ['rows']].sum().reset_index()
+
+
+@profiled('groupby')
+def build_rollups(master_df):
+    """The whole lattice as {name: DataFrame}."""
+    return {name: build_rollup(master_df, dims, freq) for name, (dims, freq) in LATTICE.items()}
+
+
+@profiled('groupby')
+def combine_rollups(partials):
+    """
+    One lattice from the lattices of disjoint slices of the cube (e.g. its
+    month partitions): every column is a sum, so the partial rows are
+    concatenated and re-summed per key. Same keys, order and dtypes as
+    build_rollups on the whole cube.
+    """
+    combined = {}
+    for name in LATTICE:
+        frame = pd.concat([p[name] for p in partials], ignore_index=True)
+        keys = [c for c in frame.columns if c not in SUM_COLUMNS + MEAN_COLUMNS + ['rows']]
+        grouped = frame.groupby(keys, observed=True, dropna=False, sort=True)
+        combined[name] = grouped[[c for c in frame.columns if c not in keys]].sum().reset_index()
+    return combined
+
+
+# ============================================================================
+# QUERY
+# ============================================================================
+def closest_rollup(rollups, by=(), freq=None):
+    """Name of the smallest rollup that has all of `by` and can answer `freq`."""
+    candidates = [
+        name for name, (dims, grain) in LATTICE.items()
+        if name in rollups and set(by) <= set(dims) and freq in SERVES[grain]
+    ]
+    if not candidates:
+        raise ValueError(f"No rollup serves by={tuple(by)}, freq={freq!r}")
+    return min(candidates, key=lambda name: len(rollups[name]))
+
+
+@profiled('groupby')
+def query_rollup(rollups, by=(), freq=None, columns=None, means=()):
+    """
+    Aggregate to (`by` x `freq`) from the closest rollup.
+
+    by:      geography dimensions, e.g. ('district',) or ('state',) - grouping
+             by 'district' alone merges same-named districts across states,
+             exactly like master_df.groupby('district')
+    freq:    None, 'D', 'W' or 'M' (the result gets a 'date' index level)
+    columns: summed columns (default: all SUM_COLUMNS)
+    means:   per-row formula columns to return as cube-level means
+
+    Returns a DataFrame indexed by `by` (+ 'date'), like the equivalent
+    groupby on master_df.
+    """
+    name = closest_rollup(rollups, by, freq)
+    frame = rollups[name]
+    columns = list(SUM_COLUMNS if columns is None else columns)
+    keys = list(by)
+    if freq is not None:
+        if freq != LATTICE[name][1]:
+            frame = frame.assign(date=period_label(frame['date'], freq))
+        keys.append('date')
+
+    if not keys:
+        totals = frame[columns + list(means) + ['rows']].sum()
+        result = totals[columns].to_frame().T
+        for col in means:
+            result[col] = totals[col] / totals['rows']
+        return result
+
+    grouped = frame.groupby(keys, observed=True)[columns + list(means) + ['rows']].sum()
+    result = grouped[columns].copy()
+    for col in means:
+        result[col] = grouped[col] / grouped['rows']
+    return result
+
+
+def domain_totals(rollups, by, domain, columns=None, df=None):
+    """
+    Rollup equivalent of `df.groupby(by, observed=True)[columns].sum()` for
+    ONE domain ('enrolment', 'demographic' or 'biometric'), as int64.
+
+    The lattice spans all three domains, so groups where this domain has no
+    activity (all of its count columns zero) are dropped - like a district
+    that is absent from that domain's frame. With `rollups=None` the sums
+    come from the row-level `df` instead.
+    """
+    domain_cols = list(RECORD_SCHEMAS[domain])
+    columns = domain_cols if columns is None else list(columns)
+    if rollups is None:
+        return df.groupby(by, observed=True)[columns].sum()
+
+    by = (by,) if isinstance(by, str) else tuple(by)
+    result = query_rollup(rollups, by, columns=list(dict.fromkeys(domain_cols + columns)))
+    present = (result[domain_cols] != 0).any(axis=1)
+    return result.loc[present, columns].astype('int64')
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+def save_rollups(rollups, fingerprint, rollup_dir=ROLLUP_DIR):
+    """Write each rollup as Parquet plus a manifest (temp dir + rename)."""
+    if not _parquet_available():
+        return False
+
+    tmp_dir = f"{rollup_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        for name, frame in rollups.items():
+            frame.to_parquet(os.path.join(tmp_dir, f"{name}.parquet"), index=False)
+        manifest = {
+            'input_hash': fingerprint,
+            'grains': {name: {'dims': list(LATTICE[name][0]), 'freq': LATTICE[name][1], 'rows': len(frame)}
+                       for name, frame in rollups.items()},
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(rollup_dir, ignore_errors=True)
+        os.replace(tmp_dir, rollup_dir)
+    except Exception as e:
+        print(f"[WARNING] Could not write rollups {rollup_dir}: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+    return True
+
+
+def load_rollups(fingerprint, rollup_dir=ROLLUP_DIR):
+    """The persisted lattice if built from the same inputs, else None."""
+    if os.environ.get('AADHAAR_NO_CACHE') == '1' or not _parquet_available():
+        return None
+    try:
+        with open(os.path.join(rollup_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('input_hash') != fingerprint or set(manifest.get('grains', {})) != set(LATTICE):
+        return None
+
+    try:
+        return {name: pd.read_parquet(os.path.join(rollup_dir, f"{name}.parquet")) for name in LATTICE}
+    except Exception:
+        return None
@@ -0,0 +1,114 @@
+"""
+Declared Column Schema for the Aadhaar Record Types
+===================================================
+One explicit dtype per column instead of letting `pd.read_csv` infer them.
+
+WHY: Inference gives object strings for state/district (one Python str per
+row), int64 pincodes and counts, and a `date` string that has to be parsed
+later with slow per-row `dayfirst` inference. With ~5M rows across the three
+frames the compact schema cuts resident memory by more than half.
+
+SCHEMA:
+- date:     datetime64, parsed at read time with the API's '%d-%m-%Y' format
+- state:    category   (~36 distinct values)
+- district: category   (~800 distinct values)
+- pincode:  int32      (6 digits fit easily)
+- state_id, district_id: int16 (cleaned CSVs only)
+- counts:   uint16 for the child buckets, uint32 for the adult buckets
+
+CAUTION: Unsigned counts wrap around on subtraction. Widen with
+`.astype('int64')` before computing differences of raw counts.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bump when the schema changes so cached typed shards are rebuilt
+SCHEMA_VERSION = 1
+
+DATE_FORMAT = '%d-%m-%Y'
+
+KEY_DTYPES = {
+    'state': 'category',
+    'district': 'category',
+    'pincode': 'int32',
+}
+
+# Geography ids written by clean_data.py (see aadhaar.geography)
+GEO_ID_DTYPES = {
+    'state_id': 'int16',
+    'district_id': 'int16',
+}
+
+RECORD_SCHEMAS = {
+    'enrolment': {
+        'age_0_5': 'uint16',
+        'age_5_17': 'uint16',
+        'age_18_greater': 'uint32',
+    },
+    'demographic': {
+        'demo_age_5_17': 'uint16',
+        'demo_age_17_': 'uint32',
+    },
+    'biometric': {
+        'bio_age_5_17': 'uint16',
+        'bio_age_17_': 'uint32',
+    },
+}
+
+COUNT_DTYPES = {col: dtype for schema in RECORD_SCHEMAS.values() for col, dtype in schema.items()}
+
+
+def record_type(columns):
+    """Identify enrolment/demographic/biometric from a frame's count columns."""
+    for name, schema in RECORD_SCHEMAS.items():
+        if set(schema).issubset(columns):
+            return name
+    return None
+
+
+def read_csv_typed(path, **kwargs):
+    """
+    `pd.read_csv` with the declared schema enforced.
+
+    state/district are parsed straight into categoricals; everything else is
+    coerced by `apply_schema` so malformed values become 0 / NaT instead of
+    failing the whole file.
+    """
+    dtype = {'state': 'category', 'district': 'category'}
+    return apply_schema(pd.read_csv(path, dtype=dtype, **kwargs))
+
+
+def iter_csv_typed(path, chunksize):
+    """Stream a CSV in `chunksize`-row pieces, each with the schema enforced."""
+    dtype = {'state': 'category', 'district': 'category'}
+    for chunk in pd.read_csv(path, dtype=dtype, chunksize=chunksize):
+        yield apply_schema(chunk)
+
+
+def apply_schema(df):
+    """
+    Cast whichever schema columns are present to their declared dtypes.
+
+    Safe to call on already-typed frames (it is then a cheap no-op).
+    """
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT, errors='coerce')
+
+    for col in ('state', 'district'):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    if 'pincode' in df.columns and df['pincode'].dtype != np.int32:
+        df['pincode'] = pd.to_numeric(df['pincode'], errors='coerce').fillna(0).astype('int32')
+
+    for col, dtype in GEO_ID_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(-1).astype(dtype)
+
+    for col, dtype in COUNT_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            values = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            df[col] = values.clip(0, np.iinfo(dtype).max).astype(dtype)
+
+    return df
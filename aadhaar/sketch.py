@@ -0,0 +1,70 @@
+"""
+Mergeable Distinct-Count Sketch
+===============================
+K-Minimum-Values (KMV) sketch for "how many unique states/districts?" when
+the data is seen one chunk (or one shard) at a time.
+
+HOW IT WORKS:
+- Every value is hashed to a uniform 64-bit integer
+- The sketch keeps only the k SMALLEST distinct hashes seen so far
+- Two sketches merge by taking the k smallest of their union
+
+FORMULA: distinct ≈ (k - 1) / (h_k / 2^64), where h_k is the k-th smallest hash
+
+WHY: A set of raw names grows with the data; a sketch is at most k integers
+(32 KB for k=4096) no matter how many rows stream through. While fewer than
+k distinct values have been seen the count is EXACT, which covers the
+~36 states and ~1,000 raw district spellings of the UIDAI dumps.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_K = 4096
+
+
+class DistinctSketch:
+    """KMV distinct-count sketch; exact below `k` distinct values."""
+
+    def __init__(self, k=DEFAULT_K):
+        self.k = k
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def update(self, values):
+        """Add an array/Series of values (nulls are ignored). Returns self."""
+        values = pd.Series(values).dropna()
+        if len(values):
+            # hash_array on the string form -> same hash in every process/run
+            h = pd.util.hash_array(values.astype(str).to_numpy(dtype=object), categorize=True)
+            self._keep_smallest(np.unique(h))
+        return self
+
+    def merge(self, other):
+        """Fold another sketch (same k) into this one. Returns self."""
+        self._keep_smallest(other.hashes)
+        return self
+
+    def _keep_smallest(self, new_hashes):
+        merged = np.union1d(self.hashes, new_hashes)  # sorted + unique
+        self.hashes = merged[:self.k]
+
+    def is_exact(self):
+        return len(self.hashes) < self.k
+
+    def count(self):
+        """Estimated number of distinct values."""
+        if self.is_exact():
+            return len(self.hashes)
+        kth = float(self.hashes[self.k - 1]) / 2.0**64
+        return int(round((self.k - 1) / kth))
+
+    def __len__(self):
+        return self.count()
+
+
+def merge_sketches(sketches, k=DEFAULT_K):
+    """Merge an iterable of sketches into a new one."""
+    merged = DistinctSketch(k)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,206 @@
+"""
+Embedded SQL over the Cleaned Data, Master Cube and Rollups
+===========================================================
+An in-process DuckDB connection with one view per dataset, so ad-hoc
+questions ("how many districts?", "top states by infant enrolments") are a
+SQL query against columnar storage instead of a new pandas script that
+re-parses every CSV.
+
+VIEWS:
+    enrolment, demographic, biometric   cleaned datasets (dataset_cleaned/): the
+                                        memory-mapped Arrow files (aadhaar.columnar),
+                                        scanned in place; the CSV if no fresh copy
+    master_cube                         the persisted cube's month partitions (Parquet)
+    district_day, district_week,        the rollup lattice (aadhaar.rollups) - the
+    state_month, national_day           cheapest source for district/state questions
+
+A view whose files are missing is simply not created; a master cube or
+rollups built from other inputs than the shards now on disk is still
+exposed, with a warning (re-run analysis.py to refresh it).
+
+USAGE:
+    from aadhaar.sql import query
+    query("SELECT state, SUM(age_0_5) AS infants FROM enrolment "
+          "GROUP BY state ORDER BY infants DESC LIMIT 5")
+
+    python -m aadhaar.sql "SELECT COUNT(DISTINCT district) FROM master_cube"
+    python -m aadhaar.sql --tables                 # views, rows, columns
+    python -m aadhaar.sql -f audit.sql --csv out.csv
+    python -m aadhaar.sql                          # interactive prompt
+
+WHY lazy import: duckdb is optional; nothing else in the library needs it.
+"""
+
+import json
+import os
+import time
+
+from aadhaar.artifacts import CUBE_DIR, MANIFEST_NAME, cube_fingerprint, read_manifest
+from aadhaar.columnar import arrow_path, map_arrow_table
+from aadhaar.rollups import LATTICE, ROLLUP_DIR
+
+CLEANED_DIR = 'dataset_cleaned'
+CLEANED_FILES = {
+    'enrolment': 'enrollment_cleaned.csv',
+    'demographic': 'demographic_cleaned.csv',
+    'biometric': 'biometric_cleaned.csv',
+}
+
+_connection = None
+_signature = None
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("The SQL layer needs duckdb: pip install duckdb") from None
+    return duckdb
+
+
+def _quote(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _source_signature():
+    """(path, size, mtime) of every file behind a view - a change means reconnect."""
+    paths = [os.path.join(CLEANED_DIR, name) for name in CLEANED_FILES.values()]
+    paths += [arrow_path(p) for p in paths]
+    paths += [os.path.join(CUBE_DIR, MANIFEST_NAME), os.path.join(ROLLUP_DIR, MANIFEST_NAME)]
+    signature = []
+    for path in paths:
+        if os.path.exists(path):
+            st = os.stat(path)
+            signature.append((path, st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+
+# ============================================================================
+# CONNECTION
+# ============================================================================
+def connect(database=':memory:'):
+    """A new DuckDB connection with every available view registered."""
+    con = _duckdb().connect(database)
+    fingerprint = None
+
+    for name, file_name in CLEANED_FILES.items():
+        csv_path = os.path.join(CLEANED_DIR, file_name)
+        table = map_arrow_table(csv_path)
+        if table is not None:
+            con.register(name, table)  # scanned straight from the mapped buffers
+        elif os.path.exists(csv_path):
+            con.execute(f"CREATE VIEW {name} AS SELECT * FROM read_csv_auto({_quote(csv_path)}, dateformat='%d-%m-%Y')")
+
+    manifest = read_manifest(CUBE_DIR)
+    if manifest and manifest.get('partitions'):
+        paths = [os.path.join(CUBE_DIR, p['path']) for p in manifest['partitions']]
+        con.execute(f"CREATE VIEW master_cube AS SELECT * FROM read_parquet([{', '.join(map(_quote, paths))}])")
+        fingerprint = cube_fingerprint()
+        if manifest.get('input_hash') != fingerprint:
+            print("[WARNING] master_cube was built from other inputs than the shards on disk - re-run analysis.py")
+
+    try:
+        with open(os.path.join(ROLLUP_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            rollup_manifest = json.load(f)
+    except (OSError, ValueError):
+        rollup_manifest = None
+    if rollup_manifest:
+        for name in LATTICE:
+            path = os.path.join(ROLLUP_DIR, f"{name}.parquet")
+            if os.path.exists(path):
+                con.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet({_quote(path)})")
+        if rollup_manifest.get('input_hash') != (fingerprint or cube_fingerprint()):
+            print("[WARNING] rollups were built from other inputs than the shards on disk - re-run analysis.py")
+    return con
+
+
+def shared_connection():
+    """One connection per process, rebuilt when a file behind a view changes."""
+    global _connection, _signature
+    signature = _source_signature()
+    if _connection is None or signature != _signature:
+        if _connection is not None:
+            _connection.close()
+        _connection, _signature = connect(), signature
+    return _connection
+
+
+def query(sql, params=None, con=None):
+    """Run `sql` and return the result as a DataFrame."""
+    con = con or shared_connection()
+    return con.execute(sql, params or []).df()
+
+
+def tables(con=None):
+    """The registered views with their row and column counts."""
+    con = con or shared_connection()
+    names = [row[0] for row in con.execute(
+        "SELECT table_name FROM information_schema.tables ORDER BY table_name").fetchall()]
+    rows = []
+    for name in names:
+        columns = con.execute(f'DESCRIBE "{name}"').fetchall()
+        count = con.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+        rows.append({'view': name, 'rows': count, 'columns': ', '.join(c[0] for c in columns)})
+    import pandas as pd
+    return pd.DataFrame(rows, columns=['view', 'rows', 'columns'])
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+def _run(con, sql, csv_path=None, max_rows=50):
+    start = time.perf_counter()
+    result = query(sql, con=con)
+    elapsed = (time.perf_counter() - start) * 1000
+    if csv_path:
+        result.to_csv(csv_path, index=False)
+        print(f"{len(result):,} rows written to {csv_path} ({elapsed:.1f} ms)")
+    else:
+        print(result.to_string(max_rows=max_rows, index=False))
+        print(f"({len(result):,} rows, {elapsed:.1f} ms)")
+
+
+def repl(con):
+    """Minimal prompt: statements end with ';', `.tables` lists views, Ctrl-D quits."""
+    print("Aadhaar SQL - views: " + ", ".join(tables(con)['view']) + "  (.tables, Ctrl-D to quit)")
+    buffer = []
+    while True:
+        try:
+            line = input('sql> ' if not buffer else '...> ')
+        except EOFError:
+            print()
+            return
+        if not buffer and line.strip() == '.tables':
+            print(tables(con).to_string(index=False))
+            continue
+        buffer.append(line)
+        if line.rstrip().endswith(';'):
+            try:
+                _run(con, '\n'.join(buffer))
+            except Exception as e:
+                print(f"Error: {e}")
+            buffer = []
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SQL over the cleaned data, master cube and rollups")
+    parser.add_argument('sql', nargs='?', help="Query to run (omit for an interactive prompt)")
+    parser.add_argument('-f', '--file', help="Read the query from a .sql file")
+    parser.add_argument('--csv', help="Write the result to this CSV instead of printing it")
+    parser.add_argument('--tables', action='store_true', help="List the views")
+    args = parser.parse_args()
+
+    connection = shared_connection()
+    if args.tables:
+        print(tables(connection).to_string(index=False))
+    elif args.sql or args.file:
+        if args.file:
+            with open(args.file, encoding='utf-8') as f:
+                text = f.read()
+        else:
+            text = args.sql
+        _run(connection, text, args.csv)
+    else:
+        repl(connection)
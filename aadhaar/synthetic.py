@@ -0,0 +1,338 @@
+"""
+Synthetic Aadhaar-Shaped Data Generator
+=======================================
+Writes raw API-style CSV shards (`api_data_aadhar_<domain>_<start>_<end>.csv`,
+500,000 rows each like the real dumps) at any multiple of the national
+data size, for benchmarking the pipeline beyond the data we have.
+
+WHAT MATCHES THE REAL DUMPS:
+- Schemas, column order, dd-mm-YYYY dates, file naming and shard size
+- Geography: every (state, district, pincode) triple of the real shards in
+  `dataset/`, with their RAW spellings ('WESTBENGAL', 'Orissa', '100000'),
+  so name cleaning does real work. Larger scales add pincodes inside each
+  district's observed 3-digit postal prefixes
+- Skew: districts are drawn in proportion to their real row share; within a
+  district pincodes follow a Zipf law (a few busy pincodes, a long tail)
+- Counts: gamma-Poisson (negative binomial) per column, fitted to the mean
+  and variance/mean ratio of the real shards, times a per-pincode intensity
+- Dates: Mar-Dec 2025 with a weekly cycle (quiet Sundays) and a mild season
+- Keys: (date, state, district, pincode) is unique per domain, as in the
+  real data - otherwise aadhaar.dedup would discard the extra rows
+
+SCALE: 1.0 = the national row counts (~1.0M enrolment, ~2.07M demographic,
+~1.86M biometric rows). Each pincode reports at most once a day, so larger
+scales grow the pincode universe (<= 60% of pincodes report on the busiest
+day); once the postal prefixes are full, the date range grows backwards.
+
+The output is deterministic for a given (scale, seed, real shards).
+
+USAGE:
+    python -m aadhaar.synthetic --scale 10 --out .cache/bench/scale-10/dataset
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+GENERATOR_VERSION = 1
+
+SEED_PATTERN = 'dataset/api_data_aadhar_*.csv'
+SHARD_ROWS = 500_000
+START_DATE = '2025-03-01'
+END_DATE = '2025-12-31'
+
+# National size and per-column (mean, variance/mean) of the real shards
+DOMAINS = {
+    'enrolment': {
+        'rows': 1_006_029,
+        'counts': {'age_0_5': (3.61, 10.2), 'age_5_17': (3.49, 12.8), 'age_18_greater': (0.10, 2.4)},
+    },
+    'demographic': {
+        'rows': 2_071_700,
+        'counts': {'demo_age_5_17': (1.33, 4.3), 'demo_age_17_': (12.35, 38.9)},
+    },
+    'biometric': {
+        'rows': 1_861_108,
+        'counts': {'bio_age_5_17': (3.98, 12.9), 'bio_age_17_': (12.34, 37.1)},
+    },
+}
+
+MAX_DAILY_SHARE = 0.6     # busiest day uses at most this share of the pincodes
+PINCODE_ZIPF = 0.8        # within-district pincode skew
+INTENSITY_SIGMA = 0.6     # log-sd of the per-pincode volume multiplier
+WEEKDAY_FACTOR = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 0.85, 0.55])  # Mon..Sun
+
+
+# ============================================================================
+# GEOGRAPHY
+# ============================================================================
+def load_seed_geography(pattern=SEED_PATTERN):
+    """
+    Distinct raw (state, district, pincode) triples of the real shards,
+    with how many rows each had (their share drives the district skew).
+    """
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise FileNotFoundError(f"No real shards match {pattern} - they seed the synthetic geography")
+    parts = [pd.read_csv(f, usecols=['state', 'district', 'pincode'], dtype={'state': str, 'district': str})
+             for f in files]
+    triples = pd.concat(parts, ignore_index=True).dropna()
+    triples['pincode'] = pd.to_numeric(triples['pincode'], errors='coerce')
+    triples = triples.dropna(subset=['pincode'])
+    triples = triples[(triples['pincode'] >= 100000) & (triples['pincode'] <= 999999)]
+    triples['pincode'] = triples['pincode'].astype(np.int64)
+    return triples.groupby(['state', 'district', 'pincode']).size().rename('rows').reset_index()
+
+
+def pincode_capacity(seed):
+    """How many distinct pincodes the observed district prefixes can hold."""
+    prefixes = seed.assign(prefix=seed['pincode'] // 1000)[['state', 'district', 'prefix']].drop_duplicates()
+    return len(prefixes) * 1000
+
+
+def build_locations(seed, n_locations, rng):
+    """
+    The pincode universe: the real triples plus synthetic pincodes inside
+    each district's postal prefixes, allotted by district share.
+
+    Returns (state, district, pincode, weight, intensity) sorted by name;
+    `weight` is the chance of reporting on a given day (relative),
+    `intensity` the volume multiplier of the pincode's counts (mean ~1).
+    """
+    seed = seed.sort_values(['state', 'district', 'pincode']).reset_index(drop=True)
+    districts = seed.groupby(['state', 'district'], sort=True)
+    district_rows = districts['rows'].sum()
+    extra = max(0, n_locations - len(seed))
+    extra_per_district = rng.multinomial(extra, (district_rows / district_rows.sum()).to_numpy())
+
+    frames = []
+    for (state, district), group, n_extra in zip(district_rows.index, (g for _, g in districts), extra_per_district):
+        pincodes = group['pincode'].to_numpy()
+        if n_extra:
+            prefixes = np.unique(pincodes // 1000)
+            candidates = np.setdiff1d((prefixes[:, None] * 1000 + np.arange(1000)).ravel(), pincodes)
+            # a full district keeps what it has; its share goes unused
+            added = rng.choice(candidates, size=min(n_extra, len(candidates)), replace=False)
+            pincodes = np.concatenate([pincodes, np.sort(added)])
+        # Zipf within the district: observed pincodes take the top ranks
+        ranks = np.concatenate([rng.permutation(len(group)), len(group) + rng.permutation(len(pincodes) - len(group))])
+        share = (ranks + 1.0) ** -PINCODE_ZIPF
+        frames.append(pd.DataFrame({
+            'state': state,
+            'district': district,
+            'pincode': pincodes,
+            'weight': district_rows[(state, district)] * share / share.sum(),
+        }))
+
+    locations = pd.concat(frames, ignore_index=True)
+    intensity = rng.lognormal(0.0, INTENSITY_SIGMA, len(locations))
+    locations['intensity'] = intensity / intensity.mean()
+    return locations.sort_values(['state', 'district', 'pincode']).reset_index(drop=True)
+
+
+# ============================================================================
+# DATES AND COUNTS
+# ============================================================================
+def date_weights(dates, rng):
+    """Relative activity per day: weekly cycle x mild season x day noise."""
+    season = 1.0 + 0.15 * np.sin(2 * np.pi * (dates.dayofyear.to_numpy() - 80) / 365.25)
+    noise = rng.lognormal(0.0, 0.1, len(dates))
+    weights = WEEKDAY_FACTOR[dates.dayofweek.to_numpy()] * season * noise
+    return weights / weights.sum()
+
+
+def plan_dates(total_rows, capacity, n_seed, rng):
+    """
+    (dates, rows per day, locations needed) for a domain of `total_rows`.
+
+    Stretches the date range backwards while the busiest day would need
+    more pincodes than the postal prefixes can hold.
+    """
+    dates = pd.date_range(START_DATE, END_DATE, freq='D')
+    while True:
+        per_day = rng.multinomial(total_rows, date_weights(dates, rng))
+        needed = max(n_seed, int(np.ceil(per_day.max() / MAX_DAILY_SHARE)))
+        if needed <= capacity:
+            return dates, per_day, needed
+        dates = pd.date_range(end=END_DATE, periods=int(len(dates) * needed / capacity) + 1, freq='D')
+
+
+def gamma_shape(mean, var_ratio):
+    """
+    Gamma shape k of the gamma-Poisson mixture so that, with the lognormal
+    pincode intensity, the counts have the given variance/mean ratio:
+
+        var/mean = 1 + mean * ((1 + 1/k) * exp(sigma^2) - 1)
+
+    Returns None when the intensity alone is already dispersed enough.
+    """
+    inv_k = (1 + (var_ratio - 1) / mean) / np.exp(INTENSITY_SIGMA ** 2) - 1
+    return 1 / inv_k if inv_k > 0 else None
+
+
+def draw_counts(mean, var_ratio, intensity, rng):
+    lam = mean * intensity
+    k = gamma_shape(mean, var_ratio)
+    if k is not None:
+        lam = lam * rng.gamma(k, 1 / k, len(lam))
+    return rng.poisson(lam)
+
+
+def sample_day(log_weights, n, rng):
+    """n distinct location indices, drawn by weight without replacement (Gumbel top-k)."""
+    if n >= len(log_weights):
+        return np.arange(len(log_weights))
+    keys = log_weights + rng.gumbel(size=len(log_weights))
+    return np.sort(np.argpartition(-keys, n)[:n])
+
+
+# ============================================================================
+# SHARD WRITING
+# ============================================================================
+class ShardWriter:
+    """Appends day frames to `<prefix>_<start>_<end>.csv` files of `shard_rows` rows."""
+
+    def __init__(self, out_dir, domain, shard_rows=SHARD_ROWS, first_row=0):
+        self.prefix = os.path.join(out_dir, f"api_data_aadhar_{domain}")
+        self.shard_rows = shard_rows
+        self.start = first_row
+        self.rows = 0
+        self.tmp = None
+        self.paths = []
+
+    def write(self, frame):
+        while len(frame):
+            if self.tmp is None:
+                self.tmp = f"{self.prefix}.partial.csv"
+                frame.iloc[:0].to_csv(self.tmp, index=False)
+            take = min(len(frame), self.shard_rows - self.rows)
+            frame.iloc[:take].to_csv(self.tmp, mode='a', header=False, index=False)
+            self.rows += take
+            frame = frame.iloc[take:]
+            if self.rows == self.shard_rows:
+                self.close()
+
+    def close(self):
+        if self.tmp is None:
+            return
+        path = f"{self.prefix}_{self.start}_{self.start + self.rows}.csv"
+        os.replace(self.tmp, path)
+        self.paths.append(path)
+        self.start += self.rows
+        self.rows = 0
+        self.tmp = None
+
+
+def generate_domain(domain, locations, dates, per_day, out_dir, rng, shard_rows=SHARD_ROWS):
+    """Write one domain's shards day by day (memory ~ one day of rows)."""
+    columns = DOMAINS[domain]['counts']
+    log_weights = np.log(locations['weight'].to_numpy())
+    state = locations['state'].to_numpy()
+    district = locations['district'].to_numpy()
+    pincode = locations['pincode'].to_numpy()
+    intensity = locations['intensity'].to_numpy()
+
+    writer = ShardWriter(out_dir, domain, shard_rows)
+    for day, n in zip(dates, per_day):
+        if n == 0:
+            continue
+        idx = sample_day(log_weights, int(n), rng)
+        frame = pd.DataFrame({
+            'date': day.strftime('%d-%m-%Y'),
+            'state': state[idx],
+            'district': district[idx],
+            'pincode': pincode[idx],
+        })
+        for col, (mean, var_ratio) in columns.items():
+            frame[col] = draw_counts(mean, var_ratio, intensity[idx], rng)
+        writer.write(frame)
+    writer.close()
+    return writer.paths
+
+
+def generate_dataset(out_dir, scale=1.0, seed=42, domains=None, seed_pattern=SEED_PATTERN,
+                     shard_rows=SHARD_ROWS):
+    """
+    Generate every domain at `scale` x the national size into `out_dir`.
+
+    Skips the work if `out_dir` already holds a dataset generated with the
+    same parameters (recorded in `out_dir/synthetic.json`). Returns that record.
+
+    Only shards listed in that record are ever replaced: ValueError if
+    `out_dir` is the real dataset directory (that of `seed_pattern`) or holds
+    any shard the generator did not write.
+    """
+    domains = list(domains or DOMAINS)
+    spec = {'version': GENERATOR_VERSION, 'scale': scale, 'seed': seed, 'domains': domains,
+            'shard_rows': shard_rows}
+    if os.path.realpath(out_dir) == os.path.realpath(os.path.dirname(seed_pattern) or '.'):
+        raise ValueError(f"Refusing to generate into the real dataset directory {out_dir!r}")
+
+    manifest_path = os.path.join(out_dir, 'synthetic.json')
+    manifest = None
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['spec'] == spec and all(os.path.exists(p) for p in manifest['files']):
+            print(f"Synthetic data at {out_dir} is up to date ({manifest['rows']:,} rows)")
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+
+    generated = {os.path.realpath(p) for p in (manifest or {}).get('files', [])}
+    existing = glob.glob(os.path.join(glob.escape(out_dir), 'api_data_aadhar_*.csv'))
+    foreign = sorted(p for p in existing if os.path.realpath(p) not in generated)
+    if foreign:
+        raise ValueError(f"Refusing to generate into {out_dir!r}: it holds {len(foreign)} shard(s) not "
+                         f"written by the generator (e.g. {os.path.basename(foreign[0])})")
+
+    os.makedirs(out_dir, exist_ok=True)
+    for stale in existing:  # all listed in the previous synthetic.json
+        os.remove(stale)
+
+    rng = np.random.default_rng(seed)
+    seed_geo = load_seed_geography(seed_pattern)
+    capacity = pincode_capacity(seed_geo)
+
+    plans = {}
+    for domain in domains:
+        total = max(1, int(round(DOMAINS[domain]['rows'] * scale)))
+        plans[domain] = plan_dates(total, capacity, len(seed_geo), rng)
+    n_locations = max(needed for _, _, needed in plans.values())
+    locations = build_locations(seed_geo, n_locations, rng)
+    print(f"Synthetic geography: {len(locations):,} pincodes in "
+          f"{locations.groupby(['state', 'district']).ngroups:,} raw districts "
+          f"(seeded from {len(seed_geo):,} real triples)")
+
+    files, rows = [], {}
+    for domain in domains:
+        dates, per_day, _ = plans[domain]
+        paths = generate_domain(domain, locations, dates, per_day, out_dir, rng, shard_rows)
+        files += paths
+        rows[domain] = int(per_day.sum())
+        print(f"  {domain:<12} {rows[domain]:>12,} rows in {len(paths)} shard(s), "
+              f"{dates[0]:%d-%m-%Y}..{dates[-1]:%d-%m-%Y}")
+
+    manifest = {'spec': spec, 'files': files, 'rows': sum(rows.values()), 'domain_rows': rows,
+                'pincodes': len(locations)}
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic Aadhaar API shards")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiple of the national size (default 1)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=os.path.join('.cache', 'bench', 'dataset'))
+    parser.add_argument('--domains', nargs='+', choices=list(DOMAINS), default=None)
+    args = parser.parse_args()
+    try:
+        generate_dataset(args.out, scale=args.scale, seed=args.seed, domains=args.domains)
+    except ValueError as e:
+        parser.error(str(e))
@@ -1,313 +1,205 @@
+"""
+Aadhaar Analytical Engine (CLI)
+===============================
+Runs the full multi-phase analysis on top of the `aadhaar` core library.
+
+Each phase is a function that reads what it needs from a shared context dict
+and returns the names it produces; the PHASES registry declares both.
+Importing this module runs nothing.
+
+USAGE:
+    python analysis.py                                 # every default phase, in order
+    python analysis.py --phases forecast_fleet         # opt-in: per-district/state forecasts
+    python analysis.py --phases predictive health_score
+    python analysis.py --list                          # phases + inputs/outputs
+    python analysis.py --phases clustering --no-memo   # recompute dependencies too
+    python analysis.py --out-of-core                   # master cube month by month (bounded memory)
+"""
+
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import glob
 import warnings
 import os
 import sys
-from sklearn.ensemble import IsolationForest, RandomForestRegressor
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 import plotly.graph_objects as go
 import plotly.express as px
 
-# Configuration
-sys.stdout.reconfigure(encoding='utf-8')
-pd.set_option('display.max_columns', None)
-sns.set(style="whitegrid", palette="viridis")
-plt.rcParams['figure.figsize'] = (14, 7)
-warnings.filterwarnings('ignore')
-
-# Create output directory for plots
-os.makedirs('output', exist_ok=True)
-print("Directory 'output' created/verified for saving visualizations.")
+from aadhaar import (
+    BIOMETRIC_PATTERN,
+    DEMOGRAPHIC_PATTERN,
+    ENROLMENT_PATTERN,
+    add_custom_formulas,
+    build_master_cube,
+    calculate_accessibility_adjusted_compliance,
+    calculate_health_score,
+    classify_opportunity_neglect,
+    clean_data,
+    corr_with_pvalue,
+    cube_fingerprint,
+    encode_geography,
+    enrollment_velocity,
+    load_and_combine,
+    load_context_proxies,
+    load_master_cube,
+    save_master_cube,
+    update_geography,
+)
+from aadhaar import models
+from aadhaar.anomaly import (COLUMNS as ANOMALY_COLUMNS, LEVELS as ANOMALY_LEVELS, WARMUP as ANOMALY_WARMUP,
+                             daily_panel, score_new_days)
+from aadhaar.artifacts import CUBE_DIR, current_shards
+from aadhaar.forecast import entity_series, forecast_fleet
+from aadhaar.geography import label_districts
+from aadhaar.memo import load_memo, phase_key, save_memo, value_key
+from aadhaar.outofcore import (build_cube_out_of_core, cube_filter, cube_groupby, cube_map, cube_quantile,
+                               cube_sum, open_partitioned_cube, out_of_core_enabled)
+from aadhaar.profiling import row_count, span, write_profile
+from aadhaar.quality import CHECKS as QUALITY_CHECKS, quality_table, scan_quality
+from aadhaar.rollups import build_rollups, combine_rollups, load_rollups, query_rollup, save_rollups
+
+
+def configure():
+    """Console, plotting and output-directory setup (run once by main)."""
+    sys.stdout.reconfigure(encoding='utf-8')
+    pd.set_option('display.max_columns', None)
+    sns.set(style="whitegrid", palette="viridis")
+    plt.rcParams['figure.figsize'] = (14, 7)
+    warnings.filterwarnings('ignore')
+
+    # Create output directory for plots
+    os.makedirs('output', exist_ok=True)
+    print("Directory 'output' created/verified for saving visualizations.")
 
-# --- HELPER FUNCTIONS ---
-def load_and_combine(pattern):
-    """
-    Load and combine multiple CSV files matching a pattern.
-    This helps us combine all enrollment/demographic/biometric files into single DataFrames.
-    """
-    files = glob.glob(pattern)
-    if not files:
-        print(f"[WARNING] No files found for pattern: {pattern}")
-        return pd.DataFrame()
-    df_list = [pd.read_csv(f) for f in files]
-    print(f"Loaded {len(files)} files for pattern: {pattern}")
-    return pd.concat(df_list, ignore_index=True)
-
-def clean_data(df):
-    """
-    Clean and standardize the data:
-    - Fix date formats
-    - Normalize state/district names (critical for merging!)
-    - Validate pincodes
-    - Handle missing values
-    
-    WHY: Raw government data often has inconsistencies (e.g., 'West Bengal' vs 'West Bangal')
-    This function ensures we can merge data correctly without losing records.
-    """
-    if df.empty: return df
-    
-    # 1. Date Standardization
-    if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
-    
-    # 2. String Cleaning (State/District)
-    for col in ['state', 'district']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip().str.title()
-    
-    # 3. State Name Normalization (Critical for Merging)
-    state_map = {
-        'Andaman & Nicobar Islands': 'Andaman and Nicobar Islands',
-        'Andhra Pradsh': 'Andhra Pradesh',
-        'Chhatisgarh': 'Chhattisgarh',
-        'Dadra & Nagar Haveli': 'Dadra and Nagar Haveli and Daman and Diu',
-        'Daman & Diu': 'Dadra and Nagar Haveli and Daman and Diu',
-        'Jammu & Kashmir': 'Jammu and Kashmir',
-        'Orissa': 'Odisha',
-        'Pondicherry': 'Puducherry',
-        'Tamilnadu': 'Tamil Nadu',
-        'Telengana': 'Telangana',
-        'Uttaranchal': 'Uttarakhand',
-        'West Bangal': 'West Bengal',
-        'Westbengal': 'West Bengal',
-        'West Bengli': 'West Bengal'
-    }
-    if 'state' in df.columns:
-        df['state'] = df['state'].replace(state_map)
-        
-    # 4. District Normalization
-    dist_map = {
-        'Bangalore': 'Bengaluru',
-        'Bangalore Urban': 'Bengaluru Urban',
-        'Calcutta': 'Kolkata',
-        'Gurgaon': 'Gurugram'
-    }
-    if 'district' in df.columns:
-        df['district'] = df['district'].replace(dist_map)
-        
-    # 5. Pincode Validation (Indian pincodes are 6 digits, 110000-999999)
-    if 'pincode' in df.columns:
-        df['pincode'] = pd.to_numeric(df['pincode'], errors='coerce').fillna(0).astype(int)
-        df = df[(df['pincode'] >= 110000) & (df['pincode'] <= 999999)]
-
-    # 6. Null Handling (Numeric -> 0)
-    num_cols = df.select_dtypes(include=[np.number]).columns
-    df[num_cols] = df[num_cols].fillna(0)
-    
-    return df
-
-# --- EXTERNAL CONTEXT INTEGRATION ---
-def load_context_proxies(districts, states):
-    """
-    Integrate external context indicators from UDISE+ and TRAI data.
-    
-    SOURCE MAP:
-    - Schools: UDISE+ (Unified District Information System for Education)
-    - Internet: TRAI Internet Subscription Report
-    
-    NOTE: Simulates external data when API unavailable.
-    In production, replace with actual API calls.
-    """
-    np.random.seed(42)  # Reproducible results
-    
-    context_data = {}
-    
-    # 1. School Density Index (UDISE+ Proxy)
-    # Range: 0.2 - 0.9 (higher = more schools per sq km)
-    # Correlation: Urban districts have higher density
-    for district in districts:
-        # Simulate based on district name characteristics
-        if any(urban in district.lower() for urban in ['urban', 'metro', 'city', 'mumbai', 'delhi', 'bengaluru', 'kolkata', 'chennai']):
-            base_density = 0.75
-        elif any(rural in district.lower() for rural in ['rural', 'north', 'south', 'east', 'west']):
-            base_density = 0.35
-        else:
-            base_density = 0.5
-        
-        # Add random variation ±0.15
-        noise = np.random.uniform(-0.15, 0.15)
-        school_density = np.clip(base_density + noise, 0.2, 0.9)
-        context_data[district] = {'school_density_index': round(school_density, 3)}
-    
-    # 2. Digital Literacy Score (TRAI Proxy)
-    # Range: 0.1 - 0.8 (higher = better internet penetration)
-    # Correlation: State-level, southern & western states higher
-    high_digital_states = ['Karnataka', 'Kerala', 'Tamil Nadu', 'Maharashtra', 'Gujarat', 'Telangana', 'Delhi']
-    medium_digital_states = ['Andhra Pradesh', 'West Bengal', 'Punjab', 'Haryana', 'Rajasthan']
-    
-    state_digital_scores = {}
-    for state in states:
-        if state in high_digital_states:
-            base_score = 0.65
-        elif state in medium_digital_states:
-            base_score = 0.45
-        else:
-            base_score = 0.25
-        
-        noise = np.random.uniform(-0.1, 0.1)
-        state_digital_scores[state] = round(np.clip(base_score + noise, 0.1, 0.8), 3)
-    
-    return context_data, state_digital_scores
-
-def calculate_accessibility_adjusted_compliance(compliance_rate, school_density_index):
-    """
-    Accessibility-Adjusted Compliance (AAC)
-    
-    FORMULA: AAC = Compliance_Rate / School_Density_Index
-    
-    INTERPRETATION:
-    - Low AAC + High School Density = NEGLECT (resources available but unused)
-    - Low AAC + Low School Density = ACCESS ISSUE (need mobile vans)
-    - High AAC = Good performance regardless of infrastructure
-    
-    APPLICATION:
-    Flag "High Priority Intervention" when:
-    - Compliance < 30% AND School_Density > 0.7
-    (High infrastructure, low usage = NEGLECT)
-    """
-    if school_density_index <= 0:
-        return compliance_rate
-    
-    aac = compliance_rate / school_density_index
-    return round(aac, 2)
-
-def classify_opportunity_neglect(compliance_rate, school_density, digital_literacy):
-    """
-    Classify districts into Opportunity vs Neglect categories.
-    
-    CATEGORIES:
-    1. HIGH_PRIORITY_INTERVENTION: Low compliance + High infrastructure
-    2. OPPORTUNITY_ZONE: Low compliance + Low infrastructure (needs resources)
-    3. SUCCESS_STORY: High compliance + High infrastructure
-    4. OVERPERFORMER: High compliance + Low infrastructure (learn from them)
-    """
-    if compliance_rate < 30:
-        if school_density > 0.7:
-            return 'HIGH_PRIORITY_INTERVENTION'  # Neglect
-        else:
-            return 'OPPORTUNITY_ZONE'  # Needs resources
-    else:
-        if school_density > 0.7:
-            return 'SUCCESS_STORY'  # Model districts
-        else:
-            return 'OVERPERFORMER'  # Learn from them
 
 # ============================================================================
 # PHASE 0: DATA INGESTION
 # ============================================================================
-print("\n=== PHASE 0: DATA INGESTION ===")
-print("Loading Enrolment Data...")
-enrolment_df = clean_data(load_and_combine('dataset/api_data_aadhar_enrolment_*.csv'))
+def phase_ingestion(ctx):
+    print("\n=== PHASE 0: DATA INGESTION ===")
+    print("Loading Enrolment Data...")
+    enrolment_df = clean_data(load_and_combine(ENROLMENT_PATTERN))
+
+    print("Loading Demographic Data...")
+    demographic_df = clean_data(load_and_combine(DEMOGRAPHIC_PATTERN))
+
+    print("Loading Biometric Data...")
+    biometric_df = clean_data(load_and_combine(BIOMETRIC_PATTERN))
 
-print("Loading Demographic Data...")
-demographic_df = clean_data(load_and_combine('dataset/api_data_aadhar_demographic_*.csv'))
+    # Integer geography ids (state_id, district_id) shared by all three frames
+    geo = update_geography([enrolment_df, demographic_df, biometric_df])
+    enrolment_df, demographic_df, biometric_df = [
+        encode_geography(df, geo) for df in (enrolment_df, demographic_df, biometric_df)
+    ]
+    print(f"Geography dimension: {geo['state_id'].nunique()} states, {len(geo)} districts")
 
-print("Loading Biometric Data...")
-biometric_df = clean_data(load_and_combine('dataset/api_data_aadhar_biometric_*.csv'))
+    print("\n--- DATASET SHAPES ---")
+    print(f"Enrolment DB:   {enrolment_df.shape}")
+    print(f"Demographic DB: {demographic_df.shape}")
+    print(f"Biometric DB:   {biometric_df.shape}")
+    return {'enrolment_df': enrolment_df, 'demographic_df': demographic_df, 'biometric_df': biometric_df,
+            'geo': geo}
 
-print("\n--- DATASET SHAPES ---")
-print(f"Enrolment DB:   {enrolment_df.shape}")
-print(f"Demographic DB: {demographic_df.shape}")
-print(f"Biometric DB:   {biometric_df.shape}")
 
 # ============================================================================
 # PHASE 0.5: EXTERNAL CONTEXT INTEGRATION (UDISE+ & TRAI)
 # WHY: Correlate Aadhaar data with school density and digital infrastructure
 # ============================================================================
-print("\n=== PHASE 0.5: EXTERNAL CONTEXT INTEGRATION ===")
-print("Loading external context proxies (UDISE+, TRAI)...")
-
-# Get unique districts and states
-all_districts = set()
-all_states = set()
-for df in [enrolment_df, demographic_df, biometric_df]:
-    if 'district' in df.columns:
-        all_districts.update(df['district'].unique())
-    if 'state' in df.columns:
-        all_states.update(df['state'].unique())
-
-# Load context proxies
-school_density_data, digital_literacy_scores = load_context_proxies(list(all_districts), list(all_states))
-
-print(f"  ✅ School Density Index loaded for {len(school_density_data)} districts (UDISE+ Proxy)")
-print(f"  ✅ Digital Literacy Score loaded for {len(digital_literacy_scores)} states (TRAI Proxy)")
-
-# Show sample
-print("\n--- SAMPLE EXTERNAL CONTEXT DATA ---")
-sample_districts = list(school_density_data.keys())[:3]
-for dist in sample_districts:
-    print(f"  {dist}: School Density = {school_density_data[dist]['school_density_index']}")
-sample_states = list(digital_literacy_scores.keys())[:3]
-for state in sample_states:
-    print(f"  {state}: Digital Literacy = {digital_literacy_scores[state]}")
+def phase_external_context(ctx):
+    enrolment_df, demographic_df, biometric_df = ctx['enrolment_df'], ctx['demographic_df'], ctx['biometric_df']
+    print("\n=== PHASE 0.5: EXTERNAL CONTEXT INTEGRATION ===")
+    print("Loading external context proxies (UDISE+, TRAI)...")
+
+    # Get unique districts and states
+    all_districts = set()
+    all_states = set()
+    for df in [enrolment_df, demographic_df, biometric_df]:
+        if 'district' in df.columns:
+            all_districts.update(df['district'].unique())
+        if 'state' in df.columns:
+            all_states.update(df['state'].unique())
+
+    # Load context proxies
+    school_density_data, digital_literacy_scores = load_context_proxies(list(all_districts), list(all_states))
+
+    print(f"  ✅ School Density Index loaded for {len(school_density_data)} districts (UDISE+ Proxy)")
+    print(f"  ✅ Digital Literacy Score loaded for {len(digital_literacy_scores)} states (TRAI Proxy)")
+
+    # Show sample
+    print("\n--- SAMPLE EXTERNAL CONTEXT DATA ---")
+    sample_districts = list(school_density_data.keys())[:3]
+    for dist in sample_districts:
+        print(f"  {dist}: School Density = {school_density_data[dist]['school_density_index']}")
+    sample_states = list(digital_literacy_scores.keys())[:3]
+    for state in sample_states:
+        print(f"  {state}: Digital Literacy = {digital_literacy_scores[state]}")
+    return {'school_density_data': school_density_data, 'digital_literacy_scores': digital_literacy_scores}
 
 
 # ============================================================================
 # PHASE 1: ENROLLMENT DEEP DIVE
 # WHY: Understand WHERE growth is happening (infant vs adult enrollment)
 # ============================================================================
-print("\n=== PHASE 1: ENROLLMENT DEEP DIVE ===")
-if not enrolment_df.empty:
-    # 1. Age Cohort Analysis
-    age_cols = ['age_0_5', 'age_5_17', 'age_18_greater']
-    total_enrol = enrolment_df[age_cols].sum()
-    
-    plt.figure(figsize=(10, 5))
-    total_enrol.plot(kind='bar', color=['#3498db', '#9b59b6', '#2ecc71'])
-    plt.title('Phase 1: National Enrollment Age Pyramid')
-    plt.ylabel('Total Enrollments')
-    plt.xticks(rotation=0)
-    plt.savefig('output/phase1_age_pyramid.png')
-    plt.close()
-    print("Saved plot: output/phase1_age_pyramid.png")
-    
-    # 2. Infant Enrollment Hotspots
-    # SECRET INSIGHT: High infant enrollment = opportunity for birth registry integration
-    infant_hotspots = enrolment_df.groupby('state')['age_0_5'].sum().sort_values(ascending=False).head(5)
-    print("\n--- TOP 5 STATES FOR INFANT ENROLLMENT (0-5) ---")
-    print(infant_hotspots)
+def phase_enrollment(ctx):
+    enrolment_df = ctx['enrolment_df']
+    print("\n=== PHASE 1: ENROLLMENT DEEP DIVE ===")
+    if not enrolment_df.empty:
+        # 1. Age Cohort Analysis
+        age_cols = ['age_0_5', 'age_5_17', 'age_18_greater']
+        total_enrol = enrolment_df[age_cols].sum()
+
+        plt.figure(figsize=(10, 5))
+        total_enrol.plot(kind='bar', color=['#3498db', '#9b59b6', '#2ecc71'])
+        plt.title('Phase 1: National Enrollment Age Pyramid')
+        plt.ylabel('Total Enrollments')
+        plt.xticks(rotation=0)
+        plt.savefig('output/phase1_age_pyramid.png')
+        plt.close()
+        print("Saved plot: output/phase1_age_pyramid.png")
+
+        # 2. Infant Enrollment Hotspots
+        # SECRET INSIGHT: High infant enrollment = opportunity for birth registry integration
+        infant_hotspots = enrolment_df.groupby('state', observed=True)['age_0_5'].sum().sort_values(ascending=False).head(5)
+        print("\n--- TOP 5 STATES FOR INFANT ENROLLMENT (0-5) ---")
+        print(infant_hotspots)
 
 
 # ============================================================================
 # PHASE 2: DEMOGRAPHIC ANALYSIS
 # WHY: High demographic updates indicate MIGRATION or DATA CORRECTION patterns
 # ============================================================================
-print("\n=== PHASE 2: DEMOGRAPHIC ANALYSIS ===")
-if not demographic_df.empty:
-    # 1. State-wise Update Volume
-    demo_state = demographic_df.groupby('state')[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1).sort_values(ascending=False).head(10)
-    
-    plt.figure(figsize=(12, 6))
-    sns.barplot(x=demo_state.values, y=demo_state.index, palette='magma')
-    plt.title('Phase 2A: Top 10 States by Demographic Updates')
-    plt.xlabel('Total Updates')
-    plt.savefig('output/phase2_demographic_states.png')
-    plt.close()
-    print("Saved plot: output/phase2_demographic_states.png")
-    
-    # 2. Migration/Update Hubs
-    district_updates = demographic_df.groupby('district')[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1)
-    print("\n--- TOP MIGRATION/UPDATE HUBS ---")
-    print(district_updates.sort_values(ascending=False).head(5))
-    
-    # 3. Seasonal Trends
-    # SECRET INSIGHT: Spikes during harvest/festival seasons = migrant worker movement
-    demo_daily = demographic_df.groupby('date')[['demo_age_5_17', 'demo_age_17_']].sum()
-    if not demo_daily.empty:
-        plt.figure(figsize=(14, 5))
-        plt.plot(demo_daily.index, demo_daily['demo_age_17_'], color='#e74c3c', linewidth=2)
-        plt.title('Phase 2B: Temporal Seasonality in Demographic Updates')
-        plt.ylabel('Daily Updates')
-        plt.grid(True, alpha=0.3)
-        plt.savefig('output/phase2_seasonality.png')
+def phase_demographic(ctx):
+    demographic_df = ctx['demographic_df']
+    print("\n=== PHASE 2: DEMOGRAPHIC ANALYSIS ===")
+    if not demographic_df.empty:
+        # 1. State-wise Update Volume
+        demo_state = demographic_df.groupby('state', observed=True)[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1).sort_values(ascending=False).head(10)
+
+        plt.figure(figsize=(12, 6))
+        sns.barplot(x=demo_state.values, y=demo_state.index, palette='magma')
+        plt.title('Phase 2A: Top 10 States by Demographic Updates')
+        plt.xlabel('Total Updates')
+        plt.savefig('output/phase2_demographic_states.png')
         plt.close()
-        print("Saved plot: output/phase2_seasonality.png")
+        print("Saved plot: output/phase2_demographic_states.png")
+
+        # 2. Migration/Update Hubs
+        district_updates = demographic_df.groupby('district', observed=True)[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1)
+        print("\n--- TOP MIGRATION/UPDATE HUBS ---")
+        print(district_updates.sort_values(ascending=False).head(5))
+
+        # 3. Seasonal Trends
+        # SECRET INSIGHT: Spikes during harvest/festival seasons = migrant worker movement
+        demo_daily = demographic_df.groupby('date')[['demo_age_5_17', 'demo_age_17_']].sum()
+        if not demo_daily.empty:
+            plt.figure(figsize=(14, 5))
+            plt.plot(demo_daily.index, demo_daily['demo_age_17_'], color='#e74c3c', linewidth=2)
+            plt.title('Phase 2B: Temporal Seasonality in Demographic Updates')
+            plt.ylabel('Daily Updates')
+            plt.grid(True, alpha=0.3)
+            plt.savefig('output/phase2_seasonality.png')
+            plt.close()
+            print("Saved plot: output/phase2_seasonality.png")
 
 
 # ============================================================================
@@ -315,208 +207,211 @@ if not demographic_df.empty:
 # WHY: Operational insights - when should centers be staffed?
 # GOAL: Identify weekly and monthly activity patterns
 # ============================================================================
-print("\n--- ADVANCED: TEMPORAL PATTERN ANALYSIS ---")
-if not enrolment_df.empty and 'date' in enrolment_df.columns:
-    # Add day of week and month columns
-    enrolment_df['day_of_week'] = pd.to_datetime(enrolment_df['date']).dt.day_name()
-    enrolment_df['month'] = pd.to_datetime(enrolment_df['date']).dt.month_name()
-    
-    # Day of Week Pattern
-    dow_pattern = enrolment_df.groupby('day_of_week')[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1)
-    dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    dow_pattern = dow_pattern.reindex(dow_order, fill_value=0)
-    
-    # Monthly Pattern
-    monthly_pattern = enrolment_df.groupby('month')[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1)
-    month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
-                   'July', 'August', 'September', 'October', 'November', 'December']
-    monthly_pattern = monthly_pattern.reindex(month_order, fill_value=0)
-    
-    # Create combined plot
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
-    
-    # Day of Week
-    dow_pattern.plot(kind='bar', ax=ax1, color='steelblue')
-    ax1.set_title('Enrollment by Day of Week')
-    ax1.set_ylabel('Total Enrollments')
-    ax1.set_xlabel('Day')
-    ax1.tick_params(axis='x', rotation=45)
-    
-    # Monthly
-    monthly_pattern.plot(kind='bar', ax=ax2, color='coral')
-    ax2.set_title('Enrollment by Month')
-    ax2.set_ylabel('Total Enrollments')
-    ax2.set_xlabel('Month')
-    ax2.tick_params(axis='x', rotation=45)
-    
-    plt.tight_layout()
-    plt.savefig('output/phase2_temporal_patterns.png')
-    plt.close()
-    print("Saved plot: output/phase2_temporal_patterns.png")
-    
-    # Identify peak day and month
-    peak_day = dow_pattern.idxmax()
-    peak_month = monthly_pattern.idxmax()
-    
-    print(f"\nTEMPORAL INSIGHTS:")
-    print(f"  Peak Day: {peak_day} ({dow_pattern[peak_day]:.0f} enrollments)")
-    print(f"  Peak Month: {peak_month} ({monthly_pattern[peak_month]:.0f} enrollments)")
-    
-    # Calculate Monday effect
-    if 'Monday' in dow_pattern.index and dow_pattern['Monday'] > 0:
-        avg_weekday = dow_pattern[['Tuesday', 'Wednesday', 'Thursday', 'Friday']].mean()
-        monday_boost = ((dow_pattern['Monday'] - avg_weekday) / avg_weekday) * 100
-        print(f"  Monday Effect: {monday_boost:+.1f}% vs avg weekday")
-        if monday_boost > 20:
-            print("  ACTION: Increase Monday staffing by 25% at enrollment centers.")
+def phase_temporal_patterns(ctx):
+    enrolment_df = ctx['enrolment_df']
+    print("\n--- ADVANCED: TEMPORAL PATTERN ANALYSIS ---")
+    if not enrolment_df.empty and 'date' in enrolment_df.columns:
+        # Day of week and month keys (kept off the frame so the master cube stays unchanged)
+        day_of_week = pd.to_datetime(enrolment_df['date']).dt.day_name()
+        month = pd.to_datetime(enrolment_df['date']).dt.month_name()
+
+        # Day of Week Pattern
+        dow_pattern = enrolment_df.groupby(day_of_week)[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1)
+        dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        dow_pattern = dow_pattern.reindex(dow_order, fill_value=0)
+
+        # Monthly Pattern
+        monthly_pattern = enrolment_df.groupby(month)[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1)
+        month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
+                       'July', 'August', 'September', 'October', 'November', 'December']
+        monthly_pattern = monthly_pattern.reindex(month_order, fill_value=0)
+
+        # Create combined plot
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+
+        # Day of Week
+        dow_pattern.plot(kind='bar', ax=ax1, color='steelblue')
+        ax1.set_title('Enrollment by Day of Week')
+        ax1.set_ylabel('Total Enrollments')
+        ax1.set_xlabel('Day')
+        ax1.tick_params(axis='x', rotation=45)
+
+        # Monthly
+        monthly_pattern.plot(kind='bar', ax=ax2, color='coral')
+        ax2.set_title('Enrollment by Month')
+        ax2.set_ylabel('Total Enrollments')
+        ax2.set_xlabel('Month')
+        ax2.tick_params(axis='x', rotation=45)
+
+        plt.tight_layout()
+        plt.savefig('output/phase2_temporal_patterns.png')
+        plt.close()
+        print("Saved plot: output/phase2_temporal_patterns.png")
+
+        # Identify peak day and month
+        peak_day = dow_pattern.idxmax()
+        peak_month = monthly_pattern.idxmax()
+
+        print(f"\nTEMPORAL INSIGHTS:")
+        print(f"  Peak Day: {peak_day} ({dow_pattern[peak_day]:.0f} enrollments)")
+        print(f"  Peak Month: {peak_month} ({monthly_pattern[peak_month]:.0f} enrollments)")
+
+        # Calculate Monday effect
+        if 'Monday' in dow_pattern.index and dow_pattern['Monday'] > 0:
+            avg_weekday = dow_pattern[['Tuesday', 'Wednesday', 'Thursday', 'Friday']].mean()
+            monday_boost = ((dow_pattern['Monday'] - avg_weekday) / avg_weekday) * 100
+            print(f"  Monday Effect: {monday_boost:+.1f}% vs avg weekday")
+            if monday_boost > 20:
+                print("  ACTION: Increase Monday staffing by 25% at enrollment centers.")
 
 
 # ============================================================================
 # PHASE 3: BIOMETRIC ANALYSIS + COMPLIANCE GAP
 # WHY: Mandatory biometric updates at age 5 and 15. Low compliance = enforcement gap.
 # ============================================================================
-print("\n=== PHASE 3: BIOMETRIC ANALYSIS ===")
-if not biometric_df.empty:
-    bio_daily = biometric_df.groupby('date')[['bio_age_5_17', 'bio_age_17_']].sum()
-    
-    plt.figure(figsize=(14, 5))
-    plt.plot(bio_daily.index, bio_daily['bio_age_5_17'], label='Age 5-17 (Mandatory Updates)', alpha=0.8)
-    plt.plot(bio_daily.index, bio_daily['bio_age_17_'], label='Age 18+ (Voluntary/Auth)', alpha=0.6)
-    plt.title('Phase 3: Biometric Update Trends (Compliance Monitoring)')
-    plt.legend()
-    plt.savefig('output/phase3_biometric_trends.png')
-    plt.close()
-    print("Saved plot: output/phase3_biometric_trends.png")
-    
-    # ADVANCED: Compliance Gap Analysis
-    # FORMULA: Expected updates (based on enrollments 10 years ago) vs Actual updates
-    # WHY: This tells UIDAI how many people are "missing" their mandatory updates
-    print("\n--- ADVANCED: BIOMETRIC COMPLIANCE GAP ---")
-    expected_updates = enrolment_df['age_5_17'].sum() * 0.6  # Assume 60% are due
-    actual_updates = biometric_df['bio_age_5_17'].sum()
-    
-    compliance_rate = (actual_updates / expected_updates) * 100 if expected_updates > 0 else 0
-    print(f"National Compliance Rate: {compliance_rate:.1f}%")
-    print(f"Estimated Missing Updates: {max(0, expected_updates - actual_updates):.0f}")
-    print("INSIGHT: This gap represents citizens who haven't updated biometrics despite")
-    print("         reaching mandatory age triggers (age 5 or 15).")
-    
-    # =========================================================================
-    # ACCESSIBILITY-ADJUSTED COMPLIANCE (External Context Integration)
-    # WHY: Raw compliance doesn't account for infrastructure availability
-    # FORMULA: AAC = Compliance_Rate / School_Density_Index
-    # =========================================================================
-    print("\n--- ADVANCED: ACCESSIBILITY-ADJUSTED COMPLIANCE (AAC) ---")
-    print("Integrating UDISE+ school density data for context-aware analysis...")
-    
-    # Calculate district-level compliance
-    district_bio = biometric_df.groupby('district')['bio_age_5_17'].sum()
-    district_enrol = enrolment_df.groupby('district')['age_5_17'].sum()
-    
-    aac_results = []
-    high_priority_interventions = []
-    
-    for district in district_bio.index:
-        if district in district_enrol.index and district in school_density_data:
-            bio_updates = district_bio[district]
-            expected = district_enrol[district] * 0.6
-            raw_compliance = (bio_updates / expected * 100) if expected > 0 else 0
-            
-            # Get school density
-            school_density = school_density_data[district]['school_density_index']
-            
-            # Calculate Accessibility-Adjusted Compliance
-            aac = calculate_accessibility_adjusted_compliance(raw_compliance, school_density)
-            
-            # Get state for digital literacy
-            state = biometric_df[biometric_df['district'] == district]['state'].iloc[0] if len(biometric_df[biometric_df['district'] == district]) > 0 else 'Unknown'
-            digital_lit = digital_literacy_scores.get(state, 0.3)
-            
-            # Classify Opportunity vs Neglect
-            category = classify_opportunity_neglect(raw_compliance, school_density, digital_lit)
-            
-            aac_results.append({
-                'district': district,
-                'raw_compliance': raw_compliance,
-                'school_density': school_density,
-                'aac': aac,
-                'category': category
-            })
-            
-            # Flag High Priority Intervention
-            if category == 'HIGH_PRIORITY_INTERVENTION':
-                high_priority_interventions.append(district)
-    
-    aac_df = pd.DataFrame(aac_results)
-    
-    if not aac_df.empty:
-        print(f"\nAAC Formula: Compliance_Rate / School_Density_Index")
-        print(f"Analyzed {len(aac_df)} districts with external context")
-        
-        # Category distribution
-        print("\n--- DISTRICT CATEGORIZATION (Opportunity vs Neglect) ---")
-        for cat in ['HIGH_PRIORITY_INTERVENTION', 'OPPORTUNITY_ZONE', 'SUCCESS_STORY', 'OVERPERFORMER']:
-            count = len(aac_df[aac_df['category'] == cat])
-            print(f"  {cat}: {count} districts")
-        
-        # High Priority Interventions
-        if high_priority_interventions:
-            print(f"\n🚨 HIGH PRIORITY INTERVENTION DISTRICTS (Low Compliance + High Infrastructure):")
-            for dist in high_priority_interventions[:10]:
-                print(f"    - {dist}")
-            print("  INSIGHT: These districts have RESOURCES but LOW USAGE = NEGLECT")
-            print("  ACTION: Investigate operational issues, not infrastructure gaps")
+def phase_biometric(ctx):
+    enrolment_df, biometric_df = ctx['enrolment_df'], ctx['biometric_df']
+    school_density_data = ctx['school_density_data']
+    digital_literacy_scores = ctx['digital_literacy_scores']
+    expected_updates, actual_updates = 0, 0
+
+    print("\n=== PHASE 3: BIOMETRIC ANALYSIS ===")
+    if not biometric_df.empty:
+        bio_daily = biometric_df.groupby('date')[['bio_age_5_17', 'bio_age_17_']].sum()
+
+        plt.figure(figsize=(14, 5))
+        plt.plot(bio_daily.index, bio_daily['bio_age_5_17'], label='Age 5-17 (Mandatory Updates)', alpha=0.8)
+        plt.plot(bio_daily.index, bio_daily['bio_age_17_'], label='Age 18+ (Voluntary/Auth)', alpha=0.6)
+        plt.title('Phase 3: Biometric Update Trends (Compliance Monitoring)')
+        plt.legend()
+        plt.savefig('output/phase3_biometric_trends.png')
+        plt.close()
+        print("Saved plot: output/phase3_biometric_trends.png")
+
+        # ADVANCED: Compliance Gap Analysis
+        # FORMULA: Expected updates (based on enrollments 10 years ago) vs Actual updates
+        # WHY: This tells UIDAI how many people are "missing" their mandatory updates
+        print("\n--- ADVANCED: BIOMETRIC COMPLIANCE GAP ---")
+        expected_updates = enrolment_df['age_5_17'].sum() * 0.6  # Assume 60% are due
+        actual_updates = biometric_df['bio_age_5_17'].sum()
+
+        compliance_rate = (actual_updates / expected_updates) * 100 if expected_updates > 0 else 0
+        print(f"National Compliance Rate: {compliance_rate:.1f}%")
+        print(f"Estimated Missing Updates: {max(0, expected_updates - actual_updates):.0f}")
+        print("INSIGHT: This gap represents citizens who haven't updated biometrics despite")
+        print("         reaching mandatory age triggers (age 5 or 15).")
+
+        # =========================================================================
+        # ACCESSIBILITY-ADJUSTED COMPLIANCE (External Context Integration)
+        # WHY: Raw compliance doesn't account for infrastructure availability
+        # FORMULA: AAC = Compliance_Rate / School_Density_Index
+        # =========================================================================
+        print("\n--- ADVANCED: ACCESSIBILITY-ADJUSTED COMPLIANCE (AAC) ---")
+        print("Integrating UDISE+ school density data for context-aware analysis...")
+
+        # Calculate district-level compliance
+        district_bio = biometric_df.groupby('district', observed=True)['bio_age_5_17'].sum()
+        district_enrol = enrolment_df.groupby('district', observed=True)['age_5_17'].sum()
+
+        # One join: district aggregates x district -> state lookup x context proxies
+        district_state = biometric_df.drop_duplicates('district').set_index('district')['state']
+        school_density = pd.Series({d: v['school_density_index'] for d, v in school_density_data.items()},
+                                   dtype='float64', name='school_density')
+        aac_df = (district_bio.rename('bio_updates').to_frame()
+                  .join(district_enrol.rename('enrol_5_17'), how='inner')
+                  .join(school_density, how='inner')
+                  .join(district_state, how='left'))
+
+        expected = aac_df['enrol_5_17'] * 0.6
+        aac_df['raw_compliance'] = (aac_df['bio_updates'] / expected * 100).where(expected > 0, 0)
+        aac_df['aac'] = calculate_accessibility_adjusted_compliance(aac_df['raw_compliance'], aac_df['school_density'])
+        digital_lit = aac_df['state'].astype(object).map(digital_literacy_scores).fillna(0.3)
+        aac_df['category'] = classify_opportunity_neglect(aac_df['raw_compliance'], aac_df['school_density'], digital_lit)
+        aac_df = aac_df.rename_axis('district').reset_index()[['district', 'raw_compliance', 'school_density', 'aac', 'category']]
+
+        # Flag High Priority Intervention
+        high_priority_interventions = aac_df.loc[aac_df['category'] == 'HIGH_PRIORITY_INTERVENTION', 'district'].tolist()
+
+        if not aac_df.empty:
+            print(f"\nAAC Formula: Compliance_Rate / School_Density_Index")
+            print(f"Analyzed {len(aac_df)} districts with external context")
+
+            # Category distribution
+            print("\n--- DISTRICT CATEGORIZATION (Opportunity vs Neglect) ---")
+            for cat in ['HIGH_PRIORITY_INTERVENTION', 'OPPORTUNITY_ZONE', 'SUCCESS_STORY', 'OVERPERFORMER']:
+                count = len(aac_df[aac_df['category'] == cat])
+                print(f"  {cat}: {count} districts")
+
+            # High Priority Interventions
+            if high_priority_interventions:
+                print(f"\n🚨 HIGH PRIORITY INTERVENTION DISTRICTS (Low Compliance + High Infrastructure):")
+                for dist in high_priority_interventions[:10]:
+                    print(f"    - {dist}")
+                print("  INSIGHT: These districts have RESOURCES but LOW USAGE = NEGLECT")
+                print("  ACTION: Investigate operational issues, not infrastructure gaps")
+    return {'expected_updates': expected_updates, 'actual_updates': actual_updates}
 
 
 # ============================================================================
 # PHASE 4: MASTER CUBE INTEGRATION + CUSTOM FORMULAS
 # WHY: Some insights require CROSS-DOMAIN data (e.g., comparing enrollment vs updates)
 # ============================================================================
-print("\n=== PHASE 4: MASTER CUBE INTEGRATION ===")
-merge_keys = ['date', 'state', 'district', 'pincode']
-
-master_df = pd.merge(enrolment_df, demographic_df, on=merge_keys, how='outer')
-master_df = pd.merge(master_df, biometric_df, on=merge_keys, how='outer')
-master_df = master_df.fillna(0)
-
-master_df['total_enrol'] = master_df['age_0_5'] + master_df['age_5_17'] + master_df['age_18_greater']
-master_df['total_demo'] = master_df['demo_age_5_17'] + master_df['demo_age_17_']
-master_df['total_bio'] = master_df['bio_age_5_17'] + master_df['bio_age_17_']
-master_df['total_activity'] = master_df['total_enrol'] + master_df['total_demo'] + master_df['total_bio']
-
-print(f"Master Cube Created. Shape: {master_df.shape}")
-
-# CUSTOM FORMULA 1: Saturation Index (System Maturity)
-# FORMULA: (Updates) / (Enrollments + 1)
-# WHY: High ratio = Mature region (more updates than new enrollments)
-#      Low ratio = Growth region (more enrollments than updates)
-master_df['Saturation_Index'] = (master_df['total_demo'] + master_df['total_bio']) / (master_df['total_enrol'] + 1)
-print("Saturation Index Calculated.")
-
-# CUSTOM FORMULA 2: System Efficiency Score (Cost Optimization)
-# FORMULA: Weighted cost of activities (Bio > Demo > Enrol)
-# WHY: Biometric updates are EXPENSIVE (fingerprint scanners, iris cameras)
-#      This score helps identify districts that are inefficient (too many bio updates)
-#      and can benefit from SELF-SERVICE KIOSKS.
-master_df['efficiency_score'] = (
-    (master_df['total_bio'] * 0.5) +   # Bio updates cost 2x (equipment)
-    (master_df['total_demo'] * 0.3) +  # Demo updates cost 1.5x (staff time)
-    (master_df['total_enrol'] * 0.2)   # Enrollments are cheapest (one-time)
-) / (master_df['total_activity'] + 1)
-
-print("System Efficiency Score Calculated.")
-
-# CUSTOM FORMULA 3: Fraud Probability Index
-# FORMULA: Combines 3 red flags
-# WHY: High demographic updates + Zero enrollments + Extreme saturation = Fraud signal
-#      This helps UIDAI focus audit resources on suspicious pincodes.
-master_df['fraud_index'] = (
-    (master_df['total_demo'] > master_df['total_demo'].quantile(0.95)).astype(int) * 0.4 +
-    (master_df['total_enrol'] == 0).astype(int) * 0.3 +
-    (master_df['Saturation_Index'] > 10).astype(int) * 0.3
-)
-print("Fraud Probability Index Calculated.")
-
+def phase_master_cube(ctx):
+    print("\n=== PHASE 4: MASTER CUBE INTEGRATION ===")
+    # Reuse the persisted cube (aadhaar.artifacts) while the inputs are unchanged
+    fingerprint = cube_fingerprint(ctx['geo'])
+    if out_of_core_enabled():
+        # Month by month, straight to disk; phases below stream the partitions
+        cube = open_partitioned_cube(fingerprint)
+        if cube is not None:
+            print(f"Master Cube opened out-of-core from {CUBE_DIR} (inputs unchanged). Shape: {cube.shape}")
+            return {'master_df': cube, 'rollups': phase_rollups(cube, fingerprint)}
+        print("Building Master Cube out-of-core (one month at a time)...")
+        built = build_cube_out_of_core(ctx['enrolment_df'], ctx['demographic_df'], ctx['biometric_df'],
+                                       ctx['geo'], fingerprint)
+        if built is not None:
+            cube, rollups = built
+            print(f"Master Cube Created with custom formulas. Shape: {cube.shape}")
+            print(f"Master Cube saved to {CUBE_DIR}")
+            print("Rollups: " + ", ".join(f"{name} {len(frame):,}" for name, frame in rollups.items()))
+            return {'master_df': cube, 'rollups': rollups}
+        print("[WARNING] Out-of-core build needs pyarrow - building in memory")
+
+    master_df = load_master_cube(fingerprint)
+    if master_df is not None:
+        print(f"Master Cube loaded from {CUBE_DIR} (inputs unchanged). Shape: {master_df.shape}")
+        return {'master_df': master_df, 'rollups': phase_rollups(master_df, fingerprint)}
+
+    master_df = build_master_cube(ctx['enrolment_df'], ctx['demographic_df'], ctx['biometric_df'],
+                                  geo=ctx['geo'])
+    print(f"Master Cube Created. Shape: {master_df.shape}")
+
+    # Saturation Index, System Efficiency Score and Fraud Probability Index
+    # (formulas documented in aadhaar.cube.add_custom_formulas)
+    master_df = add_custom_formulas(master_df)
+    print("Saturation Index Calculated.")
+    print("System Efficiency Score Calculated.")
+    print("Fraud Probability Index Calculated.")
+    if save_master_cube(master_df, fingerprint, geo=ctx['geo']):
+        print(f"Master Cube saved to {CUBE_DIR}")
+    return {'master_df': master_df, 'rollups': phase_rollups(master_df, fingerprint)}
+
+
+def phase_rollups(master_df, fingerprint):
+    """
+    Rollup lattice (district x day/week, state x month, national x day) of the
+    master cube - loaded with it, or built once and saved next to it. Every
+    district-level-or-coarser phase below queries these, not master_df.
+    """
+    rollups = load_rollups(fingerprint)
+    if rollups is None:
+        if isinstance(master_df, pd.DataFrame):
+            rollups = build_rollups(master_df)
+        else:  # out-of-core: roll up each month partition and combine
+            rollups = combine_rollups([build_rollups(part) for part in master_df.partitions()])
+        save_rollups(rollups, fingerprint)
+    print("Rollups: " + ", ".join(f"{name} {len(frame):,}" for name, frame in rollups.items()))
+    return rollups
 
 
 # ============================================================================
@@ -524,47 +419,48 @@ print("Fraud Probability Index Calculated.")
 # WHY: Identify districts with suspicious data patterns
 # GOAL: Flag potential data entry errors or synthetic patterns
 # ============================================================================
-print("\n--- ADVANCED: DATA QUALITY ASSESSMENT ---")
-# Analyze district-level patterns for anomalies
-district_daily = master_df.groupby(['district', 'date']).agg({
-    'total_enrol': 'sum',
-    'total_activity': 'sum'
-}).reset_index()
-
-# Calculate coefficient of variation (std/mean) for each district
-district_quality = district_daily.groupby('district')['total_activity'].agg([
-    ('mean', 'mean'),
-    ('std', 'std'),
-    ('count', 'count')
-])
-district_quality['cv'] = district_quality['std'] / (district_quality['mean'] + 1)  # Coefficient of variation
-
-# Identify suspicious patterns
-# 1. Extremely low variation (CV < 0.1) = Potential synthetic data
-synthetic_candidates = district_quality[district_quality['cv'] < 0.1]
-
-# 2. Round number bias (check if many days have exactly 1000, 2000, etc.)
-round_number_districts = []
-for district in district_daily['district'].unique()[:50]:  # Sample first 50
-    district_data = district_daily[district_daily['district'] == district]['total_activity']
-    if len(district_data) > 10:
-        # Check if more than 20% of values are multiples of 100
-        round_pct = (district_data % 100 == 0).sum() / len(district_data)
-        if round_pct > 0.2:
-            round_number_districts.append(district)
-
-print(f"\nDATA QUALITY FINDINGS:")
-print(f"  Low-Variation Districts: {len(synthetic_candidates)} (potential synthetic data)")
-print(f"  Round-Number Bias: {len(round_number_districts)} districts")
-
-if len(synthetic_candidates) > 0:
-    print(f"\n  TOP 5 LOW-VARIATION DISTRICTS (Audit Recommended):")
-    for dist in synthetic_candidates.nsmallest(5, 'cv').index:
-        cv_val = synthetic_candidates.loc[dist, 'cv']
-        print(f"    - {dist}: CV = {cv_val:.4f}")
-    print("  INSIGHT: These districts show suspiciously uniform daily activity.")
-    print("  ACTION: Manual audit to verify data authenticity.")
-
+def phase_data_quality(ctx):
+    master_df, rollups = ctx['master_df'], ctx['rollups']
+    print("\n--- ADVANCED: DATA QUALITY ASSESSMENT ---")
+    # Daily activity per district (district x day rollup, "District, State" so
+    # same-named districts stay apart) and per pincode (cube rows)
+    district_daily = label_districts(
+        query_rollup(rollups, ('state', 'district'), 'D', columns=['total_activity'])['total_activity'])
+    pincode_daily = cube_map(master_df, lambda part: part.groupby(['pincode', 'date'], observed=True)['total_activity'].sum(),
+                             columns=['pincode', 'date', 'total_activity'])
+
+    # Every district and pincode scored in one grouped pass per check (aadhaar.quality)
+    district_quality = scan_quality(district_daily, 'district')
+    pincode_quality = scan_quality(pincode_daily, 'pincode')
+
+    # Identify suspicious patterns
+    # 1. Extremely low variation (CV < 0.1) = Potential synthetic data
+    synthetic_candidates = district_quality[district_quality['low_cv']]
+
+    print(f"\nDATA QUALITY FINDINGS ({len(district_quality):,} districts, {len(pincode_quality):,} pincodes):")
+    print(f"  Low-Variation Districts: {len(synthetic_candidates)} (potential synthetic data)")
+    for label, check in [('Round-Number Bias', 'round_bias'), ('Benford Deviation', 'benford'),
+                         ('Repeated-Value Runs', 'repeats'), ('Zero-Activity Streaks', 'zero_streak')]:
+        print(f"  {label}: {district_quality[check].sum()} districts, {pincode_quality[check].sum():,} pincodes")
+
+    if len(synthetic_candidates) > 0:
+        print(f"\n  TOP 5 LOW-VARIATION DISTRICTS (Audit Recommended):")
+        for dist in synthetic_candidates.nsmallest(5, 'cv').index:
+            cv_val = synthetic_candidates.loc[dist, 'cv']
+            print(f"    - {dist}: CV = {cv_val:.4f}")
+        print("  INSIGHT: These districts show suspiciously uniform daily activity.")
+        print("  ACTION: Manual audit to verify data authenticity.")
+
+    flagged = district_quality[district_quality['quality_score'] < 100]
+    if len(flagged) > 0:
+        print(f"\n  LOWEST QUALITY SCORES (of {len(flagged)} flagged districts):")
+        for dist, row in flagged.sort_values(['quality_score', 'active_days'], ascending=[True, False]).head(5).iterrows():
+            issues = ", ".join(check for check in QUALITY_CHECKS if row[check])
+            print(f"    - {dist}: {row['quality_score']:.0f}/100 ({issues})")
+
+    table = quality_table({'district': district_quality, 'pincode': pincode_quality})
+    table.to_csv('output/data_quality.csv', index=False)
+    print(f"\n  Saved: output/data_quality.csv ({len(table):,} entities)")
 
 
 # ============================================================================
@@ -572,81 +468,112 @@ if len(synthetic_candidates) > 0:
 # WHY: Understand if demographic activity today PREDICTS enrollment tomorrow
 # GOAL: Identify leading indicators for resource planning
 # ============================================================================
-print("\n--- ADVANCED: CORRELATION MATRIX ---")
-# Calculate correlation between key metrics at district level
-district_corr_data = master_df.groupby('district').agg({
-    'total_enrol': 'sum',
-    'total_demo': 'sum',
-    'total_bio': 'sum',
-    'Saturation_Index': 'mean'
-}).fillna(0)
-
-corr_matrix = district_corr_data.corr()
-
-plt.figure(figsize=(10, 8))
-sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0, 
-            square=True, linewidths=1, cbar_kws={"shrink": 0.8})
-plt.title('Correlation Matrix: What Drives Enrollment?')
-plt.savefig('output/phase4_correlation.png')
-plt.close()
-print("Saved plot: output/phase4_correlation.png")
-
-# Extract key correlations
-demo_enrol_corr = corr_matrix.loc['total_demo', 'total_enrol']
-bio_enrol_corr = corr_matrix.loc['total_bio', 'total_enrol']
-
-print(f"\nKEY FINDINGS:")
-print(f"  Demographics → Enrollment Correlation: {demo_enrol_corr:.3f}")
-print(f"  Biometrics → Enrollment Correlation: {bio_enrol_corr:.3f}")
-
-if demo_enrol_corr > 0.5:
-    print("  INSIGHT: High demographic activity is a LEADING INDICATOR for future enrollment.")
-    print("  ACTION: Deploy resources to districts with demographic spikes NOW.")
-else:
-    print("  INSIGHT: Demographic updates and enrollments are independent processes.")
+def phase_correlation(ctx):
+    rollups = ctx['rollups']
+    print("\n--- ADVANCED: CORRELATION MATRIX ---")
+    # Calculate correlation between key metrics at district level
+    district_corr_data = query_rollup(rollups, ('district',), columns=['total_enrol', 'total_demo', 'total_bio'],
+                                      means=['Saturation_Index']).fillna(0)
+
+    corr_matrix = district_corr_data.corr()
+
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0, 
+                square=True, linewidths=1, cbar_kws={"shrink": 0.8})
+    plt.title('Correlation Matrix: What Drives Enrollment?')
+    plt.savefig('output/phase4_correlation.png')
+    plt.close()
+    print("Saved plot: output/phase4_correlation.png")
+
+    # Extract key correlations
+    demo_enrol_corr = corr_matrix.loc['total_demo', 'total_enrol']
+    bio_enrol_corr = corr_matrix.loc['total_bio', 'total_enrol']
+
+    print(f"\nKEY FINDINGS:")
+    print(f"  Demographics → Enrollment Correlation: {demo_enrol_corr:.3f}")
+    print(f"  Biometrics → Enrollment Correlation: {bio_enrol_corr:.3f}")
+
+    if demo_enrol_corr > 0.5:
+        print("  INSIGHT: High demographic activity is a LEADING INDICATOR for future enrollment.")
+        print("  ACTION: Deploy resources to districts with demographic spikes NOW.")
+    else:
+        print("  INSIGHT: Demographic updates and enrollments are independent processes.")
 
 
 # ============================================================================
 # PHASE 5: PREDICTIVE ANALYTICS & ANOMALY DETECTION
 # WHY: Move from DESCRIPTIVE (what happened) to PRESCRIPTIVE (what will happen)
 # ============================================================================
-print("\n=== PHASE 5: PREDICTIVE & ANOMALY ===")
-if not master_df.empty:
-    # A. Holt-Winters Forecasting (Time Series)
-    # GOAL: Predict Q1 2026 system load for capacity planning
-    ts_data = master_df.groupby('date')['total_activity'].sum().asfreq('D').fillna(0)
-    
-    try:
-        model = ExponentialSmoothing(ts_data, trend='add', seasonal='add', seasonal_periods=7).fit()
-        forecast = model.forecast(90) # Q1 2026
-        
-        plt.figure(figsize=(15, 6))
-        plt.plot(ts_data.index, ts_data, label='Historical Load')
-        plt.plot(forecast.index, forecast, label='Forecast (Q1 2026)', color='red', linestyle='--')
-        plt.title('Phase 5A: Predictive Capacity Planning (Holt-Winters)')
-        plt.legend()
-        plt.savefig('output/phase5_forecast.png')
-        plt.close()
-        print("Saved plot: output/phase5_forecast.png")
-        print(f"Projected Average Daily Load (Q1 2026): {forecast.mean():.0f} transactions")
-    except Exception as e:
-        print(f"Forecasting Error: {e}")
-
-    # B. Global Anomaly Detection (Temporal)
-    # GOAL: Find days with inexplicable spikes (could be data dumps or system errors)
-    iso = IsolationForest(contamination=0.01, random_state=42)
-    anomalies = iso.fit_predict(ts_data.values.reshape(-1, 1))
-    print(f"Detected {list(anomalies).count(-1)} Statistical Anomalies in Daily Volume.")
-    
-    # C. Domain-Specific Fraud Detection (Demographic Only)
-    # WHY: High demographic updates WITHOUT enrollment spikes = Potential FRAUD RING
-    #      (Mass address changes to claim subsidies)
-    demo_ts = master_df.groupby('date')['total_demo'].sum().asfreq('D').fillna(0).values.reshape(-1, 1)
-    iso_demo = IsolationForest(contamination=0.02, random_state=42)
-    demo_anomalies = iso_demo.fit_predict(demo_ts)
-    n_fraud_signals = list(demo_anomalies).count(-1)
-    print(f"CRITICAL: Detected {n_fraud_signals} specific 'Demographic Spike' events.")
-    print("ACTION: Cross-reference these dates with local elections/subsidy announcements.")
+def phase_predictive(ctx):
+    master_df, rollups = ctx['master_df'], ctx['rollups']
+    n_fraud_signals = 0
+
+    print("\n=== PHASE 5: PREDICTIVE & ANOMALY ===")
+    if not master_df.empty:
+        # A. Holt-Winters Forecasting (Time Series)
+        # GOAL: Predict Q1 2026 system load for capacity planning
+        national_daily = query_rollup(rollups, (), 'D', columns=['total_activity', 'total_demo'])
+        ts_data = national_daily['total_activity'].asfreq('D').fillna(0)
+
+        try:
+            model, forecast = models.holt_winters_forecast(ts_data, horizon=90) # Q1 2026
+
+            plt.figure(figsize=(15, 6))
+            plt.plot(ts_data.index, ts_data, label='Historical Load')
+            plt.plot(forecast.index, forecast, label='Forecast (Q1 2026)', color='red', linestyle='--')
+            plt.title('Phase 5A: Predictive Capacity Planning (Holt-Winters)')
+            plt.legend()
+            plt.savefig('output/phase5_forecast.png')
+            plt.close()
+            print("Saved plot: output/phase5_forecast.png")
+            print(f"Projected Average Daily Load (Q1 2026): {forecast.mean():.0f} transactions")
+        except Exception as e:
+            print(f"Forecasting Error: {e}")
+
+        # B. Streaming Anomaly Detection (Temporal) - national, state and district
+        # GOAL: Find days with inexplicable spikes (could be data dumps or system errors)
+        # HOW: Robust EWMA z-score per weekday, persisted between runs - only the
+        #      days added since the last run are scored (aadhaar.anomaly)
+        panels = {(level, column): daily_panel(rollups, by, column)
+                  for level, by in ANOMALY_LEVELS.items() for column in ANOMALY_COLUMNS}
+        _, flags, stats = score_new_days(panels)
+        warm = stats['warm']
+        print(f"Streaming detector: {stats['new_days']:,} new series-days across {stats['series']:,} series, "
+              f"{stats['scored']:,} scored"
+              + (f" ({stats['replayed']} replayed after history changes)" if stats['replayed'] else ""))
+        national_warm = warm[('national', 'total_activity')] and warm[('national', 'total_demo')]
+        if national_warm:
+            national = flags[flags['level'] == 'national']
+            print(f"Detected {(national['column'] == 'total_activity').sum()} Statistical Anomalies in Daily Volume.")
+        else:
+            # Too few days for the per-weekday baselines: an empty flag list would
+            # read as "no anomalies". Batch Isolation Forest until they are warm.
+            print(f"  Insufficient history for the streaming baselines ({ANOMALY_WARMUP} of each weekday) - "
+                  "national series scored with the batch Isolation Forest")
+            anomalies = models.detect_anomalies(ts_data.values, contamination=0.01)
+            print(f"Detected {list(anomalies).count(-1)} Statistical Anomalies in Daily Volume.")
+        for level in ('state', 'district'):
+            n_warm, n_series = warm[(level, 'total_activity')], len(panels[(level, 'total_activity')])
+            local = flags[(flags['level'] == level) & (flags['column'] == 'total_activity')]
+            if n_warm:
+                print(f"  {level.title()} level: {len(local):,} anomalous days in {local['entity'].nunique():,} {level}s "
+                      f"({n_warm:,} of {n_series:,} with full baselines)")
+            else:
+                print(f"  {level.title()} level: insufficient history ({n_series:,} {level}s still warming up)")
+
+        # C. Domain-Specific Fraud Detection (Demographic Only)
+        # WHY: High demographic updates WITHOUT enrollment spikes = Potential FRAUD RING
+        #      (Mass address changes to claim subsidies)
+        if national_warm:
+            n_fraud_signals = int(((national['column'] == 'total_demo') & (national['direction'] == 'spike')).sum())
+        else:
+            demo_ts = national_daily['total_demo'].asfreq('D').fillna(0).values
+            n_fraud_signals = list(models.detect_anomalies(demo_ts, contamination=0.02)).count(-1)
+        print(f"CRITICAL: Detected {n_fraud_signals} specific 'Demographic Spike' events.")
+        print("ACTION: Cross-reference these dates with local elections/subsidy announcements.")
+        flags.to_csv('output/anomalies.csv', index=False)
+        print(f"Saved: output/anomalies.csv ({len(flags):,} flagged series-days)")
+    return {'n_fraud_signals': n_fraud_signals}
 
 
 # ============================================================================
@@ -654,24 +581,29 @@ if not master_df.empty:
 # WHY: Temporal anomalies find "when". Spatial clustering finds "where".
 # GOAL: Detect coordinated fraud (same date + nearby pincodes)
 # ============================================================================
-print("\n--- ADVANCED: SPATIAL FRAUD DETECTION (Geographic Clustering) ---")
-# Filter high-risk transactions (top 5% of demographic updates)
-fraud_candidates = master_df[master_df['total_demo'] > master_df['total_demo'].quantile(0.95)]
-
-if len(fraud_candidates) > 10:
-    # DBSCAN: Density-Based Spatial Clustering
-    # WHY: If 500+ updates happen in NEARBY pincodes on the SAME date = coordinated fraud
-    # PARAMS: eps=1000 means pincodes within 1000 units, min_samples=3 means at least 3 pincodes
-    fraud_coords = fraud_candidates[['pincode', 'total_demo']].values
-    
-    db = DBSCAN(eps=1000, min_samples=3).fit(fraud_coords)
-    fraud_clusters = len(set(db.labels_)) - (1 if -1 in db.labels_ else 0)
-    
-    print(f"Detected {fraud_clusters} geographic fraud clusters")
-    print("INSIGHT: These are groups of nearby pincodes with synchronized demographic spikes.")
-    print("         Possible causes: Organized fraud rings, mass camp events, or data entry errors.")
-else:
-    print("Insufficient data for spatial clustering.")
+def phase_spatial_fraud(ctx):
+    master_df = ctx['master_df']
+    fraud_clusters = 0
+
+    print("\n--- ADVANCED: SPATIAL FRAUD DETECTION (Geographic Clustering) ---")
+    # Filter high-risk transactions (top 5% of demographic updates)
+    demo_p95 = cube_quantile(master_df, 'total_demo', 0.95)
+    fraud_candidates = cube_filter(master_df, lambda df: df['total_demo'] > demo_p95, columns=['pincode', 'total_demo'])
+
+    if len(fraud_candidates) > 10:
+        # DBSCAN: Density-Based Spatial Clustering
+        # WHY: If 500+ updates happen in NEARBY pincodes on the SAME date = coordinated fraud
+        # PARAMS: eps=1000 means pincodes within 1000 units, min_samples=3 means at least 3 pincodes
+        fraud_coords = fraud_candidates[['pincode', 'total_demo']].values
+
+        fraud_clusters = models.detect_spatial_clusters(fraud_coords, eps=1000, min_samples=3)
+
+        print(f"Detected {fraud_clusters} geographic fraud clusters")
+        print("INSIGHT: These are groups of nearby pincodes with synchronized demographic spikes.")
+        print("         Possible causes: Organized fraud rings, mass camp events, or data entry errors.")
+    else:
+        print("Insufficient data for spatial clustering.")
+    return {'fraud_clusters': fraud_clusters}
 
 
 # ============================================================================
@@ -679,71 +611,67 @@ else:
 # WHY: Traditional forecasting predicts TOTAL load. ML predicts PER-DISTRICT hotspots.
 # GOAL: Identify which districts will have an enrollment SURGE in Q2 2026
 # ============================================================================
-print("\n--- ADVANCED: PREDICTIVE HOT-SPOT MODELING (Random Forest) ---")
-# Feature Engineering for ML
-# FEATURES: Current enrollment volatility, demographic activity, saturation
-# TARGET: Predict future enrollment volume
-district_features = master_df.groupby('district').agg({
-    'total_enrol': ['sum', 'std'],  # Total and volatility
-    'total_demo': 'sum',
-    'Saturation_Index': 'mean'
-}).fillna(0)
-
-district_features.columns = ['enrol_sum', 'enrol_std', 'demo_sum', 'saturation']
-district_features['target'] = district_features['enrol_sum']  # Target is enrollment
-
-# Build the model
-X = district_features[['enrol_std', 'demo_sum', 'saturation']]
-y = district_features['target']
-
-if len(X) > 50:  # Need enough data for train/test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Random Forest: Ensemble of decision trees
-    # WHY: Handles non-linear relationships between features
-    rf = RandomForestRegressor(n_estimators=100, random_state=42)
-    rf.fit(X_train, y_train)
-    
-    score = rf.score(X_test, y_test)
-    print(f"Model R² Score: {score:.3f}")
-    print("INTERPRETATION: R² of 0.80 means our model explains 80% of enrollment variance.")
-    
-    # Predict future hotspots
-    predictions = rf.predict(X)
-    district_features['predicted_surge'] = predictions
-    
-    hotspots = district_features.nlargest(5, 'predicted_surge')
-    print("\nPredicted Enrollment Hotspots for Q2 2026:")
-    print(hotspots.index.tolist())
-    print("ACTION: Pre-deploy mobile enrollment vans to these districts NOW.")
-    
-    # =========================================================================
-    # XAI LAYER: SHAP Explainability
-    # WHY: Black-box ML isn't enough. Judges want to know WHY a district is flagged.
-    # =========================================================================
-    print("\n--- XAI: SHAP EXPLAINABILITY LAYER ---")
-    try:
-        import shap
-        
-        # TreeExplainer for Random Forest
-        explainer = shap.TreeExplainer(rf)
-        shap_values = explainer.shap_values(X_test)
-        
-        print("SHAP values computed successfully.")
-        
-        # Generate Fraud Explanation Cards
-        print("Generating fraud explanation cards...")
-        
-        feature_names = ['enrol_std', 'demo_sum', 'saturation']
-        
-        # Get top 5 districts with highest predicted values from test set
-        test_indices = X_test.index.tolist()
-        test_predictions = rf.predict(X_test)
-        top_fraud_indices = sorted(range(len(test_predictions)), 
-                                    key=lambda i: test_predictions[i], 
-                                    reverse=True)[:5]
-        
-        html_content = """
+def phase_hotspot_model(ctx):
+    master_df = ctx['master_df']
+    print("\n--- ADVANCED: PREDICTIVE HOT-SPOT MODELING (Random Forest) ---")
+    # Feature Engineering for ML
+    # FEATURES: Current enrollment volatility, demographic activity, saturation
+    # TARGET: Predict future enrollment volume
+    district_features = cube_groupby(master_df, 'district', {
+        'total_enrol': ['sum', 'std'],  # Total and volatility
+        'total_demo': 'sum',
+        'Saturation_Index': 'mean'
+    }).fillna(0)
+
+    district_features.columns = ['enrol_sum', 'enrol_std', 'demo_sum', 'saturation']
+    district_features['target'] = district_features['enrol_sum']  # Target is enrollment
+
+    # Build the model
+    X = district_features[['enrol_std', 'demo_sum', 'saturation']]
+    y = district_features['target']
+
+    if len(X) > 50:  # Need enough data for train/test split
+        # Random Forest: Ensemble of decision trees (80/20 train/test split)
+        rf, X_train, X_test, y_train, y_test, score = models.train_hotspot_model(X, y)
+        print(f"Model R² Score: {score:.3f}")
+        print("INTERPRETATION: R² of 0.80 means our model explains 80% of enrollment variance.")
+
+        # Predict future hotspots
+        predictions = rf.predict(X)
+        district_features['predicted_surge'] = predictions
+
+        hotspots = district_features.nlargest(5, 'predicted_surge')
+        print("\nPredicted Enrollment Hotspots for Q2 2026:")
+        print(hotspots.index.tolist())
+        print("ACTION: Pre-deploy mobile enrollment vans to these districts NOW.")
+
+        # =========================================================================
+        # XAI LAYER: SHAP Explainability
+        # WHY: Black-box ML isn't enough. Judges want to know WHY a district is flagged.
+        # =========================================================================
+        print("\n--- XAI: SHAP EXPLAINABILITY LAYER ---")
+        try:
+            import shap
+
+            # TreeExplainer for Random Forest
+            explainer = shap.TreeExplainer(rf)
+            shap_values = explainer.shap_values(X_test)
+
+            print("SHAP values computed successfully.")
+
+            # Generate Fraud Explanation Cards
+            print("Generating fraud explanation cards...")
+
+            feature_names = ['enrol_std', 'demo_sum', 'saturation']
+
+            # Get top 5 districts with highest predicted values from test set
+            test_indices = X_test.index.tolist()
+            test_predictions = rf.predict(X_test)
+            top_fraud_indices = sorted(range(len(test_predictions)), 
+                                        key=lambda i: test_predictions[i], 
+                                        reverse=True)[:5]
+
+            html_content = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -762,24 +690,24 @@ if len(X) > 50:  # Need enough data for train/test split
         <p class="text-gray-400 mb-8">SHAP-based explanations for model predictions</p>
         <p class="text-sm text-gray-500 mb-6">Source: RandomForest + SHAP TreeExplainer</p>
 """
-        
-        for rank, idx in enumerate(top_fraud_indices, 1):
-            district_name = test_indices[idx] if idx < len(test_indices) else f"District_{idx}"
-            shap_vals = shap_values[idx]
-            prediction = test_predictions[idx]
-            
-            # Calculate contribution percentages
-            total_abs_shap = sum(abs(v) for v in shap_vals)
-            contributions = []
-            for i, (feature, shap_val) in enumerate(zip(feature_names, shap_vals)):
-                pct = (abs(shap_val) / total_abs_shap * 100) if total_abs_shap > 0 else 0
-                direction = "High" if shap_val > 0 else "Low"
-                contributions.append((feature, shap_val, pct, direction))
-            
-            # Sort by absolute contribution
-            contributions.sort(key=lambda x: abs(x[1]), reverse=True)
-            
-            html_content += f"""
+
+            for rank, idx in enumerate(top_fraud_indices, 1):
+                district_name = test_indices[idx] if idx < len(test_indices) else f"District_{idx}"
+                shap_vals = shap_values[idx]
+                prediction = test_predictions[idx]
+
+                # Calculate contribution percentages
+                total_abs_shap = sum(abs(v) for v in shap_vals)
+                contributions = []
+                for i, (feature, shap_val) in enumerate(zip(feature_names, shap_vals)):
+                    pct = (abs(shap_val) / total_abs_shap * 100) if total_abs_shap > 0 else 0
+                    direction = "High" if shap_val > 0 else "Low"
+                    contributions.append((feature, shap_val, pct, direction))
+
+                # Sort by absolute contribution
+                contributions.sort(key=lambda x: abs(x[1]), reverse=True)
+
+                html_content += f"""
         <div class="card rounded-xl p-6 mb-6">
             <div class="flex justify-between items-start mb-4">
                 <div>
@@ -798,11 +726,11 @@ if len(X) > 50:  # Need enough data for train/test split
                 </p>
                 <ul class="space-y-3">
 """
-            
-            for i, (feature, shap_val, pct, direction) in enumerate(contributions, 1):
-                color = "emerald" if shap_val > 0 else "rose"
-                feature_display = feature.replace('_', ' ').title()
-                html_content += f"""
+
+                for i, (feature, shap_val, pct, direction) in enumerate(contributions, 1):
+                    color = "emerald" if shap_val > 0 else "rose"
+                    feature_display = feature.replace('_', ' ').title()
+                    html_content += f"""
                     <li class="flex items-center gap-3">
                         <span class="text-gray-400 text-sm w-4">{i}.</span>
                         <span class="text-white font-medium flex-1">{feature_display} was <span class="text-{color}-400">{direction}</span></span>
@@ -812,14 +740,14 @@ if len(X) > 50:  # Need enough data for train/test split
                         <span class="text-{color}-400 font-bold w-16 text-right">{'+' if shap_val > 0 else ''}{pct:.0f}%</span>
                     </li>
 """
-            
-            html_content += """
+
+                html_content += """
                 </ul>
             </div>
         </div>
 """
-        
-        html_content += """
+
+            html_content += """
         <div class="text-center text-gray-500 text-sm mt-8">
             <p>Generated using SHAP (SHapley Additive exPlanations)</p>
             <p class="mt-1">Team: Last Commit | UIDAI Hackathon 2026</p>
@@ -828,25 +756,25 @@ if len(X) > 50:  # Need enough data for train/test split
 </body>
 </html>
 """
-        
-        with open('output/fraud_explanation_cards.html', 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print("✅ Saved: output/fraud_explanation_cards.html")
-        
-        # Print summary
-        print("\nTOP 5 FRAUD EXPLANATION SUMMARY:")
-        for rank, idx in enumerate(top_fraud_indices[:3], 1):
-            district_name = test_indices[idx] if idx < len(test_indices) else f"District_{idx}"
-            print(f"  {rank}. {district_name}: Top driver = {feature_names[abs(shap_values[idx]).argmax()]}")
-        
-    except ImportError:
-        print("SHAP library not installed. Run: pip install shap")
-    except Exception as e:
-        print(f"SHAP analysis error: {e}")
-        print("Continuing without SHAP explanations...")
 
-else:
-    print("Insufficient district-level data for ML modeling.")
+            with open('output/fraud_explanation_cards.html', 'w', encoding='utf-8') as f:
+                f.write(html_content)
+            print("✅ Saved: output/fraud_explanation_cards.html")
+
+            # Print summary
+            print("\nTOP 5 FRAUD EXPLANATION SUMMARY:")
+            for rank, idx in enumerate(top_fraud_indices[:3], 1):
+                district_name = test_indices[idx] if idx < len(test_indices) else f"District_{idx}"
+                print(f"  {rank}. {district_name}: Top driver = {feature_names[abs(shap_values[idx]).argmax()]}")
+
+        except ImportError:
+            print("SHAP library not installed. Run: pip install shap")
+        except Exception as e:
+            print(f"SHAP analysis error: {e}")
+            print("Continuing without SHAP explanations...")
+
+    else:
+        print("Insufficient district-level data for ML modeling.")
 
 
 # ============================================================================
@@ -854,53 +782,91 @@ else:
 # WHY: Track acceleration/deceleration to catch trends early
 # GOAL: Identify districts with rapid growth or decline
 # ============================================================================
-print("\n--- ADVANCED: ENROLLMENT VELOCITY ANALYSIS ---")
-# Calculate weekly enrollment trends
-weekly_enrollment = master_df.groupby(['district', pd.Grouper(key='date', freq='W')])['total_enrol'].sum().reset_index()
-weekly_enrollment.columns = ['district', 'week', 'enrollments']
+def phase_enrollment_velocity(ctx):
+    rollups = ctx['rollups']
+    print("\n--- ADVANCED: ENROLLMENT VELOCITY ANALYSIS ---")
+    # Calculate weekly enrollment trends
+    weekly_enrollment = query_rollup(rollups, ('district',), 'W', columns=['total_enrol']).reset_index()
+    weekly_enrollment.columns = ['district', 'week', 'enrollments']
 
-# Calculate velocity (week-over-week change)
-velocity_data = []
-for district in weekly_enrollment['district'].unique():
-    district_data = weekly_enrollment[weekly_enrollment['district'] == district].sort_values('week')
-    if len(district_data) >= 2:
-        recent_enrol = district_data['enrollments'].iloc[-1]
-        previous_enrol = district_data['enrollments'].iloc[-2]
-        velocity = ((recent_enrol - previous_enrol) / (previous_enrol + 1)) * 100
-        velocity_data.append({'district': district, 'velocity': velocity, 'recent': recent_enrol})
+    # Velocity over 1/4/13 weeks and acceleration, all districts in one grouped pass
+    velocity_df = enrollment_velocity(weekly_enrollment)
+    velocity_df['velocity'] = velocity_df['velocity_1w']
 
-velocity_df = pd.DataFrame(velocity_data).sort_values('velocity', ascending=False)
+    # Identify accelerating and decelerating districts (ties by name)
+    accelerating = velocity_df.sort_values(['velocity', 'district'], ascending=[False, True]).head(5)
+    decelerating = velocity_df.sort_values(['velocity', 'district']).head(5)
 
-# Identify accelerating and decelerating districts
-accelerating = velocity_df.nlargest(5, 'velocity')
-decelerating = velocity_df.nsmallest(5, 'velocity')
+    print("\nENROLLMENT MOMENTUM:")
+    print("\n  🚀 TOP 5 ACCELERATING DISTRICTS (Week-over-Week Growth):")
+    for idx, row in accelerating.iterrows():
+        print(f"    - {row['district']}: {row['velocity']:+.1f}% velocity")
 
-print("\nENROLLMENT MOMENTUM:")
-print("\n  🚀 TOP 5 ACCELERATING DISTRICTS (Week-over-Week Growth):")
-for idx, row in accelerating.iterrows():
-    print(f"    - {row['district']}: {row['velocity']:+.1f}% velocity")
+    print("\n  📉 TOP 5 DECELERATING DISTRICTS (Week-over-Week Decline):")
+    for idx, row in decelerating.iterrows():
+        print(f"    - {row['district']}: {row['velocity']:+.1f}% velocity")
 
-print("\n  📉 TOP 5 DECELERATING DISTRICTS (Week-over-Week Decline):")
-for idx, row in decelerating.iterrows():
-    print(f"    - {row['district']}: {row['velocity']:+.1f}% velocity")
+    windows = [c for c in velocity_df.columns if c.startswith('velocity_')]
+    print("\n  📈 SUSTAINED MOMENTUM (" + " / ".join(c[len('velocity_'):] for c in windows) + " velocity, top 5 by acceleration):")
+    for idx, row in velocity_df.dropna(subset=['acceleration']).nlargest(5, 'acceleration').iterrows():
+        trend = " / ".join("n/a" if pd.isna(row[c]) else f"{row[c]:+.0f}%" for c in windows)
+        print(f"    - {row['district']}: {trend}, acceleration {row['acceleration']:+.0f} pp")
 
-print("\n  ACTION: Investigate decelerating districts for operational issues.")
+    print("\n  ACTION: Investigate decelerating districts for operational issues.")
 
 
 # ============================================================================
-# PHASE 6: STRATEGIC SYNTHESIS + GEOGRAPHIC CLUSTERING
-# WHY: Move from numbers to ACTIONABLE recommendations
+# PHASE 5E: FORECAST FLEET (Every District and State)
+# WHY: Capacity is planned per district/state, not from one national curve
+# GOAL: Daily load forecast with 95% interval for every district and state
 # ============================================================================
-print("\n=== PHASE 6: STRATEGIC SYNTHESIS ===")
-district_summary = master_df.groupby('district')[['total_enrol', 'total_bio', 'total_demo']].sum()
-district_summary['ratio'] = (district_summary['total_bio'] + district_summary['total_demo']) / (district_summary['total_enrol'] + 1)
+def phase_forecast_fleet(ctx):
+    rollups = ctx['rollups']
+    print("\n--- ADVANCED: DISTRICT & STATE FORECAST FLEET (Holt-Winters) ---")
+    series = {'state': entity_series(rollups, 'state'), 'district': entity_series(rollups, 'district')}
+    forecasts, fits = forecast_fleet(series, horizon=90)
+    if forecasts.empty:
+        print("No daily series to forecast.")
+        return
+
+    print(f"Forecast {len(series['state'])} states and {len(series['district'])} districts, 90 days ahead")
+    print("  Fits: " + ", ".join(f"{fits.get(kind, 0)} {kind}" for kind in ('cold', 'warm', 'cached', 'naive')))
+
+    load = (forecasts[forecasts['entity_type'] == 'district']
+            .groupby('entity')[['point', 'upper']].mean()
+            .sort_values('point', ascending=False))
+    print("\n  TOP 5 DISTRICTS BY PROJECTED DAILY LOAD (mean point / 95% upper):")
+    for district, row in load.head(5).iterrows():
+        print(f"    - {district}: {row['point']:.0f} / {row['upper']:.0f} transactions per day")
+
+    forecasts.to_csv('output/forecasts.csv', index=False)
+    print(f"Saved: output/forecasts.csv ({len(forecasts):,} rows)")
+    print("ACTION: Provision staff and kits against the upper bound, not the point forecast.")
 
-growing_districts = district_summary[district_summary['ratio'] < 1].sort_values(by='total_enrol', ascending=False).head(5)
-mature_districts = district_summary[district_summary['ratio'] > 5].sort_values(by='total_bio', ascending=False).head(5)
 
-# Comparative Insights
-pure_enrollment = master_df[(master_df['total_enrol'] > 500) & (master_df['total_demo'] == 0) & (master_df['total_bio'] == 0)]
-pure_update = master_df[(master_df['total_enrol'] == 0) & ((master_df['total_demo'] > 500) | (master_df['total_bio'] > 500))]
+# ============================================================================
+# PHASE 6: STRATEGIC SYNTHESIS + GEOGRAPHIC CLUSTERING
+# WHY: Move from numbers to ACTIONABLE recommendations
+# ============================================================================
+def phase_strategic_synthesis(ctx):
+    master_df, rollups = ctx['master_df'], ctx['rollups']
+    print("\n=== PHASE 6: STRATEGIC SYNTHESIS ===")
+    district_summary = query_rollup(rollups, ('district',), columns=['total_enrol', 'total_bio', 'total_demo'])
+    district_summary['ratio'] = (district_summary['total_bio'] + district_summary['total_demo']) / (district_summary['total_enrol'] + 1)
+
+    growing_districts = district_summary[district_summary['ratio'] < 1].sort_values(by='total_enrol', ascending=False).head(5)
+    mature_districts = district_summary[district_summary['ratio'] > 5].sort_values(by='total_bio', ascending=False).head(5)
+
+    # Comparative Insights
+    pure_enrollment = cube_filter(master_df, lambda df: (df['total_enrol'] > 500) & (df['total_demo'] == 0) & (df['total_bio'] == 0))
+    pure_update = cube_filter(master_df, lambda df: (df['total_enrol'] == 0) & ((df['total_demo'] > 500) | (df['total_bio'] > 500)))
+    return {
+        'district_summary': district_summary,
+        'growing_districts': growing_districts,
+        'mature_districts': mature_districts,
+        'pure_enrollment': pure_enrollment,
+        'pure_update': pure_update,
+    }
 
 
 # ============================================================================
@@ -908,52 +874,48 @@ pure_update = master_df[(master_df['total_enrol'] == 0) & ((master_df['total_dem
 # WHY: Group districts with similar "Aadhaar DNA" regardless of geography
 # GOAL: Create strategic district typologies (Metro, Growth, Rural, etc.)
 # ============================================================================
-print("\n--- ADVANCED: GEOGRAPHIC CLUSTERING (K-Means) ---")
-# Features for clustering: enrollment, updates, saturation
-cluster_features = district_summary[['total_enrol', 'total_demo', 'total_bio', 'ratio']].copy()
-
-# Standardization: K-Means is sensitive to scale
-# WHY: Enrollment numbers (100,000s) would dominate ratio (0-10) without scaling
-scaler = StandardScaler()
-scaled = scaler.fit_transform(cluster_features)
-
-# K-Means: Partition districts into 4 strategic groups
-# WHY: 4 clusters = Tier-1 Metro / Tier-2 Growth / Rural Stagnant / Fraud Risk
-kmeans = KMeans(n_clusters=4, random_state=42)
-district_summary['cluster'] = kmeans.fit_predict(scaled)
-
-# Interpret each cluster
-print("\nDISTRICT TYPOLOGY (K-Means Clustering):")
-for i in range(4):
-    cluster_districts = district_summary[district_summary['cluster'] == i]
-    avg_saturation = cluster_districts['ratio'].mean()
-    avg_enrol = cluster_districts['total_enrol'].mean()
-    
-    # Auto-name clusters based on characteristics
-    if avg_saturation > 5:
-        cluster_name = "MATURE HUB"
-    elif avg_enrol > cluster_districts['total_enrol'].median():
-        cluster_name = "GROWTH ZONE"
-    elif avg_saturation < 1:
-        cluster_name = "NEW MARKET"
-    else:
-        cluster_name = "MAINTENANCE"
-    
-    print(f"\nCluster {i}: {cluster_name} ({len(cluster_districts)} districts)")
-    print(f"  Avg Saturation: {avg_saturation:.2f}")
-    print(f"  Avg Enrollments: {avg_enrol:.0f}")
-    print(f"  Example: {cluster_districts.index[0]}")
-
-# Save cluster map
-cluster_summary = district_summary.groupby('cluster').size().sort_values(ascending=False)
-plt.figure(figsize=(10, 6))
-cluster_summary.plot(kind='bar', color='teal')
-plt.title('District Distribution Across Strategic Clusters')
-plt.xlabel('Cluster ID')
-plt.ylabel('Number of Districts')
-plt.savefig('output/phase6_clusters.png')
-plt.close()
-print("\nSaved plot: output/phase6_clusters.png")
+def phase_clustering(ctx):
+    district_summary = ctx['district_summary']
+    print("\n--- ADVANCED: GEOGRAPHIC CLUSTERING (K-Means) ---")
+    # Features for clustering: enrollment, updates, saturation
+    cluster_features = district_summary[['total_enrol', 'total_demo', 'total_bio', 'ratio']].copy()
+
+    # K-Means on standardized features: Partition districts into 4 strategic groups
+    # WHY: 4 clusters = Tier-1 Metro / Tier-2 Growth / Rural Stagnant / Fraud Risk
+    district_summary['cluster'] = models.cluster_districts(cluster_features, n_clusters=4)
+
+    # Interpret each cluster
+    print("\nDISTRICT TYPOLOGY (K-Means Clustering):")
+    for i in range(4):
+        cluster_districts = district_summary[district_summary['cluster'] == i]
+        avg_saturation = cluster_districts['ratio'].mean()
+        avg_enrol = cluster_districts['total_enrol'].mean()
+
+        # Auto-name clusters based on characteristics
+        if avg_saturation > 5:
+            cluster_name = "MATURE HUB"
+        elif avg_enrol > cluster_districts['total_enrol'].median():
+            cluster_name = "GROWTH ZONE"
+        elif avg_saturation < 1:
+            cluster_name = "NEW MARKET"
+        else:
+            cluster_name = "MAINTENANCE"
+
+        print(f"\nCluster {i}: {cluster_name} ({len(cluster_districts)} districts)")
+        print(f"  Avg Saturation: {avg_saturation:.2f}")
+        print(f"  Avg Enrollments: {avg_enrol:.0f}")
+        print(f"  Example: {cluster_districts.index[0]}")
+
+    # Save cluster map
+    cluster_summary = district_summary.groupby('cluster').size().sort_values(ascending=False)
+    plt.figure(figsize=(10, 6))
+    cluster_summary.plot(kind='bar', color='teal')
+    plt.title('District Distribution Across Strategic Clusters')
+    plt.xlabel('Cluster ID')
+    plt.ylabel('Number of Districts')
+    plt.savefig('output/phase6_clusters.png')
+    plt.close()
+    print("\nSaved plot: output/phase6_clusters.png")
 
 
 # ============================================================================
@@ -961,29 +923,33 @@ print("\nSaved plot: output/phase6_clusters.png")
 # WHY: Detect population movement corridors (rural-to-urban migration)
 # GOAL: Identify "source" and "destination" districts for targeted policy
 # ============================================================================
-print("\n--- ADVANCED: MIGRATION FLOW ANALYSIS ---")
-# Emigration Hubs: High demo updates but LOW enrollment
-# INTERPRETATION: People are LEAVING (updating address to new location)
-emigration_hubs = district_summary[
-    (district_summary['total_demo'] > district_summary['total_enrol']) & 
-    (district_summary['total_enrol'] < district_summary['total_enrol'].quantile(0.2))
-]
-
-# Immigration Hubs: Very high demo updates with low saturation
-# INTERPRETATION: NEW people are arriving (updating address TO this location)
-immigration_hubs = district_summary[
-    (district_summary['total_demo'] > district_summary['total_enrol'] * 2) &
-    (district_summary['ratio'] < 0.5)
-]
-
-print(f"Emigration Sources: {len(emigration_hubs)} districts")
-print(f"Immigration Destinations: {len(immigration_hubs)} districts")
-
-if not immigration_hubs.empty:
-    top_immigration = immigration_hubs['total_demo'].idxmax()
-    print(f"\nTop Immigration Hub: {top_immigration}")
-    print("INSIGHT: This district is a MIGRATION MAGNET (likely industrial/metro area).")
-    print("ACTION: Increase demographic update center capacity here.")
+def phase_migration_flow(ctx):
+    district_summary = ctx['district_summary']
+    top_immigration = None
+    print("\n--- ADVANCED: MIGRATION FLOW ANALYSIS ---")
+    # Emigration Hubs: High demo updates but LOW enrollment
+    # INTERPRETATION: People are LEAVING (updating address to new location)
+    emigration_hubs = district_summary[
+        (district_summary['total_demo'] > district_summary['total_enrol']) & 
+        (district_summary['total_enrol'] < district_summary['total_enrol'].quantile(0.2))
+    ]
+
+    # Immigration Hubs: Very high demo updates with low saturation
+    # INTERPRETATION: NEW people are arriving (updating address TO this location)
+    immigration_hubs = district_summary[
+        (district_summary['total_demo'] > district_summary['total_enrol'] * 2) &
+        (district_summary['ratio'] < 0.5)
+    ]
+
+    print(f"Emigration Sources: {len(emigration_hubs)} districts")
+    print(f"Immigration Destinations: {len(immigration_hubs)} districts")
+
+    if not immigration_hubs.empty:
+        top_immigration = immigration_hubs['total_demo'].idxmax()
+        print(f"\nTop Immigration Hub: {top_immigration}")
+        print("INSIGHT: This district is a MIGRATION MAGNET (likely industrial/metro area).")
+        print("ACTION: Increase demographic update center capacity here.")
+    return {'immigration_hubs': immigration_hubs, 'top_immigration': top_immigration}
 
 
 # ============================================================================
@@ -991,172 +957,182 @@ if not immigration_hubs.empty:
 # WHY: Policy is made at STATE level, not district
 # GOAL: Generate actionable recommendations per state
 # ============================================================================
-print("\n--- ADVANCED: STATE-LEVEL STRATEGIC PLAYBOOK ---")
-# Aggregate data to state level
-state_summary = master_df.groupby('state').agg({
-    'total_enrol': 'sum',
-    'total_demo': 'sum',
-    'total_bio': 'sum',
-    'Saturation_Index': 'mean'
-}).fillna(0)
-
-state_summary['ratio'] = (state_summary['total_demo'] + state_summary['total_bio']) / (state_summary['total_enrol'] + 1)
-state_summary['dominant_activity'] = state_summary[['total_enrol', 'total_demo', 'total_bio']].idxmax(axis=1)
-
-# Generate state-specific recommendations
-print("\nSTATE-LEVEL RECOMMENDATIONS:\n")
-for state in state_summary.nlargest(10, 'total_enrol').index:  # Top 10 states by enrollment
-    state_data = state_summary.loc[state]
-    ratio = state_data['ratio']
-    dominant = state_data['dominant_activity'].replace('total_', '').upper()
-    
-    # Determine strategy
-    if ratio < 1:  # Growth state
-        strategy = "EXPANSION"
-        resource = "50 mobile enrollment vans"
-    elif ratio > 5:  # Mature state
-        strategy = "OPTIMIZATION"
-        resource = "25 self-service kiosks"
-    else:
-        strategy = "BALANCED"
-        resource = "20 vans + 10 kiosks"
-    
-    print(f"  {state}:")
-    print(f"    Strategy: {strategy} (Ratio: {ratio:.2f})")
-    print(f"    Dominant Activity: {dominant}")
-    print(f"    Deploy: {resource}")
-    print()
+def phase_state_playbook(ctx):
+    rollups = ctx['rollups']
+    print("\n--- ADVANCED: STATE-LEVEL STRATEGIC PLAYBOOK ---")
+    # Aggregate data to state level
+    state_summary = query_rollup(rollups, ('state',), columns=['total_enrol', 'total_demo', 'total_bio'],
+                                 means=['Saturation_Index']).fillna(0)
+
+    state_summary['ratio'] = (state_summary['total_demo'] + state_summary['total_bio']) / (state_summary['total_enrol'] + 1)
+    state_summary['dominant_activity'] = state_summary[['total_enrol', 'total_demo', 'total_bio']].idxmax(axis=1)
+
+    # Generate state-specific recommendations
+    print("\nSTATE-LEVEL RECOMMENDATIONS:\n")
+    for state in state_summary.nlargest(10, 'total_enrol').index:  # Top 10 states by enrollment
+        state_data = state_summary.loc[state]
+        ratio = state_data['ratio']
+        dominant = state_data['dominant_activity'].replace('total_', '').upper()
+
+        # Determine strategy
+        if ratio < 1:  # Growth state
+            strategy = "EXPANSION"
+            resource = "50 mobile enrollment vans"
+        elif ratio > 5:  # Mature state
+            strategy = "OPTIMIZATION"
+            resource = "25 self-service kiosks"
+        else:
+            strategy = "BALANCED"
+            resource = "20 vans + 10 kiosks"
 
-print("  INSIGHT: States with Ratio < 1 need growth infrastructure.")
-print("           States with Ratio > 5 need cost-optimization measures.")
+        print(f"  {state}:")
+        print(f"    Strategy: {strategy} (Ratio: {ratio:.2f})")
+        print(f"    Dominant Activity: {dominant}")
+        print(f"    Deploy: {resource}")
+        print()
+
+    print("  INSIGHT: States with Ratio < 1 need growth infrastructure.")
+    print("           States with Ratio > 5 need cost-optimization measures.")
 
 
 # ============================================================================
 # FINAL EXECUTIVE REPORT
 # ============================================================================
-print("\n\n" + "="*60)
-print("📢 EXECUTIVE INSIGHTS REPORT (ADVANCED ANALYTICS)")
-print("="*60)
+def phase_executive_report(ctx):
+    growing_districts, mature_districts = ctx['growing_districts'], ctx['mature_districts']
+    pure_enrollment, pure_update = ctx['pure_enrollment'], ctx['pure_update']
+    district_summary = ctx['district_summary']
+    immigration_hubs, top_immigration = ctx['immigration_hubs'], ctx['top_immigration']
+    expected_updates, actual_updates = ctx['expected_updates'], ctx['actual_updates']
+    n_fraud_signals, fraud_clusters = ctx['n_fraud_signals'], ctx['fraud_clusters']
+
+    print("\n\n" + "="*60)
+    print("📢 EXECUTIVE INSIGHTS REPORT (ADVANCED ANALYTICS)")
+    print("="*60)
+
+    top_growth = growing_districts.index[0] if not growing_districts.empty else 'N/A'
+    top_mature = mature_districts.index[0] if not mature_districts.empty else 'N/A'
+    fraud_alert = "detected" if n_fraud_signals > 0 else "not detected"
 
-top_growth = growing_districts.index[0] if not growing_districts.empty else 'N/A'
-top_mature = mature_districts.index[0] if not mature_districts.empty else 'N/A'
-fraud_alert = "detected" if n_fraud_signals > 0 else "not detected"
+    print(f"\n1. 🚀 GROWTH ENGINE: The district of '{top_growth}' is leading new user acquisition.")
+    print(f"   -> Recommendation: Prioritize this region for 'Baal Aadhaar' camps.")
 
-print(f"\n1. 🚀 GROWTH ENGINE: The district of '{top_growth}' is leading new user acquisition.")
-print(f"   -> Recommendation: Prioritize this region for 'Baal Aadhaar' camps.")
+    print(f"\n2. 🏙️ MATURE HUB: The district of '{top_mature}' has moved to a maintenance phase.")
+    print(f"   -> Recommendation: Shift staff from here to '{top_growth}' to optimize costs.")
 
-print(f"\n2. 🏙️ MATURE HUB: The district of '{top_mature}' has moved to a maintenance phase.")
-print(f"   -> Recommendation: Shift staff from here to '{top_growth}' to optimize costs.")
+    print(f"\n3. 🚨 RISK AUDIT: Potential fraud rings were {fraud_alert} in demographic data.")
+    if fraud_alert == "detected":
+        print(f"   -> Action: Investigate the {n_fraud_signals} specific dates with anomalous address updates.")
 
-print(f"\n3. 🚨 RISK AUDIT: Potential fraud rings were {fraud_alert} in demographic data.")
-if fraud_alert == "detected":
-    print(f"   -> Action: Investigate the {n_fraud_signals} specific dates with anomalous address updates.")
+    print(f"\n4. ⚖️ MARKET SEGMENTATION:")
+    print(f"   - {len(pure_enrollment)} 'Pure Growth' Pincodes (New Markets)")
+    print(f"   - {len(pure_update)} 'Pure Maintenance' Pincodes (Kiosk Ready)")
 
-print(f"\n4. ⚖️ MARKET SEGMENTATION:")
-print(f"   - {len(pure_enrollment)} 'Pure Growth' Pincodes (New Markets)")
-print(f"   - {len(pure_update)} 'Pure Maintenance' Pincodes (Kiosk Ready)")
+    print(f"\n5. 🧠 MACHINE LEARNING INSIGHTS:")
+    print(f"   - Identified {len(district_summary)} districts across 4 strategic typologies")
+    print(f"   - Compliance Gap: ~{max(0, expected_updates - actual_updates):.0f} missing biometric updates")
+    print(f"   - Detected {fraud_clusters} geographic fraud clusters")
 
-print(f"\n5. 🧠 MACHINE LEARNING INSIGHTS:")
-print(f"   - Identified {len(district_summary)} districts across 4 strategic typologies")
-print(f"   - Compliance Gap: ~{max(0, expected_updates - actual_updates):.0f} missing biometric updates")
-print(f"   - Detected {fraud_clusters if 'fraud_clusters' in locals() else 0} geographic fraud clusters")
+    print(f"\n6. 🌍 MIGRATION CORRIDORS:")
+    if not immigration_hubs.empty:
+        print(f"   - Top Immigration Hub: {top_immigration}")
+        print(f"   - Recommendation: Deploy dedicated demographic update centers in migration destinations")
 
-print(f"\n6. 🌍 MIGRATION CORRIDORS:")
-if not immigration_hubs.empty:
-    print(f"   - Top Immigration Hub: {top_immigration}")
-    print(f"   - Recommendation: Deploy dedicated demographic update centers in migration destinations")
+    print("\n✅ ANALYSIS COMPLETE. Visualizations saved to 'output/' folder.")
+    print("="*60)
 
-print("\n✅ ANALYSIS COMPLETE. Visualizations saved to 'output/' folder.")
-print("="*60)
 
 # ============================================================================
 # PHASE 7: INTERACTIVE VISUALIZATIONS (JUDGE-READY ARTIFACTS)
 # WHY: Static charts are good, INTERACTIVE charts win hackathons.
 # ============================================================================
-print("\n=== PHASE 7: INTERACTIVE VISUALIZATIONS (PLOTLY) ===")
-
-# 1. SANKEY DIAGRAM: The "Ghost" Pipeline
-# Shows leakage from Enrollment -> Active -> Biometric Compliant
-print("Generating Interactive Sankey Diagram (Ghost Pipeline)...")
-labels = ["Total Enrollment", "Active Updates", "Dormant (Ghosts)", 
-          "Demographic Updates", "Biometric Updates", "Fully Compliant"]
-sources = [0, 0,      1, 1,      3]
-targets = [1, 2,      3, 4,      5]
-values  = [30, 70,    18, 12,    8] 
-# Note: These values are derived from the aggregate LPI and Drop-off rates found in Phase 3/4
-
-fig = go.Figure(data=[go.Sankey(
-    node = dict(
-      pad = 15, thickness = 20,
-      line = dict(color = "black", width = 0.5),
-      label = labels,
-      color = ["#3498db", "#2ecc71", "#e74c3c", "#f1c40f", "#9b59b6", "#1abc9c"]
-    ),
-    link = dict(
-      source = sources, target = targets, value = values,
-      color = ["#abebc6", "#fadbd8", "#f9e79f", "#d2b4de", "#a3e4d7"]
-    ))])
-fig.update_layout(title_text="The 'Ghost' Pipeline: 92% Attrition Rate (Interactive)", font_size=12)
-fig.write_html("output/interactive_ghost_sankey.html")
-print("Saved: output/interactive_ghost_sankey.html")
-
-# 2. STRATEGY MAP: Saturation vs Efficiency
-# Strategic plotting for resource allocation
-print("Generating Interactive Strategy Map...")
-if not district_summary.empty:
-    # Use real data from district_summary
-    # Create a nice DF for plotly
-    viz_df = district_summary.copy()
-    viz_df['District'] = viz_df.index
-    viz_df['Efficiency'] = (viz_df['total_bio'] * 0.5 + viz_df['total_demo'] * 0.3 + viz_df['total_enrol'] * 0.2) / (viz_df['total_enrol'] + 1) * 100
-    viz_df = viz_df.fillna(0)
-    
-    # Classify
-    viz_df['Type'] = viz_df['ratio'].apply(lambda x: 'Mature Hub' if x > 5 else 'Growth Zone' if x < 1 else 'Stable')
-    
-    fig2 = px.scatter(viz_df, x="ratio", y="Efficiency", 
-                     size="total_enrol", color="Type", hover_name="District",
-                     log_x=True, # Use log scale because ratio varies wildly
-                     color_discrete_map={"Mature Hub": "teal", "Growth Zone": "orange", "Stable": "grey"},
-                     title="Strategic Deployment Map: Vans (Orange) vs Kiosks (Teal)",
-                     labels={"ratio": "Saturation Index (Updates/Enrollment)", "Efficiency": "Efficiency Score"})
-    
-    fig2.add_vline(x=5, line_width=1, line_dash="dash", line_color="green", annotation_text="Kiosk Ready")
-    fig2.write_html("output/interactive_strategy_map.html")
-    print("Saved: output/interactive_strategy_map.html")
+def phase_interactive_visualizations(ctx):
+    district_summary = ctx['district_summary']
+    print("\n=== PHASE 7: INTERACTIVE VISUALIZATIONS (PLOTLY) ===")
+
+    # 1. SANKEY DIAGRAM: The "Ghost" Pipeline
+    # Shows leakage from Enrollment -> Active -> Biometric Compliant
+    print("Generating Interactive Sankey Diagram (Ghost Pipeline)...")
+    labels = ["Total Enrollment", "Active Updates", "Dormant (Ghosts)", 
+              "Demographic Updates", "Biometric Updates", "Fully Compliant"]
+    sources = [0, 0,      1, 1,      3]
+    targets = [1, 2,      3, 4,      5]
+    values  = [30, 70,    18, 12,    8] 
+    # Note: These values are derived from the aggregate LPI and Drop-off rates found in Phase 3/4
+
+    fig = go.Figure(data=[go.Sankey(
+        node = dict(
+          pad = 15, thickness = 20,
+          line = dict(color = "black", width = 0.5),
+          label = labels,
+          color = ["#3498db", "#2ecc71", "#e74c3c", "#f1c40f", "#9b59b6", "#1abc9c"]
+        ),
+        link = dict(
+          source = sources, target = targets, value = values,
+          color = ["#abebc6", "#fadbd8", "#f9e79f", "#d2b4de", "#a3e4d7"]
+        ))])
+    fig.update_layout(title_text="The 'Ghost' Pipeline: 92% Attrition Rate (Interactive)", font_size=12)
+    fig.write_html("output/interactive_ghost_sankey.html")
+    print("Saved: output/interactive_ghost_sankey.html")
+
+    # 2. STRATEGY MAP: Saturation vs Efficiency
+    # Strategic plotting for resource allocation
+    print("Generating Interactive Strategy Map...")
+    if not district_summary.empty:
+        # Use real data from district_summary
+        # Create a nice DF for plotly
+        viz_df = district_summary.copy()
+        viz_df['District'] = viz_df.index
+        viz_df['Efficiency'] = (viz_df['total_bio'] * 0.5 + viz_df['total_demo'] * 0.3 + viz_df['total_enrol'] * 0.2) / (viz_df['total_enrol'] + 1) * 100
+        viz_df = viz_df.fillna(0)
+
+        # Classify
+        viz_df['Type'] = viz_df['ratio'].apply(lambda x: 'Mature Hub' if x > 5 else 'Growth Zone' if x < 1 else 'Stable')
+
+        fig2 = px.scatter(viz_df, x="ratio", y="Efficiency", 
+                         size="total_enrol", color="Type", hover_name="District",
+                         log_x=True, # Use log scale because ratio varies wildly
+                         color_discrete_map={"Mature Hub": "teal", "Growth Zone": "orange", "Stable": "grey"},
+                         title="Strategic Deployment Map: Vans (Orange) vs Kiosks (Teal)",
+                         labels={"ratio": "Saturation Index (Updates/Enrollment)", "Efficiency": "Efficiency Score"})
+
+        fig2.add_vline(x=5, line_width=1, line_dash="dash", line_color="green", annotation_text="Kiosk Ready")
+        fig2.write_html("output/interactive_strategy_map.html")
+        print("Saved: output/interactive_strategy_map.html")
 
 
 # ============================================================================
 # FINAL GUIDE: GRAPH IMPORTANCE (WHICH ONES MATTER?)
 # ============================================================================
-print("\n" + "="*80)
-print("📢 GRAPH IMPORTANCE GUIDE: WHICH OF THE 25+ GRAPHS MATTER?")
-print("="*80)
-
-print("\n🔥 TIER 1: THE MONEY PLOTS (Show these to Judges)")
-print("1. output/interactive_ghost_sankey.html")
-print("   - WHY: Instantly proves the 92% 'Ghost' problem. It's your 'Mic Drop' image.")
-print("2. output/phase5_forecast.png")
-print("   - WHY: Shows you didn't just analyze the past, you predicted the FUTURE.")
-print("3. output/interactive_strategy_map.html")
-print("   - WHY: Proves you have a Strategy (Kiosks vs Vans), not just numbers.")
-print("4. output/phase6_clusters.png")
-print("   - WHY: Shows advanced Machine Learning (K-Means) usage.")
-
-print("\n📉 TIER 2: SUPPORTING EVIDENCE (Use in Appendix/Deep Dives)")
-print("1. output/phase2_seasonality.png")
-print("   - WHY: Proves the 'Harvest Migration' theory.")
-print("2. output/phase3_biometric_trends.png")
-print("   - WHY: Evidence for the 'Time Bomb' compliance gap.")
-print("3. output/phase1_age_pyramid.png")
-print("   - WHY: Visual proof of the missing 18-25 adult cohort.")
-
-print("\n🛠️ TIER 3: TECHNICAL/DEBUG (For Report Appendices)")
-print("- Correlation Matrix, Weekly Trends, State Bar Charts.")
-print("- These show rigor but are less exciting for a 3-minute pitch.")
-
-print("\n✅ ANALYSIS & EXPLANATION COMPLETE.")
-print("="*80)
+def phase_graph_guide(ctx):
+    print("\n" + "="*80)
+    print("📢 GRAPH IMPORTANCE GUIDE: WHICH OF THE 25+ GRAPHS MATTER?")
+    print("="*80)
+
+    print("\n🔥 TIER 1: THE MONEY PLOTS (Show these to Judges)")
+    print("1. output/interactive_ghost_sankey.html")
+    print("   - WHY: Instantly proves the 92% 'Ghost' problem. It's your 'Mic Drop' image.")
+    print("2. output/phase5_forecast.png")
+    print("   - WHY: Shows you didn't just analyze the past, you predicted the FUTURE.")
+    print("3. output/interactive_strategy_map.html")
+    print("   - WHY: Proves you have a Strategy (Kiosks vs Vans), not just numbers.")
+    print("4. output/phase6_clusters.png")
+    print("   - WHY: Shows advanced Machine Learning (K-Means) usage.")
+
+    print("\n📉 TIER 2: SUPPORTING EVIDENCE (Use in Appendix/Deep Dives)")
+    print("1. output/phase2_seasonality.png")
+    print("   - WHY: Proves the 'Harvest Migration' theory.")
+    print("2. output/phase3_biometric_trends.png")
+    print("   - WHY: Evidence for the 'Time Bomb' compliance gap.")
+    print("3. output/phase1_age_pyramid.png")
+    print("   - WHY: Visual proof of the missing 18-25 adult cohort.")
+
+    print("\n🛠️ TIER 3: TECHNICAL/DEBUG (For Report Appendices)")
+    print("- Correlation Matrix, Weekly Trends, State Bar Charts.")
+    print("- These show rigor but are less exciting for a 3-minute pitch.")
+
+    print("\n✅ ANALYSIS & EXPLANATION COMPLETE.")
+    print("="*80)
 
 
 # ============================================================================
@@ -1169,75 +1145,76 @@ print("="*80)
 # - "Sticky" pincodes: High activity that persists month-over-month
 # - "Transient" pincodes: Activity spikes that disappear (camps, events)
 # - Churn rate: What % of active pincodes become inactive?
-
-print("\n" + "="*70)
-print("📊 PHASE 8: COHORT ANALYSIS (Pincode Retention)")
-print("="*70)
-print("Question: Do the same pincodes stay active, or is there churn?")
-
-if 'date' in master_df.columns:
-    # Create monthly cohorts by pincode
-    master_df['year_month'] = pd.to_datetime(master_df['date']).dt.to_period('M')
-    
-    # Get pincodes active in each month
-    monthly_pincodes = master_df.groupby('year_month')['pincode'].apply(set)
-    
-    if len(monthly_pincodes) >= 2:
-        # Calculate month-over-month retention
-        retention_rates = []
-        months = sorted(monthly_pincodes.index)
-        
-        for i in range(1, min(len(months), 6)):  # Compare up to 6 months
-            prev_pincodes = monthly_pincodes.iloc[i-1]
-            curr_pincodes = monthly_pincodes.iloc[i]
-            
-            if len(prev_pincodes) > 0:
-                retained = len(prev_pincodes & curr_pincodes)
-                churned = len(prev_pincodes - curr_pincodes)
-                new_pincodes = len(curr_pincodes - prev_pincodes)
-                retention_rate = (retained / len(prev_pincodes)) * 100
-                
-                retention_rates.append({
-                    'Month': str(months[i]),
-                    'Retained': retained,
-                    'Churned': churned,
-                    'New': new_pincodes,
-                    'Retention_Rate': retention_rate
-                })
-        
-        retention_df = pd.DataFrame(retention_rates)
-        
-        if not retention_df.empty:
-            print(f"\n🔍 PINCODE RETENTION ANALYSIS:")
-            print(f"  Average Monthly Retention Rate: {retention_df['Retention_Rate'].mean():.1f}%")
-            print(f"  Average Monthly Churn: {retention_df['Churned'].mean():.0f} pincodes")
-            print(f"  Average New Pincodes/Month: {retention_df['New'].mean():.0f}")
-            
-            # Visualization
-            fig, ax = plt.subplots(figsize=(12, 6))
-            x = range(len(retention_df))
-            ax.bar(x, retention_df['Retained'], label='Retained', color='green', alpha=0.7)
-            ax.bar(x, retention_df['Churned'], bottom=retention_df['Retained'], 
-                   label='Churned', color='red', alpha=0.7)
-            ax.set_xlabel('Month')
-            ax.set_ylabel('Number of Pincodes')
-            ax.set_title('Pincode Cohort Analysis: Retention vs Churn', fontsize=14, fontweight='bold')
-            ax.legend()
-            ax.set_xticks(x)
-            ax.set_xticklabels(retention_df['Month'], rotation=45)
-            plt.tight_layout()
-            plt.savefig('output/cohort_retention.png', dpi=150, bbox_inches='tight')
-            plt.close()
-            print("✅ Saved: output/cohort_retention.png")
-            
-            # Insight
-            avg_retention = retention_df['Retention_Rate'].mean()
-            if avg_retention > 80:
-                print(f"\n💡 INSIGHT: HIGH retention ({avg_retention:.1f}%) - Same pincodes stay active")
-                print(f"   This suggests STABLE populations, not temporary camps")
-            else:
-                print(f"\n💡 INSIGHT: LOW retention ({avg_retention:.1f}%) - High pincode churn")
-                print(f"   Many pincodes are one-time activity (camps, special drives)")
+def phase_cohort_analysis(ctx):
+    master_df = ctx['master_df']
+    print("\n" + "="*70)
+    print("📊 PHASE 8: COHORT ANALYSIS (Pincode Retention)")
+    print("="*70)
+    print("Question: Do the same pincodes stay active, or is there churn?")
+
+    if 'date' in master_df.columns:
+        # Create monthly cohorts by pincode: pincodes active in each month
+        # (month-local, so it also runs partition by partition out-of-core)
+        monthly_pincodes = cube_map(master_df, lambda df: df.groupby(
+            pd.to_datetime(df['date']).dt.to_period('M').rename('year_month'))['pincode'].apply(set),
+            columns=['date', 'pincode'])
+
+        if len(monthly_pincodes) >= 2:
+            # Calculate month-over-month retention
+            retention_rates = []
+            months = sorted(monthly_pincodes.index)
+
+            for i in range(1, min(len(months), 6)):  # Compare up to 6 months
+                prev_pincodes = monthly_pincodes.iloc[i-1]
+                curr_pincodes = monthly_pincodes.iloc[i]
+
+                if len(prev_pincodes) > 0:
+                    retained = len(prev_pincodes & curr_pincodes)
+                    churned = len(prev_pincodes - curr_pincodes)
+                    new_pincodes = len(curr_pincodes - prev_pincodes)
+                    retention_rate = (retained / len(prev_pincodes)) * 100
+
+                    retention_rates.append({
+                        'Month': str(months[i]),
+                        'Retained': retained,
+                        'Churned': churned,
+                        'New': new_pincodes,
+                        'Retention_Rate': retention_rate
+                    })
+
+            retention_df = pd.DataFrame(retention_rates)
+
+            if not retention_df.empty:
+                print(f"\n🔍 PINCODE RETENTION ANALYSIS:")
+                print(f"  Average Monthly Retention Rate: {retention_df['Retention_Rate'].mean():.1f}%")
+                print(f"  Average Monthly Churn: {retention_df['Churned'].mean():.0f} pincodes")
+                print(f"  Average New Pincodes/Month: {retention_df['New'].mean():.0f}")
+
+                # Visualization
+                fig, ax = plt.subplots(figsize=(12, 6))
+                x = range(len(retention_df))
+                ax.bar(x, retention_df['Retained'], label='Retained', color='green', alpha=0.7)
+                ax.bar(x, retention_df['Churned'], bottom=retention_df['Retained'], 
+                       label='Churned', color='red', alpha=0.7)
+                ax.set_xlabel('Month')
+                ax.set_ylabel('Number of Pincodes')
+                ax.set_title('Pincode Cohort Analysis: Retention vs Churn', fontsize=14, fontweight='bold')
+                ax.legend()
+                ax.set_xticks(x)
+                ax.set_xticklabels(retention_df['Month'], rotation=45)
+                plt.tight_layout()
+                plt.savefig('output/cohort_retention.png', dpi=150, bbox_inches='tight')
+                plt.close()
+                print("✅ Saved: output/cohort_retention.png")
+
+                # Insight
+                avg_retention = retention_df['Retention_Rate'].mean()
+                if avg_retention > 80:
+                    print(f"\n💡 INSIGHT: HIGH retention ({avg_retention:.1f}%) - Same pincodes stay active")
+                    print(f"   This suggests STABLE populations, not temporary camps")
+                else:
+                    print(f"\n💡 INSIGHT: LOW retention ({avg_retention:.1f}%) - High pincode churn")
+                    print(f"   Many pincodes are one-time activity (camps, special drives)")
 
 
 # ============================================================================
@@ -1249,65 +1226,40 @@ if 'date' in master_df.columns:
 # - Significant (if N=10,000) - worth acting on
 # - Not significant (if N=50) - could be noise
 # P-values tell us the PROBABILITY that the correlation is due to chance.
-
-print("\n" + "="*70)
-print("📈 PHASE 9: STATISTICAL SIGNIFICANCE TESTING")
-print("="*70)
-print("Adding p-values to correlation matrix...")
-
-from scipy import stats as scipy_stats
-
-# Recalculate correlations with p-values
-district_corr_data = master_df.groupby('district').agg({
-    'total_enrol': 'sum',
-    'total_demo': 'sum',
-    'total_bio': 'sum',
-    'Saturation_Index': 'mean'
-}).fillna(0)
-
-# Calculate correlation with p-values
-def corr_with_pvalue(df):
-    """Calculate correlation matrix with p-values."""
-    cols = df.columns
-    n = len(cols)
-    corr_matrix = pd.DataFrame(index=cols, columns=cols, dtype=float)
-    pval_matrix = pd.DataFrame(index=cols, columns=cols, dtype=float)
-    
-    for i, c1 in enumerate(cols):
-        for j, c2 in enumerate(cols):
-            if i == j:
-                corr_matrix.loc[c1, c2] = 1.0
-                pval_matrix.loc[c1, c2] = 0.0
-            else:
-                corr, pval = scipy_stats.pearsonr(df[c1], df[c2])
-                corr_matrix.loc[c1, c2] = corr
-                pval_matrix.loc[c1, c2] = pval
-    
-    return corr_matrix.astype(float), pval_matrix.astype(float)
-
-corr_matrix, pval_matrix = corr_with_pvalue(district_corr_data)
-
-print(f"\n🔍 CORRELATION MATRIX WITH SIGNIFICANCE:")
-print("-" * 60)
-for col1 in corr_matrix.columns:
-    for col2 in corr_matrix.columns:
-        if col1 < col2:
-            corr = corr_matrix.loc[col1, col2]
-            pval = pval_matrix.loc[col1, col2]
-            sig = "***" if pval < 0.001 else "**" if pval < 0.01 else "*" if pval < 0.05 else ""
-            print(f"  {col1} ↔ {col2}: r={corr:.3f}, p={pval:.4f} {sig}")
-
-print(f"\n  Legend: *** p<0.001, ** p<0.01, * p<0.05")
-
-# Key finding
-demo_enrol_corr = corr_matrix.loc['total_demo', 'total_enrol']
-demo_enrol_pval = pval_matrix.loc['total_demo', 'total_enrol']
-
-if demo_enrol_pval < 0.05:
-    print(f"\n💡 STATISTICALLY SIGNIFICANT: Demographics ↔ Enrollment (p={demo_enrol_pval:.4f})")
-    print(f"   This correlation is NOT due to chance. Policy decisions can rely on it.")
-else:
-    print(f"\n⚠️ NOT SIGNIFICANT: Demographics ↔ Enrollment relationship may be noise")
+def phase_statistical_significance(ctx):
+    rollups = ctx['rollups']
+    print("\n" + "="*70)
+    print("📈 PHASE 9: STATISTICAL SIGNIFICANCE TESTING")
+    print("="*70)
+    print("Adding p-values to correlation matrix...")
+
+    # Recalculate correlations with p-values
+    district_corr_data = query_rollup(rollups, ('district',), columns=['total_enrol', 'total_demo', 'total_bio'],
+                                      means=['Saturation_Index']).fillna(0)
+
+    # Calculate correlation with p-values
+    corr_matrix, pval_matrix = corr_with_pvalue(district_corr_data)
+
+    print(f"\n🔍 CORRELATION MATRIX WITH SIGNIFICANCE:")
+    print("-" * 60)
+    for col1 in corr_matrix.columns:
+        for col2 in corr_matrix.columns:
+            if col1 < col2:
+                corr = corr_matrix.loc[col1, col2]
+                pval = pval_matrix.loc[col1, col2]
+                sig = "***" if pval < 0.001 else "**" if pval < 0.01 else "*" if pval < 0.05 else ""
+                print(f"  {col1} ↔ {col2}: r={corr:.3f}, p={pval:.4f} {sig}")
+
+    print(f"\n  Legend: *** p<0.001, ** p<0.01, * p<0.05")
+
+    # Key finding
+    demo_enrol_pval = pval_matrix.loc['total_demo', 'total_enrol']
+
+    if demo_enrol_pval < 0.05:
+        print(f"\n💡 STATISTICALLY SIGNIFICANT: Demographics ↔ Enrollment (p={demo_enrol_pval:.4f})")
+        print(f"   This correlation is NOT due to chance. Policy decisions can rely on it.")
+    else:
+        print(f"\n⚠️ NOT SIGNIFICANT: Demographics ↔ Enrollment relationship may be noise")
 
 
 # ============================================================================
@@ -1325,76 +1277,49 @@ else:
 # - Compliance = Biometric update rate (bio/enrol)
 # - Activity = Total transactions (normalized)
 # - DataQuality = Inverse of coefficient of variation (consistency)
+def phase_health_score(ctx):
+    print("\n" + "="*70)
+    print("🏥 PHASE 10: AADHAAR HEALTH SCORE")
+    print("="*70)
+    print("Creating composite district health metric...")
+
+    # Compliance (40%) + Activity (30%) + Data Quality (30%), ranked best first
+    district_health = calculate_health_score(ctx['master_df'])
+
+    print(f"\n🏆 TOP 10 HEALTHIEST DISTRICTS:")
+    print("-" * 60)
+    for idx, (district, row) in enumerate(district_health.head(10).iterrows(), 1):
+        print(f"  {idx:2}. {district}")
+        print(f"      Health Score: {row['health_score']:.1f}/100")
+        print(f"      Compliance: {row['compliance_score']:.1f} | Activity: {row['activity_score']:.1f} | Quality: {row['quality_score']:.1f}")
+        print()
+
+    print(f"\n🚨 BOTTOM 5 DISTRICTS (Need Intervention):")
+    for idx, (district, row) in enumerate(district_health.tail(5).iterrows(), 1):
+        print(f"  {idx}. {district}: Health Score = {row['health_score']:.1f}/100")
+
+    # Visualization
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
+
+    # Top 15 by health score
+    top15_health = district_health.head(15)
+    top15_health['health_score'].plot(kind='barh', ax=ax1, color='limegreen', edgecolor='darkgreen')
+    ax1.set_title('Top 15 Districts by Aadhaar Health Score', fontsize=14, fontweight='bold')
+    ax1.set_xlabel('Health Score (0-100)')
+    ax1.set_ylabel('District')
+
+    # Bottom 15 by health score
+    bottom15_health = district_health.tail(15)
+    bottom15_health['health_score'].plot(kind='barh', ax=ax2, color='crimson', edgecolor='darkred')
+    ax2.set_title('Bottom 15 Districts (Intervention Needed)', fontsize=14, fontweight='bold')
+    ax2.set_xlabel('Health Score (0-100)')
+    ax2.set_ylabel('District')
 
-print("\n" + "="*70)
-print("🏥 PHASE 10: AADHAAR HEALTH SCORE")
-print("="*70)
-print("Creating composite district health metric...")
-
-# Calculate component metrics
-district_health = master_df.groupby('district').agg({
-    'total_enrol': 'sum',
-    'total_bio': 'sum',
-    'total_activity': ['sum', 'std', 'mean']
-}).fillna(0)
-
-district_health.columns = ['enrol', 'bio', 'activity_sum', 'activity_std', 'activity_mean']
-
-# Component 1: Compliance Score (0-100)
-district_health['compliance_score'] = (district_health['bio'] / (district_health['enrol'] + 1)) * 100
-district_health['compliance_score'] = district_health['compliance_score'].clip(0, 100)
-
-# Component 2: Activity Score (0-100, normalized)
-max_activity = district_health['activity_sum'].max()
-district_health['activity_score'] = (district_health['activity_sum'] / (max_activity + 1)) * 100
-
-# Component 3: Data Quality Score (0-100, inverse of CV)
-district_health['cv'] = district_health['activity_std'] / (district_health['activity_mean'] + 1)
-district_health['quality_score'] = (1 - district_health['cv'].clip(0, 1)) * 100
-
-# COMPOSITE HEALTH SCORE
-district_health['health_score'] = (
-    0.4 * district_health['compliance_score'] +
-    0.3 * district_health['activity_score'] +
-    0.3 * district_health['quality_score']
-)
-
-# Rank districts
-district_health = district_health.sort_values('health_score', ascending=False)
-
-print(f"\n🏆 TOP 10 HEALTHIEST DISTRICTS:")
-print("-" * 60)
-for idx, (district, row) in enumerate(district_health.head(10).iterrows(), 1):
-    print(f"  {idx:2}. {district}")
-    print(f"      Health Score: {row['health_score']:.1f}/100")
-    print(f"      Compliance: {row['compliance_score']:.1f} | Activity: {row['activity_score']:.1f} | Quality: {row['quality_score']:.1f}")
-    print()
-
-print(f"\n🚨 BOTTOM 5 DISTRICTS (Need Intervention):")
-for idx, (district, row) in enumerate(district_health.tail(5).iterrows(), 1):
-    print(f"  {idx}. {district}: Health Score = {row['health_score']:.1f}/100")
-
-# Visualization
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
-
-# Top 15 by health score
-top15_health = district_health.head(15)
-top15_health['health_score'].plot(kind='barh', ax=ax1, color='limegreen', edgecolor='darkgreen')
-ax1.set_title('Top 15 Districts by Aadhaar Health Score', fontsize=14, fontweight='bold')
-ax1.set_xlabel('Health Score (0-100)')
-ax1.set_ylabel('District')
-
-# Bottom 15 by health score
-bottom15_health = district_health.tail(15)
-bottom15_health['health_score'].plot(kind='barh', ax=ax2, color='crimson', edgecolor='darkred')
-ax2.set_title('Bottom 15 Districts (Intervention Needed)', fontsize=14, fontweight='bold')
-ax2.set_xlabel('Health Score (0-100)')
-ax2.set_ylabel('District')
-
-plt.tight_layout()
-plt.savefig('output/aadhaar_health_score.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("\n✅ Saved: output/aadhaar_health_score.png")
+    plt.tight_layout()
+    plt.savefig('output/aadhaar_health_score.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("\n✅ Saved: output/aadhaar_health_score.png")
+    return {'district_health': district_health}
 
 
 # ============================================================================
@@ -1408,41 +1333,42 @@ print("\n✅ Saved: output/aadhaar_health_score.png")
 # MODEL:
 # efficiency_improvement = base_efficiency × (1 + kiosk_factor × num_kiosks)
 # where kiosk_factor = regression coefficient from historical data
+def phase_policy_simulator(ctx):
+    master_df = ctx['master_df']
+    print("\n" + "="*70)
+    print("🎮 PHASE 11: POLICY SIMULATOR")
+    print("="*70)
+    print("Model: What happens if we deploy kiosks in underperforming districts?")
+
+    # Identify underperforming districts (low efficiency score)
+    low_efficiency = cube_groupby(master_df, 'district', {'efficiency_score': 'mean'})['efficiency_score'].nsmallest(10)
+
+    print(f"\n📊 SCENARIO MODELING:")
+    print("-" * 60)
+
+    # Simulate kiosk deployment impact
+    # Assumption: Each kiosk increases efficiency by 5% (based on industry benchmarks)
+    KIOSK_EFFICIENCY_BOOST = 0.05
+    KIOSK_COST_LAKHS = 2.5  # Cost per kiosk in lakhs
+
+    for district in low_efficiency.head(5).index:
+        current_efficiency = low_efficiency[district]
+
+        for num_kiosks in [5, 10, 25]:
+            new_efficiency = current_efficiency * (1 + KIOSK_EFFICIENCY_BOOST * num_kiosks)
+            improvement = (new_efficiency - current_efficiency) / (current_efficiency + 0.001) * 100
+            cost = num_kiosks * KIOSK_COST_LAKHS
 
-print("\n" + "="*70)
-print("🎮 PHASE 11: POLICY SIMULATOR")
-print("="*70)
-print("Model: What happens if we deploy kiosks in underperforming districts?")
-
-# Identify underperforming districts (low efficiency score)
-low_efficiency = master_df.groupby('district')['efficiency_score'].mean().nsmallest(10)
-
-print(f"\n📊 SCENARIO MODELING:")
-print("-" * 60)
-
-# Simulate kiosk deployment impact
-# Assumption: Each kiosk increases efficiency by 5% (based on industry benchmarks)
-KIOSK_EFFICIENCY_BOOST = 0.05
-KIOSK_COST_LAKHS = 2.5  # Cost per kiosk in lakhs
-
-for district in low_efficiency.head(5).index:
-    current_efficiency = low_efficiency[district]
-    
-    for num_kiosks in [5, 10, 25]:
-        new_efficiency = current_efficiency * (1 + KIOSK_EFFICIENCY_BOOST * num_kiosks)
-        improvement = (new_efficiency - current_efficiency) / (current_efficiency + 0.001) * 100
-        cost = num_kiosks * KIOSK_COST_LAKHS
-        
-        print(f"\n  📍 {district}:")
-        print(f"     Current Efficiency: {current_efficiency:.4f}")
-        print(f"     Deploy {num_kiosks} kiosks (₹{cost:.1f} lakhs):")
-        print(f"     → New Efficiency: {new_efficiency:.4f} (+{improvement:.1f}%)")
-        break  # Only show first scenario for each district
-
-print(f"\n💡 RECOMMENDATION:")
-print(f"   Deploy 10 kiosks each to bottom 5 districts")
-print(f"   Estimated Total Cost: ₹{5 * 10 * KIOSK_COST_LAKHS:.1f} lakhs")
-print(f"   Expected System-wide Efficiency Boost: +{10 * KIOSK_EFFICIENCY_BOOST * 100:.0f}%")
+            print(f"\n  📍 {district}:")
+            print(f"     Current Efficiency: {current_efficiency:.4f}")
+            print(f"     Deploy {num_kiosks} kiosks (₹{cost:.1f} lakhs):")
+            print(f"     → New Efficiency: {new_efficiency:.4f} (+{improvement:.1f}%)")
+            break  # Only show first scenario for each district
+
+    print(f"\n💡 RECOMMENDATION:")
+    print(f"   Deploy 10 kiosks each to bottom 5 districts")
+    print(f"   Estimated Total Cost: ₹{5 * 10 * KIOSK_COST_LAKHS:.1f} lakhs")
+    print(f"   Expected System-wide Efficiency Boost: +{10 * KIOSK_EFFICIENCY_BOOST * 100:.0f}%")
 
 
 # ============================================================================
@@ -1452,66 +1378,67 @@ print(f"   Expected System-wide Efficiency Boost: +{10 * KIOSK_EFFICIENCY_BOOST
 # ---------------
 # Geographic visualization makes patterns instantly visible.
 # Judges love maps. UIDAI decision-makers think in terms of states.
-
-print("\n" + "="*70)
-print("🗺️ PHASE 12: INDIA CHOROPLETH MAP")
-print("="*70)
-print("Generating interactive state-level enrollment map...")
-
-# Aggregate to state level
-state_enrollment = master_df.groupby('state')['total_enrol'].sum().reset_index()
-state_enrollment.columns = ['state', 'total_enrollment']
-
-# Create choropleth using Plotly
-try:
-    fig = px.choropleth(
-        state_enrollment,
-        locations='state',
-        locationmode='country names',  # Fallback mode
-        color='total_enrollment',
-        color_continuous_scale='Viridis',
-        title='Aadhaar Enrollment by State',
-        labels={'total_enrollment': 'Total Enrollments'}
-    )
-    
-    # For India-specific, we use geojson
-    # Load India states GeoJSON (using public source)
-    INDIA_GEOJSON_URL = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
-    
-    import requests
+def phase_choropleth(ctx):
+    rollups = ctx['rollups']
+    print("\n" + "="*70)
+    print("🗺️ PHASE 12: INDIA CHOROPLETH MAP")
+    print("="*70)
+    print("Generating interactive state-level enrollment map...")
+
+    # Aggregate to state level
+    state_enrollment = query_rollup(rollups, ('state',), columns=['total_enrol']).reset_index()
+    state_enrollment.columns = ['state', 'total_enrollment']
+
+    # Create choropleth using Plotly
     try:
-        india_geojson = requests.get(INDIA_GEOJSON_URL, timeout=10).json()
-        
         fig = px.choropleth(
             state_enrollment,
-            geojson=india_geojson,
             locations='state',
-            featureidkey='properties.ST_NM',
+            locationmode='country names',  # Fallback mode
             color='total_enrollment',
             color_continuous_scale='Viridis',
-            title='Aadhaar Enrollment by State<br><sup>Color = Total Enrollments</sup>'
-        )
-        fig.update_geos(fitbounds="locations", visible=False)
-        fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
-        fig.write_html('output/india_choropleth.html')
-        print("✅ Saved: output/india_choropleth.html")
-    except Exception as e:
-        print(f"⚠️ Could not load India GeoJSON: {e}")
-        print("   Creating fallback bar chart instead...")
-        
-        # Fallback visualization
-        fig = px.bar(
-            state_enrollment.nlargest(20, 'total_enrollment'),
-            x='state', y='total_enrollment',
-            title='Top 20 States by Aadhaar Enrollment',
-            color='total_enrollment',
-            color_continuous_scale='Viridis'
+            title='Aadhaar Enrollment by State',
+            labels={'total_enrollment': 'Total Enrollments'}
         )
-        fig.write_html('output/state_enrollment_bar.html')
-        print("✅ Saved: output/state_enrollment_bar.html")
 
-except Exception as e:
-    print(f"⚠️ Choropleth generation failed: {e}")
+        # For India-specific, we use geojson
+        # Load India states GeoJSON (using public source)
+        INDIA_GEOJSON_URL = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
+
+        import requests
+        try:
+            india_geojson = requests.get(INDIA_GEOJSON_URL, timeout=10).json()
+
+            fig = px.choropleth(
+                state_enrollment,
+                geojson=india_geojson,
+                locations='state',
+                featureidkey='properties.ST_NM',
+                color='total_enrollment',
+                color_continuous_scale='Viridis',
+                title='Aadhaar Enrollment by State<br><sup>Color = Total Enrollments</sup>'
+            )
+            fig.update_geos(fitbounds="locations", visible=False)
+            fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
+            fig.write_html('output/india_choropleth.html')
+            print("✅ Saved: output/india_choropleth.html")
+        except Exception as e:
+            print(f"⚠️ Could not load India GeoJSON: {e}")
+            print("   Creating fallback bar chart instead...")
+
+            # Fallback visualization
+            fig = px.bar(
+                state_enrollment.nlargest(20, 'total_enrollment'),
+                x='state', y='total_enrollment',
+                title='Top 20 States by Aadhaar Enrollment',
+                color='total_enrollment',
+                color_continuous_scale='Viridis'
+            )
+            fig.write_html('output/state_enrollment_bar.html')
+            print("✅ Saved: output/state_enrollment_bar.html")
+
+    except Exception as e:
+        print(f"⚠️ Choropleth generation failed: {e}")
 
 
 # ============================================================================
@@ -1521,40 +1448,43 @@ except Exception as e:
 # --------------
 # Static charts show endpoints. Animations show the JOURNEY.
 # Seeing enrollment grow over time is powerful for presentations.
-
-print("\n" + "="*70)
-print("🎬 PHASE 13: ANIMATED ENROLLMENT TIMELINE")
-print("="*70)
-print("Creating animated enrollment growth visualization...")
-
-if 'date' in master_df.columns:
-    # Aggregate by month and state
-    master_df['month'] = pd.to_datetime(master_df['date']).dt.to_period('M').astype(str)
-    monthly_state = master_df.groupby(['month', 'state'])['total_enrol'].sum().reset_index()
-    
-    if len(monthly_state) > 10:
-        # Create animated bar chart race
-        fig = px.bar(
-            monthly_state,
-            x='total_enrol',
-            y='state',
-            color='state',
-            animation_frame='month',
-            orientation='h',
-            title='Aadhaar Enrollment Growth Over Time<br><sup>Watch states grow month by month</sup>',
-            labels={'total_enrol': 'Total Enrollments', 'state': 'State'},
-            range_x=[0, monthly_state['total_enrol'].max() * 1.1]
-        )
-        fig.update_layout(
-            showlegend=False,
-            xaxis_title='Total Enrollments',
-            yaxis_title='State',
-            height=700
-        )
-        fig.write_html('output/animated_enrollment_timeline.html')
-        print("✅ Saved: output/animated_enrollment_timeline.html")
-    else:
-        print("⚠️ Insufficient monthly data for animation")
+def phase_animated_timeline(ctx):
+    master_df, rollups = ctx['master_df'], ctx['rollups']
+    print("\n" + "="*70)
+    print("🎬 PHASE 13: ANIMATED ENROLLMENT TIMELINE")
+    print("="*70)
+    print("Creating animated enrollment growth visualization...")
+
+    if 'date' in master_df.columns:
+        # Aggregate by month and state
+        # state x month rollup, relabelled 'YYYY-MM' and ordered month-first for the animation
+        monthly_state = query_rollup(rollups, ('state',), 'M', columns=['total_enrol']).reset_index()
+        monthly_state['month'] = monthly_state['date'].dt.to_period('M').astype(str)
+        monthly_state = monthly_state.sort_values(['month', 'state'])[['month', 'state', 'total_enrol']].reset_index(drop=True)
+
+        if len(monthly_state) > 10:
+            # Create animated bar chart race
+            fig = px.bar(
+                monthly_state,
+                x='total_enrol',
+                y='state',
+                color='state',
+                animation_frame='month',
+                orientation='h',
+                title='Aadhaar Enrollment Growth Over Time<br><sup>Watch states grow month by month</sup>',
+                labels={'total_enrol': 'Total Enrollments', 'state': 'State'},
+                range_x=[0, monthly_state['total_enrol'].max() * 1.1]
+            )
+            fig.update_layout(
+                showlegend=False,
+                xaxis_title='Total Enrollments',
+                yaxis_title='State',
+                height=700
+            )
+            fig.write_html('output/animated_enrollment_timeline.html')
+            print("✅ Saved: output/animated_enrollment_timeline.html")
+        else:
+            print("⚠️ Insufficient monthly data for animation")
 
 
 # ============================================================================
@@ -1565,17 +1495,19 @@ if 'date' in master_df.columns:
 # UN Sustainable Development Goals provide global context.
 # Linking Aadhaar analysis to SDGs shows IMPACT beyond just numbers.
 # Hackathon judges love seeing social impact framing.
-
-print("\n" + "="*70)
-print("🌍 PHASE 14: UN SDG ALIGNMENT")
-print("="*70)
-print("Linking Aadhaar insights to Sustainable Development Goals...")
-
-# Calculate SDG-relevant metrics
-total_enrolled = master_df['total_enrol'].sum()
-total_citizens_served = total_enrolled + master_df['total_demo'].sum() + master_df['total_bio'].sum()
-
-print(f"""
+def phase_sdg_alignment(ctx):
+    master_df, district_health = ctx['master_df'], ctx['district_health']
+    print("\n" + "="*70)
+    print("🌍 PHASE 14: UN SDG ALIGNMENT")
+    print("="*70)
+    print("Linking Aadhaar insights to Sustainable Development Goals...")
+
+    # Calculate SDG-relevant metrics
+    totals = cube_sum(master_df, ['total_enrol', 'total_demo', 'total_bio'])
+    total_enrolled = totals['total_enrol']
+    total_citizens_served = total_enrolled + totals['total_demo'] + totals['total_bio']
+
+    print(f"""
 ╔══════════════════════════════════════════════════════════════════════╗
 ║                    SUSTAINABLE DEVELOPMENT GOALS                      ║
 ╠══════════════════════════════════════════════════════════════════════╣
@@ -1614,6 +1546,7 @@ print(f"""
 ║                                                                        ║
 ╚══════════════════════════════════════════════════════════════════════╝
 """)
+    return {'total_citizens_served': total_citizens_served}
 
 
 # ============================================================================
@@ -1623,18 +1556,22 @@ print(f"""
 # -----------------
 # Decision-makers don't read 800 lines of code.
 # A 1-page executive summary is what gets acted upon.
-
-print("\n" + "="*70)
-print("📋 PHASE 15: GENERATING POLICY BRIEF")
-print("="*70)
-
-# Calculate summary statistics
-avg_health = district_health['health_score'].mean()
-compliance_gap_estimate = max(0, expected_updates - actual_updates)
-top_growth_district = growing_districts.index[0] if not growing_districts.empty else 'N/A'
-top_mature_district = mature_districts.index[0] if not mature_districts.empty else 'N/A'
-
-policy_brief = f"""
+def phase_policy_brief(ctx):
+    district_health = ctx['district_health']
+    expected_updates, actual_updates = ctx['expected_updates'], ctx['actual_updates']
+    growing_districts = ctx['growing_districts']
+    total_citizens_served = ctx['total_citizens_served']
+    n_fraud_signals = ctx['n_fraud_signals']
+
+    print("\n" + "="*70)
+    print("📋 PHASE 15: GENERATING POLICY BRIEF")
+    print("="*70)
+
+    # Calculate summary statistics
+    compliance_gap_estimate = max(0, expected_updates - actual_updates)
+    top_growth_district = growing_districts.index[0] if not growing_districts.empty else 'N/A'
+
+    policy_brief = f"""
 ================================================================================
                         UIDAI POLICY BRIEF
                     Aadhaar System Analysis 2026
@@ -1696,7 +1633,7 @@ METHODOLOGY
 
 This analysis employed:
 - Holt-Winters Exponential Smoothing for capacity forecasting
-- Isolation Forest for anomaly detection
+- Streaming robust EWMA z-scores (per weekday) for anomaly detection
 - K-Means clustering for district segmentation
 - Random Forest for predictive hotspot modeling
 - Pareto analysis for resource optimization
@@ -1718,22 +1655,23 @@ This work contributes to:
 ================================================================================
 """
 
-# Save policy brief
-with open('output/POLICY_BRIEF.txt', 'w', encoding='utf-8') as f:
-    f.write(policy_brief)
+    # Save policy brief
+    with open('output/POLICY_BRIEF.txt', 'w', encoding='utf-8') as f:
+        f.write(policy_brief)
 
-print("✅ Saved: output/POLICY_BRIEF.txt")
-print("\n" + policy_brief[:2000] + "\n... [truncated for display]")
+    print("✅ Saved: output/POLICY_BRIEF.txt")
+    print("\n" + policy_brief[:2000] + "\n... [truncated for display]")
 
 
 # ============================================================================
 # FINAL COMPREHENSIVE SUMMARY
 # ============================================================================
-print("\n" + "="*80)
-print("🎉 ALL ANALYSES COMPLETE!")
-print("="*80)
+def phase_final_summary(ctx):
+    print("\n" + "="*80)
+    print("🎉 ALL ANALYSES COMPLETE!")
+    print("="*80)
 
-print(f"""
+    print(f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                         ANALYSIS SUMMARY                                      ║
 ╠══════════════════════════════════════════════════════════════════════════════╣
@@ -1754,17 +1692,186 @@ print(f"""
 ╚══════════════════════════════════════════════════════════════════════════════╝
 """)
 
-print("📁 OUTPUT FILES:")
-print("   output/POLICY_BRIEF.txt - Executive summary for decision-makers")
-print("   output/india_choropleth.html - Interactive India map")
-print("   output/animated_enrollment_timeline.html - Growth animation")
-print("   output/interactive_ghost_sankey.html - Attrition funnel")
-print("   output/interactive_strategy_map.html - Resource deployment guide")
-print("   output/aadhaar_health_score.png - District health ranking")
-print("   output/cohort_retention.png - Pincode retention analysis")
-print("   + 15 more visualizations in output/")
+    print("📁 OUTPUT FILES:")
+    print("   output/POLICY_BRIEF.txt - Executive summary for decision-makers")
+    print("   output/india_choropleth.html - Interactive India map")
+    print("   output/animated_enrollment_timeline.html - Growth animation")
+    print("   output/interactive_ghost_sankey.html - Attrition funnel")
+    print("   output/interactive_strategy_map.html - Resource deployment guide")
+    print("   output/aadhaar_health_score.png - District health ranking")
+    print("   output/cohort_retention.png - Pincode retention analysis")
+    print("   + 15 more visualizations in output/")
 
-print("\n" + "="*80)
-print("✅ ANALYSIS COMPLETE. Ready for hackathon submission!")
-print("="*80)
+    print("\n" + "="*80)
+    print("✅ ANALYSIS COMPLETE. Ready for hackathon submission!")
+    print("="*80)
 
+# ============================================================================
+# PHASE REGISTRY
+# Each phase declares the context names it reads (inputs) and returns
+# (outputs). Selecting phases pulls in only the phases producing their
+# inputs; those dependencies are served from the on-disk memo (aadhaar.memo)
+# when their input hash is unchanged. Selected phases always run.
+# ============================================================================
+def register(func, inputs=(), outputs=(), memo=True, source=None, default=True):
+    """
+    One registry entry. `source` returns a key for data read from outside the
+    context (e.g. the raw shards); memo=False for phases with their own
+    persistence (the master cube artifact); default=False for opt-in phases,
+    run only when named in --phases.
+    """
+    return {'name': func.__name__[len('phase_'):], 'func': func, 'inputs': tuple(inputs),
+            'outputs': tuple(outputs), 'memo': memo and bool(outputs), 'source': source, 'default': default}
+
+
+def ingestion_source():
+    """
+    Raw shards (name -> cache key). The geography ids are derived from them
+    (append-only, aadhaar.geography), so they are not part of the key.
+    """
+    return current_shards()
+
+
+FRAMES = ('enrolment_df', 'demographic_df', 'biometric_df')
+STRATEGY = ('district_summary', 'growing_districts', 'mature_districts', 'pure_enrollment', 'pure_update')
+
+PHASES = [
+    register(phase_ingestion, outputs=FRAMES + ('geo',), source=ingestion_source),
+    register(phase_external_context, inputs=FRAMES, outputs=('school_density_data', 'digital_literacy_scores')),
+    register(phase_enrollment, inputs=('enrolment_df',)),
+    register(phase_demographic, inputs=('demographic_df',)),
+    register(phase_temporal_patterns, inputs=('enrolment_df',)),
+    register(phase_biometric, inputs=('enrolment_df', 'biometric_df', 'school_density_data', 'digital_literacy_scores'),
+             outputs=('expected_updates', 'actual_updates')),
+    register(phase_master_cube, inputs=FRAMES + ('geo',), outputs=('master_df', 'rollups'), memo=False),
+    register(phase_data_quality, inputs=('master_df', 'rollups')),
+    register(phase_correlation, inputs=('rollups',)),
+    register(phase_predictive, inputs=('master_df', 'rollups'), outputs=('n_fraud_signals',)),
+    register(phase_spatial_fraud, inputs=('master_df',), outputs=('fraud_clusters',)),
+    register(phase_hotspot_model, inputs=('master_df',)),
+    register(phase_enrollment_velocity, inputs=('rollups',)),
+    # ~1 min cold on the sample data (vs ~11 s for everything else): opt-in
+    register(phase_forecast_fleet, inputs=('rollups',), default=False),
+    register(phase_strategic_synthesis, inputs=('master_df', 'rollups'), outputs=STRATEGY),
+    register(phase_clustering, inputs=('district_summary',)),
+    register(phase_migration_flow, inputs=('district_summary',), outputs=('immigration_hubs', 'top_immigration')),
+    register(phase_state_playbook, inputs=('rollups',)),
+    register(phase_executive_report, inputs=STRATEGY + ('immigration_hubs', 'top_immigration', 'expected_updates',
+                                                       'actual_updates', 'n_fraud_signals', 'fraud_clusters')),
+    register(phase_interactive_visualizations, inputs=('district_summary',)),
+    register(phase_graph_guide),
+    register(phase_cohort_analysis, inputs=('master_df',)),
+    register(phase_statistical_significance, inputs=('rollups',)),
+    register(phase_health_score, inputs=('master_df',), outputs=('district_health',)),
+    register(phase_policy_simulator, inputs=('master_df',)),
+    register(phase_choropleth, inputs=('rollups',)),
+    register(phase_animated_timeline, inputs=('master_df', 'rollups')),
+    register(phase_sdg_alignment, inputs=('master_df', 'district_health'), outputs=('total_citizens_served',)),
+    register(phase_policy_brief, inputs=('district_health', 'expected_updates', 'actual_updates', 'growing_districts',
+                                         'total_citizens_served', 'n_fraud_signals')),
+    register(phase_final_summary),
+]
+PHASE_NAMES = [p['name'] for p in PHASES]
+DEFAULT_PHASES = [p['name'] for p in PHASES if p['default']]
+
+
+def resolve_phases(targets):
+    """Names of `targets` plus every phase producing one of their inputs (transitively)."""
+    producers = {}
+    for p in PHASES:
+        for output in p['outputs']:
+            producers[output] = p
+    by_name = {p['name']: p for p in PHASES}
+
+    needed, pending = set(), list(targets)
+    while pending:
+        name = pending.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        pending.extend(producers[i]['name'] for i in by_name[name]['inputs'])
+    return needed
+
+
+def run_phase(p, ctx, key, use_memo):
+    """Run (or, for a dependency, load from the memo) one phase; returns its outputs."""
+    if use_memo:
+        with span(f"phase {p['name']} (memo)", 'phase'):
+            results = load_memo(p['name'], key)
+        if results is not None:
+            print(f"\n[MEMO] {p['name']}: inputs unchanged - loaded {', '.join(p['outputs'])}")
+            return results
+
+    with span(f"phase {p['name']}", 'phase') as s:
+        results = p['func'](ctx) or {}
+        rows = [row_count(value) for value in results.values()]
+        s.rows_out = max((r for r in rows if r is not None), default=None)
+    missing = set(p['outputs']) - set(results)
+    if missing:
+        raise RuntimeError(f"Phase {p['name']} did not return its declared outputs: {sorted(missing)}")
+    if p['memo'] and os.environ.get('AADHAAR_NO_CACHE') != '1':
+        save_memo(p['name'], key, results)
+    return results
+
+
+def last_readers(selected):
+    """{context value: name of the last selected phase that reads it}."""
+    last = {}
+    for p in PHASES:
+        if p['name'] in selected:
+            last.update({i: p['name'] for i in p['inputs']})
+    return last
+
+
+def main(phases=None, memo=True, out_of_core=False):
+    """
+    Run the selected phases (default: all but the opt-in ones, in order) with
+    their dependencies.
+    Dependencies come from the memo when possible; selected phases always run.
+
+    out_of_core: build and aggregate the master cube month by month
+    (aadhaar.outofcore) and drop each context value after its last reader,
+    so the returned context holds only values nothing read.
+    """
+    if out_of_core:
+        os.environ['AADHAAR_OUT_OF_CORE'] = '1'
+    configure()
+    targets = set(phases or DEFAULT_PHASES)
+    selected = resolve_phases(targets)
+    if phases:
+        print(f"Phases: {', '.join(p['name'] for p in PHASES if p['name'] in targets)} "
+              f"(+ {len(selected) - len(targets)} dependencies)")
+
+    ctx, value_keys = {}, {}
+    release = last_readers(selected) if out_of_core_enabled() else {}
+    for p in PHASES:
+        if p['name'] not in selected:
+            continue
+        source_key = p['source']() if p['source'] else ''
+        key = phase_key(p['name'], p['func'], {i: value_keys[i] for i in p['inputs']}, source_key)
+        use_memo = memo and p['memo'] and p['name'] not in targets
+        ctx.update(run_phase(p, ctx, key, use_memo))
+        value_keys.update({output: value_key(key, output) for output in p['outputs']})
+        for name in [i for i in p['inputs'] if release.get(i) == p['name']]:
+            del ctx[name]
+    write_profile('analysis')
+    return ctx
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the Aadhaar analytical engine")
+    parser.add_argument('--phases', nargs='+', metavar='PHASE', choices=PHASE_NAMES,
+                        help="Run only these phases (+ their dependencies)")
+    parser.add_argument('--list', action='store_true', help="List the phases with their inputs/outputs")
+    parser.add_argument('--no-memo', action='store_true', help="Recompute dependencies instead of loading them")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Build/aggregate the master cube month by month (bounded memory)")
+    args = parser.parse_args()
+    if args.list:
+        for p in PHASES:
+            print(f"{p['name']:<28} in: {', '.join(p['inputs']) or '-'}{'' if p['default'] else '  (opt-in)'}")
+            print(f"{'':<28} out: {', '.join(p['outputs']) or '-'}")
+    else:
+        main(phases=args.phases, memo=not args.no_memo, out_of_core=args.out_of_core)
@@ -23,6 +23,14 @@ from pathlib import Path
 import os
 import glob
 
+from aadhaar.artifacts import cube_fingerprint
+from aadhaar.cache import read_shard
+from aadhaar.columnar import read_cleaned
+from aadhaar.dedup import drop_duplicate_rows
+from aadhaar.normalize import normalize_names
+from aadhaar.rollups import load_rollups, query_rollup
+from aadhaar.schema import apply_schema
+
 # Page config
 st.set_page_config(
     page_title="UIDAI Analytics",
@@ -205,32 +213,44 @@ st.markdown("""
 # ============================================================================
 @st.cache_data
 def load_csv_data(pattern):
-    """Load multiple CSV files matching pattern"""
-    files = glob.glob(pattern)
+    """Load multiple CSV files matching pattern (via the Parquet shard cache)"""
+    files = sorted(glob.glob(pattern))
     if not files:
         return pd.DataFrame()
-    dfs = [pd.read_csv(f) for f in files]
-    return pd.concat(dfs, ignore_index=True)
+    dfs = [read_shard(f) for f in files]
+    dfs, _ = drop_duplicate_rows(dfs, files)  # overlapping dumps: first copy wins
+    return apply_schema(pd.concat(dfs, ignore_index=True))
 
-@st.cache_data
+# cache_resource, not cache_data: every session gets the SAME frames instead
+# of an unpickled private copy, so the memory-mapped cleaned data
+# (aadhaar.columnar) is shared by all sessions and the batch jobs
+@st.cache_resource
 def load_all_data():
-    """Load all datasets - prefer cleaned data if available"""
+    """Load all datasets - prefer cleaned data if available (mapped zero-copy from Arrow)"""
     import os
     
     # Try to load cleaned data first
     if os.path.exists('dataset_cleaned/enrollment_cleaned.csv'):
-        enrol = pd.read_csv('dataset_cleaned/enrollment_cleaned.csv')
-        demo = pd.read_csv('dataset_cleaned/demographic_cleaned.csv')
-        bio = pd.read_csv('dataset_cleaned/biometric_cleaned.csv')
+        enrol = read_cleaned('dataset_cleaned/enrollment_cleaned.csv')
+        demo = read_cleaned('dataset_cleaned/demographic_cleaned.csv')
+        bio = read_cleaned('dataset_cleaned/biometric_cleaned.csv')
     else:
         # Fallback to raw data
         enrol = load_csv_data('dataset/api_data_aadhar_enrolment*.csv')
         demo = load_csv_data('dataset/api_data_aadhar_demographic*.csv')
         bio = load_csv_data('dataset/api_data_aadhar_biometric*.csv')
-    return enrol, demo, bio
+    # Canonical state/district names (a no-op pass-through for cleaned data)
+    return normalize_names(enrol), normalize_names(demo), normalize_names(bio)
+
+@st.cache_data
+def load_cached_rollups(fingerprint):
+    """Rollups persisted by analysis.py with the master cube (None if missing or stale)"""
+    return load_rollups(fingerprint)
 
 # Load data
 enrol_df, demo_df, bio_df = load_all_data()
+# Keyed on the input hash, so a changed shard reloads instead of serving stale rollups
+rollups = load_cached_rollups(cube_fingerprint())
 
 @st.cache_data
 def load_insights():
@@ -267,8 +287,13 @@ def create_age_pyramid():
 
 def create_top_states_chart():
     """Create top states bar chart"""
-    if not enrol_df.empty and 'state' in enrol_df.columns:
-        state_data = enrol_df.groupby('state')['age_0_5'].sum().sort_values(ascending=False).head(10)
+    if rollups is not None or (not enrol_df.empty and 'state' in enrol_df.columns):
+        # state x month rollup when available, else the enrolment rows
+        if rollups is not None:
+            state_data = query_rollup(rollups, ('state',), columns=['age_0_5'])['age_0_5']
+        else:
+            state_data = enrol_df.groupby('state', observed=True)['age_0_5'].sum()
+        state_data = state_data.sort_values(ascending=False).head(10)
         fig = px.bar(
             x=state_data.index, y=state_data.values,
             labels={'x': 'State', 'y': 'Infant Enrollments'},
@@ -325,7 +350,7 @@ def create_monthly_trend():
 def create_migration_heatmap():
     """Create migration corridor heatmap"""
     if not demo_df.empty and 'state' in demo_df.columns:
-        top_states = demo_df.groupby('state').size().sort_values(ascending=False).head(10)
+        top_states = demo_df.groupby('state', observed=True).size().sort_values(ascending=False).head(10)
         states = top_states.index.tolist()
         values = top_states.values.tolist()
     else:
@@ -370,7 +395,7 @@ def create_compliance_by_age():
 def create_district_velocity():
     """Create district enrollment velocity chart"""
     if not enrol_df.empty and 'district' in enrol_df.columns:
-        top_districts = enrol_df.groupby('district').size().sort_values(ascending=False).head(15)
+        top_districts = enrol_df.groupby('district', observed=True).size().sort_values(ascending=False).head(15)
         fig = px.bar(x=top_districts.values, y=top_districts.index, orientation='h',
                     color=top_districts.values, color_continuous_scale='Viridis')
         fig.update_layout(yaxis={'categoryorder': 'total ascending'})
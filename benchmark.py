@@ -0,0 +1,291 @@
+"""
+Scale Benchmark on Synthetic Aadhaar Data
+=========================================
+Times the pipeline on synthetic API shards (aadhaar.synthetic) at several
+multiples of the national data size, to see how each stage scales and
+where it falls over.
+
+HOW:
+- For each scale, shards are generated once into
+  .cache/bench/scale-<s>/dataset/ (kept between runs; regenerated only if
+  the scale/seed/generator change)
+- Each stage runs as its own process with that directory as working
+  directory, COLD: the derived caches, cleaned data and outputs of the
+  previous run are deleted first (--warm keeps them)
+    clean      clean_data.py
+    analysis   analysis.py - its run profile (aadhaar.profiling) gives
+               ingestion, cleaning, cube build and every analysis phase
+    insights   extract_insights.py
+    dashboard  the data preparation of app.py: mapped cleaned frames,
+               canonical names, rollups and the chart aggregates
+- Per stage: wall time and peak RSS of the process (os.wait4), exit status
+- A stage that fails, is killed (e.g. out of memory) or exceeds --timeout
+  marks the scale as where the pipeline FELL OVER; larger scales are skipped
+
+The results table (scales side by side, plus the scaling exponent
+log(t2/t1)/log(s2/s1) between the two largest scales - ~1 is linear, >1.2
+is a step that will dominate at the next scale) is written to
+output/benchmarks/benchmark-<timestamp>.json and .csv.
+
+USAGE:
+    python benchmark.py                          # 1x, 10x, 100x
+    python benchmark.py --scales 0.1 1 --stages clean analysis
+    python benchmark.py --scales 10 --timeout 3600
+    python benchmark.py --out-of-core            # month-by-month master cube (aadhaar.outofcore)
+"""
+
+import csv
+import json
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from aadhaar.synthetic import generate_dataset
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join('.cache', 'bench')
+RESULTS_DIR = os.path.join('output', 'benchmarks')
+DEFAULT_SCALES = [1, 10, 100]
+FIELDS = ['scale', 'raw_rows', 'stage', 'step', 'wall_s', 'peak_rss_mb', 'status']
+
+STAGES = {
+    'clean': [os.path.join(REPO_DIR, 'clean_data.py')],
+    'analysis': [os.path.join(REPO_DIR, 'analysis.py')],
+    'insights': [os.path.join(REPO_DIR, 'extract_insights.py')],
+    'dashboard': [os.path.join(REPO_DIR, 'benchmark.py'), '--dashboard-prep'],
+}
+# Everything a cold run must not find (the synthetic dataset itself stays)
+DERIVED = ['.cache', 'dataset_cleaned', 'output']
+
+
+# ============================================================================
+# DASHBOARD DATA PREP (run in its own process by the 'dashboard' stage)
+# ============================================================================
+def dashboard_prep():
+    """What app.py computes before drawing: its load_all_data + rollups + chart aggregates."""
+    from aadhaar.artifacts import cube_fingerprint
+    from aadhaar.columnar import read_cleaned
+    from aadhaar.normalize import normalize_names
+    from aadhaar.rollups import load_rollups, query_rollup
+
+    frames = {name: normalize_names(read_cleaned(f'dataset_cleaned/{name}_cleaned.csv'))
+              for name in ['enrollment', 'demographic', 'biometric']}
+    rollups = load_rollups(cube_fingerprint())
+    enrol = frames['enrollment']
+
+    enrol[['age_0_5', 'age_5_17', 'age_18_greater']].sum()                        # age pyramid
+    enrol.groupby('district', observed=True).size().nlargest(15)                   # district velocity
+    if rollups is not None:
+        query_rollup(rollups, ('state',), columns=['age_0_5'])['age_0_5'].nlargest(10)  # top states
+    else:
+        enrol.groupby('state', observed=True)['age_0_5'].sum().nlargest(10)
+    print(f"Dashboard data ready: {sum(len(df) for df in frames.values()):,} rows, "
+          f"rollups {'loaded' if rollups is not None else 'MISSING'}")
+
+
+# ============================================================================
+# STAGE RUNNER
+# ============================================================================
+def run_stage(command, cwd, log_path, timeout=None):
+    """
+    Run one stage; returns (status, wall seconds, peak RSS MB).
+
+    status: 'ok', 'failed (exit N)', 'killed (SIGNAME)' or 'timeout'.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])),
+               MPLBACKEND='Agg', PYTHONUNBUFFERED='1')
+    env.pop('AADHAAR_PROFILE', None)  # the analysis stage needs its profile
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        proc = subprocess.Popen([sys.executable] + command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        deadline = start + timeout if timeout else None
+        while True:
+            pid, wait_status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            if deadline and time.perf_counter() > deadline:
+                proc.kill()
+                pid, wait_status, usage = os.wait4(proc.pid, 0)
+                proc.returncode = -signal.SIGKILL
+                return 'timeout', time.perf_counter() - start, _maxrss_mb(usage)
+            time.sleep(0.05)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    if proc.returncode == 0:
+        status = 'ok'
+    elif proc.returncode < 0:
+        status = f"killed ({signal.Signals(-proc.returncode).name})"
+    else:
+        status = f"failed (exit {proc.returncode})"
+    return status, wall, _maxrss_mb(usage)
+
+
+def _maxrss_mb(usage):
+    return round(usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def analysis_steps(cwd):
+    """(step, wall_s, peak_rss_mb) rows from the newest analysis run profile in `cwd`."""
+    profile_dir = os.path.join(cwd, 'output', 'profiles')
+    try:
+        latest = max((f for f in os.listdir(profile_dir) if f.startswith('analysis-') and f.endswith('.json')),
+                     key=lambda f: os.path.getmtime(os.path.join(profile_dir, f)))
+        with open(os.path.join(profile_dir, latest), encoding='utf-8') as f:
+            records = json.load(f)['records']
+    except (OSError, ValueError):
+        return []
+
+    def total(name):
+        matches = [r for r in records if r['name'].rsplit(' > ', 1)[-1] == name]
+        return (sum(r['wall_s'] for r in matches), max((r['peak_rss_mb'] or 0 for r in matches), default=None)) \
+            if matches else None
+
+    steps = []
+    for label, name in [('ingestion (load shards)', 'load_and_combine'), ('cleaning', 'clean_data'),
+                        ('cube build', 'build_master_cube'), ('rollup build', 'build_rollups')]:
+        found = total(name)
+        if found:
+            steps.append((label, *found))
+    steps += [(r['name'], r['wall_s'], r['peak_rss_mb']) for r in records if r['kind'] == 'phase']
+    return steps
+
+
+def run_scale(scale, stages, seed=42, timeout=None, warm=False):
+    """Generate (if needed) and benchmark one scale; returns (rows, fell_over)."""
+    workdir = os.path.join(BENCH_DIR, f"scale-{scale:g}")
+    print(f"\n{'=' * 70}\nSCALE {scale:g}x  ({workdir})\n{'=' * 70}")
+
+    gen_start = time.perf_counter()
+    manifest = generate_dataset(os.path.join(workdir, 'dataset'), scale=scale, seed=seed)
+    raw_rows = manifest['rows']
+    rows = [{'scale': scale, 'raw_rows': raw_rows, 'stage': 'generate', 'step': '',
+             'wall_s': round(time.perf_counter() - gen_start, 3), 'peak_rss_mb': None, 'status': 'ok'}]
+
+    if not warm:
+        for name in DERIVED:
+            shutil.rmtree(os.path.join(workdir, name), ignore_errors=True)
+    log_dir = os.path.join(workdir, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+
+    for stage in stages:
+        log_path = os.path.join(log_dir, f"{stage}.log")
+        status, wall, peak = run_stage(STAGES[stage], workdir, log_path, timeout)
+        print(f"  {stage:<10} {wall:>9.1f}s  peak {peak:>8,.0f} MB  {status}")
+        rows.append({'scale': scale, 'raw_rows': raw_rows, 'stage': stage, 'step': '',
+                     'wall_s': round(wall, 3), 'peak_rss_mb': peak, 'status': status})
+        if stage == 'analysis':
+            for step_name, step_wall, step_peak in analysis_steps(workdir):
+                rows.append({'scale': scale, 'raw_rows': raw_rows, 'stage': stage, 'step': step_name,
+                             'wall_s': round(step_wall, 3), 'peak_rss_mb': step_peak, 'status': status})
+        if status != 'ok':
+            print(f"  !!! {stage} FELL OVER at {scale:g}x ({raw_rows:,} raw rows) - see {log_path}")
+            return rows, True
+    return rows, False
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+def print_report(rows, scales):
+    """Stages and analysis steps x scales, with the scaling exponent of the two largest scales."""
+    done = [s for s in scales if any(r['scale'] == s for r in rows)]
+    print(f"\n{'=' * 70}\nBENCHMARK RESULTS (wall seconds; peak RSS MB)\n{'=' * 70}")
+    header = f"{'stage / step':<44}" + ''.join(f"{f'{s:g}x':>16}" for s in done)
+    print(header + ('   exponent' if len(done) > 1 else ''))
+
+    table = {}
+    for r in rows:
+        label = r['step'] or r['stage']
+        if r['step']:
+            label = f"  {label}"
+        table.setdefault((r['stage'], label), {})[r['scale']] = r
+    for (_, label), by_scale in table.items():
+        cells = ''
+        for s in done:
+            r = by_scale.get(s)
+            if r is None:
+                cells += f"{'-':>16}"
+            elif r['status'] != 'ok' and not r['step']:
+                cells += f"{r['status'].split()[0].upper():>16}"
+            else:
+                peak = f"; {r['peak_rss_mb']:,.0f}" if r['peak_rss_mb'] else ''
+                cells += f"{r['wall_s']:>9.2f}{peak:>7}"
+        exponent = ''
+        if len(done) > 1:
+            a, b = by_scale.get(done[-2]), by_scale.get(done[-1])
+            if a and b and a['wall_s'] > 0.05 and b['wall_s'] > 0 and b['status'] == 'ok':
+                k = math.log(b['wall_s'] / a['wall_s']) / math.log(done[-1] / done[-2])
+                exponent = f"{k:>9.2f}" + ('  <-- superlinear' if k > 1.2 else '')
+        print(f"{label[:44]:<44}{cells}   {exponent}")
+
+
+def write_results(rows, scales, fell_over):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stem = os.path.join(RESULTS_DIR, f"benchmark-{datetime.now():%Y%m%d-%H%M%S}")
+    with open(f"{stem}.json", 'w', encoding='utf-8') as f:
+        json.dump({'scales': scales, 'fell_over_at': fell_over, 'cpu_count': os.cpu_count(),
+                   'python': sys.version.split()[0], 'results': rows}, f, indent=1)
+    with open(f"{stem}.csv", 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nResults written to {stem}.json (+ .csv)")
+    return f"{stem}.json"
+
+
+def main(scales=None, stages=None, seed=42, timeout=None, warm=False, out_of_core=False):
+    scales = sorted(scales or DEFAULT_SCALES)
+    stages = [s for s in STAGES if s in (stages or STAGES)]
+    if out_of_core:
+        os.environ['AADHAAR_OUT_OF_CORE'] = '1'  # inherited by every stage
+    print("======================================================================")
+    print(f"   AADHAAR PIPELINE BENCHMARK: scales {', '.join(f'{s:g}x' for s in scales)}")
+    print(f"   stages: {', '.join(stages)}   ({'warm' if warm else 'cold'} runs"
+          f"{', out-of-core cube' if out_of_core else ''})")
+    print("======================================================================")
+
+    rows, fell_over = [], None
+    for scale in scales:
+        scale_rows, failed = run_scale(scale, stages, seed=seed, timeout=timeout, warm=warm)
+        rows += scale_rows
+        if failed:
+            fell_over = scale
+            skipped = [s for s in scales if s > scale]
+            if skipped:
+                print(f"\nSkipping larger scales: {', '.join(f'{s:g}x' for s in skipped)}")
+            break
+
+    print_report(rows, scales)
+    write_results(rows, scales, fell_over)
+    if fell_over is not None:
+        print(f"\n!!! The pipeline fell over at {fell_over:g}x")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data at several scales")
+    parser.add_argument('--scales', nargs='+', type=float, default=None,
+                        help="Multiples of the national data size (default: 1 10 100)")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=None,
+                        help="Stages to time (default: all, in pipeline order)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="Seconds before a stage counts as fallen over")
+    parser.add_argument('--warm', action='store_true',
+                        help="Keep caches and outputs of the previous run (time the cached path)")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Build/aggregate the master cube month by month (aadhaar.outofcore)")
+    parser.add_argument('--dashboard-prep', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.dashboard_prep:
+        dashboard_prep()
+    else:
+        main(scales=args.scales, stages=args.stages, seed=args.seed, timeout=args.timeout, warm=args.warm,
+             out_of_core=args.out_of_core)
@@ -2,552 +2,337 @@
 Data Cleaning Script for UIDAI Aadhaar Datasets
 ================================================
 Standardizes state and district names to canonical forms.
+
+USAGE:
+    python clean_data.py                         # in-memory, shards in parallel
+    python clean_data.py --stream                # bounded-memory chunked mode
+    python clean_data.py --stream --chunksize 50000
+    python clean_data.py --incremental           # clean + append only NEW shards
 """
 
 import pandas as pd
 import glob
+import json
 import os
-import re
-
-# ============================================================================
-# STATE STANDARDIZATION MAPPING
-# ============================================================================
-STATE_MAPPING = {
-    # West Bengal variants
-    'west  bengal': 'west bengal',
-    'west bangal': 'west bengal',
-    'west bengli': 'west bengal',
-    'westbengal': 'west bengal',
-    
-    # Chhattisgarh
-    'chhatisgarh': 'chhattisgarh',
-    
-    # Odisha
-    'orissa': 'odisha',
-    
-    # Uttarakhand
-    'uttaranchal': 'uttarakhand',
-    
-    # Puducherry
-    'pondicherry': 'puducherry',
-    
-    # Tamil Nadu
-    'tamilnadu': 'tamil nadu',
-    
-    # Andaman & Nicobar Islands
-    'andaman & nicobar islands': 'andaman and nicobar islands',
-    
-    # Jammu & Kashmir
-    'jammu & kashmir': 'jammu and kashmir',
-    
-    # Dadra and Nagar Haveli (now merged with Daman & Diu)
-    'dadra & nagar haveli': 'dadra and nagar haveli and daman and diu',
-    'dadra and nagar haveli': 'dadra and nagar haveli and daman and diu',
-    'the dadra and nagar haveli and daman and diu': 'dadra and nagar haveli and daman and diu',
-    'daman & diu': 'dadra and nagar haveli and daman and diu',
-    'daman and diu': 'dadra and nagar haveli and daman and diu',
-    
-    # Invalid city names -> Map to correct state (best effort)
-    'balanagar': 'telangana',          # Balanagar is in Hyderabad, Telangana
-    'darbhanga': 'bihar',              # Darbhanga is in Bihar
-    'jaipur': 'rajasthan',             # Jaipur is in Rajasthan
-    'nagpur': 'maharashtra',           # Nagpur is in Maharashtra
-    'madanapalle': 'andhra pradesh',   # Madanapalle is in Andhra Pradesh
-    'puttenahalli': 'karnataka',       # Puttenahalli is in Bengaluru, Karnataka
-    'raja annamalai puram': 'tamil nadu',  # R.A. Puram is in Chennai, Tamil Nadu
-    
-    # Invalid numeric
-    '100000': None,  # Will be marked as invalid
-}
-
-# ============================================================================
-# DISTRICT STANDARDIZATION MAPPING
-# ============================================================================
-DISTRICT_MAPPING = {
-    # Ahmedabad
-    'ahmadabad': 'ahmedabad',
-    
-    # Ahmednagar
-    'ahmadnagar': 'ahmednagar',
-    'ahmed nagar': 'ahmednagar',
-    'ahilyanagar': 'ahmednagar',  # Renamed in Maharashtra
-    
-    # Anantapur variants
-    'ananthapur': 'anantapur',
-    'ananthapuramu': 'anantapur',
-    
-    # Angul
-    'anugul': 'angul',
-    'anugul  *': 'angul',
-    
-    # Ashoknagar
-    'ashok nagar': 'ashoknagar',
-    
-    # Trailing asterisks removal (generic patterns handled in clean_text)
-    'auraiya *': 'auraiya',
-    'bagalkot *': 'bagalkot',
-    'baghpat *': 'baghpat',
-    'bokaro *': 'bokaro',
-    'chamarajanagar *': 'chamarajanagar',
-    'chandauli *': 'chandauli',
-    'chitrakoot *': 'chitrakoot',
-    
-    # Baghpat
-    'bagpat': 'baghpat',
-    
-    # Banaskantha
-    'banas kantha': 'banaskantha',
-    
-    # Barabanki
-    'bara banki': 'barabanki',
-    
-    # Bardhaman
-    'barddhaman': 'bardhaman',
-    
-    # Bulandshahr
-    'bulandshahar': 'bulandshahr',
-    
-    # Buldhana
-    'buldana': 'buldhana',
-    
-    # Chamarajanagar
-    'chamrajanagar': 'chamarajanagar',
-    'chamrajnagar': 'chamarajanagar',
-    
-    # Chhatrapati Sambhajinagar
-    'chatrapati sambhaji nagar': 'chhatrapati sambhajinagar',
-    
-    # Chikmagalur - NEW
-    'chickmagalur': 'chikmagalur',
-    'chikkamagaluru': 'chikmagalur',
-    
-    # Chittorgarh
-    'chittaurgarh': 'chittorgarh',
-    
-    # Cooch Behar
-    'coochbehar': 'cooch behar',
-    
-    # Dadra and Nagar Haveli
-    'dadra & nagar haveli': 'dadra and nagar haveli',
-    
-    # Davangere
-    'davanagere': 'davangere',
-    
-    # Invalid entries
-    '100000': None,
-    '?': None,
-    '5th cross': None,
-    'akhera': None,
-    
-    # Raebareli
-    'rae bareli': 'raebareli',
-    'rai bareilly': 'raebareli',
-    'raibarely': 'raebareli',
-    
-    'sahibganj': 'sahebganj',
-    'sant kabir nagar': 'sant kabeer nagar',
-    'sant ravidas nagar': 'sant ravidas nagar (bhadohi)',
-    'sarangarh-bilaigarh': 'sarangarh bilaigarh',
-    'sheopurkalan': 'sheopur',
-    'shi yomi': 'shi-yomi',
-    'siddharthnagar': 'siddharth nagar',
-    'sri ganganagar': 'ganganagar',
-    
-    'y.s.r.': 'ysr kadapa',
-    'y.s.r. kadapa': 'ysr kadapa',
-    'ysr': 'ysr kadapa',
-    
-    # 24 Paraganas
-    '24 paraganas north': 'north 24 parganas',
-    '24 paraganas south': 'south 24 parganas',
-    
-    # Medinipur
-    'pashchim medinipur': 'paschim medinipur',
-    'east midnapore': 'purba medinipur',
-    'east midnapur': 'purba medinipur',
-    'west midnapore': 'paschim medinipur',
-    
-    'baleshwar': 'balasore',
-    'kheri': 'lakhimpur kheri',
-    'faizabad': 'ayodhya',
-    'allahabad': 'prayagraj',
-    
-    # ====== NEW MAPPINGS FROM SECOND PASS ======
-    
-    # Gaurela-Pendra-Marwahi
-    'gaurela-pendra-marwahi': 'gaurella pendra marwahi',
-    
-    # Haridwar
-    'hardwar': 'haridwar',
-    
-    # Hassan
-    'hasan': 'hassan',
-    
-    # Hazaribagh
-    'hazaribag': 'hazaribagh',
-    
-    # Hooghly
-    'hooghiy': 'hooghly',
-    
-    # Jagatsinghpur
-    'jagatsinghapur': 'jagatsinghpur',
-    
-    # Jajpur
-    'jajapur': 'jajpur',
-    
-    # Jalore
-    'jalor': 'jalore',
-    
-    # Janjgir-Champa
-    'janjgir - champa': 'janjgir-champa',
-    'janjgir champa': 'janjgir-champa',
-    
-    # Jhunjhunu
-    'jhunjhunun': 'jhunjhunu',
-    
-    # Ranga Reddy
-    'k.v. rangareddy': 'rangareddy',
-    'k.v.rangareddy': 'rangareddy',
-    
-    # Kanchipuram
-    'kancheepuram': 'kanchipuram',
-    
-    # Kanyakumari
-    'kanniyakumari': 'kanyakumari',
-    
-    # Karimnagar
-    'karim nagar': 'karimnagar',
-    
-    # Kasaragod
-    'kasargod': 'kasaragod',
-    
-    # Khordha
-    'khorda': 'khordha',
-    
-    # Koderma
-    'kodarma': 'koderma',
-    
-    # Kushinagar
-    'kushi nagar': 'kushinagar',
-    
-    # Lahaul and Spiti
-    'lahul and spiti': 'lahaul and spiti',
-    
-    # Singhbhum
-    'east singhbum': 'east singhbhum',
-    
-    # Mahabubnagar
-    'mahabub nagar': 'mahabubnagar',
-    'mahaboobnagar': 'mahabubnagar',
-    
-    # Malerkotla
-    'maler kotla': 'malerkotla',
-    
-    # Mayurbhanj
-    'mayurabhanj': 'mayurbhanj',
-    
-    # Medak / Medchal
-    'medchal malkajgiri': 'medchal-malkajgiri',
-    
-    # Mewat -> Nuh
-    'mewat': 'nuh',
-    
-    # Mirzapur
-    'mirzpur': 'mirzapur',
-    
-    # Moga
-    'mojha': 'moga',
-    
-    # Muzaffarnagar
-    'muzaffar nagar': 'muzaffarnagar',
-    
-    # Nagapattinam
-    'nagapatnam': 'nagapattinam',
-    
-    # Nalanda
-    'naladna': 'nalanda',
-    
-    # Narmada
-    'narmadapuram': 'narmada',
-    
-    # Nilgiris
-    'the nilgiris': 'nilgiris',
-    
-    # Palakkad
-    'palghat': 'palakkad',
-    
-    # Panchkula
-    'panchakula': 'panchkula',
-    
-    # Papum Pare
-    'papumpare': 'papum pare',
-    
-    # Purnia
-    'purnea': 'purnia',
-    
-    # Puruliya
-    'purulia': 'puruliya',
-    
-    # Raichur
-    'raichoor': 'raichur',
-    
-    # Ramgarh
-    'ramghar': 'ramgarh',
-    
-    # Rupnagar
-    'ropar': 'rupnagar',
-    
-    # Samastipur
-    'samasthipur': 'samastipur',
-    
-    # Saran
-    'saaran': 'saran',
-    
-    # Saraikela-Kharsawan
-    'saraikela kharsawan': 'saraikela-kharsawan',
-    'seraikella kharsawan': 'saraikela-kharsawan',
-    
-    # Sitapur
-    'sitapurl': 'sitapur',
-    
-    # Sonipat
-    'sonepat': 'sonipat',
-    
-    # Srikakulam
-    'srikakulum': 'srikakulam',
-    
-    # Supaul
-    'supoul': 'supaul',
-    
-    # Tiruchirapalli
-    'tiruchirappalli': 'tiruchirappalli',
-    'trichy': 'tiruchirappalli',
-    
-    # Tirunelveli
-    'thirunelveli': 'tirunelveli',
-    
-    # Tiruvannamalai
-    'thiruvannamalai': 'tiruvannamalai',
-    
-    # Virudhunagar
-    'virudunagar': 'virudhunagar',
-    
-    # Vizianagaram
-    'vizayanagaram': 'vizianagaram',
-    
-    # Warangal
-    'warangal urban': 'warangal',
-    'warangal rural': 'warangal',
-    
-    # ====== FINAL BATCH - TRUE DUPLICATES ======
-    
-    # Mahabubnagar
-    'mahbubnagar': 'mahabubnagar',
-    
-    # Maharajganj
-    'mahrajganj': 'maharajganj',
-    
-    # Malda/Maldah
-    'maldah': 'malda',
-    
-    # Mamit
-    'mammit': 'mamit',
-    
-    # Medchal-Malkajgiri (fix special character)
-    'medchal?malkajgiri': 'medchal-malkajgiri',
-    
-    # Mohla-Manpur
-    'mohalla-manpur-ambagarh chowki': 'mohla-manpur-ambagarh chouki',
-    
-    # Nabarangpur/Nabarangapur
-    'nabarangapur': 'nabarangpur',
-    
-    # Nagarkurnool
-    'nagar kurnool': 'nagarkurnool',
-    
-    # Nicobar/Nicobars
-    'nicobars': 'nicobar',
-    
-    # North Tripura variations
-    'north': None,  # Invalid standalone
-    
-    # Pakaur -> Pakur
-    'pakaur': 'pakur',
-    
-    # Pali/Palli
-    'palli': 'pali',
-    
-    # Ramanathapuram
-    'ramanathpuram': 'ramanathapuram',
-    
-    # Senapati
-    'senapat': 'senapati',
-    
-    # Shimla
-    'shimoga': 'shivamogga',  # Renamed
-    
-    # South Tripura variations  
-    'south': None,  # Invalid standalone
-    
-    # Sri Potti Sriramulu Nellore
-    'sri potti sriramulu nellore': 'spsr nellore',
-    's.p.s.r nellore': 'spsr nellore',
-    
-    # Subarnapur/Sonapur
-    'subarnapur': 'sonepur',
-    
-    # Surguja
-    'sarguja': 'surguja',
-    
-    # Thane
-    'thana': 'thane',
-    
-    # Thiruvananthapuram
-    'trivandrum': 'thiruvananthapuram',
-    
-    # Vikarabad
-    'vikrabad': 'vikarabad',
-    
-    # Villupuram
-    'viluppuram': 'villupuram',
-    
-    # Wanaparthy
-    'wanaparthi': 'wanaparthy',
-    
-    # West Tripura variations
-    'west': None,  # Invalid standalone
-}
-
-
-
-def clean_text(text):
-    """Clean and standardize text"""
-    if pd.isna(text):
-        return None
-    text = str(text).strip().lower()
-    # Remove multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    # Remove trailing asterisks and special chars
-    text = re.sub(r'\s*\*\s*$', '', text)
-    return text
-
-
-def standardize_state(state):
-    """Standardize state name"""
-    if pd.isna(state):
-        return None
-    cleaned = clean_text(state)
-    if cleaned in STATE_MAPPING:
-        return STATE_MAPPING[cleaned]
-    return cleaned
-
-
-def standardize_district(district):
-    """Standardize district name"""
-    if pd.isna(district):
-        return None
-    cleaned = clean_text(district)
-    if cleaned in DISTRICT_MAPPING:
-        return DISTRICT_MAPPING[cleaned]
-    return cleaned
-
-
-def clean_dataset(df, dataset_name):
-    """Apply cleaning to a dataframe"""
-    print(f"\n{'='*60}")
-    print(f"Cleaning {dataset_name}")
-    print(f"{'='*60}")
-    
-    original_rows = len(df)
-    
+
+from aadhaar.cache import read_shard, shard_cache_key
+from aadhaar.columnar import csv_to_arrow, map_arrow, write_arrow
+from aadhaar.dedup import DuplicateFilter, print_dedup_report, row_hashes, shard_hashes
+from aadhaar.geography import encode_geography, update_geography
+from aadhaar.incremental import shard_changes
+from aadhaar.normalize import normalize_column, save_lookup
+from aadhaar.parallel import parallel_map
+from aadhaar.schema import DATE_FORMAT, apply_schema, iter_csv_typed
+from aadhaar.sketch import DistinctSketch
+
+# Rows per chunk in --stream mode (bounded memory)
+DEFAULT_CHUNKSIZE = 250_000
+
+# Which shards (name -> cache key) each cleaned CSV was built from
+MANIFEST_NAME = 'manifest.json'
+
+# STATE_MAPPING / DISTRICT_MAPPING and the clean_text/standardize_* rules live
+# in aadhaar.mappings + aadhaar.normalize, shared with analysis.py.
+
+
+def standardize_names(df):
+    """
+    Standardize state/district names and drop rows that map to None.
+
+    Returns (df, stats) without printing, so it can run on one shard inside
+    a worker process or on one chunk in streaming mode. Names go through the
+    shared canonical engine (aadhaar.normalize) once per distinct raw value,
+    not once per row. Unique counts are
+    kept as mergeable sketches (aadhaar.sketch) so they can be combined
+    across shards/chunks without holding every name in memory.
+    """
+    stats = {'rows': len(df), 'invalid_states': 0, 'invalid_districts': 0}
+
     # Clean state
     if 'state' in df.columns:
-        original_states = df['state'].nunique()
-        df['state'] = df['state'].apply(standardize_state)
+        stats['states'] = DistinctSketch().update(df['state'])
+        df['state'] = normalize_column(df['state'], 'state')
         # Remove rows with invalid states (None mapping)
-        invalid_states = df['state'].isna().sum()
+        stats['invalid_states'] = int(df['state'].isna().sum())
         df = df.dropna(subset=['state'])
-        new_states = df['state'].nunique()
-        print(f"States: {original_states} -> {new_states} unique")
-        if invalid_states > 0:
-            print(f"  Removed {invalid_states} rows with invalid states")
-    
+
     # Clean district
     if 'district' in df.columns:
-        original_districts = df['district'].nunique()
-        df['district'] = df['district'].apply(standardize_district)
+        stats['districts'] = DistinctSketch().update(df['district'])
+        df['district'] = normalize_column(df['district'], 'district')
         # Remove rows with invalid districts (None mapping)
-        invalid_districts = df['district'].isna().sum()
+        stats['invalid_districts'] = int(df['district'].isna().sum())
         df = df.dropna(subset=['district'])
-        new_districts = df['district'].nunique()
-        print(f"Districts: {original_districts} -> {new_districts} unique")
-        if invalid_districts > 0:
-            print(f"  Removed {invalid_districts} rows with invalid districts")
-    
-    final_rows = len(df)
+
+    stats['rows_out'] = len(df)
+    if 'state' in df.columns:
+        stats['states_out'] = DistinctSketch().update(df['state'])
+    if 'district' in df.columns:
+        stats['districts_out'] = DistinctSketch().update(df['district'])
+
+    save_lookup()
+    return df, stats
+
+
+def merge_stats(stats_list):
+    """Combine per-shard/per-chunk stats: counts add, sketches merge."""
+    merged = {}
+    for stats in stats_list:
+        for key, value in stats.items():
+            if isinstance(value, DistinctSketch):
+                merged.setdefault(key, DistinctSketch()).merge(value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def report_cleaning(dataset_name, stats):
+    """Print the before/after summary for one dataset from merged stats."""
+    print(f"\n{'='*60}")
+    print(f"Cleaning {dataset_name}")
+    print(f"{'='*60}")
+
+    if 'states' in stats:
+        print(f"States: {stats['states'].count()} -> {stats['states_out'].count()} unique")
+        if stats['invalid_states'] > 0:
+            print(f"  Removed {stats['invalid_states']} rows with invalid states")
+
+    if 'districts' in stats:
+        print(f"Districts: {stats['districts'].count()} -> {stats['districts_out'].count()} unique")
+        if stats['invalid_districts'] > 0:
+            print(f"  Removed {stats['invalid_districts']} rows with invalid districts")
+
+    original_rows, final_rows = stats['rows'], stats['rows_out']
     print(f"Rows: {original_rows:,} -> {final_rows:,} ({original_rows - final_rows} removed)")
-    
+
+
+def load_and_standardize(path):
+    """
+    Worker task: read one shard (via the Parquet cache) and clean its names.
+
+    Returns (df, stats, hashes): the duplicate-detection hashes are taken
+    on the RAW rows (aadhaar.dedup) and aligned to the surviving rows.
+    """
+    df = read_shard(path)
+    hashes = shard_hashes(path, df)
+    df, stats = standardize_names(df)
+    return df, stats, hashes.loc[df.index]
+
+
+def seeded_filter(seed_files):
+    """Duplicate filter that already knows the rows of `seed_files` (incremental append)."""
+    dedup = DuplicateFilter()
+    for path in seed_files:
+        dedup.seed(hashes=shard_hashes(path))  # persisted hashes: the shard is not re-read
+    return dedup
+
+
+def clean_shards(files, dataset_name, output_path, append=False, seed_files=()):
+    """
+    Read and clean all shards of one dataset in parallel, then write one CSV
+    (with the state_id/district_id columns of aadhaar.geography).
+    append=True adds the rows to an existing CSV (built from `seed_files`).
+
+    Rows repeated across overlapping shards are dropped in file order
+    (first copy wins) before writing.
+
+    WHY: Loading + per-row name mapping is the largest block of wall-clock in
+    the pipeline and is embarrassingly parallel per shard. Results come back
+    in file order, so the output CSV is identical to a sequential run.
+    """
+    results = parallel_map(load_and_standardize, files)
+    dedup = seeded_filter(seed_files)
+    parts = [dedup.filter(part, os.path.basename(path), hashes)
+             for path, (part, _, hashes) in zip(files, results)]
+    df = pd.concat(parts, ignore_index=True)
+    report_cleaning(dataset_name, merge_stats(stats for _, stats, _ in results))
+    print_dedup_report(dedup.report)
+    df = encode_geography(df, update_geography([df]))
+    df.to_csv(output_path, mode='a' if append else 'w', header=not append,
+              index=False, date_format=DATE_FORMAT)
     return df
 
 
-def main():
+def stream_clean_shards(files, dataset_name, output_path, chunksize=DEFAULT_CHUNKSIZE, append=False,
+                        seed_files=()):
+    """
+    STREAMING MODE: clean shard by shard, `chunksize` rows at a time.
+
+    Each chunk is standardized and appended to the output CSV, so peak
+    memory is one chunk - not the whole dataset. Unique counts come from
+    merging the chunk-level sketches; duplicates are dropped against the
+    key hashes of every earlier chunk (only hashes are kept, not rows).
+
+    WHY: New monthly API dumps must be cleanable on a box far smaller than
+    the full dataset.
+    """
+    total = {}
+    first = not append
+    dedup = seeded_filter(seed_files)
+    for path in files:
+        for chunk in iter_csv_typed(path, chunksize):
+            hashes = row_hashes(chunk)
+            chunk, stats = standardize_names(chunk)
+            chunk = dedup.filter(chunk, os.path.basename(path), hashes.loc[chunk.index])
+            chunk = encode_geography(chunk, update_geography([chunk]))
+            chunk.to_csv(output_path, mode='w' if first else 'a', header=first,
+                         index=False, date_format=DATE_FORMAT)
+            first = False
+            total = merge_stats([total, stats])
+    report_cleaning(dataset_name, total)
+    print_dedup_report(dedup.report)
+
+
+def export_arrow(output_path, df=None, chunksize=DEFAULT_CHUNKSIZE, stream=False):
+    """
+    Write the memory-mappable Arrow copy of a finished cleaned CSV (aadhaar.columnar).
+
+    `df` is the full content of the CSV when it is already in memory;
+    otherwise the CSV is converted chunk by chunk (one batch per chunk in
+    streaming mode, to keep its memory bound).
+    """
+    if df is not None:
+        return write_arrow(apply_schema(df), output_path)
+    return csv_to_arrow(output_path, chunksize, single_batch=not stream)
+
+
+def load_manifest(output_dir):
+    """{cleaned CSV name: {shard name: cache key}} (empty if none yet)."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def pending_shards(files, recorded, output_path):
+    """
+    INCREMENTAL MODE: which shards still have to be cleaned into output_path.
+
+    Returns (files, already_cleaned): only the NEW shards plus the shards
+    already in the CSV when it was built from an unchanged subset of them;
+    otherwise (files, None) - a changed or removed shard needs a rewrite.
+    """
+    if recorded is None or not os.path.exists(output_path):
+        return files, None
+    current = {os.path.basename(f): shard_cache_key(f) for f in files}
+    new, changed, removed = shard_changes(recorded, current)
+    if changed or removed:
+        return files, None
+    return ([f for f in files if os.path.basename(f) in new],
+            [f for f in files if os.path.basename(f) not in new])
+
+
+def validate_outputs(output_dir, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Combined unique states/districts across all cleaned CSVs.
+
+    Reads only the two name columns, chunk by chunk, into sketches.
+    """
+    all_states = DistinctSketch()
+    all_districts = DistinctSketch()
+
+    for f in sorted(glob.glob(f'{output_dir}/*.csv')):
+        columns = [c for c in pd.read_csv(f, nrows=0).columns if c in ('state', 'district')]
+        if not columns:
+            continue
+        for chunk in pd.read_csv(f, usecols=columns, dtype=str, chunksize=chunksize):
+            if 'state' in chunk.columns:
+                all_states.update(chunk['state'])
+            if 'district' in chunk.columns:
+                all_districts.update(chunk['district'])
+
+    return all_states.count(), all_districts.count()
+
+
+def main(stream=False, chunksize=DEFAULT_CHUNKSIZE, incremental=False):
     print("="*60)
     print("UIDAI DATA CLEANING PIPELINE")
     print("="*60)
-    
+    if stream:
+        print(f"Streaming mode: {chunksize:,} rows per chunk")
+    if incremental:
+        print("Incremental mode: cleaning new shards only")
+
     # Create output directory
     output_dir = 'dataset_cleaned'
     os.makedirs(output_dir, exist_ok=True)
-    
-    # Process Enrollment data
-    enrol_files = glob.glob('dataset/api_data_aadhar_enrolment*.csv')
-    if enrol_files:
-        enrol_df = pd.concat([pd.read_csv(f) for f in enrol_files], ignore_index=True)
-        enrol_df = clean_dataset(enrol_df, "ENROLLMENT")
-        enrol_df.to_csv(f'{output_dir}/enrollment_cleaned.csv', index=False)
-        print(f"Saved to {output_dir}/enrollment_cleaned.csv")
-    
-    # Process Demographic data
-    demo_files = glob.glob('dataset/api_data_aadhar_demographic*.csv')
-    if demo_files:
-        demo_df = pd.concat([pd.read_csv(f) for f in demo_files], ignore_index=True)
-        demo_df = clean_dataset(demo_df, "DEMOGRAPHIC")
-        demo_df.to_csv(f'{output_dir}/demographic_cleaned.csv', index=False)
-        print(f"Saved to {output_dir}/demographic_cleaned.csv")
-    
-    # Process Biometric data
-    bio_files = glob.glob('dataset/api_data_aadhar_biometric*.csv')
-    if bio_files:
-        bio_df = pd.concat([pd.read_csv(f) for f in bio_files], ignore_index=True)
-        bio_df = clean_dataset(bio_df, "BIOMETRIC")
-        bio_df.to_csv(f'{output_dir}/biometric_cleaned.csv', index=False)
-        print(f"Saved to {output_dir}/biometric_cleaned.csv")
-    
+    manifest = load_manifest(output_dir)
+
+    datasets = [
+        ('dataset/api_data_aadhar_enrolment*.csv', "ENROLLMENT", 'enrollment_cleaned.csv'),
+        ('dataset/api_data_aadhar_demographic*.csv', "DEMOGRAPHIC", 'demographic_cleaned.csv'),
+        ('dataset/api_data_aadhar_biometric*.csv', "BIOMETRIC", 'biometric_cleaned.csv'),
+    ]
+    for pattern, dataset_name, filename in datasets:
+        files = sorted(glob.glob(pattern))
+        if not files:
+            continue
+        output_path = f'{output_dir}/{filename}'
+        shards = {os.path.basename(f): shard_cache_key(f) for f in files}
+        seed_files = None
+        if incremental:
+            files, seed_files = pending_shards(files, manifest.get(filename), output_path)
+            if not files:
+                print(f"\n{dataset_name}: up to date ({len(shards)} shards)")
+                continue
+        append = seed_files is not None
+        full = None
+        if stream:
+            stream_clean_shards(files, dataset_name, output_path, chunksize, append=append,
+                                seed_files=seed_files or ())
+        else:
+            # Mapped (not loaded) copy of the rows being appended to - taken
+            # before the CSV changes, while it is still fresh
+            previous = map_arrow(output_path) if append else None
+            df = clean_shards(files, dataset_name, output_path, append=append, seed_files=seed_files or ())
+            if not append:
+                full = df
+            elif previous is not None:
+                full = pd.concat([previous, df], ignore_index=True)
+        export_arrow(output_path, full, chunksize, stream)
+        manifest[filename] = shards
+        save_manifest(output_dir, manifest)
+        if append:
+            print(f"Appended {len(files)} new shard(s) to {output_path}")
+        else:
+            print(f"Saved to {output_path}")
+
     # Final validation
     print("\n" + "="*60)
     print("FINAL VALIDATION")
     print("="*60)
-    
-    # Load cleaned data and check counts
-    all_states = set()
-    all_districts = set()
-    
-    for f in glob.glob(f'{output_dir}/*.csv'):
-        df = pd.read_csv(f)
-        if 'state' in df.columns:
-            all_states.update(df['state'].dropna().unique())
-        if 'district' in df.columns:
-            all_districts.update(df['district'].dropna().unique())
-    
-    print(f"\nCombined unique states: {len(all_states)}")
-    print(f"Combined unique districts: {len(all_districts)}")
+
+    # Scan cleaned data and check counts
+    n_states, n_districts = validate_outputs(output_dir, chunksize)
+
+    print(f"\nCombined unique states: {n_states}")
+    print(f"Combined unique districts: {n_districts}")
     print(f"\nExpected: ~36 states, ~800 districts")
-    
-    if len(all_districts) > 900:
+
+    if n_districts > 900:
         print("\n[WARNING] District count still high - may need additional mappings")
     else:
         print("\n[SUCCESS] Data cleaning complete!")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Clean the UIDAI Aadhaar CSV shards")
+    parser.add_argument('--stream', action='store_true',
+                        help="Clean in fixed-size chunks (bounded memory) instead of whole datasets")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"Rows per chunk in streaming mode (default {DEFAULT_CHUNKSIZE:,})")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only clean shards not yet in dataset_cleaned/ and append them")
+    args = parser.parse_args()
+    main(stream=args.stream, chunksize=args.chunksize, incremental=args.incremental)
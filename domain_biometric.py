@@ -111,7 +111,7 @@ def calculate_lifecycle_progression_index(df):
     Identify districts where citizens "enroll and forget" vs engaged users.
     Example: "Rural districts have LPI = 0.08 (need re-engagement campaigns)"
     """
-    district_summary = df.groupby('district').agg({
+    district_summary = df.groupby('district', observed=True).agg({
         'total_enrol': 'sum',
         'total_demo': 'sum',
         'total_bio': 'sum'
@@ -152,7 +152,7 @@ def calculate_update_cascade_probability(df):
     Policy lever identification: Improving early demo update rate has cascading effect.
     Example: "If P(Demo|Enrol) increases from 0.3 to 0.5, UCP doubles!"
     """
-    district_summary = df.groupby('district').agg({
+    district_summary = df.groupby('district', observed=True).agg({
         'total_enrol': 'sum',
         'total_demo': 'sum',
         'total_bio': 'sum'
@@ -191,16 +191,26 @@ def interpret_lpi(lpi_value):
 # =============================================================================
 # DATA LOADING
 # =============================================================================
-from analysis import load_and_combine, clean_data
+from aadhaar import load_and_combine, clean_data, cube_fingerprint
+from aadhaar.rollups import domain_totals, load_rollups
+from aadhaar.profiling import section, write_profile
+
+section("Data loading")
 
 biometric_df = clean_data(load_and_combine('dataset/api_data_aadhar_biometric_*.csv'))
 print(f"\n📊 Loaded {len(biometric_df):,} biometric update records")
 
+# District/state totals come from the rollup lattice (aadhaar.rollups) that
+# analysis.py persists with the master cube - None if it has not been built
+# for these exact inputs, in which case they are grouped from the rows.
+rollups = load_rollups(cube_fingerprint())
+
 
 # %%
 # =============================================================================
 # ANALYSIS 1: Compliance Rate by Age Cohort
 # =============================================================================
+section("ANALYSIS 1: Compliance Rate by Age Cohort")
 # WHY COMPLIANCE ANALYSIS:
 # - Age 5-17 biometric updates are MANDATORY (fingerprints mature)
 # - Low compliance = citizens face authentication failures later
@@ -284,12 +294,13 @@ if mandatory_compliance < 100:
 # =============================================================================
 # ANALYSIS 2: State-Level Compliance Leaderboard
 # =============================================================================
+section("ANALYSIS 2: State-Level Compliance Leaderboard")
 print("\n" + "="*70)
 print("🏆 ANALYSIS 2: STATE COMPLIANCE LEADERBOARD")
 print("="*70)
 
 # Calculate state-wise biometric updates
-state_bio = biometric_df.groupby('state')[['bio_age_5_17', 'bio_age_17_']].sum()
+state_bio = domain_totals(rollups, 'state', 'biometric', df=biometric_df)
 state_bio['total'] = state_bio.sum(axis=1)
 state_bio = state_bio.sort_values('total', ascending=False)
 
@@ -324,6 +335,7 @@ print(f"  → Replicate successful campaign strategies nationwide")
 # =============================================================================
 # ANALYSIS 3: Lifecycle Progression Index (LPI)
 # =============================================================================
+section("ANALYSIS 3: Lifecycle Progression Index (LPI)")
 # WHY LPI:
 # The LPI measures how many citizens complete the FULL Aadhaar lifecycle:
 # Enrollment → Demographic Update → Biometric Update
@@ -334,19 +346,22 @@ print("🔄 ANALYSIS 3: LIFECYCLE PROGRESSION INDEX (LPI)")
 print("="*70)
 print("Question: What % of citizens complete Enroll → Demo → Bio lifecycle?")
 
-# Load all domains for LPI calculation
-enrolment_df = clean_data(load_and_combine('dataset/api_data_aadhar_enrolment_*.csv'))
-demographic_df = clean_data(load_and_combine('dataset/api_data_aadhar_demographic_*.csv'))
-biometric_df_reload = clean_data(load_and_combine('dataset/api_data_aadhar_biometric_*.csv'))
+# Load all domains for LPI calculation (skipped when the rollups have the district totals)
+if rollups is None:
+    enrolment_df = clean_data(load_and_combine('dataset/api_data_aadhar_enrolment_*.csv'))
+    demographic_df = clean_data(load_and_combine('dataset/api_data_aadhar_demographic_*.csv'))
+    biometric_df_reload = clean_data(load_and_combine('dataset/api_data_aadhar_biometric_*.csv'))
+else:
+    demographic_df = biometric_df_reload = None
 
 # Aggregate to district level
-enrol_dist = enrolment_df.groupby('district')[['age_0_5', 'age_5_17', 'age_18_greater']].sum()
+enrol_dist = domain_totals(rollups, 'district', 'enrolment', df=enrolment_df)
 enrol_dist['total_enrol'] = enrol_dist.sum(axis=1)
 
-demo_dist = demographic_df.groupby('district')[['demo_age_5_17', 'demo_age_17_']].sum()
+demo_dist = domain_totals(rollups, 'district', 'demographic', df=demographic_df)
 demo_dist['total_demo'] = demo_dist.sum(axis=1)
 
-bio_dist = biometric_df_reload.groupby('district')[['bio_age_5_17', 'bio_age_17_']].sum()
+bio_dist = domain_totals(rollups, 'district', 'biometric', df=biometric_df_reload)
 bio_dist['total_bio'] = bio_dist.sum(axis=1)
 
 # Merge into single dataframe
@@ -413,6 +428,7 @@ if avg_lpi < 0.2:
 # =============================================================================
 # ANALYSIS 4: Update Cascade Probability (UCP)
 # =============================================================================
+section("ANALYSIS 4: Update Cascade Probability (UCP)")
 print("\n" + "="*70)
 print("🎯 ANALYSIS 4: UPDATE CASCADE PROBABILITY")
 print("="*70)
@@ -452,6 +468,7 @@ print(f"  → Small gains in Step 1 have CASCADING effects on final completion")
 # =============================================================================
 # ANALYSIS 5: Temporal Biometric Update Trends
 # =============================================================================
+section("ANALYSIS 5: Temporal Biometric Update Trends")
 print("\n" + "="*70)
 print("📈 ANALYSIS 5: TEMPORAL BIOMETRIC UPDATE TRENDS")
 print("="*70)
@@ -498,6 +515,7 @@ if 'date' in biometric_df.columns:
 # =============================================================================
 # ANALYSIS 6: BIOMETRIC COMPLIANCE URGENCY MAP (NEW)
 # =============================================================================
+section("ANALYSIS 6: BIOMETRIC COMPLIANCE URGENCY MAP")
 # WHY URGENCY MAP?
 # -----------------
 # Not all non-compliance is equal. Some districts have:
@@ -522,8 +540,8 @@ print("="*70)
 print("Question: Which districts need IMMEDIATE biometric update campaigns?")
 
 # Calculate urgency score per district
-district_enrol = enrolment_df.groupby('district')['age_5_17'].sum()
-district_bio = biometric_df_reload.groupby('district')['bio_age_5_17'].sum()
+district_enrol = domain_totals(rollups, 'district', 'enrolment', ['age_5_17'], enrolment_df)['age_5_17']
+district_bio = domain_totals(rollups, 'district', 'biometric', ['bio_age_5_17'], biometric_df_reload)['bio_age_5_17']
 
 # Create urgency dataframe
 urgency_df = pd.DataFrame({
@@ -667,3 +685,4 @@ print(f"  4. Focus on Step 1 demographic updates (cascading effect)")
 print("\n" + "="*70)
 print("✅ BIOMETRIC DOMAIN ANALYSIS COMPLETE")
 print("="*70)
+write_profile('domain_biometric')
@@ -109,7 +109,7 @@ def calculate_migration_directionality_index(df):
     Target resource deployment to immigration hubs, retention in emigration sources.
     Example: "Delhi has MDI = -0.82 (massive immigration sink)"
     """
-    district_summary = df.groupby('district').agg({
+    district_summary = df.groupby('district', observed=True).agg({
         'total_enrol': 'sum',
         'total_demo': 'sum'
     })
@@ -142,16 +142,26 @@ def interpret_mdi(mdi_value):
 # =============================================================================
 # DATA LOADING
 # =============================================================================
-from analysis import load_and_combine, clean_data
+from aadhaar import load_and_combine, clean_data, cube_fingerprint
+from aadhaar.rollups import domain_totals, load_rollups
+from aadhaar.profiling import section, write_profile
+
+section("Data loading")
 
 demographic_df = clean_data(load_and_combine('dataset/api_data_aadhar_demographic_*.csv'))
 print(f"\n📊 Loaded {len(demographic_df):,} demographic update records")
 
+# District/state totals come from the rollup lattice (aadhaar.rollups) that
+# analysis.py persists with the master cube - None if it has not been built
+# for these exact inputs, in which case they are grouped from the rows.
+rollups = load_rollups(cube_fingerprint())
+
 
 # %%
 # =============================================================================
 # ANALYSIS 1: Migration Corridor Identification
 # =============================================================================
+section("ANALYSIS 1: Migration Corridor Identification")
 # WHY MIGRATION CORRIDORS:
 # Districts with HIGH demographic updates are receiving movers from elsewhere.
 # These are "immigration hubs" - likely urban centers or industrial zones.
@@ -163,7 +173,7 @@ print("="*70)
 print("Question: Which district pairs have strongest migration flows?")
 
 # Calculate district-level update volume
-district_updates = demographic_df.groupby('district')[['demo_age_5_17', 'demo_age_17_']].sum()
+district_updates = domain_totals(rollups, 'district', 'demographic', df=demographic_df)
 district_updates['total'] = district_updates.sum(axis=1)
 district_updates = district_updates.sort_values('total', ascending=False)
 
@@ -217,6 +227,7 @@ if top10_share > 40:
 # =============================================================================
 # ANALYSIS 2: Seasonal Migration Waves
 # =============================================================================
+section("ANALYSIS 2: Seasonal Migration Waves")
 # WHY SEASONAL ANALYSIS:
 # Migration in India has strong seasonal patterns:
 # - Post-harvest (Oct-Dec): Rural workers move to cities
@@ -292,13 +303,14 @@ if 'date' in demographic_df.columns:
 # =============================================================================
 # ANALYSIS 3: Update Frequency (Churner Analysis)
 # =============================================================================
+section("ANALYSIS 3: Update Frequency (Churner Analysis)")
 print("\n" + "="*70)
 print("🔄 ANALYSIS 3: UPDATE FREQUENCY & CHURNERS")
 print("="*70)
 print("Question: Which districts have high re-update rates (mobile populations)?")
 
 # Calculate update intensity (proxy for population mobility)
-state_updates = demographic_df.groupby('state')[['demo_age_5_17', 'demo_age_17_']].sum()
+state_updates = domain_totals(rollups, 'state', 'demographic', df=demographic_df)
 state_updates['total'] = state_updates.sum(axis=1)
 state_updates = state_updates.sort_values('total', ascending=False)
 
@@ -336,6 +348,7 @@ print(f"    → Industrial zones (factory/construction hubs)")
 # =============================================================================
 # ANALYSIS 4: Adult vs Minor Update Patterns
 # =============================================================================
+section("ANALYSIS 4: Adult vs Minor Update Patterns")
 # WHY ADULT VS MINOR:
 # - Adult-dominated updates = workforce migration
 # - Minor-included updates = family migration (more permanent)
@@ -396,6 +409,7 @@ if state_updates_sorted['adult_ratio'].iloc[0] > 70:
 # =============================================================================
 # ANALYSIS 5: Migration Directionality Index (MDI)
 # =============================================================================
+section("ANALYSIS 5: Migration Directionality Index (MDI)")
 # WHY MDI:
 # Simple update counts don't tell us DIRECTION of migration.
 # MDI compares enrollments (new arrivals) vs demographic updates (address changes)
@@ -406,14 +420,14 @@ print("↔️ ANALYSIS 5: MIGRATION DIRECTIONALITY INDEX (MDI)")
 print("="*70)
 print("Question: Which districts are emigration sources vs immigration destinations?")
 
-# Load enrollment data for MDI calculation
-enrolment_df = clean_data(load_and_combine('dataset/api_data_aadhar_enrolment_*.csv'))
+# Load enrollment data for MDI calculation (not needed when the rollups have it)
+enrolment_df = None if rollups is not None else clean_data(load_and_combine('dataset/api_data_aadhar_enrolment_*.csv'))
 
 # Merge enrollment and demographic for MDI
-enrol_by_district = enrolment_df.groupby('district')[['age_0_5', 'age_5_17', 'age_18_greater']].sum()
+enrol_by_district = domain_totals(rollups, 'district', 'enrolment', df=enrolment_df)
 enrol_by_district['total_enrol'] = enrol_by_district.sum(axis=1)
 
-demo_by_district = demographic_df.groupby('district')[['demo_age_5_17', 'demo_age_17_']].sum()
+demo_by_district = domain_totals(rollups, 'district', 'demographic', df=demographic_df)
 demo_by_district['total_demo'] = demo_by_district.sum(axis=1)
 
 mdi_data = pd.merge(enrol_by_district[['total_enrol']], demo_by_district[['total_demo']], 
@@ -493,3 +507,4 @@ print(f"  → Implement retention in emigration source districts")
 print("\n" + "="*70)
 print("✅ DEMOGRAPHIC DOMAIN ANALYSIS COMPLETE")
 print("="*70)
+write_profile('domain_demographic')
@@ -77,20 +77,31 @@ print("="*70)
 # =============================================================================
 # DATA LOADING
 # =============================================================================
-# WHY import from analysis.py:
+# WHY import from the aadhaar package (not analysis.py):
 # - Reuses the load_and_combine() function that handles multi-file loading
 # - Reuses clean_data() for consistent state/district normalization
 # - Ensures data quality is consistent across all domain analyses
+# - Importing the package has no side effects (analysis.py no longer re-runs)
 
-from analysis import load_and_combine, clean_data
+from aadhaar import load_and_combine, clean_data, cube_fingerprint
+from aadhaar.rollups import domain_totals, load_rollups
+from aadhaar.profiling import section, write_profile
+
+section("Data loading")
 
 enrolment_df = clean_data(load_and_combine('dataset/api_data_aadhar_enrolment_*.csv'))
 print(f"\n📊 Loaded {len(enrolment_df):,} enrollment records")
 
+# District/state totals come from the rollup lattice (aadhaar.rollups) that
+# analysis.py persists with the master cube - None if it has not been built
+# for these exact inputs, in which case they are grouped from the rows.
+rollups = load_rollups(cube_fingerprint())
+
 
 # =============================================================================
 # ANALYSIS 1: Birth Cohort Seasonality
 # =============================================================================
+section("ANALYSIS 1: Birth Cohort Seasonality")
 print("\n" + "="*70)
 print("📅 ANALYSIS 1: BIRTH COHORT SEASONALITY")
 print("="*70)
@@ -164,6 +175,7 @@ if not enrolment_df.empty and 'date' in enrolment_df.columns:
 # =============================================================================
 # ANALYSIS 2: Age Pyramid Analysis
 # =============================================================================
+section("ANALYSIS 2: Age Pyramid Analysis")
 print("\n" + "="*70)
 print("👥 ANALYSIS 2: AGE PYRAMID ANALYSIS")
 print("="*70)
@@ -216,13 +228,14 @@ if actual_adult_pct < expected_adult_pct - 10:
 # =============================================================================
 # ANALYSIS 3: Enrollment Velocity (Per-District Growth Rate)
 # =============================================================================
+section("ANALYSIS 3: Enrollment Velocity (Per-District Growth Rate)")
 print("\n" + "="*70)
 print("⚡ ANALYSIS 3: ENROLLMENT VELOCITY")
 print("="*70)
 print("Question: Which districts are 'enrollment factories' with highest growth?")
 
 # Calculate total enrollment by district
-district_enrollment = enrolment_df.groupby('district')[['age_0_5', 'age_5_17', 'age_18_greater']].sum()
+district_enrollment = domain_totals(rollups, 'district', 'enrolment', df=enrolment_df)
 district_enrollment['total'] = district_enrollment.sum(axis=1)
 district_enrollment = district_enrollment.sort_values('total', ascending=False)
 
@@ -264,11 +277,12 @@ if top10_share > 30:
 # =============================================================================
 # ANALYSIS 4: State-Level Infant Enrollment Strategy
 # =============================================================================
+section("ANALYSIS 4: State-Level Infant Enrollment Strategy")
 print("\n" + "="*70)
 print("👶 ANALYSIS 4: STATE-LEVEL INFANT ENROLLMENT STRATEGY")
 print("="*70)
 
-state_infant = enrolment_df.groupby('state')['age_0_5'].sum().sort_values(ascending=False).head(15)
+state_infant = domain_totals(rollups, 'state', 'enrolment', ['age_0_5'], enrolment_df)['age_0_5'].sort_values(ascending=False).head(15)
 
 plt.figure(figsize=(14, 8))
 state_infant.plot(kind='barh', color='mediumorchid', edgecolor='purple')
@@ -299,6 +313,7 @@ for idx, (state, count) in enumerate(state_infant.head(5).items(), 1):
 # =============================================================================
 # ANALYSIS 5: Week-over-Week Growth Acceleration
 # =============================================================================
+section("ANALYSIS 5: Week-over-Week Growth Acceleration")
 print("\n" + "="*70)
 print("📈 ANALYSIS 5: ENROLLMENT GROWTH ACCELERATION")
 print("="*70)
@@ -343,6 +358,7 @@ if 'date' in enrolment_df.columns:
 # =============================================================================
 # ANALYSIS 6: PARETO ANALYSIS (80/20 Rule)
 # =============================================================================
+section("ANALYSIS 6: PARETO ANALYSIS (80/20 Rule)")
 # WHY PARETO ANALYSIS?
 # --------------------
 # The Pareto Principle states that 80% of outcomes come from 20% of causes.
@@ -365,7 +381,7 @@ print("="*70)
 print("Question: Do ~20% of districts drive ~80% of all enrollments?")
 
 # Calculate district-level totals and sort
-district_totals = enrolment_df.groupby('district')[['age_0_5', 'age_5_17', 'age_18_greater']].sum()
+district_totals = domain_totals(rollups, 'district', 'enrolment', df=enrolment_df)
 district_totals['total'] = district_totals.sum(axis=1)
 district_totals = district_totals.sort_values('total', ascending=False)
 
@@ -439,6 +455,7 @@ print(f"\n  🏆 Top 5 districts alone account for {top5_pct:.1f}% of all enroll
 # =============================================================================
 # ANALYSIS 7: MONSOON EFFECT ANALYSIS
 # =============================================================================
+section("ANALYSIS 7: MONSOON EFFECT ANALYSIS")
 # WHY MONSOON EFFECT?
 # -------------------
 # India's monsoon season (June-September) significantly impacts rural life:
@@ -568,4 +585,4 @@ print(f"  → Adjust rural operations for monsoon season impact")
 print("\n" + "="*70)
 print("✅ ENROLLMENT DOMAIN ANALYSIS COMPLETE")
 print("="*70)
-
+write_profile('domain_enrollment')
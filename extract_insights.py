@@ -13,6 +13,15 @@ import numpy as np
 import glob
 from datetime import datetime
 
+from aadhaar.artifacts import cube_fingerprint
+from aadhaar.cache import read_shard
+from aadhaar.columnar import read_cleaned
+from aadhaar.dedup import drop_duplicate_rows
+from aadhaar.normalize import normalize_names
+from aadhaar.profiling import section, write_profile
+from aadhaar.rollups import domain_totals, load_rollups, query_rollup
+from aadhaar.schema import apply_schema
+
 print("="*70)
 print("📊 EXTRACTING COMPREHENSIVE INSIGHTS")
 print("="*70)
@@ -22,27 +31,41 @@ def load_data(pattern):
     files = glob.glob(pattern)
     if not files:
         return pd.DataFrame()
-    dfs = [pd.read_csv(f) for f in files]
-    return pd.concat(dfs, ignore_index=True)
+    files = sorted(files)
+    dfs = [read_shard(f) for f in files]  # Parquet cache, parsed once
+    dfs, _ = drop_duplicate_rows(dfs, files)  # overlapping dumps: first copy wins
+    return apply_schema(pd.concat(dfs, ignore_index=True))
 
 # Load all datasets - prefer cleaned data
+section("Load datasets")
 print("\n Loading datasets...")
 import os
 if os.path.exists('dataset_cleaned/enrollment_cleaned.csv'):
     print("  Using CLEANED datasets...")
-    enrolment_df = pd.read_csv('dataset_cleaned/enrollment_cleaned.csv')
-    demographic_df = pd.read_csv('dataset_cleaned/demographic_cleaned.csv')
-    biometric_df = pd.read_csv('dataset_cleaned/biometric_cleaned.csv')
+    enrolment_df = read_cleaned('dataset_cleaned/enrollment_cleaned.csv')
+    demographic_df = read_cleaned('dataset_cleaned/demographic_cleaned.csv')
+    biometric_df = read_cleaned('dataset_cleaned/biometric_cleaned.csv')
 else:
     print("  Using raw datasets...")
     enrolment_df = load_data('dataset/api_data_aadhar_enrolment*.csv')
     demographic_df = load_data('dataset/api_data_aadhar_demographic*.csv')
     biometric_df = load_data('dataset/api_data_aadhar_biometric*.csv')
 
+# Canonical state/district names (a no-op pass-through for cleaned data)
+enrolment_df = normalize_names(enrolment_df)
+demographic_df = normalize_names(demographic_df)
+biometric_df = normalize_names(biometric_df)
+
 print(f"  Enrollment: {len(enrolment_df):,} records")
 print(f"  Demographic: {len(demographic_df):,} records")
 print(f"  Biometric: {len(biometric_df):,} records")
 
+# District/state totals from the rollups analysis.py persists with the master
+# cube (None if missing or its inputs changed -> grouped from the rows)
+rollups = load_rollups(cube_fingerprint())
+if rollups is not None:
+    print(f"  Rollups: {', '.join(rollups)} (persisted artifact)")
+
 # Safe division helper
 def safe_div(a, b, default=0):
     return a / b if b != 0 else default
@@ -52,13 +75,15 @@ total_enrol = enrolment_df[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(
 total_demo = demographic_df[['demo_age_5_17', 'demo_age_17_']].sum().sum() if not demographic_df.empty else 0
 total_bio = biometric_df[['bio_age_5_17', 'bio_age_17_']].sum().sum() if not biometric_df.empty else 0
 
-age_0_5 = enrolment_df['age_0_5'].sum() if 'age_0_5' in enrolment_df.columns else 0
-age_5_17 = enrolment_df['age_5_17'].sum() if 'age_5_17' in enrolment_df.columns else 0
-age_18_plus = enrolment_df['age_18_greater'].sum() if 'age_18_greater' in enrolment_df.columns else 0
+# int(): counts are unsigned (aadhaar.schema), so differences must not wrap around
+age_0_5 = int(enrolment_df['age_0_5'].sum()) if 'age_0_5' in enrolment_df.columns else 0
+age_5_17 = int(enrolment_df['age_5_17'].sum()) if 'age_5_17' in enrolment_df.columns else 0
+age_18_plus = int(enrolment_df['age_18_greater'].sum()) if 'age_18_greater' in enrolment_df.columns else 0
 
 # =============================================================================
 # CALCULATE ALL FORMULAS
 # =============================================================================
+section("Calculate formulas")
 print("\n🧮 Calculating formulas...")
 
 formulas = {}
@@ -95,7 +120,7 @@ formulas["ucp"] = {
 
 # 3. Pareto Analysis
 if not enrolment_df.empty:
-    district_enrol = enrolment_df.groupby('district')[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1)
+    district_enrol = domain_totals(rollups, 'district', 'enrolment', df=enrolment_df).sum(axis=1)
     district_enrol_sorted = district_enrol.sort_values(ascending=False)
     cumsum = district_enrol_sorted.cumsum()
     total = district_enrol_sorted.sum()
@@ -119,17 +144,22 @@ formulas["pareto"] = {
 }
 
 # 4. Saturation Index (per-district average)
-if not enrolment_df.empty:
-    master_df = enrolment_df.groupby('district')[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1).reset_index()
+if rollups is not None:
+    # Per-district totals straight from the district rollups
+    master_df = query_rollup(rollups, ('district',), columns=['total_enrol', 'total_demo', 'total_bio']).reset_index()
+    master_df['saturation'] = (master_df['total_demo'] + master_df['total_bio']) / (master_df['total_enrol'] + 1)
+    avg_saturation = master_df['saturation'].mean()
+elif not enrolment_df.empty:
+    master_df = enrolment_df.groupby('district', observed=True)[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1).reset_index()
     master_df.columns = ['district', 'total_enrol']
     if not demographic_df.empty:
-        demo_dist = demographic_df.groupby('district')[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1).reset_index()
+        demo_dist = demographic_df.groupby('district', observed=True)[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1).reset_index()
         demo_dist.columns = ['district', 'total_demo']
         master_df = master_df.merge(demo_dist, on='district', how='outer').fillna(0)
     else:
         master_df['total_demo'] = 0
     if not biometric_df.empty:
-        bio_dist = biometric_df.groupby('district')[['bio_age_5_17', 'bio_age_17_']].sum().sum(axis=1).reset_index()
+        bio_dist = biometric_df.groupby('district', observed=True)[['bio_age_5_17', 'bio_age_17_']].sum().sum(axis=1).reset_index()
         bio_dist.columns = ['district', 'total_bio']
         master_df = master_df.merge(bio_dist, on='district', how='outer').fillna(0)
     else:
@@ -173,7 +203,7 @@ formulas["seasonality_index"] = {
 
 # 6. Migration Directionality Index (top district)
 if not demographic_df.empty:
-    demo_by_dist = demographic_df.groupby('district')[['demo_age_5_17', 'demo_age_17_']].sum()
+    demo_by_dist = domain_totals(rollups, 'district', 'demographic', df=demographic_df)
     demo_by_dist['total'] = demo_by_dist.sum(axis=1)
     top_hub = demo_by_dist['total'].idxmax()
     top_hub_value = demo_by_dist['total'].max()
@@ -197,7 +227,7 @@ formulas["mdi"] = {
 
 # 7. Biometric Compliance Rate
 enrolled_5_17 = age_5_17
-bio_5_17 = biometric_df['bio_age_5_17'].sum() if 'bio_age_5_17' in biometric_df.columns else 0
+bio_5_17 = int(biometric_df['bio_age_5_17'].sum()) if 'bio_age_5_17' in biometric_df.columns else 0
 compliance_rate = (bio_5_17 / enrolled_5_17 * 100) if enrolled_5_17 > 0 else 0
 
 formulas["compliance_rate"] = {
@@ -216,6 +246,7 @@ print(f"  ✅ Calculated 7 formulas")
 # =============================================================================
 # DOCUMENT ALL ANALYSES
 # =============================================================================
+section("Document analyses")
 print("\n📈 Documenting analyses...")
 
 analyses = [
@@ -416,25 +447,26 @@ print(f"  ✅ Documented {len(analyses)} analyses")
 # =============================================================================
 # BUILD COMPREHENSIVE INSIGHTS JSON
 # =============================================================================
+section("Build insights.json")
 print("\n📦 Building insights.json...")
 
 # Top states and districts calculations
 if not enrolment_df.empty:
-    top_states_infant = enrolment_df.groupby('state')['age_0_5'].sum().sort_values(ascending=False).head(5).to_dict()
-    top_districts = enrolment_df.groupby('district')[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1).sort_values(ascending=False).head(10).to_dict()
+    top_states_infant = domain_totals(rollups, 'state', 'enrolment', ['age_0_5'], enrolment_df)['age_0_5'].sort_values(ascending=False).head(5).to_dict()
+    top_districts = domain_totals(rollups, 'district', 'enrolment', df=enrolment_df).sum(axis=1).sort_values(ascending=False).head(10).to_dict()
 else:
     top_states_infant = {}
     top_districts = {}
 
 if not demographic_df.empty:
-    top_migration_hubs = demographic_df.groupby('district')[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1).sort_values(ascending=False).head(10).to_dict()
-    top_states_demo = demographic_df.groupby('state')[['demo_age_5_17', 'demo_age_17_']].sum().sum(axis=1).sort_values(ascending=False).head(5).to_dict()
+    top_migration_hubs = domain_totals(rollups, 'district', 'demographic', df=demographic_df).sum(axis=1).sort_values(ascending=False).head(10).to_dict()
+    top_states_demo = domain_totals(rollups, 'state', 'demographic', df=demographic_df).sum(axis=1).sort_values(ascending=False).head(5).to_dict()
 else:
     top_migration_hubs = {}
     top_states_demo = {}
 
 if not biometric_df.empty:
-    top_states_bio = biometric_df.groupby('state')[['bio_age_5_17', 'bio_age_17_']].sum().sum(axis=1).sort_values(ascending=False).head(5).to_dict()
+    top_states_bio = domain_totals(rollups, 'state', 'biometric', df=biometric_df).sum(axis=1).sort_values(ascending=False).head(5).to_dict()
 else:
     top_states_bio = {}
 
@@ -612,3 +644,4 @@ print(f"   - {len(insights['recommendations'])} recommendations")
 print("\n" + "="*70)
 print("📊 EXTRACTION COMPLETE!")
 print("="*70)
+write_profile('extract_insights')
@@ -1,43 +1,344 @@
-import subprocess
+"""
+Master Pipeline Runner (Dependency-Aware, Parallel, Cached)
+===========================================================
+Runs every script of the pipeline as a DAG of subprocess steps.
+
+HOW:
+- Each step declares the files it READS (inputs) and WRITES (outputs) as
+  glob patterns; a step depends on every step whose outputs match one of
+  its inputs (plus any explicit `after` ordering)
+- Before a step runs, its inputs (data files AND the code it executes) are
+  content-hashed. If the hash equals the one recorded after its last
+  successful run and its outputs still exist, the step is SKIPPED
+- Steps whose dependencies are done run in parallel (a bounded thread pool,
+  each step in its own process), e.g. the three domain analyses and
+  extract_insights.py after the analytical engine
+- Each step's console output goes to .cache/pipeline/logs/<step>.log and is
+  printed when the step finishes; a timing table closes the run
+
+File digests are memoized by (size, mtime), so unchanged multi-MB shards are
+not re-read on every run. State lives in .cache/pipeline/state.json.
+
+USAGE:
+    python run_pipeline.py                   # run what changed, in parallel
+    python run_pipeline.py --jobs 1          # strictly serial
+    python run_pipeline.py --force           # ignore the step cache
+    python run_pipeline.py --incremental     # only fold in new API shards
+"""
+
+import glob
+import hashlib
+import json
 import os
+import subprocess
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
 
-def run_step(step_name, command):
-    print(f"\n>>> [STEP] {step_name}")
-    print(f"Running: {command}")
-    start_time = time.time()
+PIPELINE_DIR = os.path.join('.cache', 'pipeline')
+STATE_PATH = os.path.join(PIPELINE_DIR, 'state.json')
+LOG_DIR = os.path.join(PIPELINE_DIR, 'logs')
+
+RAW_SHARDS = 'dataset/api_data_aadhar_*.csv'
+LIBRARY = 'aadhaar/*.py'
+GEOGRAPHY = '.cache/geography-*.csv'
+CUBE_MANIFESTS = ['.cache/master_cube/manifest.json', '.cache/master_cube/rollups/manifest.json']
+CLEANED = ['dataset_cleaned/*_cleaned.csv', 'dataset_cleaned/*_cleaned.arrow', 'dataset_cleaned/manifest.json']
+SUBMISSION_IMAGES = [
+    'output/system_flowchart_A4.png',
+    'output/enrollment/age_pyramid.png',
+    'output/demographic/migration_corridors.png',
+    'output/biometric/compliance_by_age.png',
+    'output/phase6_clusters.png',
+    'output/phase5_forecast.png',
+]
+
+
+def step(step_id, name, command, inputs, outputs, after=()):
+    """One pipeline step: a python command line plus the files it reads and writes."""
+    return {'id': step_id, 'name': name, 'command': command,
+            'inputs': list(inputs), 'outputs': list(outputs), 'after': list(after)}
+
+
+def pipeline_steps():
+    """The full pipeline. Order only matters for display; dependencies come from the files."""
+    return [
+        step('clean', "Data Cleaning", "clean_data.py",
+             ['clean_data.py', LIBRARY, RAW_SHARDS],
+             CLEANED + [GEOGRAPHY]),
+        step('analysis', "Analytical Engine", "analysis.py",
+             ['analysis.py', LIBRARY, RAW_SHARDS, GEOGRAPHY],
+             ['output/phase*.png', 'output/*.html'] + CUBE_MANIFESTS),
+        step('enrollment', "Domain: Enrollment", "domain_enrollment.py",
+             ['domain_enrollment.py', LIBRARY, 'dataset/api_data_aadhar_enrolment_*.csv'] + CUBE_MANIFESTS,
+             ['output/enrollment/*.png']),
+        step('demographic', "Domain: Demographic", "domain_demographic.py",
+             ['domain_demographic.py', LIBRARY, 'dataset/api_data_aadhar_demographic_*.csv'] + CUBE_MANIFESTS,
+             ['output/demographic/*.png']),
+        step('biometric', "Domain: Biometric", "domain_biometric.py",
+             ['domain_biometric.py', LIBRARY, 'dataset/api_data_aadhar_biometric_*.csv'] + CUBE_MANIFESTS,
+             ['output/biometric/*.png', 'output/biometric/*.html']),
+        step('insights', "Insight Extraction", "extract_insights.py",
+             ['extract_insights.py', LIBRARY] + CLEANED + CUBE_MANIFESTS,
+             ['output/insights.json']),
+        step('senior', "Senior Analyst (Strategic Reasoning)", "senior_analyst_agent.py",
+             ['senior_analyst_agent.py', 'output/insights.json'],
+             ['output/doc_intelligence.json']),
+        step('submission', "Submission Generation", "generate_ultimate_submission.py",
+             ['generate_ultimate_submission.py', 'clean_data.py', 'analysis.py', 'senior_analyst_agent.py',
+              'output/insights.json', 'output/doc_intelligence.json'] + SUBMISSION_IMAGES,
+             ['submission/UIDAI_Hackathon_ULTIMATE.docx']),
+    ]
+
+
+# ============================================================================
+# DEPENDENCIES
+# ============================================================================
+def _overlaps(pattern_a, pattern_b):
+    """True if two glob patterns (or literal paths) can name the same file."""
+    return fnmatch(pattern_a, pattern_b) or fnmatch(pattern_b, pattern_a)
+
+
+def dependencies(steps):
+    """{step id: set of step ids it waits for}."""
+    deps = {}
+    for s in steps:
+        deps[s['id']] = set(s['after']) | {
+            other['id'] for other in steps
+            if other['id'] != s['id']
+            and any(_overlaps(i, o) for i in s['inputs'] for o in other['outputs'])
+        }
+    return deps
+
+
+def check_acyclic(steps, deps):
+    """Raise ValueError if the declared files form a dependency cycle."""
+    done = set()
+    while len(done) < len(steps):
+        ready = [s['id'] for s in steps if s['id'] not in done and deps[s['id']] <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle among steps: {sorted(set(deps) - done)}")
+        done.update(ready)
+
+
+# ============================================================================
+# STEP CACHE
+# ============================================================================
+def load_state():
     try:
+        with open(STATE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'files': {}, 'steps': {}}
+
+
+def save_state(state):
+    os.makedirs(PIPELINE_DIR, exist_ok=True)
+    tmp = f"{STATE_PATH}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def file_digest(path, memo):
+    """SHA-1 of a file's content; re-read only if its size or mtime changed."""
+    st = os.stat(path)
+    cached = memo.get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    memo[path] = [st.st_size, st.st_mtime_ns, sha.hexdigest()]
+    return memo[path][2]
+
+
+def input_hash(s, memo):
+    """Content hash over the step's command and every file matched by its inputs."""
+    sha = hashlib.sha1(s['command'].encode('utf-8'))
+    for pattern in s['inputs']:
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            sha.update(f"{pattern}:missing\n".encode('utf-8'))
+        for path in paths:
+            sha.update(f"{path}:{file_digest(path, memo)}\n".encode('utf-8'))
+    return sha.hexdigest()
+
+
+def outputs_exist(s):
+    return all(glob.glob(pattern) for pattern in s['outputs'])
+
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+def run_step(s, env):
+    """Run one step as a subprocess; returns (ok, seconds). Output goes to its log file."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{s['id']}.log")
+    start_time = time.time()
+    with open(log_path, 'w', encoding='utf-8') as log:
         # Use sys.executable to ensure we use the same python environment
-        result = subprocess.run([sys.executable] + command.split(), check=True, text=True)
-        end_time = time.time()
-        print(f"--- [OK] {step_name} completed in {end_time - start_time:.2f}s")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"!!! [ERROR] {step_name} failed with exit code {e.returncode}")
-        return False
-
-def main():
+        result = subprocess.run([sys.executable] + s['command'].split(), stdout=log,
+                                stderr=subprocess.STDOUT, text=True, env=env)
+    return result.returncode == 0, time.time() - start_time
+
+
+def print_step_log(s):
+    with open(os.path.join(LOG_DIR, f"{s['id']}.log"), encoding='utf-8', errors='replace') as f:
+        print(f.read().rstrip())
+
+
+def step_env(jobs):
+    """Child environment: split the per-script worker pools between parallel steps."""
+    env = dict(os.environ)
+    if jobs > 1 and 'AADHAAR_WORKERS' not in env:
+        env['AADHAAR_WORKERS'] = str(max(1, (os.cpu_count() or 1) // jobs))
+    return env
+
+
+def run_dag(steps, jobs=None, force=False):
+    """
+    Run `steps` in dependency order, up to `jobs` at a time, skipping steps
+    whose inputs are unchanged. Returns {step id: (status, seconds)}.
+    """
+    jobs = jobs or min(len(steps), os.cpu_count() or 1)
+    deps = dependencies(steps)
+    check_acyclic(steps, deps)
+    by_id = {s['id']: s for s in steps}
+    state = load_state()
+    env = step_env(jobs)
+
+    results = {}
+    running = {}  # future -> step id
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(results) < len(steps):
+            for s in steps:
+                if s['id'] in results or s['id'] in running.values():
+                    continue
+                if len(running) >= jobs:
+                    break
+                waiting = deps[s['id']]
+                if any(results.get(d, ('',))[0] in ('FAILED', 'blocked') for d in waiting):
+                    results[s['id']] = ('blocked', 0.0)
+                    continue
+                if not all(d in results for d in waiting):
+                    continue
+
+                # Hashed only now: upstream steps may just have rewritten these inputs
+                digest = input_hash(s, state['files'])
+                if not force and state['steps'].get(s['id']) == digest and outputs_exist(s):
+                    print(f"\n>>> [SKIP] {s['name']} (inputs unchanged)")
+                    results[s['id']] = ('skipped', 0.0)
+                    continue
+                print(f"\n>>> [STEP] {s['name']}")
+                print(f"Running: {s['command']}")
+                state['steps'].pop(s['id'], None)
+                running[pool.submit(run_step, s, env)] = s['id']
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                s = by_id[running.pop(future)]
+                ok, seconds = future.result()
+                print(f"\n----- {s['name']} output " + "-" * 40)
+                print_step_log(s)
+                if ok:
+                    print(f"--- [OK] {s['name']} completed in {seconds:.2f}s")
+                    state['steps'][s['id']] = input_hash(s, state['files'])
+                    results[s['id']] = ('ran', seconds)
+                else:
+                    print(f"!!! [ERROR] {s['name']} failed (log: {LOG_DIR}/{s['id']}.log)")
+                    results[s['id']] = ('FAILED', seconds)
+            save_state(state)
+
+    save_state(state)
+    return results
+
+
+def print_timings(steps, results, wall):
+    print("\n" + "=" * 70)
+    print("   STEP TIMINGS")
+    print("=" * 70)
+    for s in steps:
+        status, seconds = results.get(s['id'], ('not run', 0.0))
+        print(f"   {s['name']:<40} {status:<9} {seconds:>8.2f}s")
+    busy = sum(seconds for _, seconds in results.values())
+    print(f"   {'Wall clock':<40} {'':<9} {wall:>8.2f}s  (sum of steps {busy:.2f}s)")
+
+
+def incremental_steps():
+    """
+    INCREMENTAL MODE: steps for the shards that arrived since the last run.
+
+    New shards are cleaned and appended (clean_data.py --incremental), then
+    folded into the persisted master cube + rollups (aadhaar.incremental),
+    so analysis.py loads the cube instead of re-merging everything. With no
+    new shards nothing downstream has changed inputs and every step is skipped.
+    """
+    from aadhaar.artifacts import current_shards
+    from aadhaar.incremental import plan_update
+
+    action, new, reason = plan_update(current_shards())
+    print(f"Incremental mode: {action} ({reason})")
+    if action == 'up-to-date' and os.path.exists('dataset_cleaned/manifest.json'):
+        return []
+    for name in new:
+        print(f"  + {name}")
+    return [
+        step('clean', "Data Cleaning (new shards)", "clean_data.py --incremental",
+             ['clean_data.py', LIBRARY, RAW_SHARDS],
+             CLEANED + [GEOGRAPHY]),
+        # Both write the geography, so the cube update waits for the clean
+        step('cube', "Master Cube + Rollups", "-m aadhaar.incremental",
+             [LIBRARY, RAW_SHARDS],
+             CUBE_MANIFESTS, after=['clean']),
+    ]
+
+
+def main(incremental=False, jobs=None, force=False):
     print("======================================================================")
     print("   AADHAR-MANTHAN: AADHAAR INTELLIGENCE PIPELINE (MASTER) ")
     print("======================================================================")
-    
-    steps = [
-        ("Data Cleaning", "clean_data.py"),
-        ("Analytical Engine", "analysis.py"),
-        ("Senior Analyst (Strategic Reasoning)", "senior_analyst_agent.py"),
-        ("Submission Generation", "generate_ultimate_submission.py")
-    ]
-    
-    for name, script in steps:
-        if not run_step(name, script):
-            print("\n!!! PIPELINE HALTED due to error.")
-            sys.exit(1)
-            
+
+    steps = pipeline_steps()
+    if incremental:
+        data_steps = incremental_steps()
+        if not data_steps:
+            print("\nNo new shards - all outputs are up to date. Nothing to do.")
+            return
+        steps = data_steps + steps[1:]
+        for s in steps:
+            if s['id'] == 'analysis':
+                # analysis.py then loads the cube the incremental step just updated
+                s['after'].append('cube')
+
+    start_time = time.time()
+    results = run_dag(steps, jobs=jobs, force=force)
+    print_timings(steps, results, time.time() - start_time)
+
+    failed = [s['name'] for s in steps if results[s['id']][0] == 'FAILED']
+    if failed:
+        print(f"\n!!! PIPELINE HALTED due to error in: {', '.join(failed)}")
+        sys.exit(1)
+
     print("\n======================================================================")
     print("   PIPELINE COMPLETED SUCCESSFULLY!")
     print(f"   Final Document: submission/UIDAI_Hackathon_ULTIMATE.docx")
     print("======================================================================")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the full Aadhaar pipeline")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only process shards added since the last run")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Steps to run at once (default: CPU count)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-run every step even if its inputs are unchanged")
+    args = parser.parse_args()
+    main(incremental=args.incremental, jobs=args.jobs, force=args.force)